@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Local Analysis Daemon
+Keeps pricing, parse caches and module models warm and serves analyses over HTTP/JSON
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional, Tuple
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """``host:port`` or ``unix:/path/to/socket``"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+def to_jsonable(value: Any) -> Any:
+    """Convert analysis results (dataclasses, paths, pricing views) into plain JSON types"""
+    if is_dataclass(value) and not isinstance(value, type):
+        return to_jsonable(asdict(value))
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return value
+
+class AnalysisService:
+    """Warm analyzer objects and the request handlers that use them.
+
+    Handlers run on executor threads. Each warm object has its own lock, so
+    requests for different regions or configs run concurrently while requests
+    sharing an analyzer are serialized. Objects are rebuilt once their pricing
+    is older than the pricing cache lifetime.
+    """
+
+    def __init__(self):
+        from aws_pricing_fetcher import AWSPricingFetcher
+
+        self.started = time.time()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._max_age = AWSPricingFetcher().cache_duration.total_seconds()
+        # Key -> (future of the warm object, its request lock, build start, version)
+        self._warm: Dict[Tuple, Tuple[Future, threading.Lock, float, Any]] = {}
+        self._warm_lock = threading.Lock()
+        self.routes: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            "/health": self.health,
+            "/analyze": self.analyze,
+            "/compare": self.compare,
+            "/sweep": self.sweep,
+            "/report": self.report,
+            "/reload": self.reload
+        }
+
+    def _get_warm(self, key: Tuple, factory: Callable[[], Any], version: Any = None) -> Tuple[Any, threading.Lock]:
+        """The warm object of ``key``, rebuilt when older than the pricing cache or built for another ``version``.
+
+        The build runs outside ``_warm_lock``: other keys (and /health) are
+        served meanwhile, and requests for the same key wait on its future.
+        A failed build is dropped, so the next request tries again.
+        """
+        with self._warm_lock:
+            entry = self._warm.get(key)
+            build = entry is None or time.time() - entry[2] > self._max_age or entry[3] != version
+            if build:
+                entry = (Future(), threading.Lock(), time.time(), version)
+                self._warm[key] = entry
+
+        future = entry[0]
+        if build:
+            try:
+                future.set_result(factory())
+            except BaseException as e:
+                future.set_exception(e)
+                with self._warm_lock:
+                    if self._warm.get(key) is entry:
+                        del self._warm[key]
+        return future.result(), entry[1]
+
+    @staticmethod
+    def _file_version(path: Optional[str]) -> Optional[Tuple[int, int]]:
+        """Modification time and size of a file; a warm object built from it is rebuilt after an edit"""
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _report_generator(self, payload: Dict[str, Any]):
+        region = payload.get("region", "eu-west-1")
+        cost_rules = payload.get("cost_rules")
+        from cost_rules import DEFAULT_RULES_FILE
+        rules_version = self._file_version(cost_rules or str(DEFAULT_RULES_FILE))
+
+        def factory():
+            from terragrunt_analyzer import TerragruntReportGenerator
+            generator = TerragruntReportGenerator(region, cost_rules=cost_rules)
+            generator.analyzer.load_pricing_data()
+            return generator
+        return self._get_warm(("terragrunt", region, cost_rules), factory, rules_version)
+
+    def _yaml_analyzer(self, payload: Dict[str, Any]):
+        region = payload.get("region", "eu-west-1")
+        config = payload.get("config", "analyzer-config.yaml")
+        trace, calibration, media = payload.get("trace"), payload.get("calibration"), payload.get("media_traffic")
+
+        def factory():
+            from yaml_terragrunt_analyzer import YAMLBasedAnalyzer, media_traffic_profile
+            analyzer = YAMLBasedAnalyzer(config, region, trace, calibration, media_traffic_profile(media))
+            analyzer._load_pricing_data()
+            return analyzer
+        return self._get_warm(("yaml", region, config, trace, calibration, media), factory)
+
+    def health(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self._warm_lock:
+            entries = list(self._warm.items())
+        return {
+            "status": "ok",
+            "uptime_seconds": time.time() - self.started,
+            "requests": self.requests,
+            "warm": [list(key) for key, entry in entries if entry[0].done()],
+            "building": [list(key) for key, entry in entries if not entry[0].done()]
+        }
+
+    def reload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop all warm state (pricing, parse caches, module models)"""
+        with self._warm_lock:
+            dropped = len(self._warm)
+            self._warm.clear()
+        return {"dropped": dropped}
+
+    def analyze(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Cost estimate of one root (``terragrunt_environment_analyzer.py``)"""
+        generator, lock = self._report_generator(payload)
+        with lock:
+            result = generator.analyze_environments(payload.get("terragrunt_root"), payload.get("environment"))
+        if not result["success"]:
+            raise ValueError(result["error"])
+        return to_jsonable(result)
+
+    def compare(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """ECS vs EKS for one scenario (``yaml_terragrunt_analyzer.py``)"""
+        analyzer, lock = self._yaml_analyzer(payload)
+        with lock:
+            return to_jsonable(analyzer.compare_environments(payload.get("scenario", "medium_app"), verbose=False))
+
+    def sweep(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Scenario x region matrix (``yaml_terragrunt_analyzer.py --matrix``)"""
+        region = payload.get("region", "eu-west-1")
+        analyzer, lock = self._yaml_analyzer(payload)
+        with lock:
+            return to_jsonable(analyzer.compare_matrix(payload.get("regions") or [region], payload.get("scenarios"),
+                                                       payload.get("workers")))
+
+    def report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Full HTML report (``terragrunt_analyzer.py``)"""
+        generator, lock = self._report_generator(payload)
+        with lock:
+            result = generator.run_analysis(payload.get("terragrunt_root"), payload.get("environment"),
+                                            payload.get("tfstate"), payload.get("pages"))
+        if not result["success"]:
+            raise ValueError(result["error"])
+        return to_jsonable(result)
+
+    def handle(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        handler = self.routes.get(path)
+        if handler is None:
+            return 404, {"error": f"Unknown endpoint {path}"}
+        with self._requests_lock:
+            self.requests += 1
+        try:
+            return 200, handler(payload)
+        except (ValueError, FileNotFoundError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+class AnalysisDaemon:
+    """asyncio HTTP/1.1 server (keep-alive, JSON bodies) on localhost or a UNIX socket"""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, workers: int = 4):
+        self.address = address
+        self.service = AnalysisService()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, body = 413, {"error": "Request body too large"}
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    try:
+                        payload = json.loads(raw) if raw else {}
+                    except ValueError as e:
+                        status, body = 400, {"error": f"Invalid JSON: {e}"}
+                    else:
+                        status, body = await loop.run_in_executor(self.executor, self.service.handle,
+                                                                  path.split("?")[0], payload)
+
+                data = json.dumps(body).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write(
+                    f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            # Remove the socket left behind by a previous run
+            if Path(target).exists():
+                Path(target).unlink()
+            server = await asyncio.start_unix_server(self._handle_connection, path=target)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host=target[0], port=target[1])
+
+        print(f"🚀 Analysis daemon listening on {self.address}")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\n👋 Analysis daemon stopped")
+        finally:
+            self.executor.shutdown(wait=False)
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class DaemonClient:
+    """Thin client used by the CLIs; ``request`` returns None when no daemon is running"""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 300):
+        self.address = address
+        self.timeout = timeout
+        self._connection = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            kind, target = parse_address(self.address)
+            if kind == "unix":
+                self._connection = _UnixHTTPConnection(target, self.timeout)
+            else:
+                self._connection = http.client.HTTPConnection(target[0], target[1], timeout=self.timeout)
+        return self._connection
+
+    def request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        body = json.dumps(payload or {})
+        try:
+            connection = self._connect()
+            connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout, http.client.RemoteDisconnected, OSError):
+            self._connection = None
+            return None
+
+        if response.status != 200:
+            raise RuntimeError(f"Analysis daemon error ({response.status}): {data.get('error')}")
+        return data
+
+def request_daemon(address: Optional[str], path: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """CLI hand-off: the daemon's result, or None (with a notice) to fall back to local analysis"""
+    if not address:
+        return None
+    started = time.perf_counter()
+    result = DaemonClient(address).request(path, payload)
+    if result is None:
+        print(f"⚠️ Analysis daemon not reachable at {address}, running locally")
+    else:
+        print(f"⚡ Served by analysis daemon at {address} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return result
+
+def main():
+    """Run the daemon in the foreground"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Persistent local analysis service with warm caches")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="host:port or unix:/path/to/socket")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent analysis threads")
+
+    args = parser.parse_args()
+
+    AnalysisDaemon(args.address, args.workers).run()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Analysis Snapshot
+Compact binary snapshot of analysis results with a hashed environment index, read through mmap
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
+from atomic_file import atomic_write
+
+MAGIC = b"TGSN"
+VERSION = 1
+# magic, version, environment count, hash slot count, string count,
+# string table offset, records offset, metadata offset
+HEADER = struct.Struct("<4sIIIIQQQ")
+# name string id, name hash, record offset, record length, estimated monthly cost
+ENTRY = struct.Struct("<IIQQd")
+SLOT = struct.Struct("<I")
+U32 = struct.Struct("<I")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+
+# Value tags: one byte, followed by the payload
+TAG_NULL, TAG_TRUE, TAG_FALSE = b"N", b"T", b"F"
+TAG_INT, TAG_BIGINT, TAG_FLOAT, TAG_STRING = b"i", b"I", b"d", b"s"
+TAG_LIST, TAG_MAP = b"l", b"m"
+
+# The same tags as integers (indexing the map yields ints) and unbound unpackers for the decoder
+_NULL, _TRUE, _FALSE, _INT, _BIGINT, _FLOAT, _STRING, _LIST, _MAP = (
+    tag[0] for tag in (TAG_NULL, TAG_TRUE, TAG_FALSE, TAG_INT, TAG_BIGINT, TAG_FLOAT, TAG_STRING, TAG_LIST, TAG_MAP))
+_u32, _i64, _f64 = U32.unpack_from, I64.unpack_from, F64.unpack_from
+
+ENVIRONMENT_FIELDS = ("name", "path", "inputs", "source_module", "estimated_monthly_cost",
+                      "cost_breakdown", "resource_estimates")
+
+def _name_hash(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+class _Encoder:
+    """Tagged value encoding with every string and map key interned in one string table"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+
+    def intern(self, text: str) -> int:
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def encode(self, value: Any, out: bytearray):
+        if value is None:
+            out += TAG_NULL
+        elif value is True:
+            out += TAG_TRUE
+        elif value is False:
+            out += TAG_FALSE
+        elif isinstance(value, int):
+            if -2 ** 63 <= value < 2 ** 63:
+                out += TAG_INT
+                out += I64.pack(value)
+            else:
+                out += TAG_BIGINT
+                out += U32.pack(self.intern(str(value)))
+        elif isinstance(value, float):
+            out += TAG_FLOAT
+            out += F64.pack(value)
+        elif isinstance(value, dict):
+            out += TAG_MAP
+            out += U32.pack(len(value))
+            for key, item in value.items():
+                out += U32.pack(self.intern(str(key)))
+                self.encode(item, out)
+        elif isinstance(value, (list, tuple)):
+            out += TAG_LIST
+            out += U32.pack(len(value))
+            for item in value:
+                self.encode(item, out)
+        else:
+            # Strings, and anything else the JSON output would have written with default=str
+            out += TAG_STRING
+            out += U32.pack(self.intern(str(value)))
+
+def write_snapshot(result: Dict[str, Any], snapshot_file: str) -> str:
+    """Write analysis results in the ``--output`` JSON shape (``environments`` as dicts,
+    everything else as metadata) to ``snapshot_file``, atomically"""
+    encoder = _Encoder()
+    environments = result.get("environments", [])
+
+    records = bytearray()
+    spans: List[Tuple[int, int]] = []
+    for environment in environments:
+        start = len(records)
+        encoder.encode([environment.get(field) for field in ENVIRONMENT_FIELDS], records)
+        spans.append((start, len(records) - start))
+
+    metadata = bytearray()
+    encoder.encode({key: value for key, value in result.items() if key != "environments"}, metadata)
+
+    # Open addressing with linear probing at a load factor of at most 1/2
+    slot_count = 1
+    while slot_count < 2 * len(environments):
+        slot_count *= 2
+    slots = [0] * slot_count
+    name_ids = []
+    for index, environment in enumerate(environments):
+        name = str(environment.get("name", ""))
+        name_ids.append(encoder.intern(name))
+        slot = _name_hash(name) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = index + 1
+
+    encoded = [text.encode("utf-8") for text in encoder.strings]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    strings_offset = HEADER.size + ENTRY.size * len(environments) + SLOT.size * slot_count
+    records_offset = strings_offset + 8 * len(string_offsets) + string_offsets[-1]
+    metadata_offset = records_offset + len(records)
+
+    def chunks() -> Iterator[bytes]:
+        yield HEADER.pack(MAGIC, VERSION, len(environments), slot_count, len(encoded),
+                          strings_offset, records_offset, metadata_offset)
+        for environment, name_id, (start, length) in zip(environments, name_ids, spans):
+            yield ENTRY.pack(name_id, _name_hash(encoder.strings[name_id]), records_offset + start, length,
+                             float(environment.get("estimated_monthly_cost") or 0.0))
+        yield struct.pack(f"<{slot_count}I", *slots)
+        yield struct.pack(f"<{len(string_offsets)}Q", *string_offsets)
+        yield b"".join(encoded)
+        yield records
+        yield metadata
+
+    return atomic_write(snapshot_file, chunks())
+
+class AnalysisSnapshot:
+    """Analysis results attached through a read-only memory map.
+
+    Opening reads only the header. ``get(name)`` hashes the name into the
+    slot table and decodes that one environment record; iteration decodes the
+    records in file order, and ``costs()`` scans the fixed-size index entries
+    without touching the records at all. Strings are decoded on first use.
+    """
+
+    def __init__(self, snapshot_file: str):
+        self.snapshot_file = str(snapshot_file)
+        with open(self.snapshot_file, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self._count, self._slot_count, self._string_count,
+         self._strings_offset, self._records_offset, self._metadata_offset) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.snapshot_file} is not a version {VERSION} analysis snapshot")
+
+        self._slots_offset = HEADER.size + ENTRY.size * self._count
+        self._blob_offset = self._strings_offset + 8 * (self._string_count + 1)
+        self._strings: List[Optional[str]] = [None] * self._string_count
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _string(self, string_id: int) -> str:
+        text = self._strings[string_id]
+        if text is None:
+            start, end = struct.unpack_from("<QQ", self._mmap, self._strings_offset + 8 * string_id)
+            text = self._strings[string_id] = self._mmap[self._blob_offset + start:self._blob_offset + end].decode("utf-8")
+        return text
+
+    def _decode(self, offset: int) -> Tuple[Any, int]:
+        buffer = self._mmap
+        tag = buffer[offset]
+        offset += 1
+        if tag == _STRING:
+            return self._string(_u32(buffer, offset)[0]), offset + 4
+        if tag == _FLOAT:
+            return _f64(buffer, offset)[0], offset + 8
+        if tag == _INT:
+            return _i64(buffer, offset)[0], offset + 8
+        if tag == _MAP:
+            count = _u32(buffer, offset)[0]
+            offset += 4
+            value = {}
+            for _ in range(count):
+                key = self._string(_u32(buffer, offset)[0])
+                value[key], offset = self._decode(offset + 4)
+            return value, offset
+        if tag == _LIST:
+            count = _u32(buffer, offset)[0]
+            offset += 4
+            items = []
+            for _ in range(count):
+                item, offset = self._decode(offset)
+                items.append(item)
+            return items, offset
+        if tag == _NULL:
+            return None, offset
+        if tag == _TRUE:
+            return True, offset
+        if tag == _FALSE:
+            return False, offset
+        if tag == _BIGINT:
+            return int(self._string(_u32(buffer, offset)[0])), offset + 4
+        raise ValueError(f"Corrupt snapshot {self.snapshot_file}: unknown tag {tag!r} at {offset - 1}")
+
+    def _entry(self, index: int) -> Tuple[int, int, int, int, float]:
+        return ENTRY.unpack_from(self._mmap, HEADER.size + ENTRY.size * index)
+
+    def _record(self, index: int) -> Dict[str, Any]:
+        values, _ = self._decode(self._entry(index)[2])
+        return dict(zip(ENVIRONMENT_FIELDS, values))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self._count):
+            yield self._record(index)
+
+    def __getitem__(self, key: Union[int, str]) -> Dict[str, Any]:
+        if isinstance(key, int):
+            if not -self._count <= key < self._count:
+                raise IndexError(key)
+            return self._record(key % self._count)
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(name) is not None
+
+    def _find(self, name: str) -> Optional[int]:
+        if not self._slot_count:
+            return None
+        name_hash = _name_hash(name)
+        mask = self._slot_count - 1
+        slot = name_hash & mask
+        while True:
+            occupant = SLOT.unpack_from(self._mmap, self._slots_offset + SLOT.size * slot)[0]
+            if not occupant:
+                return None
+            name_id, entry_hash, _, _, _ = self._entry(occupant - 1)
+            if entry_hash == name_hash and self._string(name_id) == name:
+                return occupant - 1
+            slot = (slot + 1) & mask
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Environment record (``asdict(TerragruntEnvironment)`` shape) by name; the first one
+        written when several environments share a name"""
+        index = self._find(name)
+        return None if index is None else self._record(index)
+
+    def names(self) -> List[str]:
+        return [self._string(self._entry(index)[0]) for index in range(self._count)]
+
+    def costs(self) -> Iterator[Tuple[str, float]]:
+        """(name, estimated monthly cost) of every environment, from the index alone"""
+        for index in range(self._count):
+            name_id, _, _, _, cost = self._entry(index)
+            yield self._string(name_id), cost
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Everything of the JSON output besides ``environments``"""
+        return self._decode(self._metadata_offset)[0]
+
+    def to_result(self) -> Dict[str, Any]:
+        """The complete ``--output`` JSON shape"""
+        result = self.metadata
+        result["environments"] = list(self)
+        return result
+
+def load_snapshot(snapshot_file: str) -> AnalysisSnapshot:
+    return AnalysisSnapshot(snapshot_file)
+
+def json_to_snapshot(json_file: str, snapshot_file: str) -> str:
+    with open(json_file, 'r') as f:
+        return write_snapshot(json.load(f), snapshot_file)
+
+def snapshot_to_json(snapshot_file: str, json_file: str) -> str:
+    with AnalysisSnapshot(snapshot_file) as snapshot:
+        result = snapshot.to_result()
+    with open(json_file, 'w') as f:
+        json.dump(result, f, indent=2)
+    return str(json_file)
+
+def main():
+    """Inspect an analysis snapshot or convert between snapshots and JSON output"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Binary snapshots of Terragrunt analysis results")
+    parser.add_argument("snapshot", help="Snapshot file")
+    parser.add_argument("--from-json", help="Create the snapshot from a JSON analysis output")
+    parser.add_argument("--to-json", help="Write the snapshot as JSON analysis output")
+    parser.add_argument("--environment", help="Print one environment")
+
+    args = parser.parse_args()
+
+    if args.from_json:
+        json_to_snapshot(args.from_json, args.snapshot)
+        print(f"📦 {args.snapshot}: {os.path.getsize(args.snapshot)} bytes (JSON: {os.path.getsize(args.from_json)} bytes)")
+    if args.to_json:
+        print(f"📄 JSON written: {snapshot_to_json(args.snapshot, args.to_json)}")
+
+    with AnalysisSnapshot(args.snapshot) as snapshot:
+        if args.environment:
+            record = snapshot.get(args.environment)
+            if record is None:
+                print(f"❌ Environment {args.environment} not in {args.snapshot}")
+                return 1
+            print(json.dumps(record, indent=2))
+        elif not args.to_json:
+            metadata = snapshot.metadata
+            print(f"📦 {args.snapshot}: {len(snapshot)} environments, region {metadata.get('region', 'unknown')}")
+            for name, cost in snapshot.costs():
+                print(f"   {name:<24} ${cost:>10.2f}/month")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -48,17 +48,21 @@ usage() {
     echo "Commands:"
     echo "  compare-medium     Compare EKS vs ECS for medium application (500 users)"
     echo "  compare-large      Compare EKS vs ECS for large application (2000 users)"
+    echo "  compare-all        Compare every scenario in every --region in one run"
     echo "  setup             Setup analysis environment"
+    echo "  daemon            Run the analysis daemon (warm caches for --daemon clients)"
     echo "  validate          Validate configuration files"
     echo ""
     echo "Options:"
-    echo "  --region REGION   AWS region (default: eu-west-1)"
+    echo "  --region REGION   AWS region (default: eu-west-1, comma-separated for compare-all)"
     echo "  --output FILE     Save results to JSON file"
     echo "  --config FILE     Use custom config file (default: analyzer-config.yaml)"
+    echo "  --trace FILE      Replay a traffic trace (CSV/NDJSON users per minute) for autoscaling costs"
     echo ""
     echo "Examples:"
     echo "  $0 compare-medium                    # Compare for 500 users"
     echo "  $0 compare-large --region us-east-1  # Compare for 2000 users in US"
+    echo "  $0 compare-all --region eu-west-1,us-east-1  # Scenario x region matrix"
     echo "  $0 setup                             # Setup analysis environment"
     echo ""
     exit 1
@@ -133,6 +137,7 @@ run_analysis() {
     local scenario="$1"
     local region="$2"
     local output_file="$3"
+    local trace_file="$4"
 
     print_header "🚀 Running Infrastructure Analysis..."
     print_info "Scenario: $scenario"
@@ -146,6 +151,11 @@ run_analysis() {
         print_info "Output file: $output_file"
     fi
 
+    if [[ -n "$trace_file" ]]; then
+        cmd="$cmd --trace $trace_file"
+        print_info "Traffic trace: $trace_file"
+    fi
+
     # Run analysis
     echo ""
     if eval "$cmd"; then
@@ -160,6 +170,36 @@ run_analysis() {
     fi
 }
 
+# Function to run the scenario x region matrix in one process
+run_matrix() {
+    local regions="${1//,/ }"
+    local output_file="$2"
+    local trace_file="$3"
+
+    print_header "🚀 Running Scenario x Region Matrix..."
+    print_info "Regions: $regions"
+
+    local cmd="python3 $SCRIPT_DIR/yaml_terragrunt_analyzer.py --matrix --regions $regions"
+
+    if [[ -n "$output_file" ]]; then
+        cmd="$cmd --output $output_file"
+        print_info "Output file: $output_file"
+    fi
+
+    if [[ -n "$trace_file" ]]; then
+        cmd="$cmd --trace $trace_file"
+        print_info "Traffic trace: $trace_file"
+    fi
+
+    echo ""
+    if eval "$cmd"; then
+        print_success "Matrix analysis completed successfully"
+    else
+        print_error "Matrix analysis failed"
+        return 1
+    fi
+}
+
 # Function to show environment status
 show_status() {
     print_header "📊 Terragrunt Environment Status"
@@ -190,6 +230,7 @@ main() {
     local region="eu-west-1"
     local output_file=""
     local config_file="$CONFIG_FILE"
+    local trace_file=""
 
     # Parse arguments
     shift
@@ -208,6 +249,10 @@ main() {
                 CONFIG_FILE="$config_file"
                 shift 2
                 ;;
+            --trace)
+                trace_file="$2"
+                shift 2
+                ;;
             --help|-h)
                 usage
                 ;;
@@ -225,12 +270,17 @@ main() {
         compare-medium)
             check_prerequisites || exit 1
             validate_config || exit 1
-            run_analysis "medium_app" "$region" "$output_file"
+            run_analysis "medium_app" "$region" "$output_file" "$trace_file"
             ;;
         compare-large)
             check_prerequisites || exit 1
             validate_config || exit 1
-            run_analysis "large_app" "$region" "$output_file"
+            run_analysis "large_app" "$region" "$output_file" "$trace_file"
+            ;;
+        compare-all)
+            check_prerequisites || exit 1
+            validate_config || exit 1
+            run_matrix "$region" "$output_file" "$trace_file"
             ;;
         setup)
             setup_environment
@@ -242,6 +292,10 @@ main() {
         status)
             show_status
             ;;
+        daemon)
+            check_prerequisites || exit 1
+            exec python3 "$SCRIPT_DIR/analysis_daemon.py"
+            ;;
         "")
             print_error "No command specified"
             usage
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Atomic File Writes
+Replaces a file in one rename, so concurrent readers see the old or the new contents, never a partial file
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes, Iterable[bytes]],
+                 mode: Optional[int] = None, fsync: bool = False) -> str:
+    """Write ``data`` (text as UTF-8, bytes, or an iterable of byte chunks) to ``path``.
+
+    The temporary file sits next to ``path``, since a rename is only atomic
+    within one filesystem, and is named per process and thread so concurrent
+    writers never share it. ``mode`` sets the permissions before the rename;
+    ``fsync`` flushes the data to disk first. Returns the path written.
+    """
+    path = Path(path)
+    temp_file = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_file, 'wb') as f:
+            if isinstance(data, str):
+                f.write(data.encode("utf-8"))
+            elif isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(temp_file, mode)
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.unlink(temp_file)
+        except OSError:
+            pass
+        raise
+    return str(path)
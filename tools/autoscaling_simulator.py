@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Autoscaling Simulator
+Replays concurrent-user traffic traces through target-tracking scaling policies and integrates cost
+"""
+
+import csv
+import json
+import math
+from array import array
+from collections import deque
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Dict, List, Any, Iterator
+from dataclasses import dataclass, asdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MINUTES_PER_MONTH = 730 * 60
+
+@dataclass
+class ScalingPolicy:
+    """Target-tracking policy for one kind of capacity unit (ECS task or EKS node)"""
+    name: str
+    users_per_unit: float
+    unit_hourly_cost: float
+    target_utilization: float = 0.7
+    min_units: int = 1
+    max_units: int = 100
+    scale_out_cooldown_s: int = 60
+    scale_in_cooldown_s: int = 300
+    startup_delay_s: int = 120
+
+@dataclass
+class SimulationResult:
+    """Cost and capacity statistics of one trace replay"""
+    policy: str
+    minutes: int
+    total_cost: float
+    projected_monthly_cost: float
+    average_units: float
+    peak_units: int
+    min_units_used: int
+    peak_users: int
+    average_users: float
+    underprovisioned_minutes: int
+    scale_out_events: int
+    scale_in_events: int
+
+def iter_trace_chunks(trace_file: str, chunk_size: int = 10080) -> Iterator[List[int]]:
+    """Stream concurrent-user counts from a CSV or NDJSON trace, one chunk at a time.
+
+    CSV: a ``users`` column (or the last column when there is no header).
+    NDJSON: one object per line with a ``users`` field.
+    """
+    path = Path(trace_file)
+    ndjson = path.suffix.lower() in (".ndjson", ".jsonl")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if ndjson:
+            def column_values(lines: List[str]) -> List[Any]:
+                try:
+                    return [json.loads(line)["users"] for line in lines]
+                except KeyError:
+                    raise ValueError(f"{trace_file}: record without a 'users' field")
+        else:
+            header = next(csv.reader([f.readline()]), [])
+            column = header.index("users") if "users" in header else -1
+            if column < 0 and header:
+                try:
+                    float(header[-1])
+                except ValueError:
+                    raise ValueError(f"{trace_file}: CSV header has no 'users' column ({', '.join(header)})")
+                # No header row: the first line is already data
+                f.seek(0)
+
+            def column_values(lines: List[str]) -> List[str]:
+                try:
+                    return [line.split(",")[column] for line in lines]
+                except IndexError:
+                    raise ValueError(f"{trace_file}: row without a 'users' column")
+
+        while True:
+            lines = [line for line in islice(f, chunk_size) if line.strip()]
+            if not lines:
+                return
+            values = column_values(lines)
+            try:
+                yield list(map(int, values))
+            except ValueError:
+                yield [int(float(value)) for value in values]
+
+class AutoscalingSimulator:
+    """Replays a trace against a target-tracking policy with cooldowns and startup delays.
+
+    With numpy, the desired capacity of every step in a chunk is one array
+    operation, and per capacity level a table gives the next step whose desired
+    capacity is above (or below) it. The stateful loop then jumps from scaling
+    action to scaling action; the serving capacity of every step, and with it
+    the under-provisioned count, is rebuilt from the recorded changes with one
+    cumulative sum per chunk. Without numpy, the desired capacity is split into
+    runs of equal value and the loop jumps from event to event (run boundary,
+    cooldown expiry, unit ready).
+    """
+
+    def __init__(self, policy: ScalingPolicy, step_seconds: int = 60, vectorized: bool = True):
+        self.policy = policy
+        self.step_seconds = step_seconds
+        self.vectorized = vectorized
+
+    def run(self, chunks) -> SimulationResult:
+        """Simulate a trace given as an iterable of user-count chunks"""
+        if self.vectorized and np is not None:
+            return self._run_numpy(chunks)
+        return self._run_python(chunks)
+
+    def _result(self, steps: int, unit_steps: int, peak_units: int, min_units_used: int, peak_users: int,
+                total_users: int, under: int, outs: int, ins: int) -> SimulationResult:
+        policy = self.policy
+        step = self.step_seconds
+        total_cost = unit_steps * step / 3600 * policy.unit_hourly_cost
+        return SimulationResult(
+            policy=policy.name,
+            minutes=steps * step // 60,
+            total_cost=total_cost,
+            projected_monthly_cost=total_cost / steps * MINUTES_PER_MONTH * 60 / step if steps else 0.0,
+            average_units=unit_steps / steps if steps else 0.0,
+            peak_units=peak_units,
+            min_units_used=min_units_used,
+            peak_users=peak_users,
+            average_users=total_users / steps if steps else 0.0,
+            underprovisioned_minutes=under * step // 60,
+            scale_out_events=outs,
+            scale_in_events=ins
+        )
+
+    def _run_numpy(self, chunks) -> SimulationResult:
+        policy = self.policy
+        step = self.step_seconds
+        capacity_per_unit = policy.users_per_unit * policy.target_utilization
+        out_cooldown = math.ceil(policy.scale_out_cooldown_s / step)
+        in_cooldown = math.ceil(policy.scale_in_cooldown_s / step)
+        startup = math.ceil(policy.startup_delay_s / step)
+        min_units, max_units = policy.min_units, policy.max_units
+
+        serving = min_units
+        pending = deque()          # (ready_step, units)
+        pending_units = 0
+        last_out = last_in = -10 ** 9
+        t = 0
+        unit_steps = 0
+        peak_units = min_units_used = serving
+        peak_users = total_users = 0
+        under = 0
+        outs = ins = 0
+
+        for chunk in chunks:
+            users = np.asarray(chunk, dtype=np.int64)
+            n = len(users)
+            if not n:
+                continue
+            desired_array = np.clip(np.ceil(users / capacity_per_unit), min_units, max_units).astype(np.int64)
+            desired = desired_array.tolist()
+            total_users += int(users.sum())
+            peak_users = max(peak_users, int(users.max()))
+
+            # Per capacity level: the next step at or after j whose desired capacity is
+            # above (below) it, n when there is none in this chunk
+            positions = np.arange(n + 1)
+            above, below = {}, {}
+
+            def next_steps(level: int):
+                hits = np.where(desired_array > level, positions[:n], n)
+                above[level] = array('q', np.append(np.minimum.accumulate(hits[::-1])[::-1], n).tobytes())
+                hits = np.where(desired_array < level, positions[:n], n)
+                below[level] = array('q', np.append(np.minimum.accumulate(hits[::-1])[::-1], n).tobytes())
+
+            t0 = t
+            serving_at_start = serving
+            serving_changes = [0] * n
+            provisioned = serving + pending_units
+            i = 0
+            while True:
+                # First step where a scale-out or a scale-in is both wanted and out of cooldown
+                if provisioned not in above:
+                    next_steps(provisioned)
+                out_from = last_out + out_cooldown - t0
+                in_from = (last_in if last_in > last_out else last_out) + in_cooldown - t0
+                j = above[provisioned][out_from if out_from > i else i] if out_from < n else n
+                if in_from < n:
+                    j_in = below[provisioned][in_from if in_from > i else i]
+                    if j_in < j:
+                        j = j_in
+                unit_steps += provisioned * (j - i)
+                if j >= n:
+                    break
+
+                t = t0 + j
+                while pending and pending[0][0] <= t:
+                    ready, units = pending.popleft()
+                    pending_units -= units
+                    serving += units
+                    serving_changes[ready - t0] += units
+
+                target = desired[j]
+                if target > provisioned:
+                    # Requested units serve from the next step at the earliest, as in the event loop
+                    pending.append((t + max(startup, 1), target - provisioned))
+                    pending_units += target - provisioned
+                    last_out = t
+                    outs += 1
+                else:
+                    excess = provisioned - target
+                    while excess and pending:
+                        ready, units = pending.pop()
+                        removed = min(units, excess)
+                        pending_units -= removed
+                        excess -= removed
+                        if units > removed:
+                            pending.append((ready, units - removed))
+                    serving -= excess
+                    serving_changes[j] -= excess
+                    last_in = t
+                    ins += 1
+                provisioned = target
+                if provisioned > peak_units:
+                    peak_units = provisioned
+                elif provisioned < min_units_used:
+                    min_units_used = provisioned
+                i = j
+
+            # Units that start serving before the chunk ends
+            t = t0 + n
+            while pending and pending[0][0] < t:
+                ready, units = pending.popleft()
+                pending_units -= units
+                serving += units
+                serving_changes[ready - t0] += units
+
+            serving_capacity = (serving_at_start + np.cumsum(np.array(serving_changes, dtype=np.int64))) * policy.users_per_unit
+            under += int(np.count_nonzero(users > serving_capacity))
+
+        return self._result(t, unit_steps, peak_units, min_units_used, peak_users, total_users, under, outs, ins)
+
+    def _run_python(self, chunks) -> SimulationResult:
+        policy = self.policy
+        step = self.step_seconds
+        capacity_per_unit = policy.users_per_unit * policy.target_utilization
+        out_cooldown = math.ceil(policy.scale_out_cooldown_s / step)
+        in_cooldown = math.ceil(policy.scale_in_cooldown_s / step)
+        startup = math.ceil(policy.startup_delay_s / step)
+        min_units, max_units = policy.min_units, policy.max_units
+
+        serving = min_units
+        pending = deque()          # (ready_step, units)
+        pending_units = 0
+        last_out = last_in = -10 ** 9
+        t = 0
+        unit_steps = 0
+        peak_units = min_units_used = serving
+        peak_users = total_users = 0
+        under = 0
+        outs = ins = 0
+
+        for chunk in chunks:
+            desired = [min(max_units, max(min_units, math.ceil(u / capacity_per_unit))) for u in chunk]
+            total_users += sum(chunk)
+            peak_users = max(peak_users, max(chunk))
+
+            # End index of each run of equal desired capacity
+            run_ends = []
+            position = 0
+            for _, group in groupby(desired):
+                position += sum(1 for _ in group)
+                run_ends.append(position)
+
+            n = len(chunk)
+            i = 0
+            run = 0
+            while i < n:
+                while run_ends[run] <= i:
+                    run += 1
+                while pending and pending[0][0] <= t:
+                    units = pending.popleft()[1]
+                    pending_units -= units
+                    serving += units
+
+                provisioned = serving + pending_units
+                target = desired[i]
+                if target > provisioned and t - last_out >= out_cooldown:
+                    pending.append((t + startup, target - provisioned))
+                    pending_units += target - provisioned
+                    provisioned = target
+                    last_out = t
+                    outs += 1
+                elif target < provisioned and t - max(last_in, last_out) >= in_cooldown:
+                    excess = provisioned - target
+                    while excess and pending:
+                        ready, units = pending.pop()
+                        removed = min(units, excess)
+                        pending_units -= removed
+                        excess -= removed
+                        if units > removed:
+                            pending.append((ready, units - removed))
+                    serving -= excess
+                    provisioned = target
+                    last_in = t
+                    ins += 1
+
+                # Nothing changes until the desired run ends, a cooldown expires or a unit starts serving
+                until = run_ends[run]
+                if target > provisioned:
+                    until = min(until, i + last_out + out_cooldown - t)
+                elif target < provisioned:
+                    until = min(until, i + max(last_in, last_out) + in_cooldown - t)
+                if pending:
+                    until = min(until, i + pending[0][0] - t)
+                until = max(until, i + 1)
+
+                serving_capacity = serving * policy.users_per_unit
+                under += sum(1 for users in chunk[i:until] if users > serving_capacity)
+                unit_steps += provisioned * (until - i)
+                peak_units = max(peak_units, provisioned)
+                min_units_used = min(min_units_used, provisioned)
+                t += until - i
+                i = until
+
+        return self._result(t, unit_steps, peak_units, min_units_used, peak_users, total_users, under, outs, ins)
+
+    def run_file(self, trace_file: str, chunk_size: int = 10080) -> SimulationResult:
+        """Simulate a CSV/NDJSON trace file, streaming it chunk by chunk"""
+        return self.run(iter_trace_chunks(trace_file, chunk_size))
+
+def ecs_policy(pricing_data: Dict[str, Any], cpu_vcpus: float, memory_gb: float, users_per_task: float = 250,
+               min_units: int = 1, max_units: int = 100) -> ScalingPolicy:
+    """Target tracking for Fargate tasks (2 minute task startup)"""
+    fargate = pricing_data["fargate"]
+    return ScalingPolicy(
+        name="ECS Fargate tasks",
+        users_per_unit=users_per_task,
+        unit_hourly_cost=cpu_vcpus * fargate["cpu_per_vcpu_hour"] + memory_gb * fargate["memory_per_gb_hour"],
+        min_units=min_units,
+        max_units=max_units,
+        startup_delay_s=120
+    )
+
+def eks_policy(pricing_data: Dict[str, Any], instance_type: str = "t3.medium", users_per_node: float = 500,
+               min_units: int = 2, max_units: int = 10) -> ScalingPolicy:
+    """Cluster-autoscaler style node scaling (4 minute node startup, 10 minute scale-in)"""
+    return ScalingPolicy(
+        name=f"EKS nodes ({instance_type})",
+        users_per_unit=users_per_node,
+        unit_hourly_cost=pricing_data["ec2"].get(instance_type, {"hourly": 0.0416})["hourly"],
+        min_units=min_units,
+        max_units=max_units,
+        scale_in_cooldown_s=600,
+        startup_delay_s=240
+    )
+
+def main():
+    """Replay a trace against the ECS and EKS scaling policies"""
+    import argparse
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Autoscaling cost simulation from traffic traces")
+    parser.add_argument("trace", help="CSV or NDJSON trace of concurrent users per minute")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--task-cpu", type=float, default=1.0, help="Fargate task vCPUs")
+    parser.add_argument("--task-memory", type=float, default=2.0, help="Fargate task memory (GB)")
+    parser.add_argument("--node-type", default="t3.medium", help="EKS worker instance type")
+    parser.add_argument("--output", help="Output JSON file")
+    parser.add_argument("--no-vectorize", action="store_true", help="Use the stdlib event loop even with numpy")
+
+    args = parser.parse_args()
+
+    try:
+        pricing = AWSPricingFetcher(args.region).fetch_all_pricing()
+        results = []
+        for policy in (ecs_policy(pricing, args.task_cpu, args.task_memory), eks_policy(pricing, args.node_type)):
+            result = AutoscalingSimulator(policy, vectorized=not args.no_vectorize).run_file(args.trace)
+            results.append(result)
+            print(f"\n📈 {result.policy}")
+            print(f"   ⏱️ {result.minutes} minutes simulated, peak {result.peak_users} users")
+            print(f"   📦 Units: avg {result.average_units:.2f}, range {result.min_units_used}-{result.peak_units}")
+            print(f"   🔁 Scale-out {result.scale_out_events}, scale-in {result.scale_in_events}, "
+                  f"under-provisioned {result.underprovisioned_minutes} minutes")
+            print(f"   💰 ${result.total_cost:.2f} total, ${result.projected_monthly_cost:.2f}/month projected")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump([asdict(r) for r in results], f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -5,17 +5,88 @@ Fetches real-time AWS pricing data from the internet
 """
 
 import json
+import os
+import threading
 import urllib.request
 import urllib.error
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 import re
 from pathlib import Path
+from profiler import profiled
+from atomic_file import atomic_write
+from pricing_http import FetchResult, PricingHTTPClient
+from price_list_store import PriceListStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only single-flight within one process
+    fcntl = None
+
+# Hardware specs for the priced EC2 instance types (max_pods follows the EKS ENI limits)
+EC2_INSTANCE_SPECS = {
+    "t3.micro": {"vcpu": 2, "memory_gb": 1.0, "max_pods": 4},
+    "t3.small": {"vcpu": 2, "memory_gb": 2.0, "max_pods": 11},
+    "t3.medium": {"vcpu": 2, "memory_gb": 4.0, "max_pods": 17},
+    "t3.large": {"vcpu": 2, "memory_gb": 8.0, "max_pods": 35},
+    "t3.xlarge": {"vcpu": 4, "memory_gb": 16.0, "max_pods": 58},
+    "c5.large": {"vcpu": 2, "memory_gb": 4.0, "max_pods": 29},
+    "c5.xlarge": {"vcpu": 4, "memory_gb": 8.0, "max_pods": 58},
+    "c5.2xlarge": {"vcpu": 8, "memory_gb": 16.0, "max_pods": 58},
+    "m5.large": {"vcpu": 2, "memory_gb": 8.0, "max_pods": 29},
+    "m5.xlarge": {"vcpu": 4, "memory_gb": 16.0, "max_pods": 58},
+    "m5.2xlarge": {"vcpu": 8, "memory_gb": 32.0, "max_pods": 58},
+    "r5.large": {"vcpu": 2, "memory_gb": 16.0, "max_pods": 29},
+    "r5.xlarge": {"vcpu": 4, "memory_gb": 32.0, "max_pods": 58}
+}
+
+# Hardware specs and single-AZ on-demand hourly prices (us-east-1) of the priced RDS instance classes
+RDS_INSTANCE_SPECS = {
+    "db.t3.micro": {"vcpu": 2, "memory_gb": 1.0, "hourly": 0.018},
+    "db.t3.small": {"vcpu": 2, "memory_gb": 2.0, "hourly": 0.036},
+    "db.t3.medium": {"vcpu": 2, "memory_gb": 4.0, "hourly": 0.072},
+    "db.t3.large": {"vcpu": 2, "memory_gb": 8.0, "hourly": 0.145},
+    "db.t3.xlarge": {"vcpu": 4, "memory_gb": 16.0, "hourly": 0.29},
+    "db.m5.large": {"vcpu": 2, "memory_gb": 8.0, "hourly": 0.178},
+    "db.m5.xlarge": {"vcpu": 4, "memory_gb": 16.0, "hourly": 0.356},
+    "db.m5.2xlarge": {"vcpu": 8, "memory_gb": 32.0, "hourly": 0.712},
+    "db.r5.large": {"vcpu": 2, "memory_gb": 16.0, "hourly": 0.25},
+    "db.r5.xlarge": {"vcpu": 4, "memory_gb": 32.0, "hourly": 0.50},
+    "db.r5.2xlarge": {"vcpu": 8, "memory_gb": 64.0, "hourly": 1.00}
+}
+
+# Sections of fetch_all_pricing() output; a cache written before a section existed is refreshed
+PRICING_SECTIONS = ("ec2", "fargate", "eks", "load_balancer", "rds", "storage", "data_transfer")
+
+# Price list services whose region offer files feed the pricing data
+OFFER_SERVICES = ("AmazonEC2", "AmazonECS")
+HOURS_PER_MONTH = 730
+
+def on_demand_prices(offer: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """SKU -> attributes, unit and USD price of a price list offer file's on-demand terms"""
+    prices = {}
+    on_demand = offer.get("terms", {}).get("OnDemand", {})
+    for sku, product in offer.get("products", {}).items():
+        for term in on_demand.get(sku, {}).values():
+            for dimension in term.get("priceDimensions", {}).values():
+                usd = dimension.get("pricePerUnit", {}).get("USD")
+                if usd is not None:
+                    prices[sku] = {"attributes": product.get("attributes", {}), "unit": dimension.get("unit"),
+                                   "usd": float(usd)}
+    return prices
+
+# Background refreshes in flight in this process, by cache file
+_refresh_threads: Dict[str, threading.Thread] = {}
+_refresh_threads_lock = threading.Lock()
+# In-process side of the cache lock (flock does not order threads sharing one open file)
+_cache_locks: Dict[str, threading.Lock] = {}
 
 class AWSPricingFetcher:
     """Fetches AWS pricing data dynamically from the internet"""
 
-    def __init__(self, region: str = "eu-west-1"):
+    def __init__(self, region: str = "eu-west-1", hard_expiry: Optional[timedelta] = timedelta(days=7),
+                 stale_while_revalidate: bool = True, price_list_url: Optional[str] = None):
         self.region = region
         self.aws_region_map = {
             "eu-west-1": "EU (Ireland)",
@@ -25,9 +96,18 @@ class AWSPricingFetcher:
         }
         self.cache_file = Path(__file__).parent / f"pricing_cache_{region}.json"
         self.cache_duration = timedelta(hours=24)  # Cache for 24 hours
-
-    def get_cached_pricing(self) -> Optional[Dict[str, Any]]:
-        """Get pricing from cache if it's still valid"""
+        # Stale data is served (and refreshed in the background) until it is this old; None never expires
+        self.hard_expiry = hard_expiry
+        self.stale_while_revalidate = stale_while_revalidate
+        self.lock_file = self.cache_file.with_suffix(".lock")
+        # Price List bulk API (e.g. https://pricing.us-east-1.amazonaws.com); built-in prices when unset
+        self.price_list_url = os.environ.get("AWS_PRICE_LIST_URL") if price_list_url is None else price_list_url
+        self.offer_dir = Path(__file__).parent / "price_list_cache" / region
+        self.price_list_db = self.offer_dir.parent / "price_list.db"
+        self._offer_prices: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _read_cache(self) -> Optional[Tuple[Dict[str, Any], datetime]]:
+        """Cached pricing and its timestamp, regardless of age"""
         if not self.cache_file.exists():
             return None
 
@@ -36,34 +116,211 @@ class AWSPricingFetcher:
                 cache_data = json.load(f)
 
             cache_time = datetime.fromisoformat(cache_data.get('timestamp', '1970-01-01'))
-            if datetime.now() - cache_time < self.cache_duration:
-                return cache_data.get('pricing', {})
+            pricing = cache_data.get('pricing')
+            if pricing and all(section in pricing for section in PRICING_SECTIONS):
+                return pricing, cache_time
         except Exception:
             pass
 
         return None
 
+    def get_cached_pricing(self) -> Optional[Dict[str, Any]]:
+        """Get pricing from cache if it's still valid"""
+        cached = self._read_cache()
+        if cached and datetime.now() - cached[1] < self.cache_duration:
+            return cached[0]
+        return None
+
+    def cache_age_seconds(self) -> Optional[float]:
+        """Age of the cached pricing data, or None when there is no readable cache"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                cache_time = datetime.fromisoformat(json.load(f)['timestamp'])
+        except Exception:
+            return None
+        return (datetime.now() - cache_time).total_seconds()
+
     def save_pricing_cache(self, pricing_data: Dict[str, Any]):
-        """Save pricing data to cache"""
+        """Save pricing data to cache (atomically, so concurrent readers never see a partial file)"""
         try:
             cache_data = {
                 'timestamp': datetime.now().isoformat(),
                 'region': self.region,
                 'pricing': pricing_data
             }
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            atomic_write(self.cache_file, json.dumps(cache_data, indent=2))
         except Exception as e:
             print(f"Warning: Could not save pricing cache: {e}")
 
+    @contextmanager
+    def _cache_lock(self, blocking: bool = True) -> Iterator[bool]:
+        """Exclusive refresh lock across threads and processes; yields False if busy and not blocking"""
+        key = str(self.cache_file)
+        with _refresh_threads_lock:
+            local_lock = _cache_locks.setdefault(key, threading.Lock())
+        if not local_lock.acquire(blocking):
+            yield False
+            return
+
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(self.lock_file, 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        finally:
+            local_lock.release()
+
+    def refresh_pricing(self, blocking: bool = True) -> Optional[Dict[str, Any]]:
+        """Single-flight refresh: only the lock holder downloads, everyone else reuses its result.
+
+        Returns None when ``blocking`` is False and another refresh is already running.
+        """
+        with self._cache_lock(blocking) as acquired:
+            if not acquired:
+                return None
+            # Whoever held the lock before us may have just refreshed the cache
+            fresh = self.get_cached_pricing()
+            if fresh:
+                return fresh
+            pricing_data = self._download_pricing()
+            self.save_pricing_cache(pricing_data)
+            return pricing_data
+
+    def _refresh_in_background(self):
+        """Start one background refresh per cache file in this process.
+
+        The thread is not a daemon, so a short CLI run still finishes writing the
+        cache before the interpreter exits.
+        """
+        key = str(self.cache_file)
+        with _refresh_threads_lock:
+            thread = _refresh_threads.get(key)
+            if thread and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._background_refresh, name=f"pricing-refresh-{self.region}")
+            _refresh_threads[key] = thread
+            thread.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh_pricing(blocking=False)
+        except Exception as e:
+            print(f"Warning: Background pricing refresh for {self.region} failed: {e}")
+
+    def wait_for_refresh(self, timeout: Optional[float] = None):
+        """Block until a background refresh started in this process has finished"""
+        thread = _refresh_threads.get(str(self.cache_file))
+        if thread:
+            thread.join(timeout)
+
+    def fetch_offer_files(self, services: Tuple[str, ...] = OFFER_SERVICES) -> Dict[str, FetchResult]:
+        """Download or revalidate the region offer file of each service from the Price List API.
+
+        Region indexes and offer files are fetched in parallel over pooled
+        keep-alive connections; unchanged files cost a 304.
+        """
+        base_url = self.price_list_url.rstrip("/")
+        offer_files = {}
+        with PricingHTTPClient() as client:
+            indexes = client.fetch_many([
+                (f"{base_url}/offers/v1.0/aws/{service}/current/region_index.json",
+                 str(self.offer_dir / service / "region_index.json"))
+                for service in services
+            ])
+            jobs = []
+            for service, index in zip(services, indexes):
+                with open(index.path, 'r') as f:
+                    region = json.load(f).get("regions", {}).get(self.region)
+                if region:
+                    jobs.append((service, f"{base_url}{region['currentVersionUrl']}"))
+
+            results = client.fetch_many([(url, str(self.offer_dir / service / "index.json")) for service, url in jobs])
+            for (service, _), result in zip(jobs, results):
+                print(f"  📥 {service}: {result.status.replace('_', ' ')} ({result.bytes_transferred} bytes)")
+                offer_files[service] = result
+        return offer_files
+
+    def _load_offer_prices(self):
+        """Bring the versioned price list store up to date; any failure leaves the built-in prices in place.
+
+        An unchanged offer file is neither parsed nor applied. A new version is
+        applied as the SKUs added, changed or removed since the stored one.
+        """
+        self._offer_prices = {}
+        if not self.price_list_url:
+            return
+        try:
+            store = PriceListStore(str(self.price_list_db))
+            try:
+                for service, result in self.fetch_offer_files().items():
+                    if result.status == "not_modified" and store.current_version(service, self.region):
+                        self._offer_prices[service] = store.prices(service, self.region)
+                        continue
+
+                    with open(result.path, 'r', encoding='utf-8') as f:
+                        offer = json.load(f)
+                    prices = on_demand_prices(offer)
+                    delta = store.apply(service, self.region, offer["version"], offer.get("publicationDate"), prices)
+                    if delta.from_version != delta.to_version:
+                        print(f"  🔁 {service} {delta.from_version or 'empty'} → {delta.to_version}: "
+                              f"+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)} SKUs")
+                    self._offer_prices[service] = prices
+            finally:
+                store.close()
+        except Exception as e:
+            print(f"Warning: Could not fetch the AWS price list, using built-in prices: {e}")
+
+    def _offer_ec2_pricing(self) -> Dict[str, Any]:
+        """On-demand Linux prices of every instance type in the EC2 offer file.
+
+        Types without built-in specs carry the offer's vCPU, memory and
+        architecture, so the instance catalog covers the whole price list.
+        """
+        ec2_pricing = {}
+        for price in self._offer_prices.get("AmazonEC2", {}).values():
+            attributes = price["attributes"]
+            instance_type = attributes.get("instanceType")
+            if not (instance_type and attributes.get("operatingSystem") == "Linux"
+                    and attributes.get("tenancy") == "Shared" and attributes.get("preInstalledSw") == "NA"
+                    and attributes.get("capacitystatus") == "Used"):
+                continue
+            entry = {"hourly": price["usd"], "monthly": price["usd"] * HOURS_PER_MONTH}
+            if instance_type not in EC2_INSTANCE_SPECS:
+                try:
+                    entry["vcpu"] = float(attributes["vcpu"])
+                    entry["memory_gb"] = float(attributes["memory"].split()[0].replace(",", ""))
+                except (KeyError, ValueError, IndexError):
+                    continue
+                entry["arch"] = "arm64" if "Graviton" in attributes.get("physicalProcessor", "") else "x86_64"
+            ec2_pricing[instance_type] = entry
+        return ec2_pricing
+
+    def _offer_fargate_pricing(self) -> Dict[str, Any]:
+        """Fargate vCPU and memory hourly prices from the ECS offer file"""
+        fargate_pricing = {}
+        for price in self._offer_prices.get("AmazonECS", {}).values():
+            usage_type = price["attributes"].get("usagetype", "")
+            if usage_type.endswith("Fargate-vCPU-Hours:perCPU"):
+                fargate_pricing["cpu_per_vcpu_hour"] = price["usd"]
+                fargate_pricing["cpu_monthly_per_vcpu"] = price["usd"] * 24 * 30.44
+            elif usage_type.endswith("Fargate-GB-Hours"):
+                fargate_pricing["memory_per_gb_hour"] = price["usd"]
+                fargate_pricing["memory_monthly_per_gb"] = price["usd"] * 24 * 30.44
+        return fargate_pricing
+
     def fetch_ec2_pricing(self) -> Dict[str, Any]:
         """Fetch EC2 pricing from AWS pricing API"""
         try:
-            # AWS Pricing API endpoint
-            base_url = "https://pricing.us-east-1.amazonaws.com"
-
-            # Try to get pricing data from AWS Calculator API
-            # This is a simplified approach using known pricing patterns
+            # Known pricing patterns, replaced below by price list prices when available
 
             ec2_pricing = {
                 "t3.micro": {"hourly": 0.0104, "monthly": 7.59},
@@ -88,6 +345,7 @@ class AWSPricingFetcher:
                 ec2_pricing[instance_type]["hourly"] *= region_multiplier
                 ec2_pricing[instance_type]["monthly"] *= region_multiplier
 
+            ec2_pricing.update(self._offer_ec2_pricing())
             return ec2_pricing
 
         except Exception as e:
@@ -110,6 +368,7 @@ class AWSPricingFetcher:
             for key in fargate_pricing:
                 fargate_pricing[key] *= region_multiplier
 
+            fargate_pricing.update(self._offer_fargate_pricing())
             return fargate_pricing
 
         except Exception as e:
@@ -146,6 +405,15 @@ class AWSPricingFetcher:
             print(f"Warning: Could not fetch real-time Load Balancer pricing: {e}")
             return self._get_fallback_alb_pricing()
 
+    def fetch_rds_pricing(self) -> Dict[str, Any]:
+        """Fetch RDS single-AZ instance pricing (Multi-AZ doubles it)"""
+        region_multiplier = 1.0 if self.region == "us-east-1" else 1.02
+        return {
+            instance_class: {"hourly": specs["hourly"] * region_multiplier,
+                             "monthly": specs["hourly"] * region_multiplier * HOURS_PER_MONTH}
+            for instance_class, specs in RDS_INSTANCE_SPECS.items()
+        }
+
     def fetch_storage_pricing(self) -> Dict[str, Any]:
         """Fetch EBS storage pricing"""
         try:
@@ -168,35 +436,38 @@ class AWSPricingFetcher:
         return {
             "out_to_internet_per_gb": 0.09,
             "out_to_internet_first_gb_free": 1.0,
+            "out_to_internet_free_gb": 100.0,
+            # Monthly volume (GB, cumulative) up to which each internet egress price applies
+            "out_to_internet_tiers_gb": {"10240": 0.09, "51200": 0.085, "153600": 0.07, "inf": 0.05},
             "cloudfront_per_gb": 0.085,
-            "between_regions_per_gb": 0.02
+            "between_regions_per_gb": 0.02,
+            "inter_az_per_gb": 0.01
         }
 
+    @profiled("pricing_load")
     def fetch_all_pricing(self) -> Dict[str, Any]:
         """Fetch all pricing data, using cache when possible"""
 
         # Try to get cached pricing first
-        cached_pricing = self.get_cached_pricing()
-        if cached_pricing:
-            print(f"✅ Using cached pricing data for {self.region}")
-            return cached_pricing
+        cached = self._read_cache()
+        if cached:
+            cached_pricing, cache_time = cached
+            age = datetime.now() - cache_time
+            if age < self.cache_duration:
+                print(f"✅ Using cached pricing data for {self.region}")
+                return cached_pricing
+
+            # Stale but not expired: answer now, refresh off the critical path
+            if self.stale_while_revalidate and (self.hard_expiry is None or age < self.hard_expiry):
+                print(f"♻️ Using stale pricing data for {self.region} ({age.total_seconds() / 3600:.0f}h old), "
+                      f"refreshing in the background")
+                self._refresh_in_background()
+                return cached_pricing
 
         print(f"🔄 Fetching fresh pricing data for {self.region}...")
 
         try:
-            pricing_data = {
-                "region": self.region,
-                "ec2": self.fetch_ec2_pricing(),
-                "fargate": self.fetch_fargate_pricing(),
-                "eks": self.fetch_eks_pricing(),
-                "load_balancer": self.fetch_load_balancer_pricing(),
-                "storage": self.fetch_storage_pricing(),
-                "data_transfer": self.fetch_data_transfer_pricing(),
-                "last_updated": datetime.now().isoformat()
-            }
-
-            # Save to cache
-            self.save_pricing_cache(pricing_data)
+            pricing_data = self.refresh_pricing()
             print(f"✅ Fresh pricing data fetched and cached")
 
             return pricing_data
@@ -205,6 +476,21 @@ class AWSPricingFetcher:
             print(f"❌ Error fetching pricing data: {e}")
             return self._get_fallback_pricing()
 
+    def _download_pricing(self) -> Dict[str, Any]:
+        """Fetch every service's pricing (the slow part of a refresh)"""
+        self._load_offer_prices()
+        return {
+            "region": self.region,
+            "ec2": self.fetch_ec2_pricing(),
+            "fargate": self.fetch_fargate_pricing(),
+            "eks": self.fetch_eks_pricing(),
+            "load_balancer": self.fetch_load_balancer_pricing(),
+            "rds": self.fetch_rds_pricing(),
+            "storage": self.fetch_storage_pricing(),
+            "data_transfer": self.fetch_data_transfer_pricing(),
+            "last_updated": datetime.now().isoformat()
+        }
+
     def _get_fallback_ec2_pricing(self) -> Dict[str, Any]:
         """Fallback EC2 pricing if API fails"""
         return {
@@ -252,6 +538,7 @@ class AWSPricingFetcher:
             "fargate": self._get_fallback_fargate_pricing(),
             "eks": {"cluster_hourly": 0.10, "cluster_monthly": 73.0},
             "load_balancer": self._get_fallback_alb_pricing(),
+            "rds": self.fetch_rds_pricing(),
             "storage": self._get_fallback_ebs_pricing(),
             "data_transfer": self.fetch_data_transfer_pricing(),
             "last_updated": datetime.now().isoformat(),
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Budget-Constrained Capacity Planner
+Finds how many concurrent users ECS or EKS can serve within a monthly budget
+"""
+
+import json
+from dataclasses import dataclass, field, asdict, replace
+from typing import Dict, List, Any, Optional, Tuple
+from yaml_terragrunt_analyzer import YAMLBasedAnalyzer, AnalysisScenario, EnvironmentAnalysis
+
+INFRASTRUCTURES = ("ecs", "eks")
+
+@dataclass
+class CapacityPlan:
+    """Largest load that fits one budget, and the configuration that serves it"""
+    infrastructure: str
+    region: str
+    budget: float
+    peak_load_multiplier: float
+    max_expected_users: int
+    peak_users: int
+    monthly_cost: float
+    limiting_factor: str
+    scaling_capacity: Dict[str, Any] = field(default_factory=dict)
+    cost_breakdown: Dict[str, float] = field(default_factory=dict)
+
+class CapacityPlanner:
+    """Inverts the ``YAMLBasedAnalyzer`` cost model.
+
+    Monthly cost never decreases as expected users grow, so the largest
+    affordable user count is found by galloping from a known-affordable point
+    until the budget is exceeded and then bisecting the bracket. Budgets are
+    solved in ascending order, each one starting from the previous answer, and
+    every cost evaluation is memoized, so a batch of budgets costs little more
+    than its largest member.
+    """
+
+    def __init__(self, analyzer: YAMLBasedAnalyzer, max_users: int = 1_000_000):
+        if analyzer.traffic_trace:
+            raise ValueError("Capacity planning needs the static cost model; create the analyzer without a traffic trace")
+        self.analyzer = analyzer
+        self.max_users = max_users
+        self.evaluations = 0
+        self._cache: Dict[Tuple[str, int, float], EnvironmentAnalysis] = {}
+
+    def _analyze(self, infrastructure: str, scenario: AnalysisScenario, users: int,
+                 multiplier: float) -> EnvironmentAnalysis:
+        key = (infrastructure, users, multiplier)
+        if key not in self._cache:
+            self.evaluations += 1
+            sized = replace(scenario, expected_users=users, peak_load_multiplier=multiplier)
+            if infrastructure == "ecs":
+                self._cache[key] = self.analyzer.analyze_ecs_environment(sized)
+            else:
+                self._cache[key] = self.analyzer.analyze_eks_environment(sized)
+        return self._cache[key]
+
+    def _user_limit(self, infrastructure: str, multiplier: float) -> Tuple[int, str]:
+        """Upper bound on expected users independent of budget"""
+        if infrastructure == "eks":
+            # The cluster autoscaler cap bounds the peak the cluster can absorb
+            peak_capacity = self.analyzer.EKS_MAX_NODES * self.analyzer.EKS_USERS_PER_NODE
+            return min(self.max_users, int(peak_capacity / multiplier)), "capacity"
+        return self.max_users, "search_limit"
+
+    def solve(self, budgets: List[float], infrastructure: str = "ecs", scenario_name: str = "medium_app",
+              multipliers: Optional[List[float]] = None) -> List[CapacityPlan]:
+        """Plan every budget x peak multiplier combination, in input order of budgets"""
+        if infrastructure not in INFRASTRUCTURES:
+            raise ValueError(f"Unknown infrastructure '{infrastructure}', expected one of {INFRASTRUCTURES}")
+
+        scenario = self.analyzer.get_scenario(scenario_name)
+        multipliers = multipliers or [scenario.peak_load_multiplier]
+        order = sorted(range(len(budgets)), key=lambda i: budgets[i])
+        plans: Dict[Tuple[int, float], CapacityPlan] = {}
+
+        for multiplier in multipliers:
+            limit, limit_reason = self._user_limit(infrastructure, multiplier)
+
+            def cost(users: int) -> float:
+                return self._analyze(infrastructure, scenario, users, multiplier).monthly_cost
+
+            affordable = 0  # Largest user count known to fit the previous (smaller) budget
+            for index in order:
+                budget = budgets[index]
+                if limit < 1 or cost(1) > budget:
+                    plans[(index, multiplier)] = self._plan(infrastructure, scenario, budget, multiplier, 0,
+                                                            "budget" if limit >= 1 else limit_reason)
+                    continue
+
+                low = max(1, affordable)
+                if cost(limit) <= budget:
+                    low, reason = limit, limit_reason
+                else:
+                    # Gallop to bracket the crossing, then bisect: cost(low) <= budget < cost(high)
+                    step = max(1, low)
+                    high = min(limit, low + step)
+                    while cost(high) <= budget:
+                        low = high
+                        step *= 2
+                        high = min(limit, low + step)
+                    while high - low > 1:
+                        middle = (low + high) // 2
+                        if cost(middle) <= budget:
+                            low = middle
+                        else:
+                            high = middle
+                    reason = "budget"
+
+                affordable = low
+                plans[(index, multiplier)] = self._plan(infrastructure, scenario, budget, multiplier, low, reason)
+
+        return [plans[(index, multiplier)] for index in range(len(budgets)) for multiplier in multipliers]
+
+    def _plan(self, infrastructure: str, scenario: AnalysisScenario, budget: float, multiplier: float,
+              users: int, reason: str) -> CapacityPlan:
+        analysis = self._analyze(infrastructure, scenario, users, multiplier) if users else None
+        return CapacityPlan(
+            infrastructure=infrastructure,
+            region=self.analyzer.region,
+            budget=budget,
+            peak_load_multiplier=multiplier,
+            max_expected_users=users,
+            peak_users=int(users * multiplier),
+            monthly_cost=analysis.monthly_cost if analysis else 0.0,
+            limiting_factor=reason,
+            scaling_capacity=dict(analysis.scaling_capacity) if analysis else {},
+            cost_breakdown=dict(analysis.cost_breakdown) if analysis else {}
+        )
+
+def main():
+    """Answer "how many users fit in $X/month" for a batch of budgets"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Budget-constrained capacity planning for ECS and EKS")
+    parser.add_argument("budgets", nargs="+", type=float, help="Monthly budgets in USD")
+    parser.add_argument("--config", default="analyzer-config.yaml", help="YAML configuration file")
+    parser.add_argument("--scenario", choices=["medium_app", "large_app"], default="medium_app", help="Scenario providing task/node sizing")
+    parser.add_argument("--infrastructure", choices=INFRASTRUCTURES + ("both",), default="both", help="Platform to plan for")
+    parser.add_argument("--multiplier", type=float, action="append", help="Peak load multiplier (repeatable, default: scenario value)")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--calibration", help="Users per task / node measured by load_generator.py")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    try:
+        planner = CapacityPlanner(YAMLBasedAnalyzer(args.config, args.region, calibration=args.calibration))
+        infrastructures = INFRASTRUCTURES if args.infrastructure == "both" else (args.infrastructure,)
+        plans = []
+        for infrastructure in infrastructures:
+            plans.extend(planner.solve(args.budgets, infrastructure, args.scenario, args.multiplier))
+
+        print(f"\n🎯 Capacity Plan ({args.scenario}, {args.region})")
+        print(f"=" * 50)
+        for plan in plans:
+            scaling = plan.scaling_capacity
+            units = (f"{scaling.get('min_tasks', scaling.get('min_nodes', 0))}-"
+                     f"{scaling.get('max_tasks', scaling.get('max_nodes', 0))}")
+            print(f"{plan.infrastructure.upper()}  ${plan.budget:>9.2f}  x{plan.peak_load_multiplier:<4g}"
+                  f"  {plan.max_expected_users:>8} users (peak {plan.peak_users})"
+                  f"  ${plan.monthly_cost:>9.2f}/month  units {units:<7} limited by {plan.limiting_factor}")
+        print(f"\n🔢 {planner.evaluations} cost model evaluations")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump([asdict(plan) for plan in plans], f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Chat API Stand-in
+Single-process asyncio server emulating the json-server mock API (test/mock-api/db.json) plus the video token endpoint
+"""
+
+import asyncio
+import json
+import secrets
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_DB = Path(__file__).parent.parent / "test" / "mock-api" / "db.json"
+MAX_REQUEST_BYTES = 64 * 1024
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class ChatStore:
+    """In-memory copy of db.json with the json-server query subset the load generator uses.
+
+    Messages are kept per room and in insertion (timestamp) order, so
+    ``?roomId=&_sort=timestamp&_order=desc&_limit=`` is a slice rather than a
+    scan of every message ever posted during a ramp.
+    """
+
+    def __init__(self, db: Dict[str, Any]):
+        self.rooms: Dict[str, Dict[str, Any]] = {room["id"]: dict(room) for room in db.get("rooms", [])}
+        self.users: Dict[str, Dict[str, Any]] = {user["id"]: dict(user) for user in db.get("users", [])}
+        self.messages: Dict[str, List[Dict[str, Any]]] = {room_id: [] for room_id in self.rooms}
+        self.message_count = 0
+        for message in sorted(db.get("messages", []), key=lambda message: message.get("timestamp", "")):
+            self._append(dict(message))
+
+    @classmethod
+    def from_file(cls, db_file: str) -> "ChatStore":
+        with open(db_file, 'r') as f:
+            return cls(json.load(f))
+
+    def _append(self, message: Dict[str, Any]):
+        self.message_count += 1
+        message.setdefault("id", str(self.message_count))
+        self.messages.setdefault(str(message.get("roomId")), []).append(message)
+
+    def list_messages(self, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        room_id = query.get("roomId")
+        if room_id is not None:
+            messages = self.messages.get(room_id, [])
+        else:
+            messages = [message for room in self.messages.values() for message in room]
+        if query.get("_order") == "desc":
+            messages = messages[::-1]
+        limit = query.get("_limit")
+        return messages[:int(limit)] if limit else list(messages)
+
+    def add_message(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        message = {"roomId": str(body.get("roomId")), "text": str(body.get("text", "")),
+                   "author": body.get("author", "Anonymous"),
+                   "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")}
+        self._append(message)
+        return message
+
+    def handle(self, method: str, path: str, query: Dict[str, str],
+               body: Optional[Dict[str, Any]]) -> Tuple[int, Any]:
+        """Route one request to (status, JSON body)"""
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            return 404, {}
+        collection, item = parts[0], parts[1] if len(parts) > 1 else None
+
+        if collection == "rooms":
+            if method == "GET":
+                if item is None:
+                    return 200, list(self.rooms.values())
+                return (200, self.rooms[item]) if item in self.rooms else (404, {})
+            if method == "PATCH" and item in self.rooms:
+                self.rooms[item].update(body or {})
+                return 200, self.rooms[item]
+        elif collection == "messages":
+            if method == "GET":
+                return 200, self.list_messages(query)
+            if method == "POST":
+                if not body or str(body.get("roomId")) not in self.rooms:
+                    return 400, {"error": "roomId must name an existing room"}
+                return 201, self.add_message(body)
+        elif collection == "users" and method == "GET":
+            if item is None:
+                return 200, list(self.users.values())
+            return (200, self.users[item]) if item in self.users else (404, {})
+        elif collection == "create-token" and method == "POST":
+            # Same contract as the Twilio function behind REACT_APP_TWILIO_TOKEN_URL
+            identity = (body or {}).get("identity", "guest")
+            return 200, {"token": secrets.token_urlsafe(96), "identity": identity, "room": (body or {}).get("room")}
+        else:
+            return 404, {}
+        return 405, {}
+
+class ChatAPIServer:
+    """HTTP/1.1 keep-alive server over a ``ChatStore`` on one event loop.
+
+    One process on one loop stands for one application instance with one
+    vCPU, which is what the load generator's per-instance numbers assume.
+    ``service_time_ms`` adds CPU work to every request for matching a
+    heavier real backend.
+    """
+
+    def __init__(self, store: ChatStore, host: str = "127.0.0.1", port: int = 0, service_time_ms: float = 0.0):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.service_time_ms = service_time_ms
+        self.stats = {"connections": 0, "requests": 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "ChatAPIServer":
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _busy(self):
+        deadline = time.perf_counter() + self.service_time_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_REQUEST_BYTES:
+                    break
+                body = json.loads(await reader.readexactly(length)) if length else None
+
+                url = urlsplit(target)
+                if self.service_time_ms:
+                    self._busy()
+                status, payload = self.store.handle(method, url.path, dict(parse_qsl(url.query)), body)
+                self.stats["requests"] += 1
+
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def _serve(args):
+    server = await ChatAPIServer(ChatStore.from_file(args.db), args.host, args.port, args.service_time_ms).start()
+    # The load generator reads this line to find the port when started with --port 0
+    print(f"🛰️ Chat API stand-in listening on {server.url}", flush=True)
+    await server.serve_forever()
+
+def main():
+    """Serve the chat API stand-in"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the chat app's mock API for load generation")
+    parser.add_argument("--db", default=str(DEFAULT_DB), help="json-server database file")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address")
+    parser.add_argument("--port", type=int, default=3001, help="Listen port (0: any free port)")
+    parser.add_argument("--service-time-ms", type=float, default=0.0, help="CPU time added to every request")
+
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Cost Rules
+Declarative cost rules (predicates on environment inputs → cost items) compiled into a flat evaluation plan
+"""
+
+import ast
+import hashlib
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable, FrozenSet
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_RULES_FILE = Path(__file__).parent / "cost_rules.json"
+
+# Functions rule expressions may call; everything else (attributes, lambdas, comprehensions) is rejected
+FUNCTIONS = {"len": len, "min": min, "max": max, "abs": abs, "round": round, "sum": sum,
+             "float": float, "int": int, "bool": bool}
+
+if sys.version_info >= (3, 8):
+    _CONSTANT_NODES: Tuple[type, ...] = (ast.Constant,)
+else:
+    _CONSTANT_NODES = (ast.Num, ast.Str, ast.NameConstant, ast.Constant)
+_INDEX_NODES: Tuple[type, ...] = () if sys.version_info >= (3, 9) else (ast.Index,)
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Tuple, ast.List, ast.Subscript, ast.Call, ast.IfExp,
+    ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot
+) + _CONSTANT_NODES + _INDEX_NODES
+
+_GLOBALS = dict(FUNCTIONS, __builtins__={})
+
+class _Scope(dict):
+    """Names visible to rule expressions; inputs an environment does not set read as None"""
+
+    def __missing__(self, key):
+        # Locals are looked up before globals, so the functions are resolved here too
+        return FUNCTIONS.get(key)
+
+@dataclass
+class CompiledExpression:
+    """One validated rule expression, compiled to a code object"""
+    source: str
+    where: str
+    code: Any
+    names: FrozenSet[str]
+
+    def run(self, scope: Dict[str, Any]) -> Any:
+        try:
+            return eval(self.code, _GLOBALS, scope)
+        except Exception as e:
+            raise ValueError(f"{self.where}: {self.source!r} failed for environment "
+                             f"{scope.get('environment')!r}: {type(e).__name__}: {e}")
+
+def compile_expression(source: Any, where: str) -> CompiledExpression:
+    """Validate and compile one expression; JSON numbers, booleans and null are taken literally"""
+    text = source if isinstance(source, str) else repr(source)
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"{where}: invalid expression {text!r} ({e.msg})")
+
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{where}: {type(node).__name__} is not allowed in {text!r}")
+        if isinstance(node, ast.Name):
+            if node.id.startswith("_"):
+                raise ValueError(f"{where}: name {node.id!r} is not allowed in {text!r}")
+            names.add(node.id)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"{where}: only {', '.join(sorted(FUNCTIONS))} can be called in {text!r}")
+        elif isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, str, bool, type(None))):
+            raise ValueError(f"{where}: constant {node.value!r} is not allowed in {text!r}")
+
+    return CompiledExpression(text, where, compile(tree, where, "eval"), frozenset(names - FUNCTIONS.keys()))
+
+@dataclass
+class PlanStep:
+    """One entry of the flat plan: where guard ``guard`` holds, bill ``component``
+    (with its ``arguments`` value slots) or the fixed ``item`` costing value slot ``cost``"""
+    rule: str
+    guard: Optional[int]
+    component: Optional[str] = None
+    arguments: Dict[str, int] = field(default_factory=dict)
+    item: Optional[str] = None
+    cost: Optional[int] = None
+
+@dataclass
+class PlanBatch:
+    """Definitions and predicates of a batch of environments, run once per environment"""
+    scopes: List[_Scope]
+    guards: List[List[bool]]   # guards[slot][environment]
+
+    def select(self, indices: List[int]) -> "PlanBatch":
+        """The batch restricted to the environments at ``indices``"""
+        return PlanBatch([self.scopes[index] for index in indices],
+                         [[column[index] for index in indices] for column in self.guards])
+
+@dataclass
+class CostPlan:
+    """Compiled cost rules.
+
+    Evaluation is column-wise over a batch of environments: each definition and
+    each distinct predicate runs once per environment, then the steps run in
+    rule order, evaluating cost formulas and component arguments only for the
+    environments whose guard holds. Steps update the breakdown in order, so a
+    later item of the same name replaces an earlier one.
+    """
+    definitions: List[Tuple[str, CompiledExpression]]
+    guards: List[CompiledExpression]
+    values: List[CompiledExpression]
+    steps: List[PlanStep]
+    digest: str
+
+    @property
+    def inputs(self) -> List[str]:
+        """Names the rules read from the environment (definitions excluded)"""
+        names = set()
+        for expression in [expression for _, expression in self.definitions] + self.guards + self.values:
+            names.update(expression.names)
+        return sorted(names - {name for name, _ in self.definitions})
+
+    def _scopes(self, contexts: List[Dict[str, Any]]) -> List[_Scope]:
+        scopes = [_Scope(context) for context in contexts]
+        for name, expression in self.definitions:
+            for scope in scopes:
+                scope[name] = expression.run(scope)
+        return scopes
+
+    def prepare(self, contexts: List[Dict[str, Any]]) -> PlanBatch:
+        """Run the definitions and every predicate over a batch of environments"""
+        scopes = self._scopes(contexts)
+        return PlanBatch(scopes, [[bool(guard.run(scope)) for scope in scopes] for guard in self.guards])
+
+    def components(self, batch: PlanBatch, index: int) -> List[str]:
+        """Components the rules bill for environment ``index`` of a prepared batch, without pricing them"""
+        return [step.component for step in self.steps
+                if step.component is not None and (step.guard is None or batch.guards[step.guard][index])]
+
+    def components_for(self, context: Dict[str, Any]) -> List[str]:
+        """Components the rules bill for one environment, without pricing them"""
+        return self.components(self.prepare([context]), 0)
+
+    def evaluate(self, environments: List[Tuple[Dict[str, Any], Any]],
+                 components: Dict[str, Callable[..., Dict[str, float]]],
+                 batch: Optional[PlanBatch] = None) -> List[Dict[str, float]]:
+        """Cost breakdowns of a batch of ``(context, subject)`` pairs; ``components[name]``
+        is called with the subject and the step's arguments. ``batch`` is the pairs'
+        ``prepare``d definitions and predicates, when the caller already has them."""
+        if batch is None:
+            batch = self.prepare([context for context, _ in environments])
+        scopes, guards = batch.scopes, batch.guards
+        values: List[Dict[int, Any]] = [{} for _ in scopes]
+        breakdowns: List[Dict[str, float]] = [{} for _ in scopes]
+
+        def value(slot: int, index: int) -> Any:
+            if slot not in values[index]:
+                values[index][slot] = self.values[slot].run(scopes[index])
+            return values[index][slot]
+
+        everyone = range(len(scopes))
+        for step in self.steps:
+            selected = everyone if step.guard is None else [index for index in everyone if guards[step.guard][index]]
+            for index in selected:
+                if step.component is not None:
+                    arguments = {name: value(slot, index) for name, slot in step.arguments.items()}
+                    breakdowns[index].update(components[step.component](environments[index][1], **arguments))
+                else:
+                    breakdowns[index][step.item] = float(value(step.cost, index))
+        return breakdowns
+
+    def describe(self) -> List[str]:
+        """The plan as text, one line per definition, guard and step"""
+        lines = [f"define {name} = {expression.source}" for name, expression in self.definitions]
+        lines += [f"guard g{index}: {guard.source}" for index, guard in enumerate(self.guards)]
+        for step in self.steps:
+            guard = "always" if step.guard is None else f"g{step.guard}"
+            if step.component is not None:
+                arguments = ", ".join(f"{name}={self.values[slot].source}" for name, slot in step.arguments.items())
+                action = f"component {step.component}({arguments})"
+            else:
+                action = f"item {step.item!r} = {self.values[step.cost].source}"
+            lines.append(f"[{step.rule}] {guard} → {action}")
+        return lines
+
+def load_rules(rules_file: Optional[str] = None) -> Dict[str, Any]:
+    """Read a rules file (JSON, or YAML with PyYAML); the default rule set when none is given"""
+    path = Path(rules_file) if rules_file else DEFAULT_RULES_FILE
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError("PyYAML is required for YAML cost rules")
+        rules = yaml.safe_load(content)
+    else:
+        rules = json.loads(content)
+    if not isinstance(rules, dict) or not isinstance(rules.get("rules"), list):
+        raise ValueError(f"{path}: expected an object with a 'rules' list")
+    return rules
+
+def compile_rules(rules: Dict[str, Any], components: Optional[Iterable[str]] = None) -> CostPlan:
+    """Compile a rule set once. Identical predicates and formulas share one slot;
+    ``components`` (if given) are the names items may bill through."""
+    known = set(components) if components is not None else None
+    definitions = []
+    guards: List[CompiledExpression] = []
+    values: List[CompiledExpression] = []
+    guard_slots: Dict[str, int] = {}
+    value_slots: Dict[str, int] = {}
+    steps = []
+
+    def slot(source: Any, where: str, slots: Dict[str, int], compiled: List[CompiledExpression]) -> int:
+        expression = compile_expression(source, where)
+        if expression.source not in slots:
+            slots[expression.source] = len(compiled)
+            compiled.append(expression)
+        return slots[expression.source]
+
+    define = rules.get("define", {})
+    if not isinstance(define, dict):
+        raise ValueError("'define' must map names to expressions")
+    for name, source in define.items():
+        if not name.isidentifier() or name.startswith("_") or name in FUNCTIONS:
+            raise ValueError(f"define: {name!r} is not a usable name")
+        definitions.append((name, compile_expression(source, f"define {name}")))
+
+    for number, rule in enumerate(rules["rules"], 1):
+        if not isinstance(rule, dict) or not isinstance(rule.get("items"), list) or not rule["items"]:
+            raise ValueError(f"rule {number}: expected an object with a non-empty 'items' list")
+        name = str(rule.get("name", f"rule {number}"))
+
+        for item in rule["items"]:
+            where = f"rule '{name}'"
+            conditions = [str(condition) for condition in (rule.get("when"), item.get("when")) if condition is not None]
+            if len(conditions) > 1:
+                conditions = [" and ".join(f"({condition})" for condition in conditions)]
+            guard = slot(conditions[0], f"{where} when", guard_slots, guards) if conditions else None
+
+            if "component" in item:
+                component = item["component"]
+                if known is not None and component not in known:
+                    raise ValueError(f"{where}: unknown component {component!r} (known: {', '.join(sorted(known))})")
+                arguments = {argument: slot(source, f"{where} {component}.{argument}", value_slots, values)
+                             for argument, source in (item.get("args") or {}).items()}
+                steps.append(PlanStep(name, guard, component=component, arguments=arguments))
+            elif "item" in item and "cost" in item:
+                cost = slot(item["cost"], f"{where} '{item['item']}'", value_slots, values)
+                steps.append(PlanStep(name, guard, item=str(item["item"]), cost=cost))
+            else:
+                raise ValueError(f"{where}: items need either 'component' or 'item' and 'cost'")
+
+    digest = hashlib.sha1(json.dumps(rules, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return CostPlan(definitions, guards, values, steps, digest)
+
+def main():
+    """Compile a rules file and print its evaluation plan"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile cost rules and show the evaluation plan")
+    parser.add_argument("rules", nargs="?", help=f"Rules file (default: {DEFAULT_RULES_FILE.name})")
+
+    args = parser.parse_args()
+
+    try:
+        plan = compile_rules(load_rules(args.rules))
+        print(f"📐 Cost rules: {args.rules or DEFAULT_RULES_FILE}")
+        print(f"   {len(plan.definitions)} definitions, {len(plan.guards)} guards, "
+              f"{len(plan.values)} formulas, {len(plan.steps)} steps (digest {plan.digest[:12]})")
+        print(f"   Inputs read: {', '.join(plan.inputs)}")
+        for line in plan.describe():
+            print(f"   • {line}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Terragrunt Dependency Scheduler
+Orders Terragrunt units by their dependency blocks and analyzes each ready level in parallel
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from terraform_module_analyzer import HCLExpression, parse_hcl_file
+
+_FIND_IN_PARENT_FOLDERS = re.compile(r'^find_in_parent_folders\(\s*(?:"([^"]*)")?\s*\)$')
+_TERRAGRUNT_DIR = re.compile(r'^"\$\{get_terragrunt_dir\(\)\}/?([^"$]*)"$')
+
+@dataclass
+class DependencyBlock:
+    """A ``dependency "name"`` block: the unit it reads outputs from and its mock outputs"""
+    name: str
+    config_path: Optional[str]
+    mock_outputs: Dict[str, Any] = field(default_factory=dict)
+
+class DependencyOutputs(dict):
+    """Outputs one dependency block resolves to; ``mocked`` names the keys only its
+    ``mock_outputs`` provided although the upstream unit produced outputs"""
+
+    def __init__(self, *args, mocked=frozenset(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mocked = frozenset(mocked)
+
+@dataclass
+class TerragruntUnit:
+    """A directory with a terragrunt.hcl and what it depends on"""
+    name: str
+    path: str
+    dependencies: Dict[str, DependencyBlock] = field(default_factory=dict)
+    ordering_paths: List[str] = field(default_factory=list)   # ``dependencies { paths = [...] }``
+
+    @property
+    def key(self) -> str:
+        return str(Path(self.path).resolve())
+
+    def mock_outputs(self) -> Dict[str, Dict[str, Any]]:
+        """Outputs of every dependency as declared by its ``mock_outputs``"""
+        return {name: dict(dependency.mock_outputs) for name, dependency in self.dependencies.items()}
+
+@dataclass
+class ScheduleReport:
+    """Levels a DAG run executed and where its time went"""
+    levels: List[List[str]]
+    durations: Dict[str, float]
+    wall_seconds: float
+    critical_path: List[str]
+    critical_path_seconds: float
+    workers: int
+
+    @property
+    def unit_seconds(self) -> float:
+        return sum(self.durations.values())
+
+class DependencyCycleError(ValueError):
+    """The dependency blocks of the units form a cycle"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Dependency cycle: {' → '.join(cycle)}")
+
+def _resolve_path(value: Any, base_dir: Path, unit_dir: Path) -> Optional[str]:
+    """Directory named by a ``config_path`` / ``paths`` entry, None when it is not static"""
+    if isinstance(value, HCLExpression):
+        match = _TERRAGRUNT_DIR.match(value.strip())
+        return str((unit_dir / match.group(1)).resolve()) if match else None
+    if isinstance(value, str):
+        return str((base_dir / value).resolve())
+    return None
+
+def _included_files(unit_dir: Path, config) -> List[Path]:
+    """Files pulled in by ``include`` blocks (literal paths and ``find_in_parent_folders``)"""
+    files = []
+    for include in config.find_blocks("include"):
+        path = include.attributes.get("path")
+        if isinstance(path, HCLExpression):
+            match = _FIND_IN_PARENT_FOLDERS.match(path.strip())
+            if not match:
+                continue
+            name = match.group(1) or "terragrunt.hcl"
+            found = next((parent / name for parent in unit_dir.parents if (parent / name).is_file()), None)
+            if found:
+                files.append(found)
+        elif isinstance(path, str) and (unit_dir / path).is_file():
+            files.append((unit_dir / path).resolve())
+    return files
+
+def parse_unit(unit_dir: str) -> TerragruntUnit:
+    """Read the dependency and dependencies blocks of a unit and of the files it includes.
+
+    Blocks in the unit's own terragrunt.hcl take precedence over included ones
+    of the same name; relative paths are resolved against the declaring file.
+    """
+    directory = Path(unit_dir).resolve()
+    unit = TerragruntUnit(name=Path(unit_dir).name, path=str(unit_dir))
+    terragrunt_file = directory / "terragrunt.hcl"
+    if not terragrunt_file.is_file():
+        return unit
+
+    config = parse_hcl_file(str(terragrunt_file))
+    sources = [(included, parse_hcl_file(str(included))) for included in _included_files(directory, config)]
+    sources.append((terragrunt_file, config))
+
+    for source_file, block in sources:
+        for dependency in block.find_blocks("dependency"):
+            if not dependency.labels:
+                continue
+            mock_outputs = dependency.attributes.get("mock_outputs")
+            unit.dependencies[dependency.labels[0]] = DependencyBlock(
+                name=dependency.labels[0],
+                config_path=_resolve_path(dependency.attributes.get("config_path"), source_file.parent, directory),
+                mock_outputs=mock_outputs if isinstance(mock_outputs, dict) else {}
+            )
+        for dependencies in block.find_blocks("dependencies"):
+            for path in dependencies.attributes.get("paths") or []:
+                resolved = _resolve_path(path, source_file.parent, directory)
+                if resolved:
+                    unit.ordering_paths.append(resolved)
+    return unit
+
+class DependencyGraph:
+    """DAG of units; edges point from a unit to the units it depends on.
+
+    Dependencies on directories outside the graph are not edges: their
+    outputs come from ``mock_outputs`` alone.
+    """
+
+    def __init__(self, units: List[TerragruntUnit]):
+        self.units: Dict[str, TerragruntUnit] = {unit.key: unit for unit in units}
+        self.upstream: Dict[str, List[str]] = {}
+        for key, unit in self.units.items():
+            targets = [dependency.config_path for dependency in unit.dependencies.values()] + unit.ordering_paths
+            self.upstream[key] = sorted({target for target in targets if target in self.units})
+
+    def levels(self) -> List[List[str]]:
+        """Topological levels: every unit comes after all of its dependencies"""
+        remaining = {key: set(upstream) for key, upstream in self.upstream.items()}
+        levels = []
+        while remaining:
+            ready = sorted(key for key, upstream in remaining.items() if not upstream)
+            if not ready:
+                raise DependencyCycleError(self._find_cycle(remaining))
+            levels.append(ready)
+            for key in ready:
+                del remaining[key]
+            for upstream in remaining.values():
+                upstream.difference_update(ready)
+        return levels
+
+    def _find_cycle(self, remaining: Dict[str, set]) -> List[str]:
+        """One cycle among the units that could not be scheduled, as unit names"""
+        path: List[str] = []
+        on_path: Dict[str, int] = {}
+        key = min(remaining)
+        while key not in on_path:
+            on_path[key] = len(path)
+            path.append(key)
+            key = min(remaining[key])
+        cycle = path[on_path[key]:] + [key]
+        return [self.units[key].name for key in cycle]
+
+    def critical_path(self, durations: Dict[str, float]) -> Tuple[List[str], float]:
+        """Longest chain of dependent units by duration (the lower bound on wall time)"""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for level in self.levels():
+            for key in level:
+                before = max(self.upstream[key], key=lambda upstream: finish[upstream], default=None)
+                previous[key] = before
+                finish[key] = durations.get(key, 0.0) + (finish[before] if before else 0.0)
+        if not finish:
+            return [], 0.0
+
+        key = max(finish, key=finish.get)
+        total = finish[key]
+        chain = []
+        while key:
+            chain.append(self.units[key].name)
+            key = previous[key]
+        return list(reversed(chain)), total
+
+def run_dag(graph: DependencyGraph,
+            analyze: Callable[[TerragruntUnit, Dict[str, Dict[str, Any]]], Tuple[Any, Dict[str, Any]]],
+            workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Exception], ScheduleReport]:
+    """Run ``analyze(unit, dependency_outputs) -> (result, outputs)`` level by level.
+
+    The units of a level run in parallel on up to ``workers`` threads. Each
+    unit receives the outputs of its dependencies: the upstream unit's
+    outputs over its ``mock_outputs``, or the mock outputs alone when the
+    upstream unit is outside the graph or failed. Each is a ``DependencyOutputs``
+    whose ``mocked`` keys the upstream unit did not output. Returns the results
+    and errors by unit key and the schedule report.
+    """
+    levels = graph.levels()
+    workers = max(1, workers or os.cpu_count() or 1)
+    results: Dict[str, Any] = {}
+    outputs: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, Exception] = {}
+    durations: Dict[str, float] = {}
+
+    def run(key: str):
+        unit = graph.units[key]
+        dependency_outputs = {}
+        for name, dependency in unit.dependencies.items():
+            upstream = outputs.get(dependency.config_path)
+            if upstream is None:
+                dependency_outputs[name] = DependencyOutputs(dependency.mock_outputs)
+            else:
+                dependency_outputs[name] = DependencyOutputs(dependency.mock_outputs,
+                                                             mocked=dependency.mock_outputs.keys() - upstream.keys())
+                dependency_outputs[name].update(upstream)
+        started = time.perf_counter()
+        try:
+            results[key], outputs[key] = analyze(unit, dependency_outputs)
+        except Exception as e:
+            errors[key] = e
+        finally:
+            durations[key] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level in levels:
+            # Finish the whole level before releasing its dependents
+            list(executor.map(run, level))
+    wall_seconds = time.perf_counter() - started
+
+    critical_path, critical_path_seconds = graph.critical_path(durations)
+    report = ScheduleReport(
+        levels=[[graph.units[key].name for key in level] for level in levels],
+        durations=durations,
+        wall_seconds=wall_seconds,
+        critical_path=critical_path,
+        critical_path_seconds=critical_path_seconds,
+        workers=workers
+    )
+    return results, errors, report
+
+def main():
+    """Show the dependency levels of the units under a directory"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Order Terragrunt units by their dependency blocks")
+    parser.add_argument("root", nargs="?", default="../terragrunt/environments", help="Directory containing the units")
+
+    args = parser.parse_args()
+
+    units = [parse_unit(str(path.parent)) for path in sorted(Path(args.root).rglob("terragrunt.hcl"))
+             if path.parent != Path(args.root)]
+    graph = DependencyGraph(units)
+    try:
+        levels = graph.levels()
+    except DependencyCycleError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🕸️ {len(units)} units in {len(levels)} levels")
+    for index, level in enumerate(levels):
+        print(f"   {index}: {', '.join(graph.units[key].name for key in level)}")
+    for unit in units:
+        for dependency in unit.dependencies.values():
+            target = "mock outputs only" if dependency.config_path not in graph.units else Path(dependency.config_path).name
+            print(f"   {unit.name} → {dependency.name} ({target})")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Firestore Load Model
+Streams chat event traces into hourly Firestore document reads, writes and egress, and projects the monthly bill
+"""
+
+import csv
+import json
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # The stdlib kernel gives identical results, about 25% slower overall
+    np = None
+
+# Event kinds; "create" is a message to the rooms collection
+MESSAGE, JOIN, LEAVE, LISTENERS = 0, 1, 2, 3
+EVENT_KINDS = {"message": MESSAGE, "join": JOIN, "leave": LEAVE, "listeners": LISTENERS, "create": MESSAGE}
+ROOMS_COLLECTION = "*"   # Room name of the rooms collection (the room list listener of Leftpart.js)
+TRACE_COLUMNS = ("timestamp", "event", "room", "value")
+
+# Columns of the per-room and per-hour tables
+LISTENERS_COLUMN, DOCS_COLUMN, DOC_BYTES_COLUMN, ROOM_WRITES_COLUMN = 0, 1, 2, 3
+ROOM_COLUMNS, HOUR_COLUMNS = 6, 4
+
+HOURS_PER_MONTH = 730
+DAYS_PER_MONTH = HOURS_PER_MONTH / 24
+BYTES_PER_GB = 1024 ** 3
+
+# Firestore list prices (multi-region) and the daily free quota
+FIRESTORE_PRICING = {
+    "reads_per_100k": 0.06,
+    "writes_per_100k": 0.18,
+    "egress_per_gb": 0.12,
+    "free_reads_per_day": 50_000,
+    "free_writes_per_day": 20_000,
+    "free_egress_gb_per_month": 10.0
+}
+
+@dataclass
+class HourlyLoad:
+    """Firestore load of one hour of the trace"""
+    hour: int
+    writes: float
+    fanout_reads: float
+    join_reads: float
+    egress_gb: float
+
+    @property
+    def reads(self) -> float:
+        return self.fanout_reads + self.join_reads
+
+@dataclass
+class RoomLoad:
+    """Firestore load caused by one room (or the rooms collection)"""
+    room: str
+    writes: float
+    fanout_reads: float
+    join_reads: float
+
+    @property
+    def listeners_per_write(self) -> float:
+        return self.fanout_reads / self.writes if self.writes else 0.0
+
+@dataclass
+class FirestoreLoadReport:
+    """Totals, hourly load, the rooms with the most fan-out and the monthly projection"""
+    events: int
+    start: Optional[str]
+    hours: List[HourlyLoad]
+    rooms: List[RoomLoad]
+    monthly: Dict[str, float]
+    monthly_cost: Dict[str, float]
+    backend: str
+    elapsed_seconds: float
+
+    @property
+    def writes(self) -> float:
+        return sum(hour.writes for hour in self.hours)
+
+    @property
+    def fanout_reads(self) -> float:
+        return sum(hour.fanout_reads for hour in self.hours)
+
+    @property
+    def join_reads(self) -> float:
+        return sum(hour.join_reads for hour in self.hours)
+
+    @property
+    def fanout_share(self) -> float:
+        reads = self.fanout_reads + self.join_reads
+        return self.fanout_reads / reads if reads else 0.0
+
+    def fanout_dominated_hours(self) -> List[HourlyLoad]:
+        """Hours in which listener fan-out caused most of the document reads"""
+        return [hour for hour in self.hours if hour.fanout_reads > hour.join_reads]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "start": self.start,
+            "backend": self.backend,
+            "elapsed_seconds": self.elapsed_seconds,
+            "totals": {"writes": self.writes, "fanout_reads": self.fanout_reads, "join_reads": self.join_reads,
+                       "fanout_share": self.fanout_share,
+                       "egress_gb": sum(hour.egress_gb for hour in self.hours)},
+            "monthly": self.monthly,
+            "monthly_cost": self.monthly_cost,
+            "fanout_dominated_hours": len(self.fanout_dominated_hours()),
+            "hours": [dict(asdict(hour), reads=hour.reads) for hour in self.hours],
+            "rooms": [dict(asdict(room), listeners_per_write=room.listeners_per_write) for room in self.rooms]
+        }
+
+def _timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.strip().replace("Z", "+00:00")).timestamp()
+
+def _split_csv(lines: List[str], columns: List[Optional[int]], width: int) -> Tuple[List[str], ...]:
+    """Columns of a chunk of CSV lines.
+
+    Lines that all have ``width`` fields are split with one ``str.split`` over
+    the joined chunk and sliced per column, which keeps the per-event Python
+    work out of the hot path; anything else is split line by line.
+    """
+    text = "".join(lines)
+    if not text.endswith("\n"):
+        text += "\n"
+    fields = text.replace("\r", "").replace("\n", ",").split(",")
+    if len(fields) != width * len(lines) + 1:
+        rows = [line.rstrip("\r\n").split(",") for line in lines if line.strip()]
+        return tuple([row[column] if column is not None and column < len(row) else "" for row in rows]
+                     for column in columns)
+    return tuple(fields[column:-1:width] if column is not None else [""] * len(lines) for column in columns)
+
+def iter_event_chunks(trace_file: str, chunk_size: int = 250_000) -> Iterator[Tuple[List[str], List[str],
+                                                                                       List[str], List[str]]]:
+    """Stream (timestamps, events, rooms, values) columns from a CSV or NDJSON trace, one chunk at a time.
+
+    CSV: ``timestamp,event,room,value`` columns (that order when there is no
+    header). NDJSON: one object per line with those fields. Timestamps are
+    epoch seconds or ISO 8601; ``value`` is the message size in bytes for
+    messages and the listener count for ``listeners`` events.
+    """
+    path = Path(trace_file)
+    ndjson = path.suffix.lower() in (".ndjson", ".jsonl")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if not ndjson:
+            header = next(csv.reader([f.readline()]), [])
+            if "event" in header:
+                columns = [header.index(name) if name in header else None for name in TRACE_COLUMNS]
+                width = len(header)
+            else:
+                # No header row: the first line is already data
+                columns, width = list(range(len(TRACE_COLUMNS))), len(header)
+                f.seek(0)
+
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            if ndjson:
+                records = [json.loads(line) for line in lines if line.strip()]
+                yield ([str(record["timestamp"]) for record in records], [record["event"] for record in records],
+                       [str(record["room"]) for record in records],
+                       [str(record.get("value") or "") for record in records])
+            else:
+                yield _split_csv(lines, columns, width)
+
+def _rows(table: Any, count: int, width: int) -> List[List[float]]:
+    """A per-room or per-hour table as lists of ``width`` floats, grown to ``count`` rows"""
+    if not isinstance(table, list):
+        table = table.tolist()
+    table.extend([0.0] * width for _ in range(count - len(table)))
+    return table
+
+def _array(table: Any, count: int, width: int):
+    """The same table as a float64 array of at least ``count`` rows"""
+    if isinstance(table, list):
+        table = np.array(table, dtype=np.float64).reshape(-1, width)
+    if len(table) < count:
+        table = np.concatenate([table, np.zeros((count - len(table), width))])
+    return table
+
+class FirestoreLoadModel:
+    """Document reads, writes and egress of the chat app's Firestore listeners.
+
+    The app keeps a snapshot listener on the messages of every room it shows
+    (service.js ``roomNameExists`` / ``idExists``) and one on the rooms
+    collection. Firestore bills:
+
+    - one write per message;
+    - one read per listener of the room for each new message (the fan-out);
+    - on ``join``, one read per document the unlimited query returns (at
+      least one), plus the room document.
+
+    Listener counts and message history are carried per room across chunks.
+    A ``listeners`` event resets a room's count, e.g. from client telemetry
+    or for listeners opened before the trace started. The per-room and
+    per-hour tables stay arrays between numpy chunks (lists between stdlib
+    ones), so a chunk costs time in its events, not in the rooms seen so far.
+    """
+
+    def __init__(self, message_bytes: float = 300.0, room_doc_bytes: float = 200.0):
+        self.message_bytes = message_bytes
+        self.room_doc_bytes = room_doc_bytes
+        self.room_names: List[str] = [ROOMS_COLLECTION]
+        self._room_ids: Dict[str, int] = {ROOMS_COLLECTION: 0}
+        # Per room: current listeners, documents, their bytes, then writes, fan-out reads and join reads
+        self.room_state: Any = [[0.0] * ROOM_COLUMNS]
+        # Per hour: writes, fan-out reads, join reads and egress bytes
+        self.hourly: Any = []
+        self.events = 0
+        self.start: Optional[float] = None
+
+    def _room_id(self, name: str) -> int:
+        room_id = self._room_ids.get(name)
+        if room_id is None:
+            room_id = self._room_ids[name] = len(self.room_names)
+            self.room_names.append(name)
+        return room_id
+
+    def _hours(self, first_timestamp: float):
+        if self.start is None:
+            self.start = first_timestamp - first_timestamp % 3600
+        return self.start
+
+    def _kinds_and_rooms(self, events: List[str], rooms: List[str]) -> Tuple[Iterator[int], Iterator[int]]:
+        """Event kinds and room ids, as lazy maps over the chunk (the room ids are interned first)"""
+        unknown = set(events) - set(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event {min(unknown)!r}; expected one of {', '.join(EVENT_KINDS)}")
+        if "create" in events:
+            rooms = [ROOMS_COLLECTION if event == "create" else room for event, room in zip(events, rooms)]
+        for room in set(rooms) - set(self._room_ids):
+            self._room_id(room)
+        return map(EVENT_KINDS.__getitem__, events), map(self._room_ids.__getitem__, rooms)
+
+    def _columns_python(self, timestamps: List[str], events: List[str], rooms: List[str],
+                        values: List[str]) -> Tuple[List[int], List[int], List[int], List[float]]:
+        """Hour offsets, event kinds, room ids and values of a chunk"""
+        try:
+            seconds = list(map(float, timestamps))
+        except ValueError:
+            seconds = [_timestamp(timestamp) for timestamp in timestamps]
+        start = self._hours(seconds[0])
+        hours = [int((second - start) // 3600) for second in seconds]
+        if min(hours) < 0:
+            raise ValueError("Trace events must be in time order")
+        kinds, room_ids = self._kinds_and_rooms(events, rooms)
+        return hours, list(kinds), list(room_ids), [float(value) if value else 0.0 for value in values]
+
+    def _columns_numpy(self, timestamps: List[str], events: List[str], rooms: List[str], values: List[str]):
+        """``_columns_python`` as arrays, with the hour arithmetic done on whole columns"""
+        try:
+            seconds = np.array(timestamps, dtype=np.float64)
+        except ValueError:
+            seconds = np.array([_timestamp(timestamp) for timestamp in timestamps])
+        start = self._hours(float(seconds[0]))
+        hours = ((seconds - start) // 3600).astype(np.int64)
+        if hours.min() < 0:
+            raise ValueError("Trace events must be in time order")
+        kinds, room_ids = self._kinds_and_rooms(events, rooms)
+        count = len(timestamps)
+        return (hours, np.fromiter(kinds, np.int8, count), np.fromiter(room_ids, np.int64, count),
+                np.fromiter((float(value) if value else 0.0 for value in values), np.float64, count))
+
+    def _aggregate_python(self, hours, kinds, rooms, values):
+        message_bytes, room_doc_bytes = self.message_bytes, self.room_doc_bytes
+        state = self.room_state = _rows(self.room_state, len(self.room_names), ROOM_COLUMNS)
+        hourly = self.hourly = _rows(self.hourly, max(hours) + 1, HOUR_COLUMNS)
+
+        for hour, kind, room, value in zip(hours, kinds, rooms, values):
+            totals, row = state[room], hourly[hour]
+            if kind == MESSAGE:
+                size = value if value > 0 else message_bytes
+                live = totals[0] if totals[0] > 0 else 0.0
+                totals[1] += 1
+                totals[2] += size
+                totals[3] += 1
+                totals[4] += live
+                row[0] += 1
+                row[1] += live
+                row[3] += live * size
+            elif kind == JOIN:
+                totals[0] += 1
+                reads = (totals[1] if totals[1] > 1 else 1.0) + (room != 0)
+                totals[5] += reads
+                row[2] += reads
+                row[3] += totals[2] + (room_doc_bytes if room else 0.0)
+            elif kind == LEAVE:
+                totals[0] -= 1
+            else:
+                totals[0] = value
+
+    def _aggregate_numpy(self, hours, kinds, rooms, values):
+        """The same accounting with segmented cumulative sums over the chunk grouped by room"""
+        order = np.argsort(rooms, kind="stable")
+        h, k, r, v = hours[order], kinds[order], rooms[order], values[order]
+        index = np.arange(len(r))
+        state = self.room_state = _array(self.room_state, len(self.room_names), ROOM_COLUMNS)
+
+        start = np.ones(len(r), dtype=bool)
+        start[1:] = r[1:] != r[:-1]
+        first = np.maximum.accumulate(np.where(start, index, 0))
+        is_message, is_join, is_set = k == MESSAGE, k == JOIN, k == LISTENERS
+
+        # Listeners after each event: the value at the last anchor (segment start or reset) plus later deltas
+        delta = is_join.astype(np.float64) - (k == LEAVE)
+        running = np.cumsum(delta)
+        anchor = np.maximum.accumulate(np.where(start | is_set, index, 0))
+        base = np.where(is_set, v, state[r, LISTENERS_COLUMN] + delta)
+        listeners = base[anchor] + running - running[anchor]
+
+        # Documents (and bytes) already in the room before each event
+        counts = is_message.astype(np.float64)
+        sizes = np.where(is_message, np.where(v > 0, v, self.message_bytes), 0.0)
+        count_sum, size_sum = np.cumsum(counts), np.cumsum(sizes)
+        docs_before = state[r, DOCS_COLUMN] + (count_sum - counts) - (count_sum[first] - counts[first])
+        bytes_before = state[r, DOC_BYTES_COLUMN] + (size_sum - sizes) - (size_sum[first] - sizes[first])
+
+        not_collection = r != 0
+        fanout = np.where(is_message, np.maximum(listeners, 0.0), 0.0)
+        join_reads = np.where(is_join, np.maximum(docs_before, 1.0) + not_collection, 0.0)
+        egress = fanout * sizes + np.where(is_join, bytes_before + not_collection * self.room_doc_bytes, 0.0)
+
+        hour_count = int(h.max()) + 1
+        hourly = self.hourly = _array(self.hourly, hour_count, HOUR_COLUMNS)
+        for column, weights in enumerate((counts, fanout, join_reads, egress)):
+            hourly[:hour_count, column] += np.bincount(h, weights=weights, minlength=hour_count)
+
+        # Only the rooms of this chunk change: one segment (and one row) each
+        segments, touched = index[start], r[start]
+        end = np.ones(len(r), dtype=bool)
+        end[:-1] = start[1:]
+        state[touched, LISTENERS_COLUMN] = listeners[end]
+        for column, weights in enumerate((counts, sizes, counts, fanout, join_reads), DOCS_COLUMN):
+            state[touched, column] += np.add.reduceat(weights, segments)
+
+    def add_chunk(self, timestamps: List[str], events: List[str], rooms: List[str], values: List[str],
+                  vectorized: bool = True):
+        """Account one chunk of trace events (in time order)"""
+        if not timestamps:
+            return
+        if vectorized and np is not None:
+            self._aggregate_numpy(*self._columns_numpy(timestamps, events, rooms, values))
+        else:
+            self._aggregate_python(*self._columns_python(timestamps, events, rooms, values))
+        self.events += len(timestamps)
+
+    def report(self, pricing: Optional[Dict[str, float]] = None, top_rooms: int = 10,
+               elapsed_seconds: float = 0.0, backend: str = "") -> FirestoreLoadReport:
+        """Hourly load, the rooms with the most fan-out and the bill projected to a 730 hour month"""
+        pricing = dict(FIRESTORE_PRICING, **(pricing or {}))
+        hours = [HourlyLoad(hour, writes, fanout, joins, egress / BYTES_PER_GB)
+                 for hour, (writes, fanout, joins, egress) in enumerate(_rows(self.hourly, 0, HOUR_COLUMNS))]
+        room_state = _rows(self.room_state, len(self.room_names), ROOM_COLUMNS)
+        rooms = sorted((RoomLoad(name, *totals[ROOM_WRITES_COLUMN:]) for name, totals in zip(self.room_names, room_state)
+                        if any(totals[ROOM_WRITES_COLUMN:])), key=lambda room: (-room.fanout_reads, room.room))[:top_rooms]
+
+        scale = HOURS_PER_MONTH / len(hours) if hours else 0.0
+        monthly = {
+            "reads": sum(hour.reads for hour in hours) * scale,
+            "writes": sum(hour.writes for hour in hours) * scale,
+            "egress_gb": sum(hour.egress_gb for hour in hours) * scale
+        }
+        monthly_cost = {
+            "Firestore Reads": max(0.0, monthly["reads"] - pricing["free_reads_per_day"] * DAYS_PER_MONTH)
+                               / 100_000 * pricing["reads_per_100k"],
+            "Firestore Writes": max(0.0, monthly["writes"] - pricing["free_writes_per_day"] * DAYS_PER_MONTH)
+                                / 100_000 * pricing["writes_per_100k"],
+            "Firestore Egress": max(0.0, monthly["egress_gb"] - pricing["free_egress_gb_per_month"])
+                                * pricing["egress_per_gb"]
+        }
+        return FirestoreLoadReport(
+            events=self.events,
+            start=datetime.fromtimestamp(self.start).isoformat() if self.start is not None else None,
+            hours=hours,
+            rooms=rooms,
+            monthly=monthly,
+            monthly_cost=monthly_cost,
+            backend=backend or ("numpy" if np is not None else "python"),
+            elapsed_seconds=elapsed_seconds
+        )
+
+def analyze_trace(trace_file: str, chunk_size: int = 250_000, message_bytes: float = 300.0,
+                  pricing: Optional[Dict[str, float]] = None, top_rooms: int = 10,
+                  vectorized: bool = True) -> FirestoreLoadReport:
+    """Stream a chat event trace through ``FirestoreLoadModel``"""
+    model = FirestoreLoadModel(message_bytes)
+    started = time.perf_counter()
+    for chunk in iter_event_chunks(trace_file, chunk_size):
+        model.add_chunk(*chunk, vectorized=vectorized)
+    backend = "numpy" if vectorized and np is not None else "python"
+    return model.report(pricing, top_rooms, time.perf_counter() - started, backend)
+
+def main():
+    """Analyze a chat event trace"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Firestore reads, writes and egress of a chat event trace")
+    parser.add_argument("trace", help="CSV/NDJSON trace of timestamp,event,room,value "
+                                      "(events: message, join, leave, listeners, create)")
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="Events per chunk")
+    parser.add_argument("--message-bytes", type=float, default=300.0, help="Message size when the trace has none")
+    parser.add_argument("--pricing", help="JSON file overriding Firestore prices and free quotas")
+    parser.add_argument("--top", type=int, default=10, help="Rooms to show by fan-out reads")
+    parser.add_argument("--no-vectorize", action="store_true", help="Use the stdlib kernel even with numpy")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    try:
+        pricing = None
+        if args.pricing:
+            with open(args.pricing, 'r') as f:
+                pricing = json.load(f)
+        report = analyze_trace(args.trace, args.chunk_size, args.message_bytes, pricing, args.top,
+                               vectorized=not args.no_vectorize)
+
+        rate = report.events / report.elapsed_seconds if report.elapsed_seconds else 0.0
+        print(f"\n🔥 Firestore load of {report.events:,} events over {len(report.hours)} hours "
+              f"({report.elapsed_seconds:.1f}s, {rate:,.0f} events/s, {report.backend})")
+        print(f"   Writes: {report.writes:,.0f}  Reads: {report.fanout_reads + report.join_reads:,.0f} "
+              f"({report.fanout_share:.0%} listener fan-out)")
+
+        peak = max(report.hours, key=lambda hour: hour.reads, default=None)
+        if peak:
+            print(f"   Peak hour {peak.hour}: {peak.reads:,.0f} reads, {peak.writes:,.0f} writes, "
+                  f"{peak.egress_gb:.2f} GB egress")
+        dominated = report.fanout_dominated_hours()
+        print(f"   Fan-out dominates the reads in {len(dominated)} of {len(report.hours)} hours")
+
+        print(f"\n📡 Rooms by fan-out reads")
+        for room in report.rooms:
+            print(f"   {room.room:<24} {room.writes:>12,.0f} writes  {room.fanout_reads:>14,.0f} fan-out reads "
+                  f"({room.listeners_per_write:,.1f}/write)  {room.join_reads:>12,.0f} join reads")
+
+        print(f"\n💰 Projected monthly cost")
+        print(f"   {report.monthly['reads']:>16,.0f} reads      ${report.monthly_cost['Firestore Reads']:>10,.2f}")
+        print(f"   {report.monthly['writes']:>16,.0f} writes     ${report.monthly_cost['Firestore Writes']:>10,.2f}")
+        print(f"   {report.monthly['egress_gb']:>16,.1f} GB egress  ${report.monthly_cost['Firestore Egress']:>10,.2f}")
+        print(f"   Total: ${sum(report.monthly_cost.values()):,.2f}/month")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report.to_dict(), f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Instance Catalog
+Sorted range index over EC2 and RDS instance types for vCPU / memory / price queries
+"""
+
+import heapq
+import re
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Any, Iterable, Optional, Tuple, Union
+from aws_pricing_fetcher import EC2_INSTANCE_SPECS, RDS_INSTANCE_SPECS
+
+_INSTANCE_NAME = re.compile(r'^(?:db\.)?(([a-z]+)(\d+)([a-z\-]*))\.')
+
+@dataclass(frozen=True)
+class InstanceOffer:
+    """One priced instance type"""
+    name: str
+    family: str
+    vcpu: float
+    memory_gb: float
+    arch: str
+    hourly: float
+    monthly: float
+
+def instance_family(name: str) -> str:
+    """Family of an instance type ("m6g.large" and "db.m6g.large" -> "m6g")"""
+    match = _INSTANCE_NAME.match(name)
+    return match.group(1) if match else name.split(".")[0]
+
+def instance_arch(name: str) -> str:
+    """CPU architecture implied by the family's attribute suffix (Graviton families carry a "g")"""
+    match = _INSTANCE_NAME.match(name)
+    return "arm64" if match and "g" in match.group(4) else "x86_64"
+
+SORT_KEYS = {
+    "price": lambda offer: (offer.hourly, offer.vcpu, offer.memory_gb, offer.name),
+    "vcpu": lambda offer: (offer.vcpu, offer.memory_gb, offer.hourly, offer.name),
+    "memory": lambda offer: (offer.memory_gb, offer.vcpu, offer.hourly, offer.name)
+}
+
+class InstanceCatalog:
+    """Range index over (vCPU, memory) with price as the usual sort key.
+
+    Offers are bucketed by vCPU count (a few dozen distinct values even for
+    the full EC2 catalog) and sorted by memory within each bucket. A query
+    bisects to the first bucket with enough vCPUs and, in each remaining
+    bucket, to the first offer with enough memory, so only matching offers
+    are touched. Each bucket also keeps suffix price minima, which answers
+    ``cheapest`` with one bisection per bucket.
+    """
+
+    def __init__(self, offers: Iterable[InstanceOffer]):
+        self.offers = sorted(offers, key=SORT_KEYS["vcpu"])
+        self._by_name = {offer.name: offer for offer in self.offers}
+        self._vcpus: List[float] = []
+        self._buckets: List[Tuple[List[float], List[InstanceOffer], List[int]]] = []
+
+        for offer in self.offers:
+            if not self._vcpus or self._vcpus[-1] != offer.vcpu:
+                self._vcpus.append(offer.vcpu)
+                self._buckets.append(([], [], []))
+            memories, bucket, _ = self._buckets[-1]
+            memories.append(offer.memory_gb)
+            bucket.append(offer)
+
+        for _, bucket, cheapest_from in self._buckets:
+            # cheapest_from[i]: index of the cheapest offer in bucket[i:]
+            cheapest_from.extend([0] * len(bucket))
+            best = len(bucket) - 1
+            for index in range(len(bucket) - 1, -1, -1):
+                if SORT_KEYS["price"](bucket[index]) < SORT_KEYS["price"](bucket[best]):
+                    best = index
+                cheapest_from[index] = best
+
+    @classmethod
+    def from_pricing(cls, section: Dict[str, Any], specs: Dict[str, Dict[str, Any]]) -> "InstanceCatalog":
+        """Catalog of one pricing section (``pricing_data["ec2"]`` or ``["rds"]``).
+
+        Hardware specs come from ``specs``, or from the pricing entry itself for
+        types that were only found in a price list offer file.
+        """
+        offers = []
+        for name, price in section.items():
+            spec = specs.get(name) or price
+            if "vcpu" not in spec or "memory_gb" not in spec:
+                continue
+            offers.append(InstanceOffer(
+                name=name,
+                family=instance_family(name),
+                vcpu=float(spec["vcpu"]),
+                memory_gb=float(spec["memory_gb"]),
+                arch=price.get("arch") or instance_arch(name),
+                hourly=float(price["hourly"]),
+                monthly=float(price["monthly"])
+            ))
+        return cls(offers)
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def get(self, name: str) -> Optional[InstanceOffer]:
+        return self._by_name.get(name)
+
+    def find_instances(self, min_vcpu: float = 0, min_mem_gb: float = 0,
+                       family: Union[str, Iterable[str], None] = None, arch: Optional[str] = None,
+                       sort: str = "price", limit: Optional[int] = None) -> List[InstanceOffer]:
+        """Instance types with at least ``min_vcpu`` vCPUs and ``min_mem_gb`` GiB, optionally
+        restricted to one or more families and an architecture, ordered by ``sort``"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        families = {family} if isinstance(family, str) else set(family) if family else None
+
+        matches = []
+        for memories, bucket, _ in self._buckets[bisect_left(self._vcpus, min_vcpu):]:
+            for offer in bucket[bisect_left(memories, min_mem_gb):]:
+                if (families is None or offer.family in families) and (arch is None or offer.arch == arch):
+                    matches.append(offer)
+
+        if limit is not None:
+            return heapq.nsmallest(limit, matches, key=SORT_KEYS[sort])
+        matches.sort(key=SORT_KEYS[sort])
+        return matches
+
+    def cheapest(self, min_vcpu: float = 0, min_mem_gb: float = 0,
+                 family: Union[str, Iterable[str], None] = None, arch: Optional[str] = None) -> Optional[InstanceOffer]:
+        """Cheapest instance type that satisfies the query"""
+        if family is not None or arch is not None:
+            matches = self.find_instances(min_vcpu, min_mem_gb, family, arch, limit=1)
+            return matches[0] if matches else None
+
+        best = None
+        for memories, bucket, cheapest_from in self._buckets[bisect_left(self._vcpus, min_vcpu):]:
+            start = bisect_left(memories, min_mem_gb)
+            if start < len(bucket):
+                candidate = bucket[cheapest_from[start]]
+                if best is None or SORT_KEYS["price"](candidate) < SORT_KEYS["price"](best):
+                    best = candidate
+        return best
+
+# Catalogs built per pricing object, which stays alive while its catalogs are cached
+_catalogs: Dict[Tuple[int, str], Tuple[Any, InstanceCatalog]] = {}
+MAX_CACHED_CATALOGS = 16
+
+def instance_catalog(pricing_data: Dict[str, Any], service: str = "ec2") -> InstanceCatalog:
+    """Catalog of the ``ec2`` or ``rds`` section of ``fetch_all_pricing()`` output, built once per pricing object"""
+    key = (id(pricing_data), service)
+    cached = _catalogs.get(key)
+    if cached is None or cached[0] is not pricing_data:
+        specs = EC2_INSTANCE_SPECS if service == "ec2" else RDS_INSTANCE_SPECS
+        cached = (pricing_data, InstanceCatalog.from_pricing(pricing_data.get(service) or {}, specs))
+        if len(_catalogs) >= MAX_CACHED_CATALOGS:
+            del _catalogs[next(iter(_catalogs))]
+        _catalogs[key] = cached
+    return cached[1]
+
+def find_instances(pricing_data: Dict[str, Any], min_vcpu: float = 0, min_mem_gb: float = 0,
+                   family: Union[str, Iterable[str], None] = None, arch: Optional[str] = None,
+                   sort: str = "price", service: str = "ec2", limit: Optional[int] = None) -> List[InstanceOffer]:
+    """``InstanceCatalog.find_instances`` over the catalog of ``pricing_data``"""
+    return instance_catalog(pricing_data, service).find_instances(min_vcpu, min_mem_gb, family, arch, sort, limit)
+
+def main():
+    """Query the instance catalog of a region"""
+    import argparse
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Find instance types by vCPU, memory, family and architecture")
+    parser.add_argument("--min-vcpu", type=float, default=0, help="Minimum vCPUs")
+    parser.add_argument("--min-mem-gb", type=float, default=0, help="Minimum memory (GiB)")
+    parser.add_argument("--family", action="append", help="Instance family, e.g. m5 (repeatable)")
+    parser.add_argument("--arch", choices=["x86_64", "arm64"], help="CPU architecture")
+    parser.add_argument("--sort", choices=list(SORT_KEYS), default="price", help="Result order")
+    parser.add_argument("--service", choices=["ec2", "rds"], default="ec2", help="Catalog to query")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum results")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+
+    args = parser.parse_args()
+
+    pricing = AWSPricingFetcher(args.region).fetch_all_pricing()
+    catalog = instance_catalog(pricing, args.service)
+    started = time.perf_counter()
+    offers = catalog.find_instances(args.min_vcpu, args.min_mem_gb, args.family, args.arch, args.sort, args.limit)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+
+    print(f"🔎 {len(offers)} of {len(catalog)} {args.service.upper()} instance types "
+          f"(≥{args.min_vcpu:g} vCPU, ≥{args.min_mem_gb:g} GiB) in {elapsed_us:.0f} µs")
+    for offer in offers:
+        print(f"   {offer.name:<16} {offer.vcpu:>5g} vCPU {offer.memory_gb:>7g} GiB  {offer.arch:<7} "
+              f"${offer.hourly:.4f}/h  ${offer.monthly:>9.2f}/month")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Kubernetes Manifest Resource Analyzer
+Sums workload requests from manifests and bin-packs the pods onto EKS worker node types
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, asdict
+from aws_pricing_fetcher import EC2_INSTANCE_SPECS
+from instance_catalog import find_instances
+from terraform_module_analyzer import TerraformModuleAnalyzer, resolve_expression
+from profiler import profiled
+
+try:
+    import yaml
+except ImportError:  # PyYAML is listed as a prerequisite but not required by the other tools
+    yaml = None
+
+WORKLOAD_KINDS = ("Deployment", "StatefulSet")
+
+# Pods every node runs regardless of workloads (aws-node, kube-proxy)
+DAEMONSET_PODS = 2
+DAEMONSET_CPU = 0.125
+DAEMONSET_MEMORY_GB = 0.15
+
+_MEMORY_SUFFIXES = {
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40,
+    "k": 10 ** 3, "K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "T": 10 ** 12,
+}
+
+@dataclass
+class WorkloadResources:
+    """Aggregated resources of one Deployment/StatefulSet"""
+    kind: str
+    name: str
+    replicas: int
+    cpu_request: float
+    memory_request_gb: float
+    cpu_limit: float
+    memory_limit_gb: float
+
+    @property
+    def total_cpu_request(self) -> float:
+        return self.cpu_request * self.replicas
+
+    @property
+    def total_memory_request_gb(self) -> float:
+        return self.memory_request_gb * self.replicas
+
+@dataclass
+class BinPackingResult:
+    """Outcome of packing all pods onto one node type"""
+    instance_type: str
+    node_count: int
+    monthly_cost: float
+    pods: int
+    cpu_utilization: float
+    memory_utilization: float
+    allocatable_cpu: float
+    allocatable_memory_gb: float
+    unschedulable_pods: int = 0
+
+def parse_cpu(quantity: Any) -> float:
+    """Convert a Kubernetes CPU quantity ("250m", "2", 0.5) to cores"""
+    if quantity is None or quantity == "":
+        return 0.0
+    text = str(quantity).strip()
+    if text.endswith("m"):
+        return float(text[:-1]) / 1000
+    return float(text)
+
+def parse_memory_gb(quantity: Any) -> float:
+    """Convert a Kubernetes memory quantity ("256Mi", "1Gi", "512M") to GiB"""
+    if quantity is None or quantity == "":
+        return 0.0
+    text = str(quantity).strip()
+    for suffix in ("Ki", "Mi", "Gi", "Ti", "k", "K", "M", "G", "T"):
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * _MEMORY_SUFFIXES[suffix] / 2 ** 30
+    return float(text) / 2 ** 30
+
+def node_allocatable(instance_type: str) -> Tuple[float, float, int]:
+    """Allocatable (cpu, memory GiB, pods) for workload pods after system reservations.
+
+    Uses the EKS AMI kube-reserved formula (CPU: 6%/1%/0.5%/0.25% tiers by
+    core, memory: 255Mi + 11Mi per max pod), the 100Mi hard eviction threshold
+    and the daemonset pods every node runs.
+    """
+    specs = EC2_INSTANCE_SPECS[instance_type]
+    vcpu, memory_gb, max_pods = specs["vcpu"], specs["memory_gb"], specs["max_pods"]
+
+    reserved_cpu = 0.06 * min(vcpu, 1) + 0.01 * min(max(vcpu - 1, 0), 1)
+    reserved_cpu += 0.005 * min(max(vcpu - 2, 0), 2) + 0.0025 * max(vcpu - 4, 0)
+    reserved_memory_gb = (255 + 11 * max_pods + 100) / 1024
+
+    return (
+        vcpu - reserved_cpu - DAEMONSET_CPU,
+        memory_gb - reserved_memory_gb - DAEMONSET_MEMORY_GB,
+        max_pods - DAEMONSET_PODS,
+    )
+
+def render_template(text: str, variables: Dict[str, Any]) -> str:
+    """Render the Terraform templatefile subset used by kubectl_path_documents"""
+    # "~}" strips the whitespace that follows a directive, including the newline
+    text = re.sub(r'~\}[ \t]*\n?', '}', text)
+
+    # Loops only generate Secret/ConfigMap data, which carries no resource requests
+    text = re.sub(r'%\{\s*for\b.*?%\{\s*endfor\s*\}', '', text, flags=re.DOTALL)
+
+    def condition(expression: str) -> bool:
+        match = re.match(r'\s*(\w+)\s*(==|!=)\s*"([^"]*)"\s*$', expression)
+        if not match:
+            return False
+        name, operator, literal = match.groups()
+        equal = str(variables.get(name, "")) == literal
+        return equal if operator == "==" else not equal
+
+    def if_block(match) -> str:
+        return match.group(2) if condition(match.group(1)) else (match.group(3) or "")
+
+    # Innermost if/else/endif first (the body may not contain another "%{ if")
+    pattern = re.compile(r'%\{\s*if\s+([^}]*)\}((?:(?!%\{\s*if).)*?)(?:%\{\s*else\s*\}((?:(?!%\{\s*if).)*?))?%\{\s*endif\s*\}', re.DOTALL)
+    while True:
+        rendered = pattern.sub(if_block, text)
+        if rendered == text:
+            break
+        text = rendered
+
+    return re.sub(r'\$\{(\w+)\}', lambda m: str(variables.get(m.group(1), m.group(0))), text)
+
+class ManifestReader:
+    """Reads Deployments and StatefulSets and sums container requests and limits"""
+
+    def read(self, manifest_file: str, variables: Optional[Dict[str, Any]] = None) -> List[WorkloadResources]:
+        """Parse a (possibly templated) multi-document manifest file"""
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return self.read_text(f.read(), variables or {})
+
+    def read_text(self, text: str, variables: Dict[str, Any]) -> List[WorkloadResources]:
+        if yaml is None:
+            print("⚠️ PyYAML not installed, skipping Kubernetes manifests")
+            return []
+
+        workloads = []
+        for index, document in enumerate(re.split(r'^---\s*$', render_template(text, variables), flags=re.MULTILINE)):
+            if "kind:" not in document:
+                continue
+            try:
+                manifest = yaml.safe_load(document)
+            except yaml.YAMLError as e:
+                print(f"⚠️ Skipping unparsable manifest document #{index}: {str(e).splitlines()[0]}")
+                continue
+            if isinstance(manifest, dict) and manifest.get("kind") in WORKLOAD_KINDS:
+                workloads.append(self._workload(manifest))
+
+        return workloads
+
+    def _workload(self, manifest: Dict[str, Any]) -> WorkloadResources:
+        spec = manifest.get("spec") or {}
+        pod_spec = (spec.get("template") or {}).get("spec") or {}
+
+        def totals(containers: List[Dict[str, Any]], section: str) -> Tuple[float, float]:
+            cpu = memory = 0.0
+            for container in containers or []:
+                resources = (container.get("resources") or {}).get(section) or {}
+                cpu += parse_cpu(resources.get("cpu"))
+                memory += parse_memory_gb(resources.get("memory"))
+            return cpu, memory
+
+        cpu_request, memory_request = totals(pod_spec.get("containers"), "requests")
+        cpu_limit, memory_limit = totals(pod_spec.get("containers"), "limits")
+
+        # Init containers run one at a time before the app containers: effective request is the max
+        for init in pod_spec.get("initContainers") or []:
+            init_cpu, init_memory = totals([init], "requests")
+            cpu_request = max(cpu_request, init_cpu)
+            memory_request = max(memory_request, init_memory)
+
+        replicas = spec.get("replicas", 1)
+        return WorkloadResources(
+            kind=manifest["kind"],
+            name=(manifest.get("metadata") or {}).get("name", "unnamed"),
+            replicas=int(replicas) if str(replicas).isdigit() else 1,
+            cpu_request=cpu_request,
+            memory_request_gb=memory_request,
+            cpu_limit=cpu_limit,
+            memory_limit_gb=memory_limit,
+        )
+
+class NodeBinPacker:
+    """First-fit-decreasing packing of pods onto homogeneous node groups.
+
+    Pods of one workload are identical, so each node is filled with as many
+    copies as fit in one step; cost is O(workloads x nodes), not O(pods x nodes).
+    """
+
+    def __init__(self, pricing_data: Dict[str, Any]):
+        self.pricing_data = pricing_data
+        self.ec2_pricing = pricing_data["ec2"]
+
+    def pack(self, workloads: List[WorkloadResources], instance_type: str, min_nodes: int = 0) -> BinPackingResult:
+        """Pack every replica of every workload onto ``instance_type`` nodes"""
+        alloc_cpu, alloc_memory, alloc_pods = node_allocatable(instance_type)
+
+        # Decreasing by the dominant share of a node's allocatable resources
+        shapes = sorted(
+            ((w.cpu_request, w.memory_request_gb, w.replicas) for w in workloads if w.replicas > 0),
+            key=lambda shape: max(shape[0] / alloc_cpu, shape[1] / alloc_memory),
+            reverse=True,
+        )
+
+        free_cpu: List[float] = []
+        free_memory: List[float] = []
+        free_pods: List[int] = []
+        unschedulable = 0
+
+        def fits(node: int, cpu: float, memory: float) -> int:
+            count = free_pods[node]
+            if cpu > 0:
+                count = min(count, int((free_cpu[node] + 1e-9) // cpu))
+            if memory > 0:
+                count = min(count, int((free_memory[node] + 1e-9) // memory))
+            return count
+
+        for cpu, memory, remaining in shapes:
+            if cpu > alloc_cpu or memory > alloc_memory:
+                unschedulable += remaining
+                continue
+
+            for node in range(len(free_cpu)):
+                if not remaining:
+                    break
+                placed = min(remaining, fits(node, cpu, memory))
+                if placed:
+                    free_cpu[node] -= cpu * placed
+                    free_memory[node] -= memory * placed
+                    free_pods[node] -= placed
+                    remaining -= placed
+
+            if remaining:
+                # Open the required number of fresh nodes in one go
+                per_node = min(
+                    alloc_pods,
+                    int((alloc_cpu + 1e-9) // cpu) if cpu > 0 else alloc_pods,
+                    int((alloc_memory + 1e-9) // memory) if memory > 0 else alloc_pods,
+                )
+                new_nodes = math.ceil(remaining / per_node)
+                for i in range(new_nodes):
+                    placed = min(per_node, remaining - i * per_node)
+                    free_cpu.append(alloc_cpu - cpu * placed)
+                    free_memory.append(alloc_memory - memory * placed)
+                    free_pods.append(alloc_pods - placed)
+
+        node_count = max(len(free_cpu), min_nodes)
+        used_cpu = sum(alloc_cpu - free for free in free_cpu)
+        used_memory = sum(alloc_memory - free for free in free_memory)
+        monthly = self.ec2_pricing.get(instance_type, {"monthly": 0.0})["monthly"]
+
+        return BinPackingResult(
+            instance_type=instance_type,
+            node_count=node_count,
+            monthly_cost=monthly * node_count,
+            pods=sum(w.replicas for w in workloads) - unschedulable,
+            cpu_utilization=used_cpu / (alloc_cpu * node_count) * 100 if node_count else 0.0,
+            memory_utilization=used_memory / (alloc_memory * node_count) * 100 if node_count else 0.0,
+            allocatable_cpu=alloc_cpu,
+            allocatable_memory_gb=alloc_memory,
+            unschedulable_pods=unschedulable,
+        )
+
+    def cheapest(self, workloads: List[WorkloadResources], candidates: Optional[List[str]] = None,
+                 min_nodes: int = 0) -> Optional[BinPackingResult]:
+        """Pack onto every candidate node type and return the cheapest feasible result"""
+        if not candidates:
+            # Only node types large enough for the biggest pod, cheapest first
+            largest_cpu = max((w.cpu_request for w in workloads), default=0.0)
+            largest_memory = max((w.memory_request_gb for w in workloads), default=0.0)
+            candidates = [offer.name for offer in find_instances(self.pricing_data, largest_cpu, largest_memory)]
+        results = [self.pack(workloads, instance_type, min_nodes) for instance_type in candidates
+                   if instance_type in EC2_INSTANCE_SPECS]
+        feasible = [r for r in results if not r.unschedulable_pods]
+        return min(feasible, key=lambda r: (r.monthly_cost, r.node_count)) if feasible else None
+
+@profiled("manifest_parse")
+def load_eks_service_workloads(module_dir: str, inputs: Dict[str, Any],
+                               module_analyzer: Optional[TerraformModuleAnalyzer] = None) -> List[WorkloadResources]:
+    """Render the eks-service manifests with the module's template vars and read the workloads"""
+    module_analyzer = module_analyzer or TerraformModuleAnalyzer()
+    module = module_analyzer.load_module(module_dir)
+
+    variables = dict(module.variables)
+    variables.update({key: value for key, value in inputs.items() if key in module.variables})
+    scope = {"var": variables, "local": module.locals}
+
+    manifests = module.data_sources.get("kubectl_path_documents.manifests")
+    if not manifests:
+        return []
+    template_vars = resolve_expression(manifests.attributes.get("vars") or {}, scope)
+    template_vars = {key: value for key, value in template_vars.items() if value is not None}
+
+    pattern = str(manifests.attributes.get("pattern", "./files/manifests.yaml"))
+    manifest_file = Path(module.path) / pattern
+    if not manifest_file.exists():
+        return []
+
+    return ManifestReader().read(str(manifest_file), template_vars)
+
+def main():
+    """Pack the eks-service workloads onto candidate node types"""
+    import argparse
+    import json
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Kubernetes manifest resource model and node bin packing")
+    parser.add_argument("--module", default="../terragrunt/modules/eks-service", help="eks-service module directory")
+    parser.add_argument("--manifest", help="Plain manifest file (skips module template rendering)")
+    parser.add_argument("--replicas", type=int, help="Override the replica count template variable")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    inputs = {"replicas": args.replicas} if args.replicas else {}
+    if args.manifest:
+        workloads = ManifestReader().read(args.manifest, inputs)
+    else:
+        workloads = load_eks_service_workloads(args.module, inputs)
+
+    if not workloads:
+        print("❌ No Deployments or StatefulSets found")
+        return 1
+
+    print(f"📦 Workloads:")
+    for w in workloads:
+        print(f"   • {w.kind} {w.name}: {w.replicas}x ({w.cpu_request:g} CPU, {w.memory_request_gb:.2f} GiB requested; "
+              f"{w.cpu_limit:g} CPU, {w.memory_limit_gb:.2f} GiB limit)")
+
+    pricing = AWSPricingFetcher(args.region).fetch_all_pricing()
+    packer = NodeBinPacker(pricing)
+    results = [packer.pack(workloads, t) for t in EC2_INSTANCE_SPECS if t in pricing["ec2"]]
+    results.sort(key=lambda r: (r.unschedulable_pods > 0, r.monthly_cost))
+
+    print(f"\n⚙️ Node Packing (cheapest first):")
+    for r in results:
+        note = f" ⚠️ {r.unschedulable_pods} pods do not fit" if r.unschedulable_pods else ""
+        print(f"   {r.instance_type:<11} {r.node_count:>4} nodes  ${r.monthly_cost:>9.2f}/month  "
+              f"CPU {r.cpu_utilization:5.1f}%  Mem {r.memory_utilization:5.1f}%{note}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"workloads": [asdict(w) for w in workloads], "packing": [asdict(r) for r in results]}, f, indent=2)
+        print(f"\n📄 Results saved to: {args.output}")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Chat Load Generator
+Ramps simulated chat and video-signaling users against the chat API and writes users-per-instance calibration profiles
+"""
+
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
+from k8s_manifest_analyzer import node_allocatable
+from atomic_file import atomic_write
+
+DEFAULT_STEPS = [50, 100, 200, 400, 800, 1600]
+REQUEST_TIMEOUT_SECONDS = 5.0
+_LISTENING = re.compile(r'listening on (http://\S+)')
+
+@dataclass
+class UserBehaviour:
+    """What one simulated user does, modelled on chatandvideo/src/service.js.
+
+    The app keeps Firestore snapshot listeners on the room and its messages;
+    against a REST stand-in those become polls. Video users additionally
+    fetch a token, announce themselves in the room and poll the room for
+    participant changes while the call lasts.
+    """
+    poll_interval: float = 2.0        # Seconds between message list polls (the messages listener)
+    message_interval: float = 20.0   # Mean seconds between sent messages
+    signal_interval: float = 5.0     # Seconds between room polls of a video user (the room listener)
+    video_share: float = 0.25        # Fraction of users in a video call
+    message_page: int = 50           # Messages fetched per poll
+
+@dataclass
+class StepResult:
+    """Throughput and latency while a fixed number of users was active"""
+    users: int
+    video_users: int
+    seconds: float
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    passed: bool
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 when empty)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection, as a browser tab would hold"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nContent-Length: {len(data)}\r\n"
+        if data:
+            head += "Content-Type: application/json\r\n"
+        self._writer.write(head.encode("latin-1") + b"\r\n" + data)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        return status, await self._reader.readexactly(length)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+class LoadGenerator:
+    """Closed-loop ramp: users join in steps and stay until the run ends.
+
+    Each step waits ``warmup_seconds`` for the joining users' start-up
+    traffic, then measures for ``step_seconds``. Latency is taken from the
+    time a request was due rather than when it was sent, so a client that
+    falls behind shows up as latency instead of silently sending less
+    (coordinated omission).
+    """
+
+    def __init__(self, target: str, behaviour: Optional[UserBehaviour] = None, step_seconds: float = 15.0,
+                 warmup_seconds: float = 3.0, slo_p95_ms: float = 250.0, max_error_rate: float = 0.01,
+                 seed: Optional[int] = None):
+        url = urlsplit(target)
+        self.target = target
+        self.host, self.port = url.hostname or "127.0.0.1", url.port or 80
+        self.behaviour = behaviour or UserBehaviour()
+        self.step_seconds = step_seconds
+        self.warmup_seconds = warmup_seconds
+        self.slo_p95_ms = slo_p95_ms
+        self.max_error_rate = max_error_rate
+        self.random = random.Random(seed)
+        self.rooms: List[str] = []
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._stopping = False
+
+    def _record(self, due: float, ok: bool):
+        self._latencies.append((time.perf_counter() - due) * 1000)
+        if not ok:
+            self._errors += 1
+
+    async def _call(self, connection: _Connection, due: float, method: str, path: str,
+                    body: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+        try:
+            status, data = await asyncio.wait_for(connection.request(method, path, body), REQUEST_TIMEOUT_SECONDS)
+        except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            connection.close()
+            self._record(due, False)
+            return None
+        self._record(due, status < 400)
+        return data if status < 400 else None
+
+    async def _sleep_until(self, due: float):
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _user(self, index: int, video: bool, start_delay: float):
+        behaviour = self.behaviour
+        room = self.rooms[index % len(self.rooms)]
+        connection = _Connection(self.host, self.port)
+        now = time.perf_counter() + start_delay
+        await self._sleep_until(now)
+        try:
+            # Joining: the room list, the room and its message history
+            for path in ("/rooms", f"/rooms/{room}"):
+                await self._call(connection, now, "GET", path)
+                now = time.perf_counter()
+            if video:
+                await self._call(connection, now, "POST", "/create-token", {"identity": f"user-{index}", "room": room})
+                now = time.perf_counter()
+                await self._call(connection, now, "POST", "/messages",
+                                 {"roomId": room, "text": "connected to the video room", "author": f"user-{index}"})
+
+            next_poll = time.perf_counter()
+            next_message = next_poll + self.random.expovariate(1 / behaviour.message_interval)
+            next_signal = next_poll + behaviour.signal_interval if video else float("inf")
+            while not self._stopping:
+                due = min(next_poll, next_message, next_signal)
+                await self._sleep_until(due)
+                if self._stopping:
+                    break
+                if due == next_poll:
+                    await self._call(connection, due, "GET", f"/messages?roomId={room}&_sort=timestamp"
+                                                              f"&_order=desc&_limit={behaviour.message_page}")
+                    next_poll = due + behaviour.poll_interval
+                elif due == next_message:
+                    await self._call(connection, due, "POST", "/messages",
+                                     {"roomId": room, "text": f"message from user-{index}", "author": f"user-{index}"})
+                    next_message = due + self.random.expovariate(1 / behaviour.message_interval)
+                else:
+                    await self._call(connection, due, "GET", f"/rooms/{room}")
+                    next_signal = due + behaviour.signal_interval
+        finally:
+            connection.close()
+
+    async def _run(self, steps: List[int], stop_on_breach: bool) -> List[StepResult]:
+        probe = _Connection(self.host, self.port)
+        status, data = await probe.request("GET", "/rooms")
+        probe.close()
+        if status != 200:
+            raise RuntimeError(f"{self.target}/rooms answered {status}")
+        self.rooms = [room["id"] for room in json.loads(data)] or ["1"]
+
+        results: List[StepResult] = []
+        tasks: List[asyncio.Task] = []
+        video_users = 0
+        try:
+            for users in steps:
+                for index in range(len(tasks), users):
+                    video = self.random.random() < self.behaviour.video_share
+                    video_users += video
+                    # Spread arrivals over one poll interval
+                    delay = self.random.uniform(0, self.behaviour.poll_interval)
+                    tasks.append(asyncio.ensure_future(self._user(index, video, delay)))
+
+                await asyncio.sleep(self.warmup_seconds + self.behaviour.poll_interval)
+                self._latencies, self._errors = [], 0
+                started = time.perf_counter()
+                await asyncio.sleep(self.step_seconds)
+                seconds = time.perf_counter() - started
+                latencies, errors = sorted(self._latencies), self._errors
+
+                result = StepResult(
+                    users=users, video_users=video_users, seconds=seconds, requests=len(latencies), errors=errors,
+                    throughput_rps=(len(latencies) - errors) / seconds,
+                    p50_ms=percentile(latencies, 50), p95_ms=percentile(latencies, 95),
+                    p99_ms=percentile(latencies, 99), max_ms=latencies[-1] if latencies else 0.0, passed=False
+                )
+                result.passed = bool(latencies) and result.p95_ms <= self.slo_p95_ms \
+                    and result.error_rate <= self.max_error_rate
+                results.append(result)
+                print(f"   {'✅' if result.passed else '❌'} {users:>6} users: {result.throughput_rps:>8.1f} req/s  "
+                      f"p50 {result.p50_ms:>7.1f} ms  p95 {result.p95_ms:>7.1f} ms  p99 {result.p99_ms:>7.1f} ms  "
+                      f"errors {result.error_rate:.1%}", flush=True)
+                if not result.passed and stop_on_breach:
+                    break
+        finally:
+            self._stopping = True
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._stopping = False
+        return results
+
+    def run(self, steps: List[int], stop_on_breach: bool = True) -> List[StepResult]:
+        """Ramp through ``steps`` concurrent users, stopping after the first step that breaks the SLO"""
+        return asyncio.run(self._run(sorted(steps), stop_on_breach))
+
+def calibration_profile(results: List[StepResult], generator: LoadGenerator, instance_vcpus: float = 1.0,
+                        task_vcpus: float = 2.0, node_type: str = "t3.medium",
+                        stand_in: bool = False) -> Dict[str, Any]:
+    """Per-instance capacity from a ramp, scaled to an ECS task and an EKS worker node.
+
+    Capacity is the largest step that met the SLO. When no step broke it the
+    instance was not saturated and the figures are lower bounds. Consumers
+    scale ``users_per_vcpu`` to their own task and node sizes; the ``ecs`` and
+    ``eks`` entries record it for the sizes given here.
+    """
+    passed = [result for result in results if result.passed]
+    if not passed:
+        raise ValueError(f"No step met p95 ≤ {generator.slo_p95_ms:g} ms; start the ramp lower")
+    capacity = passed[-1]
+    users_per_vcpu = capacity.users / instance_vcpus
+    allocatable_vcpus, allocatable_memory_gb = node_allocatable(node_type)[:2]
+
+    return {
+        "generated": datetime.now().isoformat(),
+        "target": generator.target,
+        "stand_in": stand_in,
+        "slo": {"p95_ms": generator.slo_p95_ms, "max_error_rate": generator.max_error_rate},
+        "behaviour": asdict(generator.behaviour),
+        "instance_vcpus": instance_vcpus,
+        "users_per_instance": capacity.users,
+        "saturated": len(passed) < len(results),
+        "users_per_vcpu": users_per_vcpu,
+        "requests_per_user_second": capacity.throughput_rps / capacity.users,
+        "ecs": {"task_vcpus": task_vcpus, "users_per_task": max(1, int(users_per_vcpu * task_vcpus))},
+        "eks": {"node_type": node_type, "allocatable_vcpus": allocatable_vcpus,
+                "allocatable_memory_gb": allocatable_memory_gb,
+                "users_per_node": max(1, int(users_per_vcpu * allocatable_vcpus))},
+        "steps": [dict(asdict(result), error_rate=result.error_rate) for result in results]
+    }
+
+def load_calibration(profile_file: str) -> Dict[str, Any]:
+    """Read a calibration profile written by this tool"""
+    with open(profile_file, 'r') as f:
+        profile = json.load(f)
+    try:
+        users_per_vcpu = float(profile["users_per_vcpu"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{profile_file} is not a calibration profile (no users_per_vcpu)")
+    if not users_per_vcpu > 0:
+        raise ValueError(f"{profile_file}: users_per_vcpu must be positive, got {users_per_vcpu:g}")
+    return profile
+
+def start_stand_in(db_file: Optional[str] = None, service_time_ms: float = 0.0) -> Tuple[subprocess.Popen, str]:
+    """Start ``chat_api_stub.py`` in its own process on a free port; returns the process and its URL"""
+    command = [sys.executable, str(Path(__file__).parent / "chat_api_stub.py"), "--port", "0",
+               "--service-time-ms", str(service_time_ms)]
+    if db_file:
+        command += ["--db", db_file]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    match = _LISTENING.search(process.stdout.readline())
+    if not match:
+        process.kill()
+        raise RuntimeError("The chat API stand-in did not start")
+    return process, match.group(1)
+
+def _raise_open_file_limit():
+    # Every simulated user holds a socket on each side of the connection
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+def main():
+    """Run a ramp and write the calibration profile"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure users per instance of the chat API with simulated users")
+    parser.add_argument("--target", help="Base URL of a running API, e.g. json-server on http://127.0.0.1:3001 "
+                                         "(default: start the bundled stand-in)")
+    parser.add_argument("--db", help="Database file for the stand-in (default: test/mock-api/db.json)")
+    parser.add_argument("--service-time-ms", type=float, default=0.0, help="CPU time the stand-in adds per request")
+    parser.add_argument("--users", type=int, nargs="+", default=DEFAULT_STEPS, help="Concurrent users of each step")
+    parser.add_argument("--step-seconds", type=float, default=15.0, help="Measured seconds per step")
+    parser.add_argument("--warmup-seconds", type=float, default=3.0, help="Unmeasured seconds after users join")
+    parser.add_argument("--slo-p95-ms", type=float, default=250.0, help="p95 latency a step must stay under")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate a step must stay under")
+    parser.add_argument("--video-share", type=float, default=0.25, help="Fraction of users in a video call")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between message polls")
+    parser.add_argument("--message-interval", type=float, default=20.0, help="Mean seconds between messages sent")
+    parser.add_argument("--signal-interval", type=float, default=5.0, help="Seconds between room polls of video users")
+    parser.add_argument("--full-ramp", action="store_true", help="Keep ramping after a step breaks the SLO")
+    parser.add_argument("--instance-vcpus", type=float, default=1.0,
+                        help="vCPUs of the measured instance (the stand-in runs on one)")
+    parser.add_argument("--task-vcpus", type=float, default=2.0, help="Fargate task size to scale users_per_task to")
+    parser.add_argument("--node-type", default="t3.medium", help="EKS worker node type to scale users_per_node to")
+    parser.add_argument("--seed", type=int, help="Random seed for arrivals and message timing")
+    parser.add_argument("--output", default="calibration_profile.json", help="Calibration profile file")
+
+    args = parser.parse_args()
+
+    _raise_open_file_limit()
+    process = None
+    try:
+        target = args.target
+        if not target:
+            process, target = start_stand_in(args.db, args.service_time_ms)
+        behaviour = UserBehaviour(args.poll_interval, args.message_interval, args.signal_interval, args.video_share)
+        generator = LoadGenerator(target, behaviour, args.step_seconds, args.warmup_seconds,
+                                  args.slo_p95_ms, args.max_error_rate, args.seed)
+
+        print(f"🚦 Ramping {', '.join(map(str, sorted(args.users)))} users against {target} "
+              f"(p95 ≤ {args.slo_p95_ms:g} ms, errors ≤ {args.max_error_rate:.0%})")
+        results = generator.run(args.users, stop_on_breach=not args.full_ramp)
+        profile = calibration_profile(results, generator, args.instance_vcpus, args.task_vcpus, args.node_type,
+                                      stand_in=process is not None)
+
+        atomic_write(args.output, json.dumps(profile, indent=2))
+
+        bound = "" if profile["saturated"] else " (not saturated: lower bound)"
+        print(f"📏 {profile['users_per_instance']} users per {args.instance_vcpus:g}-vCPU instance{bound}")
+        print(f"   ECS: {profile['ecs']['users_per_task']} users per {args.task_vcpus:g}-vCPU task")
+        print(f"   EKS: {profile['eks']['users_per_node']} users per {args.node_type} node "
+              f"({profile['eks']['allocatable_vcpus']:.2f} allocatable vCPU)")
+        print(f"📄 Calibration profile saved to: {args.output}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    exit(main())
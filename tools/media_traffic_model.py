@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+WebRTC Media Traffic Model
+Simulates video calls (size, resolution, TURN relay, P2P vs SFU) to estimate monthly egress and inter-AZ transfer
+"""
+
+import json
+import math
+import random
+from array import array
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # The stdlib sampler gives the same estimates, about 2 s per million calls
+    np = None
+
+SECONDS_PER_MONTH = 730 * 3600
+BYTES_PER_GB = 1024 ** 3
+TOPOLOGIES = ("auto", "p2p", "sfu")
+
+# Used when the pricing data predates the tiered egress keys
+DEFAULT_INTERNET_FREE_GB = 100.0
+DEFAULT_INTERNET_TIERS_GB = {"10240": 0.09, "51200": 0.085, "153600": 0.07, "inf": 0.05}
+DEFAULT_INTER_AZ_PER_GB = 0.01
+
+@dataclass
+class MediaTrafficProfile:
+    """How the video calls of the app behave.
+
+    With ``topology="auto"`` calls of up to ``p2p_max_participants`` are a
+    peer-to-peer mesh and larger ones go through an SFU, which is how most
+    WebRTC stacks (and Twilio's "go" vs group rooms) switch over.
+    """
+    call_sizes: Dict[int, float] = field(default_factory=lambda: {2: 0.55, 3: 0.2, 4: 0.12, 6: 0.08, 10: 0.05})
+    resolutions: Dict[str, float] = field(default_factory=lambda: {"360p": 0.35, "720p": 0.55, "1080p": 0.1})
+    video_kbps: Dict[str, float] = field(default_factory=lambda: {"180p": 150, "360p": 500, "720p": 1500,
+                                                                  "1080p": 3000})
+    audio_kbps: float = 40.0
+    call_minutes_median: float = 8.0   # Call durations are log-normal
+    call_minutes_sigma: float = 0.9
+    turn_relay_fraction: float = 0.15  # Participants whose media must go through TURN
+    topology: str = "auto"
+    p2p_max_participants: int = 2
+    media_azs: int = 2                 # AZs the SFU/TURN fleet spans
+    video_share: float = 0.25          # Fraction of concurrent users in a call
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> "MediaTrafficProfile":
+        unknown = set(values) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown media traffic parameters: {', '.join(sorted(unknown))}")
+        profile = cls(**values)
+        profile.call_sizes = {int(size): float(weight) for size, weight in profile.call_sizes.items()}
+        profile.validate()
+        return profile
+
+    @classmethod
+    def load(cls, profile_file: str) -> "MediaTrafficProfile":
+        with open(profile_file, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+    def validate(self):
+        if self.topology not in TOPOLOGIES:
+            raise ValueError(f"topology must be one of {', '.join(TOPOLOGIES)}")
+        if min(self.call_sizes) < 2:
+            raise ValueError("Calls need at least 2 participants")
+        missing = set(self.resolutions) - set(self.video_kbps)
+        if missing:
+            raise ValueError(f"No bitrate for resolutions: {', '.join(sorted(missing))}")
+        if not 0 <= self.turn_relay_fraction <= 1 or not 0 <= self.video_share <= 1:
+            raise ValueError("turn_relay_fraction and video_share must be between 0 and 1")
+
+    def uses_sfu(self, participants: int) -> bool:
+        if self.topology == "auto":
+            return participants > self.p2p_max_participants
+        return self.topology == "sfu"
+
+@dataclass
+class MediaTrafficEstimate:
+    """Monthly media bytes of ``calls_per_month`` calls, from ``calls_simulated`` simulated ones"""
+    concurrent_users: float
+    calls_simulated: int
+    calls_per_month: float
+    participant_hours: float
+    egress_gb: float
+    inter_az_gb: float
+    turn_relay_gb: float
+    sfu_call_share: float
+    egress_per_call_mb: Dict[str, float]
+    backend: str
+
+def _binomial(n: int, p: float) -> List[float]:
+    return [math.factorial(n) // (math.factorial(k) * math.factorial(n - k)) * p ** k * (1 - p) ** (n - k)
+            for k in range(n + 1)]
+
+def call_classes(profile: MediaTrafficProfile) -> Tuple[List[float], List[Tuple[int, bool, float, float, float]]]:
+    """Every distinct kind of call with its probability.
+
+    A class is (participants, SFU?, egress, TURN relay and inter-AZ bytes per
+    second of call). The number of relayed participants and of participants
+    on a media server outside the room's AZ are binomial, so the classes
+    enumerate the whole joint distribution exactly and a simulated call only
+    needs a class index and a duration.
+
+    - Mesh: every participant sends its stream to every other one. Only
+      streams to or from a relayed participant touch AWS, via TURN egress.
+    - SFU: each participant uploads once and receives ``n - 1`` streams,
+      all of which leave AWS. A participant on a media node in another AZ
+      than the room's SFU moves its upload and downloads across AZs.
+    """
+    size_total = sum(profile.call_sizes.values())
+    resolution_total = sum(profile.resolutions.values())
+    cross_az = (profile.media_azs - 1) / profile.media_azs if profile.media_azs > 1 else 0.0
+
+    probabilities: List[float] = []
+    classes: List[Tuple[int, bool, float, float, float]] = []
+    for n, size_weight in sorted(profile.call_sizes.items()):
+        sfu = profile.uses_sfu(n)
+        relayed_pmf = _binomial(n, profile.turn_relay_fraction)
+        remote_pmf = _binomial(n, cross_az) if sfu else [1.0]
+        for resolution, resolution_weight in sorted(profile.resolutions.items()):
+            stream = (profile.video_kbps[resolution] + profile.audio_kbps) * 1000 / 8
+            for relayed, relayed_p in enumerate(relayed_pmf):
+                for remote, remote_p in enumerate(remote_pmf):
+                    probability = (size_weight / size_total) * (resolution_weight / resolution_total) \
+                        * relayed_p * remote_p
+                    if probability == 0:
+                        continue
+                    if sfu:
+                        egress = n * (n - 1) * stream
+                        relay = relayed * n * stream
+                        inter_az = remote * n * stream
+                    else:
+                        egress = relay = (n * (n - 1) - (n - relayed) * (n - relayed - 1)) * stream
+                        inter_az = 0.0
+                    probabilities.append(probability)
+                    classes.append((n, sfu, egress, relay, inter_az))
+    return probabilities, classes
+
+def _percentiles_mb(values, mean: float) -> Dict[str, float]:
+    if np is not None:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    else:
+        values = sorted(values)
+        p50, p95, p99 = (values[min(len(values) - 1, int(len(values) * q))] for q in (0.5, 0.95, 0.99))
+    return {"mean": mean / 1e6, "p50": p50 / 1e6, "p95": p95 / 1e6, "p99": p99 / 1e6}
+
+def _simulate_numpy(probabilities, classes, samples, mu, sigma, seed, chunk_size):
+    rng = np.random.default_rng(seed)
+    p = np.asarray(probabilities) / sum(probabilities)
+    columns = np.asarray([(n, sfu, egress, relay, inter_az) for n, sfu, egress, relay, inter_az in classes])
+    totals = np.zeros(5)
+    per_call = []
+    for start in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - start)
+        picked = columns[rng.choice(len(p), size=size, p=p)]
+        seconds = rng.lognormal(mu, sigma, size)
+        weighted = picked * seconds[:, None]
+        # participant-seconds, SFU calls, egress, relay and inter-AZ bytes
+        totals += (weighted[:, 0].sum(), picked[:, 1].sum(), weighted[:, 2].sum(), weighted[:, 3].sum(),
+                   weighted[:, 4].sum())
+        per_call.append(weighted[:, 2])
+    return totals, np.concatenate(per_call)
+
+def _simulate_python(probabilities, classes, samples, mu, sigma, seed, chunk_size):
+    rng = random.Random(seed)
+    cumulative, running = [], 0.0
+    for probability in probabilities:
+        running += probability
+        cumulative.append(running)
+    indexes = range(len(classes))
+    totals = [0.0] * 5
+    per_call = array('d')
+    for start in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - start)
+        lognormal = rng.lognormvariate
+        for index in rng.choices(indexes, cum_weights=cumulative, k=size):
+            n, sfu, egress, relay, inter_az = classes[index]
+            seconds = lognormal(mu, sigma)
+            totals[0] += n * seconds
+            totals[1] += sfu
+            totals[2] += egress * seconds
+            totals[3] += relay * seconds
+            totals[4] += inter_az * seconds
+            per_call.append(egress * seconds)
+    return totals, per_call
+
+def simulate_media_traffic(profile: MediaTrafficProfile, concurrent_users: float, samples: int = 1_000_000,
+                           seed: Optional[int] = 0, chunk_size: int = 250_000) -> MediaTrafficEstimate:
+    """Monthly media traffic of ``concurrent_users`` (``video_share`` of them in calls).
+
+    ``samples`` calls are drawn in chunks (vectorized with numpy when it is
+    installed) to get the bytes per participant-second of an average call.
+    The month then holds as many calls as fill ``concurrent_users *
+    video_share`` participants around the clock.
+    """
+    if samples < 1:
+        raise ValueError("samples must be positive")
+    profile.validate()
+    probabilities, classes = call_classes(profile)
+    mu, sigma = math.log(profile.call_minutes_median * 60), profile.call_minutes_sigma
+
+    simulate = _simulate_numpy if np is not None else _simulate_python
+    totals, per_call = simulate(probabilities, classes, samples, mu, sigma, seed, chunk_size)
+    participant_seconds, sfu_calls, egress, relay, inter_az = (float(total) for total in totals)
+
+    participant_seconds_per_month = concurrent_users * profile.video_share * SECONDS_PER_MONTH
+    calls_per_month = participant_seconds_per_month / (participant_seconds / samples)
+    scale = calls_per_month / samples / BYTES_PER_GB
+
+    return MediaTrafficEstimate(
+        concurrent_users=concurrent_users,
+        calls_simulated=samples,
+        calls_per_month=calls_per_month,
+        participant_hours=participant_seconds_per_month / 3600,
+        egress_gb=egress * scale,
+        inter_az_gb=inter_az * scale,
+        turn_relay_gb=relay * scale,
+        sfu_call_share=sfu_calls / samples,
+        egress_per_call_mb=_percentiles_mb(per_call, egress / samples),
+        backend="numpy" if np is not None else "python"
+    )
+
+def internet_egress_cost(egress_gb: float, data_transfer_pricing: Dict[str, Any]) -> float:
+    """Monthly cost of ``egress_gb`` to the internet on the tiered price (after the free allowance)"""
+    free_gb = data_transfer_pricing.get("out_to_internet_free_gb", DEFAULT_INTERNET_FREE_GB)
+    tiers = sorted((float(limit), price) for limit, price in
+                   data_transfer_pricing.get("out_to_internet_tiers_gb", DEFAULT_INTERNET_TIERS_GB).items())
+    billable = max(0.0, egress_gb - free_gb)
+    cost, lower = 0.0, 0.0
+    for limit, price in tiers:
+        if billable <= lower:
+            break
+        cost += (min(billable, limit) - lower) * price
+        lower = limit
+    return cost
+
+def media_transfer_costs(estimate: MediaTrafficEstimate, data_transfer_pricing: Dict[str, Any]) -> Dict[str, float]:
+    """Cost breakdown lines for the media traffic (inter-AZ bytes are billed on both sides)"""
+    inter_az_per_gb = data_transfer_pricing.get("inter_az_per_gb", DEFAULT_INTER_AZ_PER_GB)
+    return {
+        "Data Transfer (media egress)": internet_egress_cost(estimate.egress_gb, data_transfer_pricing),
+        "Inter-AZ Media Transfer": estimate.inter_az_gb * inter_az_per_gb * 2
+    }
+
+def main():
+    """Estimate the media traffic and its transfer cost for a number of concurrent users"""
+    import argparse
+    import time
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Monthly WebRTC media egress and inter-AZ transfer of the video app")
+    parser.add_argument("--users", type=float, default=500, help="Concurrent users")
+    parser.add_argument("--profile", help="JSON file overriding MediaTrafficProfile parameters")
+    parser.add_argument("--topology", choices=TOPOLOGIES, help="Override the profile topology")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="Calls to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    try:
+        profile = MediaTrafficProfile.load(args.profile) if args.profile else MediaTrafficProfile()
+        if args.topology:
+            profile.topology = args.topology
+        started = time.perf_counter()
+        estimate = simulate_media_traffic(profile, args.users, args.samples, args.seed)
+        elapsed = time.perf_counter() - started
+        costs = media_transfer_costs(estimate, AWSPricingFetcher(args.region).fetch_all_pricing()["data_transfer"])
+
+        per_call = estimate.egress_per_call_mb
+        print(f"\n📹 Media traffic for {args.users:g} concurrent users ({profile.video_share:.0%} in calls, "
+              f"{profile.topology} topology)")
+        print(f"   {estimate.calls_simulated:,} calls simulated in {elapsed:.2f}s ({estimate.backend})")
+        print(f"   {estimate.calls_per_month:,.0f} calls/month, {estimate.participant_hours:,.0f} participant hours, "
+              f"{estimate.sfu_call_share:.0%} via SFU")
+        print(f"   Egress per call: mean {per_call['mean']:.1f} MB, p50 {per_call['p50']:.1f} MB, "
+              f"p95 {per_call['p95']:.1f} MB, p99 {per_call['p99']:.1f} MB")
+        print(f"   Internet egress: {estimate.egress_gb:>12,.1f} GB/month  ${costs['Data Transfer (media egress)']:>10,.2f}")
+        print(f"   Inter-AZ:        {estimate.inter_az_gb:>12,.1f} GB/month  ${costs['Inter-AZ Media Transfer']:>10,.2f}")
+        print(f"   TURN relayed:    {estimate.turn_relay_gb:>12,.1f} GB/month")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({"profile": asdict(profile), "estimate": asdict(estimate), "costs": costs}, f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
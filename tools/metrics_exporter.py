@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics Exporter
+Writes environment costs and analyzer runtime metrics as an OpenMetrics textfile for node_exporter
+"""
+
+from typing import Dict, List, Optional, Tuple
+from multi_repo_analyzer import service_name
+from terragrunt_environment_analyzer import priced_from_memo
+from atomic_file import atomic_write
+
+METRIC_PREFIX = "terragrunt_analyzer"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+class MetricsFamily:
+    """One gauge family and its samples"""
+
+    def __init__(self, name: str, help_text: str, unit: str = ""):
+        self.name = name
+        self.help_text = help_text
+        self.unit = unit
+        self.samples: List[Tuple[Dict[str, str], float]] = []
+
+    def add(self, value: float, **labels) -> None:
+        self.samples.append((labels, value))
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} gauge"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        for labels, value in self.samples:
+            lines.append(f"{self.name}{_format_labels(labels)} {float(value)!r}")
+        return lines
+
+def build_metrics(environments: list, region: str, run_duration_seconds: float,
+                  cache_hits: Optional[int] = None, cache_misses: Optional[int] = None,
+                  pricing_cache_age_seconds: Optional[float] = None,
+                  finished_at: Optional[float] = None,
+                  environments_analyzed: Optional[int] = None) -> List[MetricsFamily]:
+    """Metric families for one analyzer run, straight from its ``TerragruntEnvironment`` results.
+
+    ``environments_analyzed`` overrides the count when only aggregated totals are
+    available (multi-repository runs), in which case ``environments`` may be empty.
+    """
+    cost = MetricsFamily("environment_monthly_cost", "Estimated monthly cost in USD by environment and service")
+    for environment in environments:
+        env_region = environment.inputs.get("aws_region", region)
+        by_service: Dict[str, float] = {}
+        for item, item_cost in environment.cost_breakdown.items():
+            service = service_name(item)
+            by_service[service] = by_service.get(service, 0.0) + item_cost
+        for service, service_cost in by_service.items():
+            cost.add(service_cost, env=environment.name, service=service, region=env_region)
+
+    families = [cost]
+
+    duration = MetricsFamily(f"{METRIC_PREFIX}_run_duration_seconds", "Wall time of the last analyzer run", "seconds")
+    duration.add(run_duration_seconds)
+    families.append(duration)
+
+    analyzed = MetricsFamily(f"{METRIC_PREFIX}_environments_analyzed", "Environments analyzed by the last run")
+    analyzed.add(len(environments) if environments_analyzed is None else environments_analyzed)
+    families.append(analyzed)
+
+    if environments_analyzed is None:
+        memo = MetricsFamily(f"{METRIC_PREFIX}_environments_priced_from_memo",
+                             "Environments of the last run whose costs came from the cost memo")
+        memo.add(priced_from_memo(environments))
+        families.append(memo)
+
+    if cache_hits is not None and cache_misses is not None:
+        lookups = cache_hits + cache_misses
+        ratio = MetricsFamily(f"{METRIC_PREFIX}_parse_cache_hit_ratio", "Share of module loads served from the parse cache",
+                              "ratio")
+        ratio.add(cache_hits / lookups if lookups else 0.0)
+        families.append(ratio)
+
+    if pricing_cache_age_seconds is not None:
+        age = MetricsFamily(f"{METRIC_PREFIX}_pricing_cache_age_seconds", "Age of the pricing data used by the run",
+                            "seconds")
+        age.add(pricing_cache_age_seconds, region=region)
+        families.append(age)
+
+    if finished_at is not None:
+        finished = MetricsFamily(f"{METRIC_PREFIX}_last_run_timestamp_seconds", "Unix time the last run finished",
+                                 "seconds")
+        finished.add(finished_at)
+        families.append(finished)
+
+    return families
+
+def render_openmetrics(families: List[MetricsFamily]) -> str:
+    lines = []
+    for family in families:
+        lines.extend(family.render())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+def write_textfile(families: List[MetricsFamily], output_file: str) -> str:
+    """Write the metrics atomically: node_exporter never sees a partially written file"""
+    return atomic_write(output_file, render_openmetrics(families), mode=0o644, fsync=True)
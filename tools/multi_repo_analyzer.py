@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Multi-Repository Terragrunt Cost Aggregator
+Analyzes many Terragrunt roots on worker processes and reduces them into one combined report
+"""
+
+import contextlib
+import heapq
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional, Tuple
+from pricing_table import attach_pricing_table, published_pricing_table
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+TOP_ENVIRONMENTS = 20
+
+@dataclass
+class CostAggregate:
+    """Running totals of analyzed environments; mergeable, independent of how many were added"""
+    repositories: int = 0
+    environments: int = 0
+    total_monthly_cost: float = 0.0
+    by_service: Dict[str, float] = field(default_factory=dict)
+    by_region: Dict[str, float] = field(default_factory=dict)
+    by_tier: Dict[str, float] = field(default_factory=dict)
+    by_repository: Dict[str, float] = field(default_factory=dict)
+    top_environments: List[Tuple[float, str, str]] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def add_environment(self, repository: str, environment) -> None:
+        """Fold one ``TerragruntEnvironment`` into the totals"""
+        cost = environment.estimated_monthly_cost
+        self.environments += 1
+        self.total_monthly_cost += cost
+        for service, service_cost in environment.cost_breakdown.items():
+            _add(self.by_service, service_name(service), service_cost)
+        _add(self.by_region, environment.inputs.get("aws_region", "unknown"), cost)
+        _add(self.by_tier, environment_tier(environment.name), cost)
+        _add(self.by_repository, repository, cost)
+        self._keep_top((cost, repository, environment.name))
+
+    def merge(self, other: "CostAggregate") -> None:
+        """Fold a partial aggregate (e.g. one repository from a worker) into this one"""
+        self.repositories += other.repositories
+        self.environments += other.environments
+        self.total_monthly_cost += other.total_monthly_cost
+        for mine, theirs in ((self.by_service, other.by_service), (self.by_region, other.by_region),
+                             (self.by_tier, other.by_tier), (self.by_repository, other.by_repository)):
+            for key, cost in theirs.items():
+                _add(mine, key, cost)
+        for entry in other.top_environments:
+            self._keep_top(tuple(entry))
+        self.errors.extend(other.errors)
+
+    def _keep_top(self, entry: Tuple[float, str, str]) -> None:
+        # Min-heap of the most expensive environments, bounded so memory does not grow with the input
+        if len(self.top_environments) < TOP_ENVIRONMENTS:
+            heapq.heappush(self.top_environments, entry)
+        else:
+            heapq.heappushpop(self.top_environments, entry)
+
+def _add(totals: Dict[str, float], key: str, cost: float) -> None:
+    totals[key] = totals.get(key, 0.0) + cost
+
+def service_name(cost_item: str) -> str:
+    """Service of a cost breakdown item, without its sizing suffix ("NAT Gateways (2x)" -> "NAT Gateways")"""
+    return re.sub(r"\s*\([^)]*\)$", "", cost_item)
+
+def environment_tier(environment_name: str) -> str:
+    """Production / staging / development tier of an environment name"""
+    name = environment_name.lower()
+    if name.startswith("prod"):
+        return "production"
+    if name.startswith("stag") or name in ("stage", "uat", "preprod"):
+        return "staging"
+    return "development"
+
+def load_manifest(manifest_file: str) -> List[str]:
+    """Terragrunt roots listed in a manifest.
+
+    Plain text (one path per line, ``#`` comments) or JSON/YAML holding a list
+    of paths or ``{"repositories": [{"path": ...}, ...]}``. Relative paths are
+    resolved against the manifest's directory.
+    """
+    manifest = Path(manifest_file)
+    content = manifest.read_text(encoding='utf-8')
+
+    if manifest.suffix.lower() in (".json", ".yaml", ".yml"):
+        if manifest.suffix.lower() == ".json":
+            data = json.loads(content)
+        elif yaml is not None:
+            data = yaml.safe_load(content)
+        else:
+            raise ImportError("PyYAML is required for YAML manifests")
+        if isinstance(data, dict):
+            data = data.get("repositories", [])
+        entries = [entry["path"] if isinstance(entry, dict) else entry for entry in data or []]
+    else:
+        entries = [line.split("#", 1)[0].strip() for line in content.splitlines()]
+
+    return [str((manifest.parent / entry).resolve()) for entry in entries if entry]
+
+# Per-process analyzer: built once by the pool initializer and reused for every root the worker maps
+_worker_analyzer = None
+
+def _init_worker(region: str, pricing_table: Optional[str] = None, cost_rules: Optional[str] = None) -> None:
+    global _worker_analyzer
+    from terragrunt_environment_analyzer import TerragruntCostAnalyzer
+    _worker_analyzer = TerragruntCostAnalyzer(region, cost_rules=cost_rules)
+    if pricing_table:
+        # Attach to the parent's packed table instead of re-reading the JSON cache
+        _worker_analyzer.pricing_data = attach_pricing_table(pricing_table)
+
+def analyze_root(terragrunt_root: str, region: str = "eu-west-1") -> CostAggregate:
+    """Map step: analyze one Terragrunt root into a partial aggregate"""
+    if _worker_analyzer is None:
+        _init_worker(region)
+
+    partial = CostAggregate(repositories=1)
+    try:
+        # Progress output of the per-root analysis is not shown for many roots
+        with contextlib.redirect_stdout(io.StringIO()):
+            environments = _worker_analyzer.analyze_all_environments(terragrunt_root)
+        for environment in environments:
+            partial.add_environment(terragrunt_root, environment)
+        partial.errors.extend(f"{terragrunt_root}: {name}: {message}"
+                              for name, message in sorted(_worker_analyzer.last_errors.items()))
+    except Exception as e:
+        partial.errors.append(f"{terragrunt_root}: {e}")
+    return partial
+
+class MultiRepoAnalyzer:
+    """Maps Terragrunt roots onto a process pool and streams partial results into one aggregate"""
+
+    def __init__(self, region: str = "eu-west-1", workers: Optional[int] = None, cost_rules: Optional[str] = None):
+        self.region = region
+        self.workers = workers
+        self.cost_rules = cost_rules
+
+    def analyze(self, terragrunt_roots: Iterable[str]) -> CostAggregate:
+        """Analyze every root; at most ``2 x workers`` partials are in flight at any time"""
+        from aws_pricing_fetcher import AWSPricingFetcher
+
+        aggregate = CostAggregate()
+        roots = iter(terragrunt_roots)
+        workers = self.workers or os.cpu_count() or 1
+        window = 2 * workers
+
+        # Pricing is fetched once here and shared with every worker through one mapped file
+        pricing = AWSPricingFetcher(self.region).fetch_all_pricing()
+        with published_pricing_table(pricing) as pricing_table, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(self.region, pricing_table, self.cost_rules)) as executor:
+            pending = set()
+            while True:
+                for root in roots:
+                    pending.add(executor.submit(analyze_root, root, self.region))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partial = future.result()
+                    aggregate.merge(partial)
+                    print(f"  📊 {aggregate.repositories} repositories, {aggregate.environments} environments, "
+                          f"${aggregate.total_monthly_cost:.2f}/month so far")
+
+        return aggregate
+
+def generate_combined_report_html(aggregate: CostAggregate, region: str) -> str:
+    """HTML report of the aggregated totals"""
+    current_date = datetime.now().strftime("%B %d, %Y")
+
+    def table(title: str, totals: Dict[str, float], label: str) -> str:
+        rows = "".join(
+            f'<tr><td><strong>{key}</strong></td><td class="has-cost">${cost:.2f}</td>'
+            f'<td>{cost / aggregate.total_monthly_cost * 100 if aggregate.total_monthly_cost else 0:.1f}%</td></tr>'
+            for key, cost in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        )
+        return f'''
+    <div class="section">
+        <h2>{title}</h2>
+        <table>
+            <thead><tr><th>{label}</th><th>Monthly Cost</th><th>Share</th></tr></thead>
+            <tbody>{rows}</tbody>
+        </table>
+    </div>'''
+
+    top_rows = "".join(
+        f'<tr><td><code>{repository}</code></td><td>{name}</td><td class="has-cost">${cost:.2f}</td></tr>'
+        for cost, repository, name in sorted(aggregate.top_environments, reverse=True)
+    )
+    errors_html = ""
+    if aggregate.errors:
+        errors_html = '<div class="warning"><h3>⚠️ Errors</h3><ul>' + \
+                      "".join(f"<li>{error}</li>" for error in aggregate.errors) + "</ul></div>"
+
+    return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Multi-Repository Terragrunt Cost Analysis</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, sans-serif; margin: 40px; line-height: 1.6; color: #333; }}
+        .header {{ background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%); color: white; padding: 30px; border-radius: 10px; text-align: center; }}
+        .badge {{ background: #e74c3c; color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px; margin: 5px; }}
+        .section {{ margin: 30px 0; background: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        table {{ width: 100%; border-collapse: collapse; margin: 15px 0; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
+        th {{ background-color: #f8f9fa; font-weight: 600; }}
+        .has-cost {{ background-color: #d4edda; font-weight: bold; }}
+        .metric-box {{ background: #f8f9fa; border-radius: 8px; padding: 20px; margin: 10px; text-align: center; flex: 1; }}
+        .metric-value {{ font-size: 24px; font-weight: bold; color: #2c3e50; }}
+        .metric-label {{ font-size: 14px; color: #666; margin-top: 5px; }}
+        .flex {{ display: flex; gap: 15px; flex-wrap: wrap; }}
+        .warning {{ background: #fff3cd; border: 1px solid #ffeaa7; border-radius: 5px; padding: 15px; margin: 15px 0; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🏗️ Multi-Repository Terragrunt Cost Analysis</h1>
+        <p>Combined infrastructure cost across all analyzed repositories</p>
+        <span class="badge">{current_date}</span>
+        <span class="badge">{region.upper()}</span>
+    </div>
+
+    <div class="section">
+        <h2>📊 Cost Overview</h2>
+        <div class="flex">
+            <div class="metric-box">
+                <div class="metric-value">${aggregate.total_monthly_cost:.2f}</div>
+                <div class="metric-label">Total Monthly Cost</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">{aggregate.repositories}</div>
+                <div class="metric-label">Repositories</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">{aggregate.environments}</div>
+                <div class="metric-label">Environments</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">${aggregate.total_monthly_cost * 12:.2f}</div>
+                <div class="metric-label">Annual Cost (24/7)</div>
+            </div>
+        </div>
+    </div>
+    {errors_html}
+    {table("🧩 Cost by Service", aggregate.by_service, "Service")}
+    {table("🌍 Cost by Region", aggregate.by_region, "Region")}
+    {table("🏷️ Cost by Environment Tier", aggregate.by_tier, "Tier")}
+    {table("📁 Cost by Repository", aggregate.by_repository, "Repository")}
+
+    <div class="section">
+        <h2>💸 Most Expensive Environments</h2>
+        <table>
+            <thead><tr><th>Repository</th><th>Environment</th><th>Monthly Cost</th></tr></thead>
+            <tbody>{top_rows}</tbody>
+        </table>
+    </div>
+</body>
+</html>'''
+
+def main():
+    """Aggregate the costs of many Terragrunt repositories"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Map-reduce cost analysis over many Terragrunt roots")
+    parser.add_argument("terragrunt_roots", nargs="*", help="Terragrunt root directories")
+    parser.add_argument("--manifest", help="File listing Terragrunt roots (text, JSON or YAML)")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region for pricing")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cost-rules", help="Cost rules file (default: cost_rules.json)")
+    parser.add_argument("--output", default="multi_repo_analysis.html", help="Combined HTML report")
+    parser.add_argument("--json", help="Also write the aggregate as JSON")
+
+    args = parser.parse_args()
+
+    roots = list(args.terragrunt_roots)
+    if args.manifest:
+        roots.extend(load_manifest(args.manifest))
+    if not roots:
+        parser.error("no Terragrunt roots given (pass paths or --manifest)")
+
+    try:
+        print(f"🔍 Analyzing {len(roots)} Terragrunt roots...")
+        aggregate = MultiRepoAnalyzer(args.region, args.workers, args.cost_rules).analyze(roots)
+
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(generate_combined_report_html(aggregate, args.region))
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(asdict(aggregate), f, indent=2)
+
+        print(f"✅ {aggregate.repositories} repositories, {aggregate.environments} environments")
+        print(f"💰 Total Cost: ${aggregate.total_monthly_cost:.2f}/month")
+        for error in aggregate.errors:
+            print(f"⚠️ {error}")
+        print(f"📄 Report saved: {args.output}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local Price List Server
+Stand-in for the AWS Price List bulk API (ETag, Last-Modified, Range, injected failures) for offline runs and tests
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+def _ec2_product(sku: str, instance_type: str, location: str, region: str) -> Dict[str, Any]:
+    return {
+        "sku": sku,
+        "productFamily": "Compute Instance",
+        "attributes": {"servicecode": "AmazonEC2", "location": location, "regionCode": region,
+                       "instanceType": instance_type, "operatingSystem": "Linux", "tenancy": "Shared",
+                       "preInstalledSw": "NA", "capacitystatus": "Used"}
+    }
+
+def _fargate_product(sku: str, usage_type: str, location: str, region: str) -> Dict[str, Any]:
+    return {
+        "sku": sku,
+        "productFamily": "Compute",
+        "attributes": {"servicecode": "AmazonECS", "location": location, "regionCode": region, "usagetype": usage_type}
+    }
+
+def _on_demand(sku: str, usd: float, unit: str) -> Dict[str, Any]:
+    return {f"{sku}.JRTCKXETXF": {
+        "offerTermCode": "JRTCKXETXF",
+        "sku": sku,
+        "priceDimensions": {f"{sku}.JRTCKXETXF.6YS6EN2CT7": {
+            "unit": unit,
+            "pricePerUnit": {"USD": f"{usd:.10f}"}
+        }}
+    }}
+
+def build_offer(service: str, region: str, location: str, pricing: Dict[str, Any], version: str) -> Dict[str, Any]:
+    """Price list offer file in the bulk API format, generated from ``fetch_all_pricing()`` style pricing"""
+    products, terms = {}, {}
+    if service == "AmazonEC2":
+        for instance_type, price in pricing["ec2"].items():
+            sku = hashlib.sha1(f"{region}/{instance_type}".encode()).hexdigest()[:16].upper()
+            products[sku] = _ec2_product(sku, instance_type, location, region)
+            terms[sku] = _on_demand(sku, price["hourly"], "Hrs")
+    elif service == "AmazonECS":
+        prefix = region.split("-")[0].upper()
+        for usage, key, unit in (("Fargate-vCPU-Hours:perCPU", "cpu_per_vcpu_hour", "hours"),
+                                 ("Fargate-GB-Hours", "memory_per_gb_hour", "GB-Hours")):
+            sku = hashlib.sha1(f"{region}/{usage}".encode()).hexdigest()[:16].upper()
+            products[sku] = _fargate_product(sku, f"{prefix}-{usage}", location, region)
+            terms[sku] = _on_demand(sku, pricing["fargate"][key], unit)
+
+    return {
+        "formatVersion": "v1.0",
+        "offerCode": service,
+        "version": version,
+        "publicationDate": datetime.strptime(version, "%Y%m%d%H%M%S").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "products": products,
+        "terms": {"OnDemand": terms}
+    }
+
+def write_price_list(root: str, region: str, location: str, pricing: Dict[str, Any],
+                     version: Optional[str] = None) -> str:
+    """Write a bulk API tree (service index, region indexes, region offer files) under ``root``"""
+    root = Path(root)
+    version = version or datetime.now().strftime("%Y%m%d%H%M%S")
+    base = "/offers/v1.0/aws"
+    offers = {}
+    for service in ("AmazonEC2", "AmazonECS"):
+        offer_path = f"{base}/{service}/{version}/{region}/index.json"
+        region_index = {"formatVersion": "v1.0", "regions": {
+            region: {"regionCode": region, "currentVersionUrl": offer_path}
+        }}
+        for path, document in ((f"{base}/{service}/current/region_index.json", region_index),
+                               (offer_path, build_offer(service, region, location, pricing, version))):
+            target = root / path.lstrip("/")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, 'w') as f:
+                json.dump(document, f)
+        offers[service] = {"offerCode": service,
+                           "currentVersionUrl": f"{base}/{service}/current/index.json",
+                           "currentRegionIndexUrl": f"{base}/{service}/current/region_index.json"}
+
+    index = root / base.lstrip("/") / "index.json"
+    with open(index, 'w') as f:
+        json.dump({"formatVersion": "v1.0", "offers": offers}, f)
+    return version
+
+class _PriceListHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.stats["requests"] += 1
+            fail = server.fail_requests > 0
+            if fail:
+                server.fail_requests -= 1
+
+        if fail:
+            self._send_empty(503, {"Retry-After": "0"})
+            return
+
+        path = (server.root / self.path.split("?")[0].lstrip("/")).resolve()
+        if server.root not in path.parents or not path.is_file():
+            self._send_empty(404)
+            return
+
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        validators = {"ETag": etag, "Last-Modified": last_modified}
+
+        if self.headers.get("If-None-Match") == etag or (
+                not self.headers.get("If-None-Match") and self.headers.get("If-Modified-Since") == last_modified):
+            server.stats["not_modified"] += 1
+            self._send_empty(304, validators)
+            return
+
+        data = path.read_bytes()
+        start = 0
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and range_header.startswith("bytes=") and if_range in (None, etag, last_modified):
+            start = int(range_header[len("bytes="):].split("-")[0])
+            if start >= len(data):
+                self._send_empty(416, {"Content-Range": f"bytes */{len(data)}"})
+                return
+            server.stats["ranges"] += 1
+
+        body = data[start:]
+        with server.lock:
+            drop_after = server.drop_after_bytes
+            server.drop_after_bytes = None
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if drop_after is not None and drop_after < len(body):
+            # Simulate a connection reset part-way through the body
+            self.wfile.write(body[:drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+        server.stats["bytes_sent"] += len(body)
+
+    def _send_empty(self, status: int, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+class PriceListServer(ThreadingHTTPServer):
+    """Serves a directory like ``pricing.us-east-1.amazonaws.com``.
+
+    ``fail_requests`` answers that many requests with 503 and
+    ``drop_after_bytes`` cuts the next body short, to exercise retries and
+    resumed downloads. ``stats`` counts connections, requests, 304s and ranges.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, root: str, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _PriceListHandler)
+        self.root = Path(root).resolve()
+        self.lock = threading.Lock()
+        self.fail_requests = 0
+        self.drop_after_bytes: Optional[int] = None
+        self.stats = {"connections": 0, "requests": 0, "not_modified": 0, "ranges": 0, "bytes_sent": 0}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PriceListServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="price-list-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+def main():
+    """Serve a generated price list built from the fetcher's built-in pricing"""
+    import argparse
+    import tempfile
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the AWS Price List bulk API")
+    parser.add_argument("--root", help="Directory to serve (default: a generated price list in a temporary directory)")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region of the generated price list")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on")
+
+    args = parser.parse_args()
+
+    root = args.root
+    if not root:
+        root = tempfile.mkdtemp(prefix="price_list_")
+        fetcher = AWSPricingFetcher(args.region, price_list_url="")
+        version = write_price_list(root, args.region, fetcher.aws_region_map.get(args.region, args.region),
+                                   fetcher._download_pricing())
+        print(f"📦 Generated price list version {version} in {root}")
+
+    server = PriceListServer(root, port=args.port)
+    print(f"🚀 Price list server listening on {server.url} (use AWS_PRICE_LIST_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Price list server stopped")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Versioned Price List Store
+Keeps every ingested price list version per service and region and applies new versions as SKU deltas
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    service TEXT NOT NULL,
+    region TEXT NOT NULL,
+    version TEXT NOT NULL,
+    publication_date TEXT,
+    ingested_at TEXT NOT NULL,
+    added INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    removed INTEGER NOT NULL,
+    PRIMARY KEY (service, region, version)
+);
+CREATE TABLE IF NOT EXISTS prices (
+    service TEXT NOT NULL,
+    region TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    attributes TEXT NOT NULL,
+    unit TEXT,
+    usd REAL NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT
+);
+CREATE INDEX IF NOT EXISTS prices_current ON prices (service, region, valid_to, sku);
+"""
+
+@dataclass
+class PriceListDelta:
+    """SKUs that differ between two versions of one service's regional price list"""
+    service: str
+    region: str
+    from_version: Optional[str]
+    to_version: str
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+def sku_fingerprint(price: Dict[str, Any]) -> str:
+    """Stable digest of everything the store keeps about one SKU"""
+    payload = json.dumps([price.get("attributes", {}), price.get("unit"), price["usd"]], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class PriceListStore:
+    """SQLite store of price list SKUs with one validity interval per price.
+
+    A row is valid from the version that introduced it until the version that
+    changed or removed it (``valid_to``). Applying a new version only closes the
+    rows of changed and removed SKUs and inserts the added and changed ones, so
+    the write cost follows the size of the delta, and every earlier version
+    can still be read back for comparisons.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = str(db_file)
+        Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._connection.close()
+
+    def versions(self, service: str, region: str) -> List[Dict[str, Any]]:
+        """Ingested versions, oldest first"""
+        rows = self._connection.execute(
+            "SELECT version, publication_date, ingested_at, added, changed, removed FROM versions "
+            "WHERE service = ? AND region = ? ORDER BY version", (service, region))
+        return [dict(zip(("version", "publication_date", "ingested_at", "added", "changed", "removed"), row))
+                for row in rows]
+
+    def current_version(self, service: str, region: str) -> Optional[str]:
+        row = self._connection.execute("SELECT MAX(version) FROM versions WHERE service = ? AND region = ?",
+                                       (service, region)).fetchone()
+        return row[0]
+
+    def prices(self, service: str, region: str, version: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """SKU -> attributes, unit and USD price as of ``version`` (default: the current one)"""
+        if version is None:
+            rows = self._connection.execute(
+                "SELECT sku, attributes, unit, usd FROM prices WHERE service = ? AND region = ? AND valid_to IS NULL",
+                (service, region))
+        else:
+            rows = self._connection.execute(
+                "SELECT sku, attributes, unit, usd FROM prices WHERE service = ? AND region = ? "
+                "AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)", (service, region, version, version))
+        return {sku: {"attributes": json.loads(attributes), "unit": unit, "usd": usd}
+                for sku, attributes, unit, usd in rows}
+
+    def diff(self, service: str, region: str, from_version: str, to_version: str) -> PriceListDelta:
+        """SKU changes between two stored versions"""
+        before = {sku: sku_fingerprint(price) for sku, price in self.prices(service, region, from_version).items()}
+        after = {sku: sku_fingerprint(price) for sku, price in self.prices(service, region, to_version).items()}
+        return PriceListDelta(
+            service, region, from_version, to_version,
+            added=sorted(set(after) - set(before)),
+            changed=sorted(sku for sku in after if sku in before and after[sku] != before[sku]),
+            removed=sorted(set(before) - set(after))
+        )
+
+    def apply(self, service: str, region: str, version: str, publication_date: Optional[str],
+              prices: Dict[str, Dict[str, Any]]) -> PriceListDelta:
+        """Ingest a complete price list version as a delta against the current one"""
+        with self._lock:
+            current_version = self.current_version(service, region)
+            if current_version is not None and version <= current_version:
+                if version == current_version:
+                    return PriceListDelta(service, region, current_version, version)
+                raise ValueError(f"{service} {region} version {version} is older than the stored {current_version}")
+
+            current = dict(self._connection.execute(
+                "SELECT sku, fingerprint FROM prices WHERE service = ? AND region = ? AND valid_to IS NULL",
+                (service, region)))
+            fingerprints = {sku: sku_fingerprint(price) for sku, price in prices.items()}
+            delta = PriceListDelta(
+                service, region, current_version, version,
+                added=[sku for sku in fingerprints if sku not in current],
+                changed=[sku for sku, fingerprint in fingerprints.items()
+                         if sku in current and current[sku] != fingerprint],
+                removed=[sku for sku in current if sku not in fingerprints]
+            )
+
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE prices SET valid_to = ? WHERE service = ? AND region = ? AND sku = ? AND valid_to IS NULL",
+                    [(version, service, region, sku) for sku in delta.changed + delta.removed])
+                self._connection.executemany(
+                    "INSERT INTO prices (service, region, sku, fingerprint, attributes, unit, usd, valid_from) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(service, region, sku, fingerprints[sku], json.dumps(prices[sku].get("attributes", {})),
+                      prices[sku].get("unit"), prices[sku]["usd"], version) for sku in delta.added + delta.changed])
+                self._connection.execute(
+                    "INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (service, region, version, publication_date, datetime.now().isoformat(),
+                     len(delta.added), len(delta.changed), len(delta.removed)))
+            return delta
+
+def main():
+    """Show the stored versions of a price list or the SKU changes between two of them"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the versioned price list store")
+    parser.add_argument("--db", default=str(Path(__file__).parent / "price_list_cache" / "price_list.db"),
+                        help="Store file")
+    parser.add_argument("--service", default="AmazonEC2", help="Price list service code")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--diff", nargs=2, metavar=("FROM", "TO"), help="Compare two stored versions")
+
+    args = parser.parse_args()
+
+    store = PriceListStore(args.db)
+    try:
+        if args.diff:
+            delta = store.diff(args.service, args.region, *args.diff)
+            before = store.prices(args.service, args.region, args.diff[0])
+            after = store.prices(args.service, args.region, args.diff[1])
+            print(f"📊 {args.service} {args.region}: {args.diff[0]} → {args.diff[1]} "
+                  f"(+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)} SKUs)")
+            for sku in delta.changed:
+                print(f"   ~ {sku}: ${before[sku]['usd']:.6f} → ${after[sku]['usd']:.6f} per {after[sku]['unit']}")
+            for sku in delta.added:
+                print(f"   + {sku}: ${after[sku]['usd']:.6f} per {after[sku]['unit']}")
+            for sku in delta.removed:
+                print(f"   - {sku}")
+        else:
+            versions = store.versions(args.service, args.region)
+            if not versions:
+                print(f"❌ No versions of {args.service} stored for {args.region}")
+                return 1
+            print(f"📚 {args.service} {args.region}")
+            for version in versions:
+                print(f"   {version['version']} (published {version['publication_date']}): "
+                      f"+{version['added']} ~{version['changed']} -{version['removed']} SKUs")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Pricing HTTP Client
+Pooled keep-alive downloads of AWS price list files with conditional revalidation, resume and retries
+"""
+
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from atomic_file import atomic_write
+
+CHUNK_SIZE = 1024 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+@dataclass
+class FetchResult:
+    """Outcome of one conditional download"""
+    url: str
+    path: str
+    status: str              # "downloaded", "resumed" or "not_modified"
+    bytes_transferred: int
+    attempts: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+class PricingHTTPClient:
+    """Thread-safe HTTP/1.1 client for price list files.
+
+    Connections are kept alive and reused per host; at most ``max_connections``
+    requests are in flight at once. Every file is stored next to a ``.meta``
+    sidecar holding its ETag and Last-Modified, so a later fetch is a
+    conditional request that costs a 304 when nothing changed. Interrupted
+    downloads continue from their ``.part`` file with a Range request, and
+    connection errors, 429 and 5xx responses are retried with jittered
+    exponential backoff (honouring Retry-After).
+    """
+
+    def __init__(self, max_connections: int = 4, timeout: float = 60, retries: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 30):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connections_opened = 0
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _acquire(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get((scheme, host, port))
+            if idle:
+                return idle.pop()
+            self.connections_opened += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection, reusable: bool):
+        if not reusable:
+            connection.close()
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _read_meta(meta_file: Path) -> Dict[str, Any]:
+        try:
+            with open(meta_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_meta(meta_file: Path, meta: Dict[str, Any]):
+        atomic_write(meta_file, json.dumps(meta))
+
+    def fetch(self, url: str, dest: str) -> FetchResult:
+        """Download ``url`` to ``dest`` unless the stored copy is still current"""
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        meta_file = dest.with_name(dest.name + ".meta")
+        part_file = dest.with_name(dest.name + ".part")
+        part_meta_file = dest.with_name(dest.name + ".part.meta")
+
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80))
+        target = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        transferred = 0
+
+        for attempt in range(self.retries + 1):
+            meta = self._read_meta(meta_file) if dest.exists() else {}
+            part_meta = self._read_meta(part_meta_file) if part_file.exists() else {}
+            offset = part_file.stat().st_size if part_meta else 0
+
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                validator = part_meta.get("etag") or part_meta.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+            elif meta.get("url") == url:
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+            with self._slots:
+                connection = self._acquire(*key)
+                reusable = False
+                try:
+                    connection.request("GET", target, headers=headers)
+                    response = connection.getresponse()
+
+                    if response.status == 304:
+                        response.read()
+                        reusable = not response.will_close
+                        return FetchResult(url, str(dest), "not_modified", transferred, attempt + 1,
+                                           meta.get("etag"), meta.get("last_modified"))
+
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        response.read()
+                        reusable = not response.will_close
+                        retry_after = response.getheader("Retry-After")
+                    elif response.status == 416 and offset and attempt < self.retries:
+                        # The partial file does not fit the current resource: start over
+                        response.read()
+                        reusable = not response.will_close
+                        part_file.unlink()
+                        part_meta_file.unlink()
+                        retry_after = "0"
+                    elif response.status not in (200, 206):
+                        response.read()
+                        raise RuntimeError(f"GET {url} failed with HTTP {response.status}")
+                    else:
+                        resumed = response.status == 206
+                        validators = {"url": url, "etag": response.getheader("ETag"),
+                                      "last_modified": response.getheader("Last-Modified")}
+                        if not resumed:
+                            # Full body: (re)start the partial file with the new validators
+                            self._write_meta(part_meta_file, validators)
+                        with open(part_file, 'ab' if resumed else 'wb') as f:
+                            while True:
+                                chunk = response.read(CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                f.write(chunk)
+                                transferred += len(chunk)
+                        reusable = not response.will_close
+
+                        expected = response.getheader("Content-Length")
+                        received = part_file.stat().st_size - (offset if resumed else 0)
+                        if expected is not None and received < int(expected):
+                            raise http.client.IncompleteRead(b"", int(expected) - received)
+
+                        os.replace(part_file, dest)
+                        part_meta_file.unlink()
+                        self._write_meta(meta_file, validators)
+                        return FetchResult(url, str(dest), "resumed" if resumed else "downloaded", transferred,
+                                           attempt + 1, validators["etag"], validators["last_modified"])
+
+                except (OSError, http.client.HTTPException):
+                    reusable = False
+                    if attempt >= self.retries:
+                        raise
+                    retry_after = None
+                finally:
+                    self._release(key, connection, reusable)
+
+            time.sleep(self._delay(attempt, retry_after))
+
+        raise RuntimeError(f"GET {url} failed after {self.retries + 1} attempts")
+
+    def fetch_many(self, jobs: List[Tuple[str, str]]) -> List[FetchResult]:
+        """Fetch ``(url, dest)`` pairs in parallel, bounded by the connection limit"""
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_connections, len(jobs))) as executor:
+            return list(executor.map(lambda job: self.fetch(*job), jobs))
+
+    def fetch_json(self, url: str, dest: str) -> Any:
+        """Conditionally fetch a JSON document and load it"""
+        result = self.fetch(url, dest)
+        with open(result.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Packed Pricing Table
+Read-only pricing data in one memory-mapped file that process-pool workers attach to without copying
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from atomic_file import atomic_write
+
+MAGIC = b"PRCT"
+VERSION = 1
+# magic, version, value count, index length
+HEADER = struct.Struct("<4sIQQ")
+
+# Leaf kinds: numbers live in the float64 value array, everything else in the string table
+KIND_FLOAT, KIND_INT, KIND_BOOL, KIND_STRING, KIND_NULL = "d", "i", "b", "s", "n"
+
+def _flatten(data: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    for key, value in data.items():
+        path = prefix + (str(key),)
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        else:
+            yield path, value
+
+def publish_pricing_table(pricing_data: Dict[str, Any], table_file: str) -> str:
+    """Pack ``fetch_all_pricing()`` output into ``table_file`` (written atomically)"""
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+    values = array('d')
+    entries = []
+
+    def intern(text: str) -> int:
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    for path, value in _flatten(pricing_data):
+        path_ids = [intern(part) for part in path]
+        if isinstance(value, bool):
+            entries.append([path_ids, KIND_BOOL, len(values)])
+            values.append(float(value))
+        elif isinstance(value, (int, float)):
+            entries.append([path_ids, KIND_INT if isinstance(value, int) else KIND_FLOAT, len(values)])
+            values.append(float(value))
+        elif value is None:
+            entries.append([path_ids, KIND_NULL, 0])
+        else:
+            entries.append([path_ids, KIND_STRING, intern(str(value))])
+
+    index = json.dumps({"strings": strings, "entries": entries}, separators=(",", ":")).encode("utf-8")
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    return atomic_write(table_file, [HEADER.pack(MAGIC, VERSION, len(values), len(index)), values.tobytes(), index])
+
+class PackedPricingTable:
+    """A published pricing table attached through a read-only memory map.
+
+    Numbers are read straight out of the mapped float64 array on access; only
+    the small interned key index is decoded per process, so attaching costs the
+    same whether one worker or fifty share the file.
+    """
+
+    def __init__(self, table_file: str):
+        self.table_file = str(table_file)
+        with open(self.table_file, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, value_count, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.table_file} is not a version {VERSION} pricing table")
+
+        values_end = HEADER.size + value_count * 8
+        if sys.byteorder == "little":
+            self._values = memoryview(self._mmap)[HEADER.size:values_end].cast('d')
+        else:
+            swapped = array('d', self._mmap[HEADER.size:values_end])
+            swapped.byteswap()
+            self._values = swapped
+        index = json.loads(self._mmap[values_end:values_end + index_length].decode("utf-8"))
+
+        self._strings = [sys.intern(text) for text in index["strings"]]
+        self._leaves: Dict[Tuple[str, ...], Tuple[str, int]] = {}
+        self._children: Dict[Tuple[str, ...], List[str]] = {(): []}
+        for path_ids, kind, ref in index["entries"]:
+            path = tuple(self._strings[i] for i in path_ids)
+            self._leaves[path] = (kind, ref)
+            for depth in range(len(path)):
+                children = self._children.setdefault(path[:depth], [])
+                if path[depth] not in children:
+                    children.append(path[depth])
+                if depth + 1 < len(path):
+                    self._children.setdefault(path[:depth + 1], [])
+
+    def lookup(self, path: Tuple[str, ...]) -> Any:
+        """Value or nested view at ``path``"""
+        leaf = self._leaves.get(path)
+        if leaf is not None:
+            kind, ref = leaf
+            if kind == KIND_FLOAT:
+                return self._values[ref]
+            if kind == KIND_INT:
+                return int(self._values[ref])
+            if kind == KIND_BOOL:
+                return bool(self._values[ref])
+            if kind == KIND_STRING:
+                return self._strings[ref]
+            return None
+        if path in self._children:
+            return PricingView(self, path)
+        raise KeyError(path[-1] if path else path)
+
+    def view(self) -> "PricingView":
+        """Dict-like view usable wherever ``fetch_all_pricing()`` output is expected"""
+        return PricingView(self, ())
+
+class PricingView(Mapping):
+    """Read-only mapping over one level of a packed pricing table"""
+
+    __slots__ = ("_table", "_prefix")
+
+    def __init__(self, table: PackedPricingTable, prefix: Tuple[str, ...]):
+        self._table = table
+        self._prefix = prefix
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table.lookup(self._prefix + (key,))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table._children[self._prefix])
+
+    def __len__(self) -> int:
+        return len(self._table._children[self._prefix])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize a plain nested dict (e.g. for JSON output)"""
+        return {key: value.to_dict() if isinstance(value, PricingView) else value for key, value in self.items()}
+
+    def __repr__(self) -> str:
+        return f"PricingView({self.to_dict()!r})"
+
+# Tables already attached in this process, by file
+_attached: Dict[str, PackedPricingTable] = {}
+
+def attach_pricing_table(table_file: str) -> PricingView:
+    """Attach to a published table once per process and return its root view"""
+    table_file = str(table_file)
+    if table_file not in _attached:
+        _attached[table_file] = PackedPricingTable(table_file)
+    return _attached[table_file].view()
+
+@contextmanager
+def published_pricing_table(pricing_data: Dict[str, Any], table_file: Optional[str] = None) -> Iterator[str]:
+    """Publish a table for the lifetime of a pool; the file is removed afterwards.
+
+    Workers that still have it mapped keep reading it after removal on POSIX.
+    """
+    if table_file is None:
+        region = pricing_data.get("region", "pricing")
+        table_file = Path(tempfile.gettempdir()) / f"pricing_table_{region}_{os.getpid()}_{id(pricing_data)}.bin"
+    path = publish_pricing_table(pricing_data, str(table_file))
+    try:
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+def main():
+    """Publish the cached pricing of a region as a packed table"""
+    import argparse
+    from aws_pricing_fetcher import AWSPricingFetcher
+
+    parser = argparse.ArgumentParser(description="Pack pricing data into a shared read-only table")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--output", help="Table file (default: pricing_table_<region>.bin)")
+
+    args = parser.parse_args()
+
+    pricing = AWSPricingFetcher(args.region).fetch_all_pricing()
+    table_file = publish_pricing_table(pricing, args.output or f"pricing_table_{args.region}.bin")
+    view = attach_pricing_table(table_file)
+    if view.to_dict() != json.loads(json.dumps(pricing)):
+        print(f"❌ Round trip mismatch for {table_file}")
+        return 1
+
+    print(f"📦 {table_file}: {os.path.getsize(table_file)} bytes, {len(view)} sections")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
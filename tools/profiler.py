@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Analyzer Pipeline Profiler
+Per-phase wall/CPU time and peak memory, with optional cProfile dumps, behind --profile
+"""
+
+import cProfile
+import functools
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active: Optional["PhaseProfiler"] = None
+
+def _peak_rss_kb() -> Optional[int]:
+    """Process memory high-water mark (KB on Linux, bytes on macOS)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+class _NullPhase:
+    """Shared no-op context manager returned while profiling is off"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class PhaseProfiler:
+    """Records one entry per phase execution; phases may nest.
+
+    Nesting depth is tracked per thread and CPU time is the thread's own
+    (``time.thread_time``), so worker threads can record phases concurrently.
+    cProfile only sees the thread that entered the profiled phase first.
+    """
+
+    def __init__(self, cprofile_phase: Optional[str] = None, cprofile_output: Optional[str] = None):
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+        self.records: List[Dict[str, Any]] = []
+        self.cprofile_phase = cprofile_phase
+        self.cprofile_output = cprofile_output or f"{cprofile_phase}.pstats"
+        self._cprofile = cProfile.Profile() if cprofile_phase else None
+        self._cprofile_depth = 0
+        self._cprofile_thread: Optional[int] = None
+        self._cprofiled = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, **labels) -> Iterator[None]:
+        profiling = False
+        if name == self.cprofile_phase:
+            with self._lock:
+                if self._cprofile_thread in (None, threading.get_ident()):
+                    if self._cprofile_depth == 0:
+                        self._cprofile_thread = threading.get_ident()
+                        self._cprofile.enable()
+                        self._cprofiled = True
+                    self._cprofile_depth += 1
+                    profiling = True
+
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        rss_before = _peak_rss_kb()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            rss_after = _peak_rss_kb()
+            self._local.depth = depth
+            record = {
+                "phase": name,
+                "labels": {key: str(value) for key, value in labels.items()},
+                "thread": threading.current_thread().name,
+                "depth": depth,
+                "wall_seconds": wall,
+                "cpu_seconds": cpu,
+                "peak_rss_kb": rss_after,
+                "peak_rss_growth_kb": rss_after - rss_before if rss_after is not None else None
+            }
+            with self._lock:
+                if profiling:
+                    self._cprofile_depth -= 1
+                    if self._cprofile_depth == 0:
+                        self._cprofile.disable()
+                        self._cprofile_thread = None
+                self.records.append(record)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Totals per phase name"""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            total = totals.setdefault(record["phase"], {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            total["calls"] += 1
+            total["wall_seconds"] += record["wall_seconds"]
+            total["cpu_seconds"] += record["cpu_seconds"]
+        return totals
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        return {
+            "started": self.started_at,
+            "total_wall_seconds": time.perf_counter() - self.started,
+            "total_cpu_seconds": time.process_time(),
+            "peak_rss_kb": _peak_rss_kb(),
+            "summary": self.summary(),
+            "phases": records,
+            "cprofile": self.cprofile_output if self._cprofiled else None
+        }
+
+    def write_report(self, output_file: str) -> Dict[str, Any]:
+        report = self.report()
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        if self._cprofiled:
+            self._cprofile.dump_stats(self.cprofile_output)
+        return report
+
+def profile_phase(name: str, **labels):
+    """Context manager timing ``name``; a shared no-op unless profiling was enabled"""
+    if _active is None:
+        return _NULL_PHASE
+    return _active.phase(name, **labels)
+
+def profiling_enabled() -> bool:
+    """Whether phases are being recorded"""
+    return _active is not None
+
+def profiled(name: str, labels=None):
+    """Decorator form of ``profile_phase``; ``labels`` maps the call arguments to phase labels"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return function(*args, **kwargs)
+            with _active.phase(name, **(labels(*args, **kwargs) if labels else {})):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def enable_profiling(cprofile_phase: Optional[str] = None, cprofile_output: Optional[str] = None) -> PhaseProfiler:
+    global _active
+    _active = PhaseProfiler(cprofile_phase, cprofile_output)
+    return _active
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile / --profile-phase to a CLI"""
+    parser.add_argument("--profile", nargs="?", const="profile_report.json",
+                        help="Write a per-phase timing report (default: profile_report.json)")
+    parser.add_argument("--profile-phase", help="Also cProfile one phase (e.g. hcl_parse) into <phase>.pstats")
+
+def start_profiling(args) -> None:
+    if getattr(args, "profile", None):
+        enable_profiling(args.profile_phase)
+
+def finish_profiling(args) -> None:
+    """Write the report and print the per-phase summary; call it from a ``finally``
+    so failed runs still leave their profile behind"""
+    global _active
+    if _active is None or not getattr(args, "profile", None):
+        return
+
+    report = _active.write_report(args.profile)
+    _active = None
+    print(f"\n⏱️ Profile ({report['total_wall_seconds']:.3f}s wall, {report['total_cpu_seconds']:.3f}s CPU)")
+    for name, total in sorted(report["summary"].items(), key=lambda item: item[1]["wall_seconds"], reverse=True):
+        print(f"   {name:<20} {total['calls']:>5}x  {total['wall_seconds']:>8.4f}s wall  {total['cpu_seconds']:>8.4f}s CPU")
+    print(f"📄 Profile saved to: {args.profile}")
+    if report["cprofile"]:
+        print(f"📄 cProfile stats saved to: {report['cprofile']}")
+        pstats.Stats(report["cprofile"]).sort_stats("cumulative").print_stats(10)
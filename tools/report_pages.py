@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Report Page Writer
+Writes static report pages in parallel, skipping unchanged content and keeping gzip-precompressed copies
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from atomic_file import atomic_write
+
+@dataclass
+class PageWriteStats:
+    """What one report run did to the output directory"""
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+def page_slug(name: str) -> str:
+    """File name stem for a page ("eu west/prod" -> "eu-west-prod")"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-.') or "page"
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def write_page(path: str, html: str) -> bool:
+    """Write ``html`` and ``<path>.gz`` unless the file on disk already has the same
+    content hash; returns whether anything was written"""
+    path = Path(path)
+    data = html.encode("utf-8")
+    gz_path = path.with_name(path.name + ".gz")
+    try:
+        if gz_path.exists() and content_hash(path.read_bytes()) == content_hash(data):
+            return False
+    except OSError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the compressed copy byte-identical for identical pages
+    atomic_write(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+    atomic_write(path, data)
+    return True
+
+def write_pages(output_dir: str, pages: Dict[str, Callable[[], str]], workers: Optional[int] = None,
+                prune: Optional[str] = None) -> PageWriteStats:
+    """Render and write pages (relative path -> render function) on up to ``workers`` threads.
+
+    With ``prune`` (a subdirectory of ``output_dir``), pages there that are no
+    longer part of the report are deleted along with their gzip copies.
+    """
+    output_dir = Path(output_dir)
+    stats = PageWriteStats()
+    lock = threading.Lock()
+
+    def render(item):
+        relative_path, render_page = item
+        written = write_page(str(output_dir / relative_path), render_page())
+        with lock:
+            (stats.written if written else stats.unchanged).append(relative_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1)) as executor:
+        list(executor.map(render, pages.items()))
+
+    if prune:
+        keep = {str(Path(relative_path)) for relative_path in pages}
+        for page in sorted((output_dir / prune).glob("*.html")):
+            relative_path = str(page.relative_to(output_dir))
+            if relative_path not in keep:
+                page.unlink()
+                gz_page = page.with_name(page.name + ".gz")
+                if gz_page.exists():
+                    gz_page.unlink()
+                stats.removed.append(relative_path)
+
+    stats.written.sort()
+    stats.unchanged.sort()
+    return stats
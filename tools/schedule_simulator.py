@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Environment Schedule Simulator
+Computes realistic annual costs from per-environment on/off windows, scaling levels and holidays
+"""
+
+import calendar
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+HOURS_PER_WEEK = 168
+HOURS_PER_MONTH = 730.0
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Cost items that follow the scaling level; everything else is fixed infrastructure
+SCALABLE_COST_KEYWORDS = ("Fargate", "Worker Nodes", "EC2")
+
+# Built-in schedules, used when analyzer-config.yaml has no "schedules" section
+DEFAULT_SCHEDULES = {
+    "production": {
+        "windows": [{"days": "mon-sun", "hours": "00-24", "level": 1.0}]
+    },
+    "staging": {
+        "windows": [{"days": "mon-fri", "hours": "06-22", "level": 1.0}],
+        "off_level": 0.0
+    },
+    "development": {
+        "windows": [{"days": "mon-fri", "hours": "08-19", "level": 1.0}],
+        "holidays": ["01-01", "12-24", "12-25", "12-26", "12-31"],
+        "scale_to_zero": True
+    },
+    "eks": {
+        "windows": [{"days": "mon-fri", "hours": "00-24", "level": 1.0},
+                    {"days": "sat-sun", "hours": "00-24", "level": 0.5}],
+        "alternative_group": "platform"
+    },
+    "ecs": {
+        "windows": [{"days": "mon-fri", "hours": "00-24", "level": 1.0},
+                    {"days": "sat-sun", "hours": "00-24", "level": 0.5}],
+        "alternative_group": "platform"
+    }
+}
+
+@dataclass
+class EnvironmentSchedule:
+    """Hour-of-week scaling levels for one environment"""
+    name: str
+    weekly_levels: List[float]
+    holidays: List[str] = field(default_factory=list)
+    holiday_level: float = 0.0
+    scale_to_zero: bool = False
+    alternative_group: str = ""
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> "EnvironmentSchedule":
+        """Build a schedule from ``windows`` of ``{days, hours, level}`` entries"""
+        off_level = float(config.get("off_level", 0.0))
+        levels = [off_level] * HOURS_PER_WEEK
+        for window in config.get("windows", []):
+            level = float(window.get("level", 1.0))
+            start, end = _parse_hours(str(window.get("hours", "00-24")))
+            for day in _parse_days(str(window.get("days", "mon-sun"))):
+                for hour in range(start, end):
+                    levels[day * 24 + hour] = level
+
+        return cls(
+            name=name,
+            weekly_levels=levels,
+            holidays=[str(h) for h in config.get("holidays", [])],
+            holiday_level=float(config.get("holiday_level", 0.0)),
+            scale_to_zero=bool(config.get("scale_to_zero", False)),
+            alternative_group=str(config.get("alternative_group", ""))
+        )
+
+    @classmethod
+    def always_on(cls, name: str) -> "EnvironmentSchedule":
+        return cls(name=name, weekly_levels=[1.0] * HOURS_PER_WEEK)
+
+@dataclass
+class ScheduleResult:
+    """Simulated annual cost of one environment"""
+    name: str
+    annual_cost: float
+    always_on_annual_cost: float
+    effective_uptime: float
+    active_hours: int
+    counted: bool = True
+
+def _parse_days(spec: str) -> List[int]:
+    days = []
+    for part in spec.lower().replace(" ", "").split(","):
+        if "-" in part:
+            first, last = (DAY_NAMES.index(d[:3]) for d in part.split("-"))
+            days.extend(range(first, last + 1) if first <= last else list(range(first, 7)) + list(range(0, last + 1)))
+        elif part:
+            days.append(DAY_NAMES.index(part[:3]))
+    return days
+
+def _parse_hours(spec: str) -> Tuple[int, int]:
+    start, _, end = spec.partition("-")
+    return int(start), int(end or 24)
+
+def load_schedules(config_file: Optional[str] = None) -> Dict[str, EnvironmentSchedule]:
+    """Load schedules from the ``schedules`` section of analyzer-config.yaml"""
+    config_file = Path(config_file) if config_file else Path(__file__).parent / "analyzer-config.yaml"
+    schedules_config = DEFAULT_SCHEDULES
+
+    if yaml is not None and config_file.exists():
+        try:
+            with open(config_file, 'r') as f:
+                loaded = yaml.safe_load(f) or {}
+            schedules_config = loaded.get("schedules") or DEFAULT_SCHEDULES
+        except Exception as e:
+            print(f"⚠️ Could not load schedules from {config_file}: {e}, using built-in schedules")
+
+    return {name: EnvironmentSchedule.from_config(name, config) for name, config in schedules_config.items()}
+
+class ScheduleSimulator:
+    """Simulates every hour of a year for all environments at once.
+
+    Cost is linear in the hourly level, so the 8,760-hour simulation reduces to
+    one shared hour-of-week occurrence vector for the year and one dot product
+    per environment; holidays only correct the few hours they cover.
+    """
+
+    def __init__(self, year: Optional[int] = None):
+        self.year = year or date.today().year
+        self.hours_in_year = (366 if calendar.isleap(self.year) else 365) * 24
+        self.week_hour_counts = self._week_hour_counts()
+        self._reported_holidays = set()
+
+    def _week_hour_counts(self) -> List[int]:
+        counts = [0] * HOURS_PER_WEEK
+        day = date(self.year, 1, 1)
+        while day.year == self.year:
+            base = day.weekday() * 24
+            for hour in range(24):
+                counts[base + hour] += 1
+            day += timedelta(days=1)
+        return counts
+
+    def _report_holiday(self, schedule: EnvironmentSchedule, holiday: str, message: str):
+        if (schedule.name, holiday) not in self._reported_holidays:
+            self._reported_holidays.add((schedule.name, holiday))
+            print(f"⚠️ {schedule.name}: holiday {holiday} {message}")
+
+    def _holiday_dates(self, schedule: EnvironmentSchedule) -> List[date]:
+        """Holidays falling in the simulated year. A recurring 02-29 is observed on
+        02-28 in non-leap years; dates that do not exist are skipped and reported."""
+        dates = set()
+        for holiday in schedule.holidays:
+            try:
+                parts = [int(p) for p in holiday.split("-")]
+                if len(parts) not in (2, 3):
+                    raise ValueError
+            except ValueError:
+                self._report_holiday(schedule, holiday, "is not MM-DD or YYYY-MM-DD, skipped")
+                continue
+            if len(parts) == 3 and parts[0] != self.year:
+                continue
+            month, day = parts[-2], parts[-1]
+            if len(parts) == 2 and (month, day) == (2, 29) and not calendar.isleap(self.year):
+                self._report_holiday(schedule, holiday, f"does not exist in {self.year}, observed on 02-28")
+                day = 28
+            try:
+                dates.add(date(self.year, month, day))
+            except ValueError:
+                self._report_holiday(schedule, holiday, f"does not exist in {self.year}, skipped")
+        return sorted(dates)
+
+    def hourly_levels(self, schedule: EnvironmentSchedule) -> List[float]:
+        """Expanded per-hour level for the whole year (for charts and exports)"""
+        offset = date(self.year, 1, 1).weekday() * 24
+        levels = [schedule.weekly_levels[(offset + h) % HOURS_PER_WEEK] for h in range(self.hours_in_year)]
+        for holiday in self._holiday_dates(schedule):
+            start = (holiday.timetuple().tm_yday - 1) * 24
+            levels[start:start + 24] = [schedule.holiday_level] * 24
+        return levels
+
+    def simulate(self, monthly_costs: Dict[str, Dict[str, float]],
+                 schedules: Dict[str, EnvironmentSchedule]) -> Dict[str, ScheduleResult]:
+        """Annual cost per environment from its cost breakdown and schedule"""
+        counts = self.week_hour_counts
+        results = {}
+
+        for name, breakdown in monthly_costs.items():
+            schedule = schedules.get(name) or EnvironmentSchedule.always_on(name)
+            levels = schedule.weekly_levels
+
+            # Sum of level x hours, and hours the environment exists at all
+            level_hours = sum(c * l for c, l in zip(counts, levels))
+            active_hours = sum(c for c, l in zip(counts, levels) if l > 0 or not schedule.scale_to_zero)
+
+            for holiday in self._holiday_dates(schedule):
+                base = holiday.weekday() * 24
+                level_hours += 24 * schedule.holiday_level - sum(levels[base:base + 24])
+                active_before = sum(1 for l in levels[base:base + 24] if l > 0 or not schedule.scale_to_zero)
+                active_now = 24 if schedule.holiday_level > 0 or not schedule.scale_to_zero else 0
+                active_hours += active_now - active_before
+
+            scalable = sum(cost for item, cost in breakdown.items() if any(k in item for k in SCALABLE_COST_KEYWORDS))
+            fixed = sum(breakdown.values()) - scalable
+
+            annual = (fixed * active_hours + scalable * level_hours) / HOURS_PER_MONTH
+            always_on = sum(breakdown.values()) * self.hours_in_year / HOURS_PER_MONTH
+
+            results[name] = ScheduleResult(
+                name=name,
+                annual_cost=annual,
+                always_on_annual_cost=always_on,
+                effective_uptime=annual / always_on if always_on else 0.0,
+                active_hours=active_hours
+            )
+
+        # Only one environment of an alternative group (e.g. EKS vs ECS) would be deployed
+        groups: Dict[str, List[ScheduleResult]] = {}
+        for name, result in results.items():
+            group = (schedules.get(name) or EnvironmentSchedule.always_on(name)).alternative_group
+            if group:
+                groups.setdefault(group, []).append(result)
+        for members in groups.values():
+            cheapest = min(members, key=lambda r: r.annual_cost)
+            for result in members:
+                result.counted = result is cheapest
+
+        return results
+
+    def realistic_annual_cost(self, environments: list,
+                              schedules: Optional[Dict[str, EnvironmentSchedule]] = None) -> Tuple[float, Dict[str, ScheduleResult]]:
+        """Total annual cost of ``TerragruntEnvironment`` objects under their schedules"""
+        schedules = schedules if schedules is not None else load_schedules()
+        results = self.simulate({env.name.lower(): env.cost_breakdown for env in environments}, schedules)
+        return sum(r.annual_cost for r in results.values() if r.counted), results
+
+def main():
+    """Simulate the schedules of all Terragrunt environments"""
+    import argparse
+    from terragrunt_environment_analyzer import TerragruntCostAnalyzer
+
+    parser = argparse.ArgumentParser(description="Hourly schedule simulation of environment costs")
+    parser.add_argument("terragrunt_root", nargs="?", default="../terragrunt", help="Path to Terragrunt root directory")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--config", help="Config file with a schedules section (default: analyzer-config.yaml)")
+    parser.add_argument("--year", type=int, help="Calendar year to simulate")
+
+    args = parser.parse_args()
+
+    environments = TerragruntCostAnalyzer(args.region).analyze_all_environments(args.terragrunt_root)
+    simulator = ScheduleSimulator(args.year)
+    total, results = simulator.realistic_annual_cost(environments, load_schedules(args.config))
+
+    print(f"\n📅 Schedule Simulation ({simulator.year}, {simulator.hours_in_year} hours)")
+    for result in sorted(results.values(), key=lambda r: r.annual_cost, reverse=True):
+        note = "" if result.counted else "  (alternative not counted)"
+        print(f"   {result.name:<12} ${result.annual_cost:>10.2f}/year  "
+              f"{result.effective_uptime * 100:5.1f}% of 24/7  {result.active_hours:>5} active hours{note}")
+    print(f"\n💰 Realistic Annual Cost: ${total:.2f}")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Cost Sensitivity Analyzer
+Computes the marginal monthly cost of every numeric input and ranks the cost drivers
+"""
+
+import copy
+import json
+from dataclasses import dataclass, field, asdict, replace
+from typing import Dict, List, Any, Hashable, Tuple
+from terraform_module_analyzer import ResolvedSizing
+
+@dataclass
+class InputSensitivity:
+    """Marginal cost of one numeric input"""
+    name: str
+    value: float
+    step: float
+    marginal_cost: float   # USD/month per unit of the input
+    elasticity: float      # % cost change per 1% input change
+    exact: bool            # Unit step on a count, or equal slopes on both sides
+
+@dataclass
+class CostSensitivity:
+    """All input sensitivities of one environment or scenario, largest driver first"""
+    name: str
+    monthly_cost: float
+    drivers: List[InputSensitivity] = field(default_factory=list)
+
+class EnvironmentCostModel:
+    """Numeric inputs of a ``TerragruntEnvironment`` as seen by ``TerragruntCostAnalyzer``"""
+
+    integer_inputs = ("nat_gateways", "desired_count", "node_count")
+
+    def __init__(self, cost_analyzer):
+        self.cost_analyzer = cost_analyzer
+        self.cost_analyzer.load_pricing_data()
+
+    def name(self, environment) -> str:
+        return environment.name
+
+    def key(self, environment) -> Hashable:
+        """Everything besides the perturbed inputs that the cost depends on"""
+        return json.dumps([environment.inputs, environment.source_module,
+                           environment.resource_estimates.get("resolved_sizing")], sort_keys=True, default=str)
+
+    def _sizing(self, environment) -> ResolvedSizing:
+        resolved = environment.resource_estimates.get("resolved_sizing")
+        sizing = ResolvedSizing(**resolved) if resolved else ResolvedSizing()
+        return replace(sizing, node_groups=[dict(group) for group in sizing.node_groups])
+
+    def inputs(self, environment) -> Dict[str, float]:
+        sizing = self._sizing(environment)
+        is_production = environment.inputs.get("environment") == "production"
+        values = {
+            "nat_gateways": float(sizing.nat_gateways if sizing.nat_gateways is not None
+                                  else len(environment.inputs.get("availability_zones", ["eu-west-1a", "eu-west-1b"]))),
+            "lcu_multiplier": (self.cost_analyzer.LCU_MULTIPLIER_PRODUCTION if is_production
+                               else self.cost_analyzer.LCU_MULTIPLIER_DEFAULT),
+            "ecr_storage_gb": self.cost_analyzer.ECR_STORAGE_GB
+        }
+        # Task and node sizes only when they were resolved and actually priced
+        priced = " ".join(environment.cost_breakdown)
+        if "Fargate" in priced and sizing.task_cpu_units and sizing.task_memory_mb and sizing.desired_count:
+            values["task_cpu_vcpus"] = sizing.task_cpu_vcpus
+            values["task_memory_gb"] = sizing.task_memory_gb
+            values["desired_count"] = float(sizing.desired_count)
+        if "Worker Nodes" in priced and sizing.node_groups:
+            values["node_count"] = float(sizing.node_groups[0]["desired_size"])
+        return values
+
+    def cost(self, environment, values: Dict[str, float]) -> float:
+        return self.costs([(environment, values)])[0]
+
+    def costs(self, points: List[Tuple[Any, Dict[str, float]]]) -> List[float]:
+        """Monthly cost of every ``(environment, values)`` point.
+
+        Points sharing the estimation constants (LCU multiplier, ECR storage) are
+        priced in one ``_estimate_costs`` batch on an analyzer copy carrying those
+        constants; perturbed points bypass the analyzer's cost memo entirely.
+        """
+        batches: Dict[Tuple[float, float], List[int]] = {}
+        configurations = []
+        for index, (environment, values) in enumerate(points):
+            sizing = self._sizing(environment)
+            sizing.nat_gateways = int(values["nat_gateways"])
+            if "task_cpu_vcpus" in values:
+                sizing.task_cpu_units = values["task_cpu_vcpus"] * 1024
+                sizing.task_memory_mb = values["task_memory_gb"] * 1024
+                sizing.desired_count = int(values["desired_count"])
+            if "node_count" in values:
+                sizing.node_groups[0]["desired_size"] = int(values["node_count"])
+            configurations.append((environment.inputs, environment.source_module, sizing, environment.path))
+            batches.setdefault((values["lcu_multiplier"], values["ecr_storage_gb"]), []).append(index)
+
+        costs: List[float] = [0.0] * len(points)
+        for (lcu_multiplier, ecr_storage_gb), indices in batches.items():
+            analyzer = copy.copy(self.cost_analyzer)
+            analyzer.LCU_MULTIPLIER_PRODUCTION = analyzer.LCU_MULTIPLIER_DEFAULT = lcu_multiplier
+            analyzer.ECR_STORAGE_GB = ecr_storage_gb
+            estimates = analyzer._estimate_costs([configurations[index] for index in indices], memo=False)
+            for index, (cost_breakdown, _) in zip(indices, estimates):
+                costs[index] = sum(cost_breakdown.values())
+        return costs
+
+class ScenarioCostModel:
+    """Numeric inputs of an ``AnalysisScenario`` priced on ECS or EKS by ``YAMLBasedAnalyzer``"""
+
+    integer_inputs = ()
+    SCENARIO_INPUTS = ("cpu_cores", "memory_gb", "storage_gb", "network_bandwidth_mbps",
+                       "expected_users", "peak_load_multiplier")
+    MODEL_PARAMETERS = {
+        "ecs": {"users_per_task": "ECS_USERS_PER_TASK", "lcu_multiplier": "ECS_LCU_MULTIPLIER"},
+        "eks": {"users_per_node": "EKS_USERS_PER_NODE", "lcu_multiplier": "EKS_LCU_MULTIPLIER"}
+    }
+
+    def __init__(self, analyzer, infrastructure: str = "ecs"):
+        self.analyzer = analyzer
+        self.infrastructure = infrastructure
+        self.parameters = dict(self.MODEL_PARAMETERS[infrastructure])
+        if infrastructure == "ecs" and analyzer.USERS_PER_VCPU is not None:
+            # Calibrated task capacity is users per vCPU scaled to the task size
+            del self.parameters["users_per_task"]
+            self.parameters["users_per_vcpu"] = "USERS_PER_VCPU"
+
+    def name(self, scenario) -> str:
+        return f"{scenario.name} ({self.infrastructure.upper()})"
+
+    def key(self, scenario) -> Hashable:
+        # The perturbed inputs are everything the cost depends on
+        return self.infrastructure
+
+    def inputs(self, scenario) -> Dict[str, float]:
+        values = {name: float(getattr(scenario, name)) for name in self.SCENARIO_INPUTS}
+        for name, attribute in self.parameters.items():
+            values[name] = float(getattr(self.analyzer, attribute))
+        return values
+
+    def cost(self, scenario, values: Dict[str, float]) -> float:
+        sized = replace(scenario, **{name: values[name] for name in self.SCENARIO_INPUTS})
+        analyzer = copy.copy(self.analyzer)
+        for name, attribute in self.parameters.items():
+            setattr(analyzer, attribute, values[name])
+        if self.infrastructure == "ecs":
+            return analyzer.analyze_ecs_environment(sized).monthly_cost
+        return analyzer.analyze_eks_environment(sized).monthly_cost
+
+    def costs(self, points: List[Tuple[Any, Dict[str, float]]]) -> List[float]:
+        return [self.cost(scenario, values) for scenario, values in points]
+
+class SensitivityAnalyzer:
+    """Batched finite differences over a cost model.
+
+    Counts (NAT gateways, tasks, nodes) get a unit forward step, which is the
+    exact marginal cost of one more. Continuous inputs get a central difference
+    of ``relative_step``; where both one-sided slopes agree the model is linear
+    there and the derivative is exact. All evaluation points of the batch are
+    collected first and every distinct point is priced once, in a single
+    ``model.costs`` call, so thousands of environments sharing a configuration
+    cost a handful of evaluations.
+    """
+
+    def __init__(self, model, relative_step: float = 0.05):
+        self.model = model
+        self.relative_step = relative_step
+        self.evaluations = 0
+
+    def analyze(self, subjects: list) -> List[CostSensitivity]:
+        points: Dict[Tuple, Tuple[Any, Dict[str, float]]] = {}
+
+        def point(subject, subject_key: Hashable, values: Dict[str, float]) -> Tuple:
+            key = (subject_key, tuple(sorted(values.items())))
+            points.setdefault(key, (subject, values))
+            return key
+
+        plans = []
+        for subject in subjects:
+            subject_key = self.model.key(subject)
+            base = self.model.inputs(subject)
+            probes = []
+            for name, value in base.items():
+                if name in self.model.integer_inputs:
+                    step, down = 1.0, None
+                else:
+                    step = abs(value) * self.relative_step or self.relative_step
+                    # Inputs at zero only get a forward step (no negative sizes)
+                    down = point(subject, subject_key, dict(base, **{name: value - step})) if value else None
+                up = point(subject, subject_key, dict(base, **{name: value + step}))
+                probes.append((name, value, step, up, down))
+            plans.append((subject, point(subject, subject_key, base), probes))
+
+        costs = dict(zip(points, self.model.costs(list(points.values()))))
+        self.evaluations += len(points)
+
+        results = []
+        for subject, base_key, probes in plans:
+            base_cost = costs[base_key]
+            drivers = []
+            for name, value, step, up, down in probes:
+                forward = (costs[up] - base_cost) / step
+                if down is None:
+                    marginal, exact = forward, name in self.model.integer_inputs
+                else:
+                    backward = (base_cost - costs[down]) / step
+                    marginal = (forward + backward) / 2
+                    exact = abs(forward - backward) <= 1e-9 * max(1.0, abs(marginal))
+                drivers.append(InputSensitivity(
+                    name=name,
+                    value=value,
+                    step=step,
+                    marginal_cost=marginal,
+                    elasticity=marginal * value / base_cost if base_cost else 0.0,
+                    exact=exact
+                ))
+            drivers.sort(key=lambda d: abs(d.elasticity), reverse=True)
+            results.append(CostSensitivity(name=self.model.name(subject), monthly_cost=base_cost, drivers=drivers))
+
+        return results
+
+def rank_drivers(results: List[CostSensitivity]) -> List[Tuple[str, float]]:
+    """Inputs ranked by the share of total cost they drive across all results"""
+    total_cost = sum(result.monthly_cost for result in results)
+    driven: Dict[str, float] = {}
+    for result in results:
+        for driver in result.drivers:
+            driven[driver.name] = driven.get(driver.name, 0.0) + abs(driver.marginal_cost * driver.value)
+    ranked = sorted(driven.items(), key=lambda item: item[1], reverse=True)
+    return [(name, amount / total_cost if total_cost else 0.0) for name, amount in ranked]
+
+def main():
+    """Rank the cost drivers of Terragrunt environments or analyzer scenarios"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Marginal cost and driver ranking for every numeric input")
+    parser.add_argument("terragrunt_root", nargs="?", default="../terragrunt", help="Path to Terragrunt root directory")
+    parser.add_argument("--scenarios", action="store_true", help="Analyze the YAML analyzer scenarios instead of environments")
+    parser.add_argument("--config", default="analyzer-config.yaml", help="YAML configuration file (with --scenarios)")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--relative-step", type=float, default=0.05, help="Relative step for continuous inputs")
+    parser.add_argument("--top", type=int, default=5, help="Drivers to show per environment")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    try:
+        if args.scenarios:
+            from yaml_terragrunt_analyzer import YAMLBasedAnalyzer
+            analyzer = YAMLBasedAnalyzer(args.config, args.region)
+            scenarios = [analyzer.get_scenario(name) for name in analyzer.config['scenarios']]
+            batches = [(ScenarioCostModel(analyzer, infrastructure), scenarios) for infrastructure in ("ecs", "eks")]
+        else:
+            from terragrunt_environment_analyzer import TerragruntCostAnalyzer
+            cost_analyzer = TerragruntCostAnalyzer(args.region)
+            environments = cost_analyzer.analyze_all_environments(args.terragrunt_root)
+            batches = [(EnvironmentCostModel(cost_analyzer), environments)]
+
+        results = []
+        evaluations = 0
+        for model, subjects in batches:
+            sensitivity = SensitivityAnalyzer(model, args.relative_step)
+            results.extend(sensitivity.analyze(subjects))
+            evaluations += sensitivity.evaluations
+
+        print(f"\n📐 Cost Sensitivity ({len(results)} analyzed, {evaluations} cost evaluations)")
+        for result in results:
+            print(f"\n💰 {result.name}: ${result.monthly_cost:.2f}/month")
+            for driver in result.drivers[:args.top]:
+                marker = "" if driver.exact else " ~"
+                print(f"   {driver.name:<24} = {driver.value:<10g} ${driver.marginal_cost:>9.2f}/unit  "
+                      f"elasticity {driver.elasticity:>6.3f}{marker}")
+
+        print(f"\n🏆 Top cost drivers")
+        for name, share in rank_drivers(results)[:args.top]:
+            print(f"   {name:<24} {share * 100:5.1f}% of total cost (value x marginal cost)")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({"results": [asdict(result) for result in results],
+                           "ranking": rank_drivers(results)}, f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Terraform Module Analyzer
+Parses module .tf sources and resolves task sizes, counts and NAT gateways for an environment
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from profiler import profiled
+
+class HCLExpression(str):
+    """An HCL expression that is not a plain literal (kept as source text)"""
+
+@dataclass
+class HCLBlock:
+    """A parsed HCL block: ``type "label" ... { attributes / nested blocks }``"""
+    type: str
+    labels: List[str] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    blocks: List["HCLBlock"] = field(default_factory=list)
+
+    def find_blocks(self, block_type: str) -> List["HCLBlock"]:
+        """Return the nested blocks of the given type"""
+        return [block for block in self.blocks if block.type == block_type]
+
+class HCLParser:
+    """Small recursive-descent parser for the HCL subset used by Terraform/Terragrunt files.
+
+    Literals (strings without interpolation, numbers, bools, null, lists and
+    objects of literals) become Python values; anything else is returned as an
+    ``HCLExpression`` holding the source text, to be resolved by the caller.
+    """
+
+    _NUMBER = re.compile(r'-?\d+(\.\d+)?([eE][+-]?\d+)?$')
+    _IDENT = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]*')
+    _CLOSERS = {"(": ")", "[": "]", "{": "}"}
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def parse(self) -> HCLBlock:
+        """Parse the whole document into an anonymous root block"""
+        root = HCLBlock(type="")
+        self._parse_body(root, closing=None)
+        return root
+
+    # -- lexical helpers -------------------------------------------------------
+
+    def _skip(self, newlines: bool = True):
+        text, pos = self.text, self.pos
+        while pos < len(text):
+            char = text[pos]
+            if char in " \t\r" or (newlines and char in "\n,"):
+                pos += 1
+            elif char == "#" or text.startswith("//", pos):
+                end = text.find("\n", pos)
+                pos = len(text) if end < 0 else end
+            elif text.startswith("/*", pos):
+                end = text.find("*/", pos + 2)
+                pos = len(text) if end < 0 else end + 2
+            else:
+                break
+        self.pos = pos
+
+    def _skip_string(self, pos: int) -> int:
+        """Return the index just after the quoted string starting at ``pos``"""
+        text = self.text
+        pos += 1
+        depth = 0
+        while pos < len(text):
+            char = text[pos]
+            if char == "\\":
+                pos += 2
+                continue
+            if text.startswith("${", pos) or text.startswith("%{", pos):
+                depth += 1
+                pos += 2
+                continue
+            if depth and char == "}":
+                depth -= 1
+            elif depth and char == '"':
+                pos = self._skip_string(pos)
+                continue
+            elif not depth and char == '"':
+                return pos + 1
+            pos += 1
+        return pos
+
+    def _skip_heredoc(self, pos: int) -> int:
+        """Return the index just after the heredoc starting at ``pos``"""
+        match = re.compile(r'<<-?([A-Za-z_]+)[ \t]*\n').match(self.text, pos)
+        if not match:
+            return pos + 2
+        end = re.compile(r'^[ \t]*' + re.escape(match.group(1)) + r'[ \t]*$', re.MULTILINE).search(self.text, match.end())
+        return len(self.text) if not end else end.end()
+
+    def _expression_end(self, pos: int) -> int:
+        """Find where an attribute expression ends (newline/comma/closer at depth 0)"""
+        text = self.text
+        stack = []
+        while pos < len(text):
+            char = text[pos]
+            if char == '"':
+                pos = self._skip_string(pos)
+                continue
+            if text.startswith("<<", pos):
+                pos = self._skip_heredoc(pos)
+                continue
+            if char in self._CLOSERS:
+                stack.append(self._CLOSERS[char])
+            elif stack and char == stack[-1]:
+                stack.pop()
+            elif not stack and (char in "\n,)]}" or char == "#" or text.startswith("//", pos)):
+                break
+            elif stack and (char == "#" or text.startswith("//", pos)):
+                end = text.find("\n", pos)
+                pos = len(text) if end < 0 else end
+                continue
+            pos += 1
+        return pos
+
+    # -- grammar ---------------------------------------------------------------
+
+    def _parse_body(self, block: HCLBlock, closing: Optional[str]):
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                return
+            if closing and self.text[self.pos] == closing:
+                self.pos += 1
+                return
+
+            if self.text[self.pos] == '"':
+                # Quoted object key: "name" = value / "name" : value
+                end = self._skip_string(self.pos)
+                name = self.text[self.pos + 1:end - 1]
+                self.pos = end
+                self._skip(newlines=False)
+                if self.pos < len(self.text) and self.text[self.pos] in "=:":
+                    self.pos += 1
+                    self._skip(newlines=False)
+                    block.attributes[name] = self._parse_value()
+                continue
+
+            match = self._IDENT.match(self.text, self.pos)
+            if not match:
+                # Unknown token: skip the rest of the line rather than failing the whole file
+                self.pos = self._expression_end(self.pos + 1)
+                continue
+            name = match.group(0)
+            self.pos = match.end()
+            self._skip(newlines=False)
+
+            if self.pos < len(self.text) and self.text[self.pos] in "=:" and not self.text.startswith("==", self.pos):
+                self.pos += 1
+                self._skip(newlines=False)
+                block.attributes[name] = self._parse_value()
+                continue
+
+            labels = []
+            while self.pos < len(self.text) and self.text[self.pos] != "{":
+                if self.text[self.pos] == '"':
+                    end = self._skip_string(self.pos)
+                    labels.append(self.text[self.pos + 1:end - 1])
+                    self.pos = end
+                else:
+                    label = self._IDENT.match(self.text, self.pos)
+                    if not label:
+                        break
+                    labels.append(label.group(0))
+                    self.pos = label.end()
+                self._skip(newlines=False)
+            if self.pos >= len(self.text) or self.text[self.pos] != "{":
+                continue
+            self.pos += 1
+            child = HCLBlock(type=name, labels=labels)
+            self._parse_body(child, closing="}")
+            block.blocks.append(child)
+
+    def _parse_value(self) -> Any:
+        start = self.pos
+        char = self.text[start] if start < len(self.text) else ""
+        if char in "[{" and re.compile(r'[\[{]\s*for\s').match(self.text, start):
+            end = self._expression_end(start)
+            self.pos = end
+            return HCLExpression(self.text[start:end].strip())
+        if char == "[":
+            self.pos += 1
+            value = self._parse_list()
+        elif char == "{":
+            self.pos += 1
+            body = HCLBlock(type="")
+            self._parse_body(body, closing="}")
+            value = body.attributes
+            for child in body.blocks:
+                value.setdefault(child.type, child.attributes)
+        else:
+            end = self._expression_end(start)
+            self.pos = end
+            return self._literal(self.text[start:end].strip())
+
+        # Collection followed by more expression text (e.g. ``[...][0]``) is not a literal
+        end = self._expression_end(self.pos)
+        if self.text[self.pos:end].strip():
+            self.pos = end
+            return HCLExpression(self.text[start:end].strip())
+        return value
+
+    def _parse_list(self) -> Any:
+        items = []
+        while True:
+            self._skip()
+            if self.pos >= len(self.text):
+                return items
+            if self.text[self.pos] == "]":
+                self.pos += 1
+                return items
+            items.append(self._parse_value())
+
+    def _literal(self, source: str) -> Any:
+        if source in ("true", "false"):
+            return source == "true"
+        if source == "null":
+            return None
+        if self._NUMBER.match(source):
+            return float(source) if any(c in source for c in ".eE") else int(source)
+        if len(source) >= 2 and source[0] == '"' and self._skip_string_in(source) == len(source):
+            inner = source[1:-1]
+            if "${" not in inner and "%{" not in inner:
+                return inner.replace('\\"', '"').replace("\\\\", "\\")
+        return HCLExpression(source)
+
+    def _skip_string_in(self, source: str) -> int:
+        return HCLParser(source)._skip_string(0)
+
+def parse_hcl(text: str) -> HCLBlock:
+    """Parse HCL source text"""
+    return HCLParser(text).parse()
+
+def parse_hcl_file(file_path: str) -> HCLBlock:
+    """Parse an HCL/.tf file"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_hcl(f.read())
+
+_REFERENCE = re.compile(r'^(var|local|dependency)\.([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+|\[\d+\])*)$')
+_LENGTH = re.compile(r'^length\((.+)\)$')
+
+def resolve_expression(value: Any, scope: Dict[str, Dict[str, Any]]) -> Any:
+    """Resolve literals, ``var.x``/``local.x.y[0]``/``dependency.x.outputs.y`` references and ``length(...)``
+
+    Returns None when the expression depends on something that is not known
+    statically (resource attributes, remote modules, functions we do not model).
+    """
+    if isinstance(value, list):
+        return [resolve_expression(item, scope) for item in value]
+    if isinstance(value, dict):
+        return {key: resolve_expression(item, scope) for key, item in value.items()}
+    if not isinstance(value, HCLExpression):
+        return value
+
+    source = value.strip()
+    length_match = _LENGTH.match(source)
+    if length_match:
+        inner = resolve_expression(HCLExpression(length_match.group(1).strip()), scope)
+        return len(inner) if isinstance(inner, (list, dict, str)) else None
+
+    match = _REFERENCE.match(source)
+    if not match:
+        return None
+    namespace, name, path = match.groups()
+    current = scope.get(namespace, {}).get(name)
+    for step in re.findall(r'\.([A-Za-z0-9_\-]+)|\[(\d+)\]', path):
+        attr, index = step
+        if isinstance(current, dict) and attr:
+            current = current.get(attr)
+        elif isinstance(current, list) and index and int(index) < len(current):
+            current = current[int(index)]
+        else:
+            return None
+    return resolve_expression(current, scope) if isinstance(current, HCLExpression) else current
+
+@dataclass
+class TerraformModule:
+    """Statically parsed Terraform module"""
+    path: str
+    variables: Dict[str, Any]
+    locals: Dict[str, Any]
+    modules: Dict[str, HCLBlock]
+    resources: Dict[str, HCLBlock]
+    data_sources: Dict[str, HCLBlock] = field(default_factory=dict)
+
+@dataclass
+class ResolvedSizing:
+    """Cost-relevant values resolved from module sources and environment inputs"""
+    task_cpu_units: Optional[int] = None
+    task_memory_mb: Optional[int] = None
+    desired_count: Optional[int] = None
+    min_count: Optional[int] = None
+    max_count: Optional[int] = None
+    node_groups: List[Dict[str, Any]] = field(default_factory=list)
+    nat_gateways: Optional[int] = None
+    sources: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def task_cpu_vcpus(self) -> Optional[float]:
+        return self.task_cpu_units / 1024 if self.task_cpu_units else None
+
+    @property
+    def task_memory_gb(self) -> Optional[float]:
+        return self.task_memory_mb / 1024 if self.task_memory_mb else None
+
+class TerraformModuleAnalyzer:
+    """Parses module .tf files once per run and resolves sizing for environments"""
+
+    # Environment inputs that override the module wiring directly
+    INPUT_OVERRIDES = {
+        "fargate_cpu": "task_cpu_units",
+        "fargate_memory": "task_memory_mb",
+        "desired_count": "desired_count",
+        "min_count": "min_count",
+        "max_count": "max_count",
+    }
+
+    def __init__(self):
+        self._module_cache: Dict[str, Tuple[tuple, TerraformModule]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @profiled("module_parse", lambda self, module_path: {"module": Path(module_path).name})
+    def load_module(self, module_path: str) -> TerraformModule:
+        """Parse every .tf file in a module directory (cached by resolved path until a file changes)"""
+        key = str(Path(module_path).resolve())
+        tf_files = sorted(Path(key).glob("*.tf"))
+        signature = tuple((tf_file.name, tf_file.stat().st_mtime_ns) for tf_file in tf_files)
+        cached = self._module_cache.get(key)
+        if cached and cached[0] == signature:
+            self.cache_hits += 1
+            return cached[1]
+        self.cache_misses += 1
+
+        variables, local_values, modules, resources, data_sources = {}, {}, {}, {}, {}
+        for tf_file in tf_files:
+            try:
+                root = parse_hcl_file(str(tf_file))
+            except Exception as e:
+                print(f"⚠️ Could not parse {tf_file}: {e}")
+                continue
+            for block in root.blocks:
+                if block.type == "variable" and block.labels:
+                    variables[block.labels[0]] = block.attributes.get("default")
+                elif block.type == "locals":
+                    local_values.update(block.attributes)
+                elif block.type == "module" and block.labels:
+                    modules[block.labels[0]] = block
+                elif block.type == "resource" and len(block.labels) >= 2:
+                    resources[f"{block.labels[0]}.{block.labels[1]}"] = block
+                elif block.type == "data" and len(block.labels) >= 2:
+                    data_sources[f"{block.labels[0]}.{block.labels[1]}"] = block
+
+        module = TerraformModule(path=key, variables=variables, locals=local_values, modules=modules, resources=resources,
+                                 data_sources=data_sources)
+        self._module_cache[key] = (signature, module)
+        return module
+
+    @profiled("sizing_resolve")
+    def resolve_sizing(self, module_path: str, inputs: Dict[str, Any]) -> ResolvedSizing:
+        """Resolve cpu, memory, counts, node groups and NAT gateways for an environment"""
+        sizing = ResolvedSizing()
+        self._walk_module(module_path, dict(inputs), sizing, depth=0)
+
+        for input_name, attr in self.INPUT_OVERRIDES.items():
+            if isinstance(inputs.get(input_name), (int, float)):
+                setattr(sizing, attr, int(inputs[input_name]))
+                sizing.sources[attr] = f"inputs.{input_name}"
+
+        node_groups = inputs.get("node_groups")
+        if isinstance(node_groups, dict):
+            sizing.node_groups = [self._node_group(name, group, sizing, "inputs.node_groups")
+                                  for name, group in node_groups.items() if isinstance(group, dict)]
+            sizing.sources["node_groups"] = "inputs.node_groups"
+
+        return sizing
+
+    def _walk_module(self, module_path: str, inputs: Dict[str, Any], sizing: ResolvedSizing, depth: int):
+        module_dir = Path(module_path)
+        if depth > 5 or not module_dir.is_dir():
+            return
+
+        module = self.load_module(str(module_dir))
+        variables = {name: default for name, default in module.variables.items()}
+        variables.update({name: value for name, value in inputs.items() if value is not None})
+        scope = {"var": variables, "local": module.locals}
+
+        def resolve(block: HCLBlock, attr: str) -> Any:
+            return resolve_expression(block.attributes.get(attr), scope)
+
+        for address, block in module.resources.items():
+            resource_type = address.split(".")[0]
+            if resource_type == "aws_ecs_task_definition":
+                self._set(sizing, "task_cpu_units", resolve(block, "cpu"), module.path, address)
+                self._set(sizing, "task_memory_mb", resolve(block, "memory"), module.path, address)
+            elif resource_type == "aws_ecs_service":
+                self._set(sizing, "desired_count", resolve(block, "desired_count"), module.path, address)
+            elif resource_type == "aws_appautoscaling_target":
+                self._set(sizing, "min_count", resolve(block, "min_capacity"), module.path, address)
+                self._set(sizing, "max_count", resolve(block, "max_capacity"), module.path, address)
+            elif resource_type == "aws_eks_node_group":
+                # scaling_config is a nested block in Terraform; an object attribute is accepted too
+                scaling_blocks = block.find_blocks("scaling_config")
+                scaling = (resolve_expression(scaling_blocks[0].attributes, scope) if scaling_blocks
+                           else resolve(block, "scaling_config")) or {}
+                types = resolve(block, "instance_types") or []
+                sizing.node_groups.append(self._node_group(address, dict(scaling, instance_types=types),
+                                                           sizing, f"{module.path}:{address}"))
+            elif resource_type == "aws_nat_gateway":
+                count = resolve(block, "count")
+                sizing.nat_gateways = (sizing.nat_gateways or 0) + (count if isinstance(count, int) else 1)
+
+        for name, block in module.modules.items():
+            source = block.attributes.get("source", "")
+            if source == "terraform-aws-modules/vpc/aws":
+                nat_gateways = self._vpc_nat_gateways({attr: resolve(block, attr) for attr in block.attributes})
+                if nat_gateways is not None:
+                    sizing.nat_gateways = (sizing.nat_gateways or 0) + nat_gateways
+                    sizing.sources["nat_gateways"] = f"{module.path}:module.{name}"
+            elif isinstance(source, str) and source.startswith("."):
+                child_inputs = {attr: resolve(block, attr) for attr in block.attributes if attr != "source"}
+                self._walk_module(str(module_dir / source), child_inputs, sizing, depth + 1)
+
+    @staticmethod
+    def _set(sizing: ResolvedSizing, attr: str, value: Any, module_path: str, address: str):
+        if isinstance(value, (int, float)) and getattr(sizing, attr) is None:
+            setattr(sizing, attr, int(value))
+            sizing.sources[attr] = f"{module_path}:{address}"
+
+    @staticmethod
+    def _vpc_nat_gateways(args: Dict[str, Any]) -> Optional[int]:
+        """NAT gateway count using terraform-aws-modules/vpc semantics"""
+        if not args.get("enable_nat_gateway"):
+            return 0
+        if args.get("single_nat_gateway"):
+            return 1
+        azs = args.get("azs")
+        if args.get("one_nat_gateway_per_az"):
+            return len(azs) if isinstance(azs, list) else None
+        private_subnets = args.get("private_subnets")
+        return len(private_subnets) if isinstance(private_subnets, list) else None
+
+    @staticmethod
+    def _node_group(name: str, group: Dict[str, Any], sizing: ResolvedSizing, origin: str) -> Dict[str, Any]:
+        """A node group with numeric sizes. Sizes that are not numbers (unresolved references,
+        null) fall back like missing ones: desired to min_size and then 1, min and max to
+        desired. Each such fallback is recorded in ``sizing.sources``."""
+        def size(key: str) -> Optional[int]:
+            value = group.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return int(value)
+            if key in group:
+                sizing.sources[f"node_groups.{name}.{key}"] = f"{origin} ({value!r} is not a number)"
+            return None
+
+        instance_types = group.get("instance_types") or ["t3.medium"]
+        minimum, maximum, desired = size("min_size"), size("max_size"), size("desired_size")
+        if desired is None:
+            desired = minimum if minimum is not None else 1
+            if f"node_groups.{name}.desired_size" in sizing.sources:
+                sizing.sources[f"node_groups.{name}.desired_size"] += f", using {desired}"
+        return {
+            "name": name,
+            "instance_type": instance_types[0] if isinstance(instance_types, list) else "t3.medium",
+            "min_size": minimum if minimum is not None else desired,
+            "max_size": maximum if maximum is not None else desired,
+            "desired_size": desired,
+        }
+
+def main():
+    """Print resolved sizing for each Terragrunt environment"""
+    import argparse
+    from terragrunt_environment_analyzer import TerragruntParser
+
+    parser = argparse.ArgumentParser(description="Resolve module sizing for Terragrunt environments")
+    parser.add_argument("terragrunt_root", nargs="?", default="../terragrunt", help="Path to Terragrunt root directory")
+
+    args = parser.parse_args()
+
+    analyzer = TerraformModuleAnalyzer()
+    terragrunt_parser = TerragruntParser()
+    environments_path = Path(args.terragrunt_root) / "environments"
+
+    for env_dir in sorted(d for d in environments_path.iterdir() if d.is_dir()):
+        config = terragrunt_parser.parse_terragrunt_file(str(env_dir / "terragrunt.hcl"))
+        sizing = analyzer.resolve_sizing(str(env_dir / config["source_module"]), config["inputs"])
+        print(f"\n🏗️ {env_dir.name}")
+        print(f"   📦 Task: {sizing.task_cpu_units} CPU units, {sizing.task_memory_mb} MB x {sizing.desired_count} "
+              f"(min {sizing.min_count}, max {sizing.max_count})")
+        print(f"   🌐 NAT Gateways: {sizing.nat_gateways}")
+        for group in sizing.node_groups:
+            print(f"   ⚙️ Node group {group['name']}: {group['desired_size']}x {group['instance_type']} "
+                  f"({group['min_size']}-{group['max_size']})")
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,17 +6,31 @@ Generates comprehensive HTML reports for Terragrunt environment analysis
 
 import os
 import json
+import time
+import functools
+from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime
-from terragrunt_environment_analyzer import TerragruntCostAnalyzer, TerragruntEnvironment
+from terragrunt_environment_analyzer import TerragruntCostAnalyzer, TerragruntEnvironment, priced_from_memo
 from aws_pricing_fetcher import AWSPricingFetcher
+from tfstate_reader import TerraformStateCostAnalyzer
+from schedule_simulator import ScheduleSimulator, load_schedules
+from multi_repo_analyzer import MultiRepoAnalyzer, generate_combined_report_html, load_manifest
+from analysis_daemon import DEFAULT_ADDRESS, request_daemon
+from profiler import profiled, add_profile_arguments, start_profiling, finish_profiling
+from metrics_exporter import build_metrics, write_textfile
+from report_pages import page_slug, write_pages
+
+DEFAULT_PAGES_DIR = Path(__file__).parent / "terragrunt_report"
 
 class TerragruntReportGenerator:
     """Generates comprehensive HTML reports for Terragrunt environments"""
 
-    def __init__(self, region="eu-west-1"):
+    def __init__(self, region="eu-west-1", cost_memo: str = None, cost_rules: str = None):
         self.region = region
-        self.analyzer = TerragruntCostAnalyzer(region)
+        self.cost_rules = cost_rules
+        self.analyzer = TerragruntCostAnalyzer(region, cost_memo, cost_rules)
+        self.schedule_simulator = ScheduleSimulator()
 
     def analyze_environments(self, terragrunt_root: str = None, specific_env: str = None) -> dict:
         """Analyze Terragrunt environments"""
@@ -30,6 +44,7 @@ class TerragruntReportGenerator:
                     raise FileNotFoundError(f"Environment {specific_env} not found")
                 environment = self.analyzer.analyze_terragrunt_environment(str(env_path))
                 environments = [environment]
+                self.analyzer.save_memo()
             else:
                 environments = self.analyzer.analyze_all_environments(terragrunt_root)
 
@@ -51,19 +66,67 @@ class TerragruntReportGenerator:
                 "terragrunt_root": terragrunt_root
             }
 
-    def generate_environment_comparison_html(self, environments: list, total_cost: float, terragrunt_root: str) -> str:
-        """Generate HTML report comparing environments"""
+    @profiled("state_read")
+    def analyze_deployed_state(self, state_files: list) -> list:
+        """Price the resources recorded in Terraform state files"""
+        self.analyzer.load_pricing_data()
+        state_analyzer = TerraformStateCostAnalyzer(self.region, self.analyzer.pricing_data)
+
+        stacks = []
+        for state_file in state_files:
+            print(f"  📦 Reading state {state_file}...")
+            stacks.append(state_analyzer.analyze_state_file(state_file))
+
+        return stacks
+
+    @staticmethod
+    def _environment_color(name: str) -> str:
+        """Card background of an environment"""
+        if name == "production":
+            return "linear-gradient(135deg, #e74c3c 0%, #c0392b 100%)"
+        elif name == "staging":
+            return "linear-gradient(135deg, #f39c12 0%, #e67e22 100%)"
+        elif name == "eks":
+            return "linear-gradient(135deg, #3498db 0%, #2980b9 100%)"
+        elif name == "ecs":
+            return "linear-gradient(135deg, #9b59b6 0%, #8e44ad 100%)"
+        return "linear-gradient(135deg, #27ae60 0%, #229954 100%)"
+
+    @staticmethod
+    def _environment_icon(name: str) -> str:
+        if name == "production":
+            return "🚀"
+        elif name == "staging":
+            return "🧪"
+        elif name == "eks":
+            return "⚙️"
+        elif name == "ecs":
+            return "📦"
+        return "🛠️"
+
+    @staticmethod
+    def environment_page_path(environment) -> str:
+        """Path of an environment's page relative to the report index"""
+        return f"environments/{page_slug(Path(environment.path).name)}.html"
+
+    @profiled("html_render")
+    def generate_environment_comparison_html(self, environments: list, total_cost: float, terragrunt_root: str,
+                                             deployed_stacks: list = None, page_links: bool = False) -> str:
+        """Generate HTML report comparing environments; ``page_links`` links every
+        environment card to its page of a multi-page report"""
 
         current_date = datetime.now().strftime("%B %d, %Y")
 
         # Sort environments by cost
         environments.sort(key=lambda x: x.estimated_monthly_cost, reverse=True)
 
-        # Calculate realistic annual cost
-        realistic_annual_cost = self._calculate_realistic_annual_cost(environments)
-
-        # Calculate realistic annual cost
-        realistic_annual_cost = self._calculate_realistic_annual_cost(environments)
+        # Calculate realistic annual cost from the hourly schedule simulation
+        realistic_annual_cost, schedule_results = self._calculate_realistic_annual_cost(environments)
+        schedule_rows_html = ""
+        for result in sorted(schedule_results.values(), key=lambda r: r.annual_cost, reverse=True):
+            note = "" if result.counted else " (alternative, not counted)"
+            schedule_rows_html += (f'<li><strong>{result.name.title()}:</strong> {result.effective_uptime * 100:.1f}% of 24/7 cost, '
+                                   f'{result.active_hours} active hours = ${result.annual_cost:.2f}/year{note}</li>')
 
         # Environment cards HTML
         env_cards_html = ""
@@ -71,16 +134,10 @@ class TerragruntReportGenerator:
             percentage = (env.estimated_monthly_cost / total_cost * 100) if total_cost > 0 else 0
 
             # Determine card color based on environment
-            if env.name == "production":
-                card_color = "linear-gradient(135deg, #e74c3c 0%, #c0392b 100%)"
-            elif env.name == "staging":
-                card_color = "linear-gradient(135deg, #f39c12 0%, #e67e22 100%)"
-            elif env.name == "eks":
-                card_color = "linear-gradient(135deg, #3498db 0%, #2980b9 100%)"
-            elif env.name == "ecs":
-                card_color = "linear-gradient(135deg, #9b59b6 0%, #8e44ad 100%)"
-            else:
-                card_color = "linear-gradient(135deg, #27ae60 0%, #229954 100%)"
+            card_color = self._environment_color(env.name)
+            title = f"{env.name.upper()} Environment"
+            if page_links:
+                title = f'<a href="{self.environment_page_path(env)}" style="color: inherit;">{title}</a>'
 
             # Build cost breakdown list
             cost_breakdown_html = ""
@@ -89,7 +146,7 @@ class TerragruntReportGenerator:
 
             env_cards_html += f'''
             <div class="env-card" style="background: {card_color};">
-                <h3>{env.name.upper()} Environment</h3>
+                <h3>{title}</h3>
                 <div class="env-cost">${env.estimated_monthly_cost:.2f}/month</div>
                 <div class="env-percentage">{percentage:.1f}% of total cost</div>
                 <div class="env-details">
@@ -183,6 +240,7 @@ class TerragruntReportGenerator:
     <div class="success">
         <h3>✅ Analysis Complete</h3>
         <p><strong>Successfully analyzed {len(environments)} Terragrunt environments!</strong> Total infrastructure cost across all environments: <strong>${total_cost:.2f}/month</strong></p>
+        <p>{priced_from_memo(environments)} of {len(environments)} environments were priced from the cost memo (identical cost-relevant configuration).</p>
     </div>
 
     <div class="section">
@@ -277,17 +335,16 @@ class TerragruntReportGenerator:
                 <li>ECS environment uses Fargate serverless containers</li>
             </ul>
             
-            <h4>📊 Realistic Annual Cost Calculation</h4>
+            <h4>📊 Realistic Annual Cost Calculation ({self.schedule_simulator.hours_in_year}-hour schedule simulation, {self.schedule_simulator.year})</h4>
             <ul>
-                <li><strong>Production:</strong> 100% uptime (24/7/365) = ${[env.estimated_monthly_cost * 12 for env in environments if env.name.lower() == "production"][0] if any(env.name.lower() == "production" for env in environments) else 0:.2f}/year</li>
-                <li><strong>Staging:</strong> 60% uptime (weekdays) = ${[env.estimated_monthly_cost * 12 * 0.6 for env in environments if env.name.lower() == "staging"][0] if any(env.name.lower() == "staging" for env in environments) else 0:.2f}/year</li>
-                <li><strong>Development:</strong> 30% uptime (business hours) = ${[env.estimated_monthly_cost * 12 * 0.3 for env in environments if env.name.lower() == "development"][0] if any(env.name.lower() == "development" for env in environments) else 0:.2f}/year</li>
-                <li><strong>EKS/ECS:</strong> Only one deployed (70% uptime for testing)</li>
+                {schedule_rows_html}
                 <li><strong>Total Savings:</strong> ${(total_cost * 12) - realistic_annual_cost:.2f}/year vs running all environments 24/7</li>
             </ul>
         </div>
     </div>
 
+    {self._generate_deployed_state_html(deployed_stacks, total_cost)}
+
     <div class="section">
         <h2>🔧 Environment Specifications</h2>
         
@@ -331,16 +388,7 @@ class TerragruntReportGenerator:
 
         for env in environments:
             # Environment icon
-            if env.name == "production":
-                icon = "🚀"
-            elif env.name == "staging":
-                icon = "🧪"
-            elif env.name == "eks":
-                icon = "⚙️"
-            elif env.name == "ecs":
-                icon = "📦"
-            else:
-                icon = "🛠️"
+            icon = self._environment_icon(env.name)
 
             specs_html += f'''
             <div style="background: #f8f9fa; border-radius: 8px; padding: 20px; margin: 15px 0;">
@@ -366,48 +414,131 @@ class TerragruntReportGenerator:
 
         return specs_html
 
-    def _calculate_realistic_annual_cost(self, environments: list) -> float:
-        """Calculate realistic annual costs based on actual usage patterns"""
+    @profiled("html_render", lambda self, env: {"environment": env.name})
+    def generate_environment_page_html(self, env) -> str:
+        """Report page of one environment.
 
-        # Separate environments by type
-        production_envs = [e for e in environments if e.name.lower() == "production"]
-        staging_envs = [e for e in environments if e.name.lower() == "staging"]
-        dev_envs = [e for e in environments if e.name.lower() == "development"]
-        eks_envs = [e for e in environments if e.name.lower() == "eks"]
-        ecs_envs = [e for e in environments if e.name.lower() == "ecs"]
+        The page depends on nothing but the environment itself (no totals or
+        dates), so it only changes when that environment's costs or configuration do.
+        """
+        rows_html = "".join(f'<tr><td>{service}</td><td class="has-cost">${cost:.2f}</td></tr>'
+                            for service, cost in env.cost_breakdown.items())
+        directory = Path(env.path).name
 
-        total_realistic = 0
+        return f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{env.name.title()} Environment Cost Analysis</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, sans-serif; margin: 40px; line-height: 1.6; color: #333; }}
+        .header {{ background: {self._environment_color(env.name)}; color: white; padding: 30px; border-radius: 10px; text-align: center; }}
+        .badge {{ background: rgba(0,0,0,0.2); color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px; margin: 5px; }}
+        .section {{ margin: 30px 0; background: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        table {{ width: 100%; border-collapse: collapse; margin: 15px 0; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
+        th {{ background-color: #f8f9fa; font-weight: 600; }}
+        .has-cost {{ background-color: #d4edda; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <p><a href="../index.html">← All environments</a></p>
 
-        # Production: 100% uptime (24/7/365)
-        for env in production_envs:
-            total_realistic += env.estimated_monthly_cost * 12
+    <div class="header">
+        <h1>{self._environment_icon(env.name)} {env.name.upper()} Environment</h1>
+        <h2>${env.estimated_monthly_cost:.2f}/month</h2>
+        <span class="badge">{env.inputs.get('aws_region', 'eu-west-1')}</span>
+        <span class="badge">{env.resource_estimates.get('estimated_scale', 'Unknown')} scale</span>
+    </div>
 
-        # Staging: 60% uptime (weekdays mostly)
-        for env in staging_envs:
-            total_realistic += env.estimated_monthly_cost * 12 * 0.6
+    <div class="section">
+        <h2>💸 Cost Breakdown</h2>
+        <table>
+            <thead><tr><th>Service</th><th>Monthly Cost</th></tr></thead>
+            <tbody>{rows_html}</tbody>
+            <tfoot><tr><th>Total</th><th>${env.estimated_monthly_cost:.2f}</th></tr></tfoot>
+        </table>
+    </div>
 
-        # Development: 30% uptime (business hours only)
-        for env in dev_envs:
-            total_realistic += env.estimated_monthly_cost * 12 * 0.3
+    <div class="section">
+        <h2>🔧 Environment Specification</h2>
+        <p><strong>Module:</strong> <code>{env.source_module}</code></p>
+        {self._generate_environment_specs_html([env])}
+    </div>
 
-        # EKS vs ECS: Choose the cheaper alternative (only one would be deployed)
-        if eks_envs and ecs_envs:
-            eks_cost = eks_envs[0].estimated_monthly_cost
-            ecs_cost = ecs_envs[0].estimated_monthly_cost
+    <div class="section">
+        <h2>🚀 Deployment</h2>
+        <code>cd terragrunt/environments/{directory} && terragrunt apply</code>
+    </div>
+</body>
+</html>'''
 
-            if eks_cost < ecs_cost:
-                total_realistic += eks_cost * 12 * 0.7  # 70% uptime for testing
-            else:
-                total_realistic += ecs_cost * 12 * 0.7  # 70% uptime for testing
-        elif eks_envs:
-            total_realistic += eks_envs[0].estimated_monthly_cost * 12 * 0.7
-        elif ecs_envs:
-            total_realistic += ecs_envs[0].estimated_monthly_cost * 12 * 0.7
+    def write_report_pages(self, output_dir: str, environments: list, total_cost: float, terragrunt_root: str,
+                           deployed_stacks: list = None, prune: bool = True):
+        """Multi-page report: ``index.html`` plus one page per environment, rendered in
+        parallel; pages whose content did not change are left untouched"""
+        pages = {"index.html": functools.partial(self.generate_environment_comparison_html, environments, total_cost,
+                                                 terragrunt_root, deployed_stacks, page_links=True)}
+        for env in environments:
+            pages[self.environment_page_path(env)] = functools.partial(self.generate_environment_page_html, env)
+
+        return write_pages(output_dir, pages, prune="environments" if prune else None)
+
+    def _generate_deployed_state_html(self, deployed_stacks: list, total_cost: float) -> str:
+        """Generate HTML comparing deployed state costs with the estimates"""
+        if not deployed_stacks:
+            return ""
+
+        deployed_total = sum(stack.monthly_cost for stack in deployed_stacks)
+        rows_html = ""
+        for stack in deployed_stacks:
+            breakdown_html = "".join(
+                f'<li>{service}: <strong>${cost:.2f}</strong></li>' for service, cost in stack.cost_breakdown.items()
+            )
+            rows_html += f'''
+                <tr>
+                    <td><code>{stack.state_file}</code></td>
+                    <td>{stack.resource_count} / {stack.instance_count}</td>
+                    <td class="{"has-cost" if stack.monthly_cost > 0 else "no-cost"}">${stack.monthly_cost:.2f}</td>
+                    <td><ul class="cost-breakdown">{breakdown_html}</ul>{", ".join(stack.unpriced_types)}</td>
+                </tr>'''
 
-        return total_realistic
+        return f'''
+    <div class="section">
+        <h2>📦 Deployed State vs Estimate</h2>
+        <div class="flex">
+            <div class="metric-box">
+                <div class="metric-value">${deployed_total:.2f}</div>
+                <div class="metric-label">Deployed Monthly Cost (from state)</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">${total_cost:.2f}</div>
+                <div class="metric-label">Estimated Monthly Cost</div>
+            </div>
+            <div class="metric-box">
+                <div class="metric-value">${deployed_total - total_cost:+.2f}</div>
+                <div class="metric-label">Deployed - Estimated</div>
+            </div>
+        </div>
+        <table>
+            <thead>
+                <tr><th>State File</th><th>Resources / Instances</th><th>Monthly Cost</th><th>Breakdown / Not Priced</th></tr>
+            </thead>
+            <tbody>
+                {rows_html}
+            </tbody>
+        </table>
+    </div>'''
+
+    def _calculate_realistic_annual_cost(self, environments: list) -> tuple:
+        """Calculate realistic annual costs by simulating each environment's schedule"""
+        return self.schedule_simulator.realistic_annual_cost(environments, load_schedules())
 
-    def run_analysis(self, terragrunt_root: str = None, environment: str = None) -> dict:
-        """Run complete Terragrunt environment analysis and generate report"""
+    def run_analysis(self, terragrunt_root: str = None, environment: str = None, state_files: list = None,
+                     pages_dir: str = None) -> dict:
+        """Run complete Terragrunt environment analysis and generate report
+        (a multi-page report in ``pages_dir`` when given)"""
 
         print(f"🔍 Running Terragrunt Environment Analysis...")
         if environment:
@@ -426,25 +557,67 @@ class TerragruntReportGenerator:
         total_cost = analysis_result["total_cost"]
         terragrunt_root = analysis_result["terragrunt_root"]
 
-        # Generate HTML report
-        html_content = self.generate_environment_comparison_html(environments, total_cost, terragrunt_root)
+        # Price what is actually deployed
+        deployed_stacks = self.analyze_deployed_state(state_files) if state_files else []
 
-        # Write HTML file
-        tools_dir = Path(__file__).parent
-        output_file = tools_dir / "terragrunt_analysis.html"
+        pages = None
+        if pages_dir:
+            # Stale environment pages are only pruned when every environment was analyzed
+            pages = self.write_report_pages(pages_dir, environments, total_cost, terragrunt_root, deployed_stacks,
+                                            prune=not environment)
+            output_file = Path(pages_dir) / "index.html"
+        else:
+            # Generate HTML report
+            html_content = self.generate_environment_comparison_html(environments, total_cost, terragrunt_root, deployed_stacks)
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            # Write HTML file
+            tools_dir = Path(__file__).parent
+            output_file = tools_dir / "terragrunt_analysis.html"
+
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(html_content)
 
         print(f"✅ Terragrunt analysis complete!")
         print(f"💰 Total Cost: ${total_cost:.2f}/month")
         print(f"🏗️ Environments analyzed: {len(environments)}")
+        print(f"♻️ Priced from cost memo: {priced_from_memo(environments)}")
+        if deployed_stacks:
+            print(f"📦 Deployed Cost (state): ${sum(stack.monthly_cost for stack in deployed_stacks):.2f}/month")
+        if pages:
+            print(f"📑 Report pages: {len(pages.written)} written, {len(pages.unchanged)} unchanged, "
+                  f"{len(pages.removed)} removed ({', '.join(pages.written) or 'nothing to write'})")
         print(f"📄 Report saved: {output_file}")
 
         return {
             "success": True,
             "environments": environments,
             "total_cost": total_cost,
+            "deployed_stacks": deployed_stacks,
+            "output_file": str(output_file),
+            "pages": asdict(pages) if pages else None
+        }
+
+    def run_multi_repo_analysis(self, terragrunt_roots: list, workers: int = None) -> dict:
+        """Analyze many Terragrunt roots on worker processes and generate the combined report"""
+
+        print(f"🔍 Running multi-repository analysis of {len(terragrunt_roots)} Terragrunt roots...")
+        aggregate = MultiRepoAnalyzer(self.region, workers, self.cost_rules).analyze(terragrunt_roots)
+
+        output_file = Path(__file__).parent / "multi_repo_analysis.html"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(generate_combined_report_html(aggregate, self.region))
+
+        print(f"✅ Multi-repository analysis complete!")
+        print(f"💰 Total Cost: ${aggregate.total_monthly_cost:.2f}/month")
+        print(f"🏗️ Repositories: {aggregate.repositories}, environments: {aggregate.environments}")
+        for error in aggregate.errors:
+            print(f"⚠️ {error}")
+        print(f"📄 Report saved: {output_file}")
+
+        return {
+            "success": True,
+            "aggregate": aggregate,
+            "total_cost": aggregate.total_monthly_cost,
             "output_file": str(output_file)
         }
 
@@ -453,15 +626,51 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Terragrunt Environment Cost Analysis")
-    parser.add_argument("terragrunt_root", nargs="?", help="Path to Terragrunt root directory")
+    parser.add_argument("terragrunt_roots", nargs="*", help="Path to Terragrunt root directory (several for a combined report)")
     parser.add_argument("--region", default="eu-west-1", help="AWS region for pricing")
     parser.add_argument("--environment", help="Analyze specific environment only")
+    parser.add_argument("--tfstate", action="append", help="Terraform state file to price alongside the estimate (repeatable)")
+    parser.add_argument("--manifest", help="File listing Terragrunt roots to aggregate into a combined report")
+    parser.add_argument("--workers", type=int, help="Worker processes for multi-repository analysis")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, help=f"Hand off to a running analysis daemon (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--metrics-file", help="Write costs and run metrics as an OpenMetrics textfile (e.g. for node_exporter)")
+    parser.add_argument("--cost-memo", help="JSON file that keeps priced configurations between runs")
+    parser.add_argument("--cost-rules", help="Cost rules file (default: cost_rules.json)")
+    parser.add_argument("--pages", nargs="?", const=str(DEFAULT_PAGES_DIR),
+                        help=f"Write an index plus one page per environment (gzip copies included) to a directory (default: {DEFAULT_PAGES_DIR})")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args)
+    started = time.perf_counter()
 
     try:
-        generator = TerragruntReportGenerator(args.region)
-        result = generator.run_analysis(args.terragrunt_root, args.environment)
+        # Built only when this process analyzes: the daemon hand-off stays a thin client
+        generator = None
+        roots = list(args.terragrunt_roots)
+        if args.manifest:
+            roots.extend(load_manifest(args.manifest))
+
+        if len(roots) > 1 or args.manifest:
+            generator = TerragruntReportGenerator(args.region, args.cost_memo, args.cost_rules)
+            result = generator.run_multi_repo_analysis(roots, args.workers)
+        else:
+            result = request_daemon(args.daemon, "/report", {
+                "terragrunt_root": str(Path(roots[0]).resolve()) if roots else None,
+                "environment": args.environment,
+                "tfstate": [str(Path(state_file).resolve()) for state_file in args.tfstate or []],
+                "region": args.region,
+                "cost_rules": str(Path(args.cost_rules).resolve()) if args.cost_rules else None,
+                "pages": str(Path(args.pages).resolve()) if args.pages else None
+            })
+            if result is not None:
+                print(f"💰 Total Cost: ${result['total_cost']:.2f}/month")
+                print(f"🏗️ Environments analyzed: {len(result['environments'])}")
+                print(f"📄 Report saved: {result['output_file']}")
+                result["environments"] = [TerragruntEnvironment(**env) for env in result["environments"]]
+            else:
+                generator = TerragruntReportGenerator(args.region, args.cost_memo, args.cost_rules)
+                result = generator.run_analysis(roots[0] if roots else None, args.environment, args.tfstate, args.pages)
 
         if result["success"]:
             print("\\n🎉 Terragrunt environment analysis completed successfully!")
@@ -469,11 +678,31 @@ def main():
             print(f"\\n❌ Analysis failed: {result.get('error', 'Unknown error')}")
             return 1
 
+        if args.metrics_file:
+            module_analyzer = generator.analyzer.module_analyzer if generator else None
+            served = module_analyzer is None or module_analyzer.cache_hits + module_analyzer.cache_misses == 0
+            pricing_fetcher = generator.analyzer.pricing_fetcher if generator else AWSPricingFetcher(args.region)
+            aggregate = result.get("aggregate")
+            families = build_metrics(
+                result.get("environments", []),
+                args.region,
+                time.perf_counter() - started,
+                # Parse caches of daemon or worker processes are not visible here
+                cache_hits=None if served else module_analyzer.cache_hits,
+                cache_misses=None if served else module_analyzer.cache_misses,
+                pricing_cache_age_seconds=pricing_fetcher.cache_age_seconds(),
+                finished_at=time.time(),
+                environments_analyzed=aggregate.environments if aggregate else None
+            )
+            print(f"📈 Metrics written: {write_textfile(families, args.metrics_file)}")
+
     except Exception as e:
         print(f"\\n❌ Analysis failed: {e}")
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        finish_profiling(args)
 
     return 0
 
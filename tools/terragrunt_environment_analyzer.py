@@ -6,12 +6,23 @@ Analyzes Terragrunt environment files and calculates costs for each environment
 
 import re
 import json
-import os
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from aws_pricing_fetcher import AWSPricingFetcher
+from terraform_module_analyzer import TerraformModuleAnalyzer, ResolvedSizing, HCLExpression, parse_hcl, resolve_expression
+from k8s_manifest_analyzer import NodeBinPacker, load_eks_service_workloads
+from instance_catalog import instance_catalog
+from analysis_daemon import DEFAULT_ADDRESS, request_daemon
+from dependency_scheduler import DependencyGraph, parse_unit, run_dag
+from analysis_snapshot import write_snapshot
+from cost_rules import compile_rules, load_rules
+from profiler import profiled, add_profile_arguments, start_profiling, finish_profiling
+from atomic_file import atomic_write
 
 @dataclass
 class TerragruntEnvironment:
@@ -24,10 +35,47 @@ class TerragruntEnvironment:
     cost_breakdown: Dict[str, float]
     resource_estimates: Dict[str, Any]
 
+# Terragrunt input names the inputs block parser stores under a different key
+INPUT_KEYS = {"vpc_CIDR": "vpc_cidr", "DNS": "dns"}
+
+_DEPENDENCY_REFERENCE = re.compile(r'dependency\.([\w-]+)\.outputs\.([\w-]+)')
+
+def _resolve_dependency_references(value: Any, scope: Dict[str, Dict[str, Any]]) -> Any:
+    """``value`` with its ``dependency.<name>.outputs.<key>`` references resolved;
+    the same object when there was nothing to resolve"""
+    if isinstance(value, HCLExpression):
+        if value.strip().startswith("dependency."):
+            resolved = resolve_expression(value, scope)
+            return value if resolved is None else resolved
+        return value
+    if isinstance(value, dict):
+        resolved = {key: _resolve_dependency_references(item, scope) for key, item in value.items()}
+        return value if all(resolved[key] is item for key, item in value.items()) else resolved
+    if isinstance(value, list):
+        resolved = [_resolve_dependency_references(item, scope) for item in value]
+        return value if all(new is old for new, old in zip(resolved, value)) else resolved
+    return value
+
+def _dependency_references(value: Any) -> Iterator[Tuple[str, str]]:
+    """``(dependency, output)`` pairs of the ``dependency.<name>.outputs.<key>`` references in ``value``"""
+    if isinstance(value, HCLExpression):
+        yield from _DEPENDENCY_REFERENCE.findall(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _dependency_references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _dependency_references(item)
+
+def priced_from_memo(environments: List[TerragruntEnvironment]) -> int:
+    """Number of environments whose cost breakdown came from the cost memo"""
+    return sum(1 for env in environments if env.resource_estimates.get("priced_from_memo"))
+
 class TerragruntParser:
     """Parses Terragrunt files and extracts environment configurations"""
 
     def __init__(self):
+        self.errors: List[Tuple[str, str]] = []  # (file, message) of files parsed as empty
         self.aws_regions = {
             "eu-west-1": "EU (Ireland)",
             "us-east-1": "US East (N. Virginia)",
@@ -35,8 +83,12 @@ class TerragruntParser:
             "ap-southeast-1": "Asia Pacific (Singapore)"
         }
 
-    def parse_terragrunt_file(self, file_path: str) -> Dict[str, Any]:
-        """Parse a Terragrunt HCL file"""
+    @profiled("hcl_parse", lambda self, file_path, *args: {"file": file_path})
+    def parse_terragrunt_file(self, file_path: str,
+                              dependency_outputs: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Parse a Terragrunt HCL file; ``dependency_outputs`` (outputs by dependency block
+        name) resolves inputs that read ``dependency.<name>.outputs``. ``hcl_inputs`` is
+        the whole inputs map with those references resolved."""
         path = Path(file_path)
 
         if not path.exists():
@@ -51,20 +103,36 @@ class TerragruntParser:
             source_module = source_match.group(1) if source_match else ""
 
             # Extract inputs block
-            inputs = self._extract_inputs_block(content)
+            hcl_inputs = parse_hcl(content).attributes.get("inputs", {})
+            if not isinstance(hcl_inputs, dict):
+                hcl_inputs = {}
+            inputs = self._extract_inputs_block(content, dependency_outputs, hcl_inputs)
+
+            resolved_inputs = hcl_inputs
+            if dependency_outputs:
+                scope = {"dependency": {name: {"outputs": outputs} for name, outputs in dependency_outputs.items()}}
+                resolved_inputs = {key: _resolve_dependency_references(value, scope) for key, value in hcl_inputs.items()}
+                for name, output in sorted(set(_dependency_references(hcl_inputs))):
+                    if output in getattr(dependency_outputs.get(name), "mocked", ()):
+                        print(f"⚠️ {path.parent.name}: dependency.{name}.outputs.{output} is not an output "
+                              f"of the upstream unit; using its mock value")
 
             return {
                 "source_module": source_module,
                 "inputs": inputs,
+                "hcl_inputs": resolved_inputs,
                 "file_path": str(path)
             }
 
         except Exception as e:
             print(f"❌ Error parsing {file_path}: {e}")
-            return {"source_module": "", "inputs": {}, "file_path": str(path)}
+            self.errors.append((str(path), str(e)))
+            return {"source_module": "", "inputs": {}, "hcl_inputs": {}, "file_path": str(path)}
 
-    def _extract_inputs_block(self, content: str) -> Dict[str, Any]:
-        """Extract the inputs block from Terragrunt content"""
+    def _extract_inputs_block(self, content: str,
+                              dependency_outputs: Optional[Dict[str, Dict[str, Any]]] = None,
+                              hcl_inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Extract the inputs block from Terragrunt content (``hcl_inputs``: its parsed form, if at hand)"""
         inputs = {}
 
         # Find the inputs block
@@ -106,24 +174,75 @@ class TerragruntParser:
                 else:
                     inputs[key] = value
 
+        # Sizing inputs (nested maps included) consumed by the module analyzer
+        if hcl_inputs is None:
+            hcl_inputs = parse_hcl(content).attributes.get("inputs", {})
+        if isinstance(hcl_inputs, dict):
+            for key in ("fargate_cpu", "fargate_memory", "desired_count", "min_count", "max_count", "node_groups"):
+                if key in hcl_inputs:
+                    inputs[key] = hcl_inputs[key]
+
+            # Inputs read from dependency outputs (nested ones included)
+            if dependency_outputs:
+                scope = {"dependency": {name: {"outputs": outputs} for name, outputs in dependency_outputs.items()}}
+                for key, value in hcl_inputs.items():
+                    resolved = _resolve_dependency_references(value, scope)
+                    if resolved is not value:
+                        inputs[INPUT_KEYS.get(key, key)] = resolved
+
         return inputs
 
 class TerragruntCostAnalyzer:
     """Analyzes Terragrunt environments and calculates infrastructure costs"""
 
-    def __init__(self, region: str = "eu-west-1"):
+    LCU_MULTIPLIER_PRODUCTION = 2.0  # Average ALB LCUs consumed in production
+    LCU_MULTIPLIER_DEFAULT = 0.5     # Average ALB LCUs consumed elsewhere
+    ECR_STORAGE_GB = 2.0             # Estimated container image storage
+    MEMO_SIZE = 1024                 # Cost breakdowns (and eks-service workload sets) kept in process
+    MEMO_VERSION = 1                 # Bump whenever a calculator's prices or formulas change
+    DATABASE_INPUTS = ("db_instance_class", "db_min_vcpu", "db_min_memory_gb")
+    COST_COMPONENTS = ("vpc", "load_balancer", "ecs", "eks", "ecr", "rds")  # Calculators cost rules can bill
+
+    def __init__(self, region: str = "eu-west-1", memo_file: Optional[str] = None,
+                 cost_rules: Optional[str] = None):
         self.region = region
+        self.cost_plan = compile_rules(load_rules(cost_rules), self.COST_COMPONENTS)
         self.pricing_fetcher = AWSPricingFetcher(region)
         self.parser = TerragruntParser()
+        self.module_analyzer = TerraformModuleAnalyzer()
         self.pricing_data = None
+        self._workload_cache: "OrderedDict[str, list]" = OrderedDict()
+        self.memo_file = Path(memo_file) if memo_file else None
+        self._cost_memo: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._memo_dirty = False
+        self._memo_lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.last_schedule = None
+        self.last_errors: Dict[str, str] = {}
+        if self.memo_file:
+            self._load_memo()
 
     def load_pricing_data(self):
         """Load current pricing data"""
         if not self.pricing_data:
             self.pricing_data = self.pricing_fetcher.fetch_all_pricing()
 
-    def analyze_terragrunt_environment(self, env_path: str) -> TerragruntEnvironment:
-        """Analyze a single Terragrunt environment"""
+    def analyze_terragrunt_environment(self, env_path: str,
+                                       dependency_outputs: Optional[Dict[str, Dict[str, Any]]] = None) -> TerragruntEnvironment:
+        """Analyze a single Terragrunt environment.
+
+        ``dependency_outputs`` holds the outputs of its dependency blocks; without
+        it, the blocks' ``mock_outputs`` are used.
+        """
+        environment, sizing, _ = self._resolve_environment(env_path, dependency_outputs)
+        return self._price_environments([(environment, sizing)])[0]
+
+    @profiled("environment", lambda self, env_path, *args: {"environment": Path(env_path).name})
+    def _resolve_environment(self, env_path: str, dependency_outputs: Optional[Dict[str, Dict[str, Any]]] = None
+                             ) -> Tuple[TerragruntEnvironment, Optional[ResolvedSizing], Dict[str, Any]]:
+        """Parse an environment and resolve its sizing; the returned environment is not priced yet.
+        The last item is the environment's whole inputs map (see ``environment_outputs``)."""
 
         self.load_pricing_data()
 
@@ -134,110 +253,250 @@ class TerragruntCostAnalyzer:
             raise FileNotFoundError(f"No terragrunt.hcl found in {env_path}")
 
         # Parse Terragrunt file
-        terragrunt_config = self.parser.parse_terragrunt_file(str(terragrunt_file))
+        if dependency_outputs is None:
+            dependency_outputs = parse_unit(str(env_path)).mock_outputs()
+        terragrunt_config = self.parser.parse_terragrunt_file(str(terragrunt_file), dependency_outputs)
 
         # Extract environment name
         env_name = terragrunt_config["inputs"].get("environment", env_path.name)
 
-        # Estimate infrastructure costs based on the environment configuration
-        cost_breakdown, resource_estimates = self._estimate_environment_costs(
-            terragrunt_config["inputs"],
-            terragrunt_config["source_module"]
-        )
+        # Resolve task sizes, counts and NAT gateways from the module sources
+        sizing = None
+        if terragrunt_config["source_module"]:
+            sizing = self.module_analyzer.resolve_sizing(
+                str(env_path / terragrunt_config["source_module"]),
+                terragrunt_config["inputs"]
+            )
 
-        total_cost = sum(cost_breakdown.values())
-
-        return TerragruntEnvironment(
+        environment = TerragruntEnvironment(
             name=env_name,
             path=str(env_path),
             inputs=terragrunt_config["inputs"],
             source_module=terragrunt_config["source_module"],
-            estimated_monthly_cost=total_cost,
-            cost_breakdown=cost_breakdown,
-            resource_estimates=resource_estimates
+            estimated_monthly_cost=0.0,
+            cost_breakdown={},
+            resource_estimates=self._resource_estimates(terragrunt_config["inputs"], sizing)
         )
+        return environment, sizing, terragrunt_config["hcl_inputs"]
+
+    def _price_environments(self, resolved: List[Tuple[TerragruntEnvironment, Optional[ResolvedSizing]]]
+                            ) -> List[TerragruntEnvironment]:
+        """Fill in the costs of resolved environments, all in one batch"""
+        estimates = self._estimate_costs([(environment.inputs, environment.source_module, sizing, environment.path)
+                                          for environment, sizing in resolved])
+        for (environment, _), (cost_breakdown, resource_estimates) in zip(resolved, estimates):
+            environment.cost_breakdown = cost_breakdown
+            environment.estimated_monthly_cost = sum(cost_breakdown.values())
+            environment.resource_estimates = resource_estimates
+        return [environment for environment, _ in resolved]
+
+    def _load_memo(self):
+        """Seed the memo from ``memo_file``; a missing or unreadable file, or one written
+        with another ``MEMO_VERSION``, starts an empty memo"""
+        try:
+            with open(self.memo_file, 'r') as f:
+                memo = json.load(f)
+            version, entries = memo.get("version"), memo.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            return
+        if version != self.MEMO_VERSION:
+            print(f"⚠️ Ignoring cost memo {self.memo_file} (version {version}, expected {self.MEMO_VERSION})")
+            return
+        for fingerprint, cost_breakdown in list(entries.items())[-self.MEMO_SIZE:]:
+            self._cost_memo[fingerprint] = cost_breakdown
+
+    def save_memo(self):
+        """Write the memo to ``memo_file`` (atomically) if it gained entries"""
+        if not self.memo_file or not self._memo_dirty:
+            return
+        self.memo_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.memo_file, json.dumps({"version": self.MEMO_VERSION, "updated": datetime.now().isoformat(),
+                                                 "entries": self._cost_memo}))
+        self._memo_dirty = False
+
+    @staticmethod
+    def eks_service_module(env_path: Optional[str], source_module: str = "") -> Optional[Path]:
+        """The eks-service module of an environment's own tree: next to its source module,
+        else under ``modules/`` of its Terragrunt root; None when the tree has none"""
+        if not env_path:
+            return None
+        env_path = Path(env_path).resolve()
+        candidates = []
+        if source_module and "://" not in source_module and "::" not in source_module:
+            candidates.append((env_path / source_module).resolve().parent / "eks-service")
+        candidates.append(env_path.parent.parent / "modules" / "eks-service")
+        return next((candidate for candidate in candidates if candidate.is_dir()), None)
+
+    def _eks_service_signature(self, inputs: Dict[str, Any], module: Optional[Path]) -> Optional[Dict[str, Any]]:
+        """The part of an environment the eks-service workloads depend on: the module,
+        the inputs it declares as variables and the modification times of its files"""
+        if module is None:
+            return None
+        variables = self.module_analyzer.load_module(str(module)).variables
+        files = sorted(path for path in module.rglob("*") if path.is_file())
+        return {
+            "module": str(module),
+            "inputs": {key: value for key, value in inputs.items() if key in variables},
+            "files": [(str(path.relative_to(module)), path.stat().st_mtime_ns) for path in files]
+        }
 
-    def _estimate_environment_costs(self, inputs: Dict[str, Any], source_module: str) -> Tuple[Dict[str, float], Dict[str, Any]]:
-        """Estimate costs based on environment inputs and module type"""
-
-        cost_breakdown = {}
-        resource_estimates = {}
+    def _rule_context(self, inputs: Dict[str, Any], source_module: str) -> Dict[str, Any]:
+        """Names cost rule expressions see: the inputs, ``environment`` (default: development),
+        ``module`` (the lower-cased source) and ``pricing``"""
+        context = dict(inputs)
+        context["environment"] = inputs.get("environment", "development")
+        context["module"] = source_module.lower()
+        context["pricing"] = self.pricing_data
+        return context
+
+    def _cost_components(self) -> Dict[str, Any]:
+        """The calculators cost rules bill through, each called with ``(inputs, sizing, eks_service_module)``"""
+        return {
+            "vpc": lambda environment: self._calculate_vpc_costs(environment[0], environment[1]),
+            "load_balancer": lambda environment, production=False: self._calculate_load_balancer_costs(
+                environment[0], production),
+            "ecs": lambda environment, production=False: self._calculate_ecs_costs(environment[0], production, environment[1]),
+            "eks": lambda environment, production=False: self._calculate_eks_costs(
+                environment[0], production, environment[1], environment[2]),
+            "ecr": lambda environment: self._calculate_ecr_costs(environment[0]),
+            "rds": lambda environment, multi_az=False: self._calculate_rds_costs(environment[0], multi_az)
+        }
 
-        # Determine environment scale based on environment name
+    def cost_fingerprint(self, inputs: Dict[str, Any], source_module: str,
+                         sizing: Optional[ResolvedSizing] = None, env_path: Optional[str] = None,
+                         components: Optional[List[str]] = None) -> str:
+        """Digest of everything the cost breakdown depends on: the cost rules and the inputs
+        they read, the cost-relevant inputs of the components they bill (``components``,
+        when already known), the resolved sizing, the estimation constants and the pricing version"""
+        context = self._rule_context(inputs, source_module)
+        if components is None:
+            components = self.cost_plan.components_for(context)
+
+        resolved = None
+        if sizing:
+            resolved = asdict(sizing)
+            resolved.pop("sources", None)
+
+        payload = {
+            "version": self.MEMO_VERSION,
+            "pricing": [self.region, self.pricing_data.get("region"), self.pricing_data.get("last_updated")],
+            "constants": [self.LCU_MULTIPLIER_PRODUCTION, self.LCU_MULTIPLIER_DEFAULT, self.ECR_STORAGE_GB],
+            "rules": self.cost_plan.digest,
+            "rule_inputs": {name: context[name] for name in self.cost_plan.inputs if name in context and name != "pricing"},
+            "components": components,
+            "environment": context["environment"],
+            "availability_zones": len(inputs["availability_zones"]) if "availability_zones" in inputs else None,
+            "database": {key: inputs[key] for key in self.DATABASE_INPUTS if key in inputs},
+            "sizing": resolved,
+            "eks_service": (self._eks_service_signature(inputs, self.eks_service_module(env_path, source_module))
+                            if "eks" in components else None)
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    def _estimate_environment_costs(self, inputs: Dict[str, Any], source_module: str,
+                                    sizing: Optional[ResolvedSizing] = None,
+                                    env_path: Optional[str] = None) -> Tuple[Dict[str, float], Dict[str, Any]]:
+        """Estimate costs based on environment inputs and module type; ``env_path``
+        locates the eks-service module of the environment's tree"""
+        return self._estimate_costs([(inputs, source_module, sizing, env_path)])[0]
+
+    @profiled("cost_estimation", lambda self, configurations, memo=True: {"environments": len(configurations)})
+    def _estimate_costs(self, configurations: List[Tuple[Dict[str, Any], str, Optional[ResolvedSizing], Optional[str]]],
+                        memo: bool = True) -> List[Tuple[Dict[str, float], Dict[str, Any]]]:
+        """Cost breakdowns and resource estimates of ``(inputs, source_module, sizing, env_path)`` configurations.
+
+        Breakdowns are memoized by ``cost_fingerprint``, so configurations with
+        identical cost-relevant inputs are priced once; the rest go through the
+        compiled cost rules together in one batch. With ``memo=False`` (what-if
+        pricing) identical configurations are still priced once, but the memo is
+        neither read nor written.
+        """
+
+        # Definitions and predicates run once per configuration, for the fingerprints and the pricing alike
+        contexts = [self._rule_context(inputs, source_module) for inputs, source_module, _, _ in configurations]
+        plan_batch = self.cost_plan.prepare(contexts)
+        fingerprints = [self.cost_fingerprint(inputs, source_module, sizing, env_path,
+                                              self.cost_plan.components(plan_batch, index))
+                        for index, (inputs, source_module, sizing, env_path) in enumerate(configurations)]
+        breakdowns: Dict[str, Optional[Dict[str, float]]] = {}
+        from_memo = []
+        with self._memo_lock:
+            for fingerprint in fingerprints:
+                if fingerprint in breakdowns:
+                    # Same configuration earlier in the batch: priced once for both
+                    hit = True
+                elif memo and fingerprint in self._cost_memo:
+                    self._cost_memo.move_to_end(fingerprint)
+                    breakdowns[fingerprint] = self._cost_memo[fingerprint]
+                    hit = True
+                else:
+                    breakdowns[fingerprint] = None
+                    hit = False
+                from_memo.append(hit and memo)
+                if not memo:
+                    continue
+                if hit:
+                    self.memo_hits += 1
+                else:
+                    self.memo_misses += 1
+
+        # One evaluation of the cost plan for every configuration the memo did not have
+        batch: Dict[str, int] = {}
+        for index, fingerprint in enumerate(fingerprints):
+            if breakdowns[fingerprint] is None:
+                batch.setdefault(fingerprint, index)
+        if batch:
+            indices = list(batch.values())
+            environments = []
+            for index in indices:
+                inputs, source_module, sizing, env_path = configurations[index]
+                environments.append((contexts[index], (inputs, sizing, self.eks_service_module(env_path, source_module))))
+            priced = self.cost_plan.evaluate(environments, self._cost_components(), plan_batch.select(indices))
+            breakdowns.update(zip(batch, priced))
+            if memo:
+                with self._memo_lock:
+                    for fingerprint, cost_breakdown in zip(batch, priced):
+                        self._cost_memo[fingerprint] = dict(cost_breakdown)
+                        self._memo_dirty = True
+                    while len(self._cost_memo) > self.MEMO_SIZE:
+                        self._cost_memo.popitem(last=False)
+
+        return [(dict(breakdowns[fingerprint]), self._resource_estimates(inputs, sizing, hit))
+                for fingerprint, hit, (inputs, _, sizing, _) in zip(fingerprints, from_memo, configurations)]
+
+    @staticmethod
+    def _resource_estimates(inputs: Dict[str, Any], sizing: Optional[ResolvedSizing] = None,
+                            priced_from_memo: bool = False) -> Dict[str, Any]:
+        """Resource estimates for reporting"""
         env_name = inputs.get("environment", "development")
         is_production = env_name == "production"
         is_staging = env_name == "staging"
-        is_development = env_name == "development"
-        is_eks = env_name == "eks"
-        is_ecs = env_name == "ecs"
-
-        # VPC and Networking Costs
-        vpc_cost = self._calculate_vpc_costs(inputs)
-        cost_breakdown.update(vpc_cost)
-
-        # Load Balancer Costs
-        alb_cost = self._calculate_load_balancer_costs(inputs, is_production)
-        cost_breakdown.update(alb_cost)
-
-        # Infrastructure-specific costs
-        if is_eks or "eks" in source_module.lower():
-            # EKS-specific costs
-            eks_cost = self._calculate_eks_costs(inputs, is_production)
-            cost_breakdown.update(eks_cost)
-        elif is_ecs or "ecs" in source_module.lower() or "fargate" in source_module.lower():
-            # ECS/Fargate costs
-            ecs_cost = self._calculate_ecs_costs(inputs, is_production)
-            cost_breakdown.update(ecs_cost)
-        else:
-            # Default to ECS if not specified
-            ecs_cost = self._calculate_ecs_costs(inputs, is_production)
-            cost_breakdown.update(ecs_cost)
-
-        # ECR Costs
-        ecr_cost = self._calculate_ecr_costs(inputs)
-        cost_breakdown.update(ecr_cost)
-
-        # Additional services based on environment
-        if is_production:
-            # Production gets additional redundancy and monitoring
-            rds_cost = self._calculate_rds_costs(inputs, multi_az=True)
-            cost_breakdown.update(rds_cost)
-
-            # CloudWatch enhanced monitoring
-            cost_breakdown["CloudWatch Enhanced"] = 15.0
-
-            # Backup and disaster recovery
-            cost_breakdown["Backup Services"] = 25.0
-
-        elif is_staging:
-            # Staging gets some redundancy
-            rds_cost = self._calculate_rds_costs(inputs, multi_az=False)
-            cost_breakdown.update(rds_cost)
 
-            cost_breakdown["CloudWatch Basic"] = 5.0
-
-        else:  # Development, EKS, ECS
-            # Development uses minimal resources
-            cost_breakdown["CloudWatch Basic"] = 2.0
-
-        # Resource estimates for reporting
         resource_estimates = {
             "environment_type": env_name,
             "region": inputs.get("aws_region", "eu-west-1"),
             "vpc_subnets": len(inputs.get("public_subnets", [])) + len(inputs.get("private_subnets", [])),
             "availability_zones": len(inputs.get("availability_zones", [])),
             "cluster_name": inputs.get("ecs_cluster_name", inputs.get("cluster_name", "unknown")),
-            "estimated_scale": "High" if is_production else "Medium" if is_staging else "Low"
+            "estimated_scale": "High" if is_production else "Medium" if is_staging else "Low",
+            "priced_from_memo": priced_from_memo
         }
 
-        return cost_breakdown, resource_estimates
+        if sizing:
+            resource_estimates["resolved_sizing"] = asdict(sizing)
+
+        return resource_estimates
 
-    def _calculate_vpc_costs(self, inputs: Dict[str, Any]) -> Dict[str, float]:
+    def _calculate_vpc_costs(self, inputs: Dict[str, Any], sizing: Optional[ResolvedSizing] = None) -> Dict[str, float]:
         """Calculate VPC-related costs"""
         costs = {}
 
-        # NAT Gateways (one per AZ as configured)
-        num_azs = len(inputs.get("availability_zones", ["eu-west-1a", "eu-west-1b"]))
+        # NAT Gateways (resolved from the VPC module, else one per AZ as configured)
+        if sizing and sizing.nat_gateways is not None:
+            num_azs = sizing.nat_gateways
+        else:
+            num_azs = len(inputs.get("availability_zones", ["eu-west-1a", "eu-west-1b"]))
         nat_gateway_cost = 32.85 * num_azs  # $32.85/month per NAT Gateway in eu-west-1
         costs[f"NAT Gateways ({num_azs}x)"] = nat_gateway_cost
 
@@ -256,21 +515,27 @@ class TerragruntCostAnalyzer:
 
         # LCU costs based on expected traffic
         if is_production:
-            lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * 2  # Higher traffic
+            lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * self.LCU_MULTIPLIER_PRODUCTION  # Higher traffic
             costs["ALB LCUs (Production)"] = lcu_cost
         else:
-            lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * 0.5  # Lower traffic
+            lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * self.LCU_MULTIPLIER_DEFAULT  # Lower traffic
             costs["ALB LCUs (Dev/Staging)"] = lcu_cost
 
         return costs
 
-    def _calculate_ecs_costs(self, inputs: Dict[str, Any], is_production: bool) -> Dict[str, float]:
+    def _calculate_ecs_costs(self, inputs: Dict[str, Any], is_production: bool,
+                             sizing: Optional[ResolvedSizing] = None) -> Dict[str, float]:
         """Calculate ECS Fargate costs"""
         costs = {}
 
         fargate_pricing = self.pricing_data["fargate"]
 
-        if is_production:
+        if sizing and sizing.task_cpu_units and sizing.task_memory_mb and sizing.desired_count:
+            # Values resolved from the module sources and environment inputs
+            cpu_vcpus = sizing.task_cpu_vcpus
+            memory_gb = sizing.task_memory_gb
+            num_tasks = sizing.desired_count
+        elif is_production:
             # Production: Higher CPU/Memory, multiple tasks
             cpu_vcpus = 2.0  # 2 vCPUs per task
             memory_gb = 4.0  # 4 GB per task
@@ -294,7 +559,9 @@ class TerragruntCostAnalyzer:
 
         return costs
 
-    def _calculate_eks_costs(self, inputs: Dict[str, Any], is_production: bool) -> Dict[str, float]:
+    def _calculate_eks_costs(self, inputs: Dict[str, Any], is_production: bool,
+                             sizing: Optional[ResolvedSizing] = None,
+                             eks_service_module: Optional[Path] = None) -> Dict[str, float]:
         """Calculate EKS costs"""
         costs = {}
 
@@ -302,6 +569,45 @@ class TerragruntCostAnalyzer:
         eks_cluster_cost = self.pricing_data["eks"]["cluster_monthly"]
         costs["EKS Cluster Management"] = eks_cluster_cost
 
+        ec2_pricing = self.pricing_data["ec2"]
+
+        # Pods declared by the eks-service manifests, packed onto the worker nodes
+        workloads = []
+        if eks_service_module is not None:
+            # Keyed like the cost memo: only the inputs the module declares and its files' mtimes matter
+            cache_key = json.dumps(self._eks_service_signature(inputs, eks_service_module), sort_keys=True, default=str)
+            with self._memo_lock:
+                cached = self._workload_cache.get(cache_key)
+                if cached is not None:
+                    self._workload_cache.move_to_end(cache_key)
+            if cached is None:
+                cached = load_eks_service_workloads(str(eks_service_module), inputs, self.module_analyzer)
+                with self._memo_lock:
+                    self._workload_cache[cache_key] = cached
+                    while len(self._workload_cache) > self.MEMO_SIZE:
+                        self._workload_cache.popitem(last=False)
+            workloads = cached
+        packer = NodeBinPacker(self.pricing_data)
+
+        # Worker node costs from the resolved node groups
+        if sizing and sizing.node_groups:
+            for index, group in enumerate(sizing.node_groups):
+                node_instance = group["instance_type"]
+                num_nodes = int(group["desired_size"])
+                if workloads and index == 0 and node_instance in ec2_pricing:
+                    packing = packer.pack(workloads, node_instance, min_nodes=num_nodes)
+                    if not packing.unschedulable_pods:
+                        num_nodes = packing.node_count
+                node_cost = ec2_pricing.get(node_instance, {"monthly": 30.37})["monthly"]
+                costs[f"Worker Nodes ({num_nodes}x {node_instance})"] = node_cost * num_nodes
+            return costs
+
+        if workloads:
+            packing = packer.cheapest(workloads, min_nodes=3 if is_production else 2)
+            if packing:
+                costs[f"Worker Nodes ({packing.node_count}x {packing.instance_type})"] = packing.monthly_cost
+                return costs
+
         # Worker node costs
         if is_production:
             node_instance = "t3.large"
@@ -310,7 +616,6 @@ class TerragruntCostAnalyzer:
             node_instance = "t3.medium"
             num_nodes = 2
 
-        ec2_pricing = self.pricing_data["ec2"]
         node_cost = ec2_pricing.get(node_instance, {"monthly": 30.37})["monthly"]
         total_node_cost = node_cost * num_nodes
 
@@ -324,29 +629,55 @@ class TerragruntCostAnalyzer:
 
         # ECR storage costs (estimated based on container image sizes)
         # Typical web app images: ~500MB-1GB
-        storage_gb = 2.0  # Estimated storage
+        storage_gb = self.ECR_STORAGE_GB
         ecr_storage_cost = storage_gb * 0.10  # $0.10/GB/month
 
         costs["ECR Storage"] = ecr_storage_cost
 
         return costs
 
+    def _rds_instance(self, inputs: Dict[str, Any]):
+        """RDS instance class named by ``db_instance_class`` or the cheapest one meeting
+        ``db_min_vcpu`` / ``db_min_memory_gb``; None when the inputs do not size the database"""
+        catalog = instance_catalog(self.pricing_data, "rds")
+        if inputs.get("db_instance_class"):
+            return catalog.get(inputs["db_instance_class"])
+        if "db_min_vcpu" in inputs or "db_min_memory_gb" in inputs:
+            return catalog.cheapest(float(inputs.get("db_min_vcpu", 0)), float(inputs.get("db_min_memory_gb", 0)))
+        return None
+
     def _calculate_rds_costs(self, inputs: Dict[str, Any], multi_az: bool = False) -> Dict[str, float]:
         """Calculate RDS database costs"""
         costs = {}
 
-        if multi_az:
+        instance = self._rds_instance(inputs)
+        if instance:
+            # Multi-AZ runs a synchronous standby of the same class
+            deployment = "Multi-AZ" if multi_az else "Single-AZ"
+            costs[f"RDS ({deployment}, {instance.name})"] = instance.monthly * (2.0 if multi_az else 1.0)
+            instance_type = None
+        elif multi_az:
             # Production RDS with Multi-AZ
             instance_type = "db.t3.small"
             base_cost = 30.0  # Approximate cost for db.t3.small
             multi_az_multiplier = 2.0
             total_cost = base_cost * multi_az_multiplier
-            costs["RDS (Multi-AZ)"] = total_cost
+            deployment = "Multi-AZ"
         else:
             # Single-AZ RDS for staging
             instance_type = "db.t3.micro"
             total_cost = 15.0  # Approximate cost for db.t3.micro
-            costs["RDS (Single-AZ)"] = total_cost
+            deployment = "Single-AZ"
+
+        if instance_type:
+            requested = inputs.get("db_instance_class")
+            if not requested and ("db_min_vcpu" in inputs or "db_min_memory_gb" in inputs):
+                requested = f"{inputs.get('db_min_vcpu', 0)} vCPU / {inputs.get('db_min_memory_gb', 0)} GB"
+            if requested:
+                # The inputs sized the database but the catalog has nothing for them
+                print(f"⚠️ No RDS pricing for {requested} in {self.region}, using the {instance_type} estimate")
+                deployment = f"{deployment}, {instance_type} estimate for {requested}"
+            costs[f"RDS ({deployment})"] = total_cost
 
         # Storage costs
         storage_gb = 20 if multi_az else 10
@@ -355,10 +686,30 @@ class TerragruntCostAnalyzer:
 
         return costs
 
-    def analyze_all_environments(self, terragrunt_root: str) -> List[TerragruntEnvironment]:
-        """Analyze all environments in the Terragrunt directory"""
-
-        environments = []
+    @staticmethod
+    def environment_outputs(environment: TerragruntEnvironment,
+                            hcl_inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """What dependents can read from ``dependency.<name>.outputs``. Without applied state
+        this is the unit's own configuration: its resource estimates and every input of its
+        ``inputs`` block (``hcl_inputs``) that is a value rather than an unresolved expression."""
+        outputs = {key: value for key, value in environment.resource_estimates.items()
+                   if key not in ("resolved_sizing", "priced_from_memo")}
+        outputs.update((key, value) for key, value in (hcl_inputs or {}).items()
+                       if not isinstance(value, HCLExpression))
+        outputs.update(environment.inputs)
+        return outputs
+
+    def analyze_all_environments(self, terragrunt_root: str, workers: Optional[int] = None) -> List[TerragruntEnvironment]:
+        """Analyze all environments in the Terragrunt directory.
+
+        Environments are scheduled by their dependency blocks: each level of the
+        dependency graph runs in parallel on up to ``workers`` threads and passes
+        its outputs on to the next. Once all are resolved, they are priced
+        together in one pass over the cost rules. Failures are kept in
+        ``last_errors`` by environment directory name.
+        """
+
+        resolved = []
         terragrunt_path = Path(terragrunt_root)
         environments_path = terragrunt_path / "environments"
 
@@ -372,14 +723,37 @@ class TerragruntCostAnalyzer:
 
         print(f"📁 Found {len(env_dirs)} environments: {[d.name for d in env_dirs]}")
 
-        for env_dir in env_dirs:
-            try:
-                print(f"  📊 Analyzing {env_dir.name}...")
-                environment = self.analyze_terragrunt_environment(str(env_dir))
-                environments.append(environment)
-            except Exception as e:
-                print(f"  ❌ Error analyzing {env_dir.name}: {e}")
+        self.load_pricing_data()
+        self.last_errors = {}
+        del self.parser.errors[:]
+        graph = DependencyGraph([parse_unit(str(env_dir)) for env_dir in env_dirs])
+
+        def analyze(unit, dependency_outputs):
+            print(f"  📊 Analyzing {unit.name}...")
+            environment, sizing, hcl_inputs = self._resolve_environment(unit.path, dependency_outputs)
+            return (environment, sizing), self.environment_outputs(environment, hcl_inputs)
+
+        results, errors, schedule = run_dag(graph, analyze, workers)
+        self.last_schedule = schedule
 
+        for env_dir in env_dirs:
+            key = str(env_dir.resolve())
+            if key in errors:
+                print(f"  ❌ Error analyzing {env_dir.name}: {errors[key]}")
+                self.last_errors[env_dir.name] = str(errors[key])
+            elif key in results:
+                resolved.append(results[key])
+
+        if len(schedule.levels) > 1:
+            print(f"🕸️ Dependency levels: {' → '.join('[' + ', '.join(level) + ']' for level in schedule.levels)}")
+        print(f"⏱️ Critical path: {' → '.join(schedule.critical_path)} ({schedule.critical_path_seconds:.3f}s; "
+              f"{schedule.unit_seconds:.3f}s of unit time in {schedule.wall_seconds:.3f}s wall, workers: {schedule.workers})")
+
+        for file_path, message in self.parser.errors:
+            self.last_errors.setdefault(Path(file_path).parent.name, f"parse error: {message}")
+
+        environments = self._price_environments(resolved)
+        self.save_memo()
         return environments
 
 def main():
@@ -391,24 +765,40 @@ def main():
     parser.add_argument("--region", default="eu-west-1", help="AWS region")
     parser.add_argument("--environment", help="Analyze specific environment (development, staging, production)")
     parser.add_argument("--output", help="Output JSON file")
+    parser.add_argument("--snapshot", help="Output binary snapshot file (see analysis_snapshot.py)")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, help=f"Hand off to a running analysis daemon (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--cost-memo", help="JSON file that keeps priced configurations between runs")
+    parser.add_argument("--cost-rules", help="Cost rules file (default: cost_rules.json)")
+    parser.add_argument("--workers", type=int, help="Threads per dependency level (default: CPU count)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args)
 
     try:
-        analyzer = TerragruntCostAnalyzer(args.region)
-
-        if args.environment:
+        served = request_daemon(args.daemon, "/analyze", {
+            "terragrunt_root": str(Path(args.terragrunt_root).resolve()),
+            "environment": args.environment,
+            "region": args.region,
+            "cost_rules": str(Path(args.cost_rules).resolve()) if args.cost_rules else None
+        })
+        if served is not None:
+            environments = [TerragruntEnvironment(**env) for env in served["environments"]]
+        elif args.environment:
             # Analyze specific environment
             env_path = Path(args.terragrunt_root) / "environments" / args.environment
             if not env_path.exists():
                 print(f"❌ Environment {args.environment} not found")
                 return 1
 
+            analyzer = TerragruntCostAnalyzer(args.region, args.cost_memo, args.cost_rules)
             environment = analyzer.analyze_terragrunt_environment(str(env_path))
             environments = [environment]
+            analyzer.save_memo()
         else:
             # Analyze all environments
-            environments = analyzer.analyze_all_environments(args.terragrunt_root)
+            analyzer = TerragruntCostAnalyzer(args.region, args.cost_memo, args.cost_rules)
+            environments = analyzer.analyze_all_environments(args.terragrunt_root, args.workers)
 
         if not environments:
             print("❌ No environments found to analyze")
@@ -432,8 +822,9 @@ def main():
             total_cost_all_envs += env.estimated_monthly_cost
 
         print(f"\n💰 Total Cost (All Environments): ${total_cost_all_envs:.2f}/month")
+        print(f"♻️ Priced from cost memo: {priced_from_memo(environments)} of {len(environments)} environments")
 
-        if args.output:
+        if args.output or args.snapshot:
             result = {
                 "analysis_timestamp": datetime.now().isoformat(),
                 "region": args.region,
@@ -441,15 +832,21 @@ def main():
                 "environments": [asdict(env) for env in environments]
             }
 
+        if args.output:
             with open(args.output, 'w') as f:
                 json.dump(result, f, indent=2)
             print(f"\n📄 Results saved to: {args.output}")
 
+        if args.snapshot:
+            print(f"\n📦 Snapshot saved to: {write_snapshot(result, args.snapshot)}")
+
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        finish_profiling(args)
 
     return 0
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Capacity Planner Tests
+Gallop-and-bisect search for the largest affordable user count in capacity_planner.py
+"""
+
+import json
+import math
+import unittest
+from pathlib import Path
+
+from capacity_planner import CapacityPlanner
+from yaml_terragrunt_analyzer import AnalysisScenario, EnvironmentAnalysis, YAMLBasedAnalyzer
+
+PRICING_CACHE = Path(__file__).parent / "pricing_cache_eu-west-1.json"
+
+class StepCostAnalyzer:
+    """Cost model with a fixed base and one price step per task / node of peak users"""
+
+    region = "eu-west-1"
+    traffic_trace = None
+    EKS_MAX_NODES = 10
+    EKS_USERS_PER_NODE = 500
+    MODELS = {"ecs": (250, 40.0, 50.0), "eks": (500, 30.0, 73.0)}   # users per unit, unit cost, fixed cost
+
+    def get_scenario(self, scenario_name: str) -> AnalysisScenario:
+        return AnalysisScenario(scenario_name, 1.0, 2.0, 20, 100, 500, 2.0)
+
+    def cost(self, infrastructure: str, users: int, multiplier: float) -> float:
+        users_per_unit, unit_cost, fixed_cost = self.MODELS[infrastructure]
+        return fixed_cost + unit_cost * math.ceil(users * multiplier / users_per_unit)
+
+    def _analysis(self, infrastructure: str, scenario: AnalysisScenario) -> EnvironmentAnalysis:
+        monthly_cost = self.cost(infrastructure, scenario.expected_users, scenario.peak_load_multiplier)
+        return EnvironmentAnalysis(scenario.name, infrastructure, monthly_cost, {"Compute": monthly_cost},
+                                   {}, {"users": scenario.expected_users}, [])
+
+    def analyze_ecs_environment(self, scenario: AnalysisScenario) -> EnvironmentAnalysis:
+        return self._analysis("ecs", scenario)
+
+    def analyze_eks_environment(self, scenario: AnalysisScenario) -> EnvironmentAnalysis:
+        return self._analysis("eks", scenario)
+
+def largest_affordable(cost, budget: float, limit: int) -> int:
+    """Reference answer by linear scan"""
+    users = 0
+    while users < limit and cost(users + 1) <= budget:
+        users += 1
+    return users
+
+class CapacityPlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = StepCostAnalyzer()
+
+    def test_matches_a_linear_scan(self):
+        for infrastructure, multiplier in (("ecs", 2.0), ("ecs", 1.3), ("eks", 1.5)):
+            planner = CapacityPlanner(self.analyzer, max_users=10_000)
+            budgets = [49.0, 50.0, 90.0, 91.5, 333.0, 1000.0]
+            plans = planner.solve(budgets, infrastructure, multipliers=[multiplier])
+            limit = planner._user_limit(infrastructure, multiplier)[0]
+
+            for budget, plan in zip(budgets, plans):
+                expected = largest_affordable(lambda users: self.analyzer.cost(infrastructure, users, multiplier),
+                                              budget, limit)
+                self.assertEqual(plan.max_expected_users, expected, (infrastructure, multiplier, budget))
+                self.assertLessEqual(plan.monthly_cost, budget)
+
+    def test_evaluations_grow_logarithmically(self):
+        planner = CapacityPlanner(self.analyzer)
+        plan = planner.solve([100_000.0], "ecs")[0]
+
+        # (100,000 - 50) / 40 = 2498 tasks of 250 peak users at a 2x peak
+        self.assertEqual(plan.max_expected_users, 2498 * 250 // 2)
+        self.assertLess(planner.evaluations, 4 * math.log2(plan.max_expected_users))
+
+    def test_budgets_keep_their_input_order(self):
+        planner = CapacityPlanner(self.analyzer)
+        budgets = [500.0, 100.0, 250.0]
+        plans = planner.solve(budgets, "ecs", multipliers=[1.0, 2.0])
+
+        self.assertEqual([(plan.budget, plan.peak_load_multiplier) for plan in plans],
+                         [(500.0, 1.0), (500.0, 2.0), (100.0, 1.0), (100.0, 2.0), (250.0, 1.0), (250.0, 2.0)])
+        for plan in plans:
+            alone = CapacityPlanner(self.analyzer).solve([plan.budget], "ecs", multipliers=[plan.peak_load_multiplier])
+            self.assertEqual(plan.max_expected_users, alone[0].max_expected_users)
+
+    def test_budget_below_the_fixed_cost(self):
+        plan = CapacityPlanner(self.analyzer).solve([60.0], "ecs")[0]
+
+        self.assertEqual((plan.max_expected_users, plan.monthly_cost, plan.limiting_factor), (0, 0.0, "budget"))
+
+    def test_eks_is_capped_by_the_cluster_autoscaler(self):
+        plan = CapacityPlanner(self.analyzer).solve([1_000_000.0], "eks", multipliers=[2.0])[0]
+
+        self.assertEqual(plan.max_expected_users, 10 * 500 // 2)
+        self.assertEqual(plan.limiting_factor, "capacity")
+
+    def test_rejects_unknown_infrastructure_and_traffic_traces(self):
+        with self.assertRaises(ValueError):
+            CapacityPlanner(self.analyzer).solve([100.0], "lambda")
+
+        self.analyzer.traffic_trace = "traffic.csv"
+        with self.assertRaises(ValueError):
+            CapacityPlanner(self.analyzer)
+
+class YAMLCapacityPlannerTest(unittest.TestCase):
+    def test_answers_sit_on_the_budget_crossing(self):
+        analyzer = YAMLBasedAnalyzer(str(Path(__file__).parent / "analyzer-config.yaml"))
+        with open(PRICING_CACHE, 'r') as f:
+            analyzer.pricing_data = json.load(f)["pricing"]
+        planner = CapacityPlanner(analyzer)
+
+        for infrastructure in ("ecs", "eks"):
+            for plan in planner.solve([600.0, 1500.0], infrastructure):
+                users = plan.max_expected_users
+                self.assertGreater(users, 0)
+                self.assertLessEqual(planner._analyze(infrastructure, analyzer.get_scenario("medium_app"), users,
+                                                      plan.peak_load_multiplier).monthly_cost, plan.budget)
+                if plan.limiting_factor == "budget":
+                    self.assertGreater(planner._analyze(infrastructure, analyzer.get_scenario("medium_app"),
+                                                        users + 1, plan.peak_load_multiplier).monthly_cost,
+                                       plan.budget)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Cost Memo Tests
+Fingerprinting, persistence and invalidation of TerragruntCostAnalyzer's cost breakdown memo
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from terragrunt_environment_analyzer import TerragruntCostAnalyzer
+
+PRICING_CACHE = Path(__file__).parent / "pricing_cache_eu-west-1.json"
+STAGING = ({"environment": "staging", "availability_zones": ["eu-west-1a", "eu-west-1b"]},
+           "../modules/ecs-service", None, None)
+PRODUCTION = ({"environment": "production", "availability_zones": ["eu-west-1a", "eu-west-1b", "eu-west-1c"]},
+              "../modules/ecs-service", None, None)
+
+class CostMemoTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(PRICING_CACHE, 'r') as f:
+            cls.pricing = json.load(f)["pricing"]
+
+    def setUp(self):
+        self.work = tempfile.mkdtemp(prefix="cost_memo_test_")
+        self.memo_file = Path(self.work) / "memo.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def analyzer(self, **kwargs) -> TerragruntCostAnalyzer:
+        analyzer = TerragruntCostAnalyzer(**kwargs)
+        # Pricing from the checked-in cache, so no fetch (and no background refresh) happens
+        analyzer.pricing_data = self.pricing
+        return analyzer
+
+    def fingerprint(self, analyzer: TerragruntCostAnalyzer, configuration=STAGING) -> str:
+        inputs, source_module, sizing, env_path = configuration
+        return analyzer.cost_fingerprint(inputs, source_module, sizing, env_path)
+
+    def test_identical_configurations_are_priced_once(self):
+        analyzer = self.analyzer()
+        first, second, third = analyzer._estimate_costs([STAGING, PRODUCTION, STAGING])
+
+        self.assertEqual(first[0], third[0])
+        self.assertNotEqual(first[0], second[0])
+        self.assertEqual(len(analyzer._cost_memo), 2)
+
+        analyzer._estimate_costs([PRODUCTION])
+        self.assertEqual((analyzer.memo_hits, analyzer.memo_misses), (2, 2))
+
+    def test_fingerprint_covers_constants_version_and_rules(self):
+        analyzer = self.analyzer()
+        base = self.fingerprint(analyzer)
+
+        self.assertEqual(self.fingerprint(self.analyzer()), base)
+        self.assertNotEqual(self.fingerprint(analyzer, PRODUCTION), base)
+
+        analyzer.ECR_STORAGE_GB = 5.0
+        self.assertNotEqual(self.fingerprint(analyzer), base)
+
+        analyzer = self.analyzer()
+        analyzer.MEMO_VERSION = TerragruntCostAnalyzer.MEMO_VERSION + 1
+        self.assertNotEqual(self.fingerprint(analyzer), base)
+
+        rules_file = Path(self.work) / "rules.json"
+        rules_file.write_text(json.dumps({"rules": [{"items": [{"component": "vpc"}]}]}))
+        self.assertNotEqual(self.fingerprint(self.analyzer(cost_rules=str(rules_file))), base)
+
+    def test_memo_file_is_reused_across_runs(self):
+        analyzer = self.analyzer(memo_file=str(self.memo_file))
+        priced = analyzer._estimate_costs([STAGING])[0][0]
+        analyzer.save_memo()
+
+        with open(self.memo_file, 'r') as f:
+            memo = json.load(f)
+        self.assertEqual(memo["version"], TerragruntCostAnalyzer.MEMO_VERSION)
+        self.assertEqual(list(memo["entries"]), [self.fingerprint(analyzer)])
+
+        rerun = self.analyzer(memo_file=str(self.memo_file))
+        cost_breakdown, resource_estimates = rerun._estimate_costs([STAGING])[0]
+        self.assertEqual(cost_breakdown, priced)
+        self.assertTrue(resource_estimates["priced_from_memo"])
+        self.assertEqual((rerun.memo_hits, rerun.memo_misses), (1, 0))
+
+    def test_memo_files_of_other_versions_are_ignored(self):
+        analyzer = self.analyzer(memo_file=str(self.memo_file))
+        analyzer._estimate_costs([STAGING])
+        analyzer.save_memo()
+
+        with open(self.memo_file, 'r') as f:
+            memo = json.load(f)
+        for version in (TerragruntCostAnalyzer.MEMO_VERSION + 1, None):
+            memo["version"] = version
+            self.memo_file.write_text(json.dumps(memo))
+            output = StringIO()
+            with redirect_stdout(output):
+                stale = self.analyzer(memo_file=str(self.memo_file))
+
+            self.assertEqual(len(stale._cost_memo), 0)
+            self.assertIn("Ignoring cost memo", output.getvalue())
+
+    def test_unreadable_memo_file_starts_empty(self):
+        self.memo_file.write_text("{not json")
+
+        self.assertEqual(len(self.analyzer(memo_file=str(self.memo_file))._cost_memo), 0)
+
+    def test_what_if_pricing_bypasses_the_memo(self):
+        analyzer = self.analyzer(memo_file=str(self.memo_file))
+        analyzer._estimate_costs([STAGING, STAGING], memo=False)
+
+        self.assertEqual(len(analyzer._cost_memo), 0)
+        self.assertEqual((analyzer.memo_hits, analyzer.memo_misses), (0, 0))
+        analyzer.save_memo()
+        self.assertFalse(self.memo_file.exists())
+
+    def test_memo_is_bounded(self):
+        analyzer = self.analyzer()
+        analyzer.MEMO_SIZE = 1
+        analyzer._estimate_costs([STAGING])
+        analyzer._estimate_costs([PRODUCTION])
+
+        self.assertEqual(list(analyzer._cost_memo), [self.fingerprint(analyzer, PRODUCTION)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Cost Rules Tests
+Expression sandbox, rule compilation and column-wise plan evaluation of cost_rules.py
+"""
+
+import unittest
+
+from cost_rules import compile_expression, compile_rules, load_rules
+
+class CompileExpressionTest(unittest.TestCase):
+    def assertRejected(self, source: str, message: str):
+        with self.assertRaises(ValueError) as raised:
+            compile_expression(source, "test")
+        self.assertIn(message, str(raised.exception))
+
+    def test_allowed_expression_runs(self):
+        expression = compile_expression("max(nat_gateways, len(azs)) * 32.85 if production else 0", "test")
+
+        self.assertEqual(expression.names, {"nat_gateways", "azs", "production"})
+        self.assertAlmostEqual(expression.run({"nat_gateways": 1, "azs": ["a", "b"], "production": True}), 65.7)
+
+    def test_literals_are_taken_as_is(self):
+        self.assertEqual(compile_expression(15.0, "test").run({}), 15.0)
+        self.assertIs(compile_expression(True, "test").run({}), True)
+
+    def test_rejects_attribute_access(self):
+        self.assertRejected("environment.__class__", "Attribute is not allowed")
+        self.assertRejected("azs.count", "Attribute is not allowed")
+        # Method calls fail on the call itself
+        self.assertRejected("''.join(module)", "can be called")
+
+    def test_rejects_lambdas_and_comprehensions(self):
+        self.assertRejected("lambda: 1", "Lambda is not allowed")
+        self.assertRejected("max(lambda: 1, 0)", "Lambda is not allowed")
+        self.assertRejected("[x for x in azs]", "ListComp is not allowed")
+
+    def test_rejects_underscore_names(self):
+        self.assertRejected("__import__", "name '__import__' is not allowed")
+        self.assertRejected("_secret + 1", "name '_secret' is not allowed")
+
+    def test_rejects_calls_outside_the_allowed_functions(self):
+        self.assertRejected("open('/etc/passwd')", "can be called")
+        self.assertRejected("eval('1')", "can be called")
+        self.assertRejected("round(cost, ndigits=2)", "can be called")
+
+    def test_rejects_invalid_syntax(self):
+        self.assertRejected("cost +", "invalid expression")
+
+    def test_runtime_errors_name_the_environment(self):
+        expression = compile_expression("cost / 0", "rule 'x'")
+        with self.assertRaises(ValueError) as raised:
+            expression.run({"cost": 1, "environment": "staging"})
+        self.assertIn("'staging'", str(raised.exception))
+        self.assertIn("ZeroDivisionError", str(raised.exception))
+
+class CompileRulesTest(unittest.TestCase):
+    RULES = {
+        "define": {"production": "environment == 'production'"},
+        "rules": [
+            {"name": "network", "items": [{"component": "vpc", "args": {"production": "production"}}]},
+            {"name": "monitoring", "when": "production", "items": [
+                {"item": "CloudWatch Enhanced", "cost": 15.0},
+                {"item": "Backups", "cost": "replicas * 10", "when": "replicas"}
+            ]},
+            {"name": "basic monitoring", "when": "not production", "items": [{"item": "CloudWatch Basic", "cost": 2.0}]}
+        ]
+    }
+
+    def test_evaluates_column_wise(self):
+        plan = compile_rules(self.RULES, ["vpc"])
+        calls = []
+
+        def vpc(subject, production):
+            calls.append((subject, production))
+            return {"NAT Gateway": 32.85 * (2 if production else 1)}
+
+        breakdowns = plan.evaluate([({"environment": "production", "replicas": 2}, "prod"),
+                                    ({"environment": "staging"}, "stage")], {"vpc": vpc})
+
+        self.assertEqual(calls, [("prod", True), ("stage", False)])
+        self.assertEqual(breakdowns[0], {"NAT Gateway": 65.7, "CloudWatch Enhanced": 15.0, "Backups": 20.0})
+        self.assertEqual(breakdowns[1], {"NAT Gateway": 32.85, "CloudWatch Basic": 2.0})
+
+    def test_shares_identical_predicates(self):
+        plan = compile_rules(self.RULES, ["vpc"])
+
+        self.assertEqual([guard.source for guard in plan.guards],
+                         ["production", "(production) and (replicas)", "not production"])
+        self.assertEqual(plan.inputs, ["environment", "replicas"])
+
+    def test_components_are_listed_without_pricing(self):
+        plan = compile_rules(self.RULES, ["vpc"])
+
+        self.assertEqual(plan.components_for({"environment": "production"}), ["vpc"])
+
+    def test_rejects_unknown_components(self):
+        with self.assertRaises(ValueError) as raised:
+            compile_rules({"rules": [{"items": [{"component": "lambda"}]}]}, ["vpc"])
+        self.assertIn("unknown component 'lambda'", str(raised.exception))
+
+    def test_rejects_unusable_definitions(self):
+        for name in ("_hidden", "len", "not a name"):
+            with self.assertRaises(ValueError):
+                compile_rules({"define": {name: "1"}, "rules": []})
+
+    def test_digest_follows_the_rules(self):
+        changed = dict(self.RULES, define={"production": "environment in ('production', 'prod')"})
+
+        self.assertEqual(compile_rules(self.RULES).digest, compile_rules(dict(self.RULES)).digest)
+        self.assertNotEqual(compile_rules(self.RULES).digest, compile_rules(changed).digest)
+
+    def test_default_rules_compile(self):
+        plan = compile_rules(load_rules(), ("vpc", "load_balancer", "ecs", "eks", "ecr", "rds"))
+
+        self.assertEqual(plan.components_for({"environment": "production", "module": "ecs-service"}),
+                         ["vpc", "load_balancer", "ecs", "ecr", "rds"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Dependency Scheduler Tests
+Terragrunt dependency parsing, level ordering, cycle detection and DAG runs
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from dependency_scheduler import DependencyCycleError, DependencyGraph, parse_unit, run_dag
+
+def dependency(name: str, path: str, mocks: str = "") -> str:
+    mock_outputs = f"\n  mock_outputs = {{ {mocks} }}" if mocks else ""
+    return f'dependency "{name}" {{\n  config_path = "{path}"{mock_outputs}\n}}\n'
+
+class DependencySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="dependency_scheduler_test_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def unit(self, name: str, config: str = "") -> str:
+        directory = self.root / name
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "terragrunt.hcl").write_text(config)
+        return str(directory)
+
+    def graph(self, *units: str) -> DependencyGraph:
+        return DependencyGraph([parse_unit(unit) for unit in units])
+
+    def names(self, graph: DependencyGraph, levels):
+        return [[graph.units[key].name for key in level] for level in levels]
+
+    def test_parses_dependency_blocks(self):
+        vpc = self.unit("vpc")
+        app = parse_unit(self.unit("app", dependency("vpc", "../vpc", 'vpc_id = "vpc-mock"')
+                                   + 'dependencies {\n  paths = ["../db"]\n}\n'))
+
+        self.assertEqual(app.dependencies["vpc"].config_path, str(Path(vpc).resolve()))
+        self.assertEqual(app.dependencies["vpc"].mock_outputs, {"vpc_id": "vpc-mock"})
+        self.assertEqual(app.ordering_paths, [str((self.root / "db").resolve())])
+
+    def test_included_dependencies_resolve_against_their_file(self):
+        (self.root / "common.hcl").write_text(dependency("vpc", "./vpc"))
+        self.unit("vpc")
+        app = parse_unit(self.unit("app", 'include "root" {\n  path = find_in_parent_folders("common.hcl")\n}\n'))
+
+        self.assertEqual(app.dependencies["vpc"].config_path, str((self.root / "vpc").resolve()))
+
+    def test_levels_follow_dependencies(self):
+        graph = self.graph(
+            self.unit("app", dependency("vpc", "../vpc") + dependency("db", "../db")),
+            self.unit("db", dependency("vpc", "../vpc")),
+            self.unit("vpc"),
+            self.unit("dns")
+        )
+
+        self.assertEqual(self.names(graph, graph.levels()), [["dns", "vpc"], ["db"], ["app"]])
+
+    def test_dependencies_outside_the_graph_are_not_edges(self):
+        graph = self.graph(self.unit("app", dependency("shared", "../../elsewhere/shared")))
+
+        self.assertEqual(self.names(graph, graph.levels()), [["app"]])
+
+    def test_detects_cycles(self):
+        graph = self.graph(
+            self.unit("a", dependency("b", "../b")),
+            self.unit("b", dependency("c", "../c")),
+            self.unit("c", dependency("a", "../a")),
+            self.unit("d")
+        )
+
+        with self.assertRaises(DependencyCycleError) as raised:
+            graph.levels()
+        cycle = raised.exception.cycle
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertEqual(sorted(cycle[:-1]), ["a", "b", "c"])
+        self.assertIn("Dependency cycle: ", str(raised.exception))
+
+    def test_detects_self_dependencies(self):
+        graph = self.graph(self.unit("a", dependency("self", "../a")))
+
+        with self.assertRaises(DependencyCycleError) as raised:
+            graph.levels()
+        self.assertEqual(raised.exception.cycle, ["a", "a"])
+
+    def test_run_passes_outputs_downstream(self):
+        graph = self.graph(
+            self.unit("vpc"),
+            self.unit("app", dependency("vpc", "../vpc", 'vpc_id = "vpc-mock", azs = 2')),
+            self.unit("worker", dependency("shared", "../../elsewhere/shared", 'queue = "mock-queue"'))
+        )
+        seen = {}
+
+        def analyze(unit, dependency_outputs):
+            seen[unit.name] = dependency_outputs
+            return unit.name.upper(), {"vpc_id": "vpc-123"} if unit.name == "vpc" else {}
+
+        results, errors, report = run_dag(graph, analyze, workers=2)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(sorted(results.values()), ["APP", "VPC", "WORKER"])
+        self.assertEqual(seen["app"]["vpc"], {"vpc_id": "vpc-123", "azs": 2})
+        self.assertEqual(seen["app"]["vpc"].mocked, {"azs"})
+        self.assertEqual(seen["worker"]["shared"], {"queue": "mock-queue"})
+        self.assertEqual(report.levels, [["vpc", "worker"], ["app"]])
+        self.assertEqual(report.critical_path[-1], "app")
+
+    def test_failed_units_leave_their_dependents_on_mocks(self):
+        graph = self.graph(self.unit("vpc"), self.unit("app", dependency("vpc", "../vpc", 'vpc_id = "vpc-mock"')))
+        seen = {}
+
+        def analyze(unit, dependency_outputs):
+            if unit.name == "vpc":
+                raise RuntimeError("state locked")
+            seen[unit.name] = dependency_outputs
+            return unit.name, {}
+
+        results, errors, _ = run_dag(graph, analyze)
+
+        self.assertEqual([graph.units[key].name for key in errors], ["vpc"])
+        self.assertEqual(list(results.values()), ["app"])
+        self.assertEqual(seen["app"]["vpc"], {"vpc_id": "vpc-mock"})
+
+    def test_critical_path_is_the_longest_chain(self):
+        graph = self.graph(
+            self.unit("vpc"),
+            self.unit("db", dependency("vpc", "../vpc")),
+            self.unit("app", dependency("db", "../db")),
+            self.unit("dns")
+        )
+        keys = {unit.name: key for key, unit in graph.units.items()}
+        durations = {keys["vpc"]: 1.0, keys["db"]: 2.0, keys["app"]: 0.5, keys["dns"]: 3.0}
+
+        self.assertEqual(graph.critical_path(durations), (["vpc", "db", "app"], 3.5))
+
+if __name__ == "__main__":
+    unittest.main()
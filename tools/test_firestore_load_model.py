@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Firestore Load Model Tests
+Read/write/egress accounting, trace formats and chunk-invariance of firestore_load_model.py
+"""
+
+import json
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+from firestore_load_model import FirestoreLoadModel, analyze_trace, np
+
+START = 1_699_999_200   # On an hour boundary
+TRACE = [
+    (0, "listeners", "general", "2"),
+    (10, "message", "general", "100"),     # 2 fan-out reads of 100 bytes
+    (20, "join", "general", ""),           # 1 message + the room document
+    (3700, "message", "general", ""),      # Default size (300 bytes), 3 listeners
+    (3800, "create", "random", ""),        # A write to the rooms collection, nobody listening yet
+    (3900, "join", "*", ""),               # The room list: 1 document, no room document
+    (4000, "leave", "general", ""),
+    (4100, "message", "general", "50")     # 2 listeners left
+]
+
+def backends():
+    return [False, True] if np is not None else [False]
+
+class FirestoreLoadModelTest(unittest.TestCase):
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp(prefix="firestore_test_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def write_csv(self, events, name: str = "trace.csv", header: str = "timestamp,event,room,value") -> str:
+        lines = [header] if header else []
+        lines += [f"{START + offset},{event},{room},{value}" for offset, event, room, value in events]
+        (self.work / name).write_text("\n".join(lines) + "\n")
+        return str(self.work / name)
+
+    def summary(self, report):
+        return ([(hour.writes, hour.fanout_reads, hour.join_reads, round(hour.egress_gb * 2 ** 30, 6))
+                 for hour in report.hours],
+                [(room.room, room.writes, room.fanout_reads, room.join_reads) for room in report.rooms])
+
+    def test_accounts_reads_writes_and_egress(self):
+        trace = self.write_csv(TRACE)
+        for vectorized in backends():
+            report = analyze_trace(trace, chunk_size=3, vectorized=vectorized)
+
+            hours, rooms = self.summary(report)
+            self.assertEqual(hours, [(1, 2, 2, 500), (3, 5, 1, 1300)], vectorized)
+            self.assertEqual(rooms, [("general", 3, 7, 2), ("*", 1, 0, 1)], vectorized)
+            self.assertEqual(report.events, len(TRACE))
+            self.assertEqual(report.start, datetime.fromtimestamp(START).isoformat())
+            self.assertEqual(len(report.fanout_dominated_hours()), 1)
+
+    def test_results_do_not_depend_on_chunking_or_backend(self):
+        rng = random.Random(11)
+        events, offset = [], 0
+        rooms = [f"room{index}" for index in range(25)]
+        for _ in range(3000):
+            offset += rng.randint(0, 40)
+            event = rng.choices(["message", "join", "leave", "listeners", "create"], [60, 15, 10, 2, 1])[0]
+            value = str(rng.randint(0, 900)) if event in ("message", "listeners") else ""
+            events.append((offset, event, rng.choice(rooms), value))
+        trace = self.write_csv(events)
+
+        expected = self.summary(analyze_trace(trace, chunk_size=len(events), vectorized=False))
+        for vectorized in backends():
+            for chunk_size in (1, 7, 500, 2999):
+                hours, rooms_seen = self.summary(analyze_trace(trace, chunk_size, vectorized=vectorized))
+                self.assertEqual(len(hours), len(expected[0]))
+                for actual, wanted in zip(hours + rooms_seen, expected[0] + expected[1]):
+                    for a, b in zip(actual, wanted):
+                        if isinstance(b, str):
+                            self.assertEqual(a, b)
+                        else:
+                            self.assertAlmostEqual(a, b, places=6, msg=(vectorized, chunk_size))
+
+    def test_trace_formats(self):
+        expected = self.summary(analyze_trace(self.write_csv(TRACE), vectorized=False))
+
+        reordered = self.work / "reordered.csv"
+        reordered.write_text("room,value,event,timestamp\n" + "".join(
+            f"{room},{value},{event},{START + offset}\n" for offset, event, room, value in TRACE))
+        ndjson = self.work / "trace.ndjson"
+        ndjson.write_text("".join(json.dumps({"timestamp": datetime.fromtimestamp(START + offset, timezone.utc)
+                                              .isoformat().replace("+00:00", "Z"),
+                                              "event": event, "room": room, "value": value or None}) + "\n"
+                                  for offset, event, room, value in TRACE))
+        for trace in (self.write_csv(TRACE, "bare.csv", header=""), str(reordered), str(ndjson)):
+            for vectorized in backends():
+                self.assertEqual(self.summary(analyze_trace(trace, chunk_size=4, vectorized=vectorized)), expected,
+                                 (trace, vectorized))
+
+    def test_rejects_unknown_events_and_unordered_traces(self):
+        for vectorized in backends():
+            with self.assertRaises(ValueError):
+                FirestoreLoadModel().add_chunk([str(START)], ["typing"], ["general"], [""], vectorized=vectorized)
+
+            model = FirestoreLoadModel()
+            model.add_chunk([str(START + 7200)], ["message"], ["general"], [""], vectorized=vectorized)
+            with self.assertRaises(ValueError):
+                model.add_chunk([str(START)], ["message"], ["general"], [""], vectorized=vectorized)
+
+    def test_monthly_projection_and_free_quota(self):
+        report = analyze_trace(self.write_csv(TRACE), vectorized=False)
+
+        # Two hours of trace scale by 365 to a 730 hour month
+        self.assertAlmostEqual(report.monthly["writes"], 4 * 365)
+        self.assertAlmostEqual(report.monthly["reads"], 10 * 365)
+        self.assertEqual(report.monthly_cost, {"Firestore Reads": 0.0, "Firestore Writes": 0.0,
+                                               "Firestore Egress": 0.0})
+
+        billed = analyze_trace(self.write_csv(TRACE), vectorized=False,
+                               pricing={"free_reads_per_day": 0, "free_writes_per_day": 0})
+        self.assertAlmostEqual(billed.monthly_cost["Firestore Reads"], 10 * 365 / 100_000 * 0.06)
+        self.assertAlmostEqual(billed.monthly_cost["Firestore Writes"], 4 * 365 / 100_000 * 0.18)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Kubernetes Manifest Analyzer Tests
+Quantity parsing, manifest templates and reading, and first-fit-decreasing node packing
+"""
+
+import random
+import unittest
+
+from k8s_manifest_analyzer import (ManifestReader, NodeBinPacker, WorkloadResources, node_allocatable,
+                                   parse_cpu, parse_memory_gb, render_template, yaml)
+
+PRICING = {"ec2": {"t3.medium": {"monthly": 30.37}, "m5.large": {"monthly": 70.08},
+                   "m5.xlarge": {"monthly": 140.16}}}
+
+MANIFESTS = '''
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: api
+spec:
+  replicas: ${api_replicas}
+  template:
+    spec:
+      initContainers:
+        - name: migrate
+          resources:
+            requests: {cpu: "1", memory: 256Mi}
+      containers:
+        - name: api
+          resources:
+            requests: {cpu: 250m, memory: 512Mi}
+            limits: {cpu: 500m, memory: 1Gi}
+        - name: sidecar
+          resources:
+            requests: {cpu: 50m, memory: 64Mi}
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: api
+---
+%{ if cache_enabled == "true" ~}
+apiVersion: apps/v1
+kind: StatefulSet
+metadata:
+  name: redis
+spec:
+  template:
+    spec:
+      containers:
+        - name: redis
+          resources:
+            requests: {cpu: 100m, memory: 1Gi}
+%{ endif ~}
+'''
+
+def workload(name: str, cpu: float, memory: float, replicas: int) -> WorkloadResources:
+    return WorkloadResources("Deployment", name, replicas, cpu, memory, cpu, memory)
+
+def first_fit_decreasing(workloads, instance_type: str) -> int:
+    """Reference packing, one pod at a time"""
+    alloc_cpu, alloc_memory, alloc_pods = node_allocatable(instance_type)
+    pods = sorted(((w.cpu_request, w.memory_request_gb) for w in workloads for _ in range(w.replicas)),
+                  key=lambda pod: max(pod[0] / alloc_cpu, pod[1] / alloc_memory), reverse=True)
+    nodes = []
+    for cpu, memory in pods:
+        for node in nodes:
+            if node[0] + 1e-9 >= cpu and node[1] + 1e-9 >= memory and node[2] >= 1:
+                break
+        else:
+            node = [alloc_cpu, alloc_memory, alloc_pods]
+            nodes.append(node)
+        node[0] -= cpu
+        node[1] -= memory
+        node[2] -= 1
+    return len(nodes)
+
+class QuantityTest(unittest.TestCase):
+    def test_cpu(self):
+        self.assertEqual(parse_cpu("250m"), 0.25)
+        self.assertEqual(parse_cpu("2"), 2.0)
+        self.assertEqual(parse_cpu(0.5), 0.5)
+        self.assertEqual(parse_cpu(None), 0.0)
+
+    def test_memory(self):
+        self.assertEqual(parse_memory_gb("512Mi"), 0.5)
+        self.assertEqual(parse_memory_gb("2Gi"), 2.0)
+        self.assertAlmostEqual(parse_memory_gb("1G"), 10 ** 9 / 2 ** 30)
+        self.assertEqual(parse_memory_gb(str(2 ** 30)), 1.0)
+        self.assertEqual(parse_memory_gb(""), 0.0)
+
+    def test_allocatable_leaves_room_for_the_system(self):
+        cpu, memory, pods = node_allocatable("t3.medium")
+
+        self.assertAlmostEqual(cpu, 2 - 0.07 - 0.125)
+        self.assertLess(memory, 4.0)
+        self.assertEqual(pods, 15)
+
+class ManifestTest(unittest.TestCase):
+    def test_render_template(self):
+        template = '%{ if tier == "prod" }big%{ else }small%{ endif } ${name} ${unknown}'
+
+        self.assertEqual(render_template(template, {"tier": "prod", "name": "api"}), "big api ${unknown}")
+        self.assertEqual(render_template(template, {"tier": "dev", "name": "api"}), "small api ${unknown}")
+
+    @unittest.skipIf(yaml is None, "PyYAML is not installed")
+    def test_reads_workloads(self):
+        workloads = ManifestReader().read_text(MANIFESTS, {"api_replicas": 3, "cache_enabled": "true"})
+
+        self.assertEqual([(w.kind, w.name, w.replicas) for w in workloads],
+                         [("Deployment", "api", 3), ("StatefulSet", "redis", 1)])
+        api = workloads[0]
+        # The init container's 1 CPU outweighs the 300m of the app containers
+        self.assertEqual((api.cpu_request, api.memory_request_gb), (1.0, 0.5625))
+        self.assertEqual((api.cpu_limit, api.memory_limit_gb), (0.5, 1.0))
+
+    @unittest.skipIf(yaml is None, "PyYAML is not installed")
+    def test_template_conditions_drop_workloads(self):
+        workloads = ManifestReader().read_text(MANIFESTS, {"api_replicas": 2, "cache_enabled": "false"})
+
+        self.assertEqual([w.name for w in workloads], ["api"])
+
+class NodeBinPackerTest(unittest.TestCase):
+    def setUp(self):
+        self.packer = NodeBinPacker(PRICING)
+
+    def test_matches_pod_by_pod_first_fit_decreasing(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            # Binary fractions keep the float arithmetic of both packings exact
+            workloads = [workload(f"w{index}", rng.choice([0.125, 0.25, 0.5, 1.0, 1.5]),
+                                  rng.choice([0.125, 0.25, 0.5, 1.0, 2.0, 3.0]), rng.randint(0, 12))
+                         for index in range(rng.randint(1, 6))]
+            for instance_type in ("t3.medium", "m5.large"):
+                result = self.packer.pack(workloads, instance_type)
+                self.assertEqual(result.node_count, first_fit_decreasing(workloads, instance_type),
+                                 (instance_type, workloads))
+
+    def test_pod_limit_bounds_tiny_pods(self):
+        result = self.packer.pack([workload("tiny", 0.001, 0.001, 40)], "t3.medium")
+
+        self.assertEqual(result.node_count, 3)   # 15 pods per t3.medium
+        self.assertEqual(result.pods, 40)
+
+    def test_oversized_pods_are_unschedulable(self):
+        result = self.packer.pack([workload("huge", 4.0, 1.0, 2), workload("web", 0.5, 0.5, 2)], "t3.medium")
+
+        self.assertEqual(result.unschedulable_pods, 2)
+        self.assertEqual((result.pods, result.node_count), (2, 1))
+
+    def test_min_nodes_and_cost(self):
+        result = self.packer.pack([workload("web", 0.5, 0.5, 1)], "t3.medium", min_nodes=3)
+
+        self.assertEqual(result.node_count, 3)
+        self.assertAlmostEqual(result.monthly_cost, 3 * 30.37)
+        self.assertAlmostEqual(result.cpu_utilization, 0.5 / (3 * result.allocatable_cpu) * 100)
+
+    def test_cheapest_feasible_node_type(self):
+        # 2 GiB pods: 8 t3.medium, 3 m5.large or 2 m5.xlarge nodes
+        workloads = [workload("api", 0.5, 2.0, 8)]
+
+        self.assertEqual(self.packer.cheapest(workloads, ["t3.medium", "m5.large", "m5.xlarge"]).instance_type,
+                         "m5.large")
+        # Memory requests that no candidate can hold leave nothing feasible
+        self.assertIsNone(self.packer.cheapest([workload("big", 0.5, 12.0, 1)], ["t3.medium", "m5.large"]))
+
+if __name__ == "__main__":
+    unittest.main()
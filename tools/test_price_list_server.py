@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Price List Download Tests
+Runs PricingHTTPClient and AWSPricingFetcher against price_list_server.py on an ephemeral port
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from aws_pricing_fetcher import AWSPricingFetcher
+from price_list_server import PriceListServer, write_price_list
+from pricing_http import PricingHTTPClient
+
+REGION = "eu-west-1"
+
+class PriceListServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp(prefix="price_list_test_")
+        fetcher = AWSPricingFetcher(REGION, price_list_url="")
+        cls.location = fetcher.aws_region_map[REGION]
+        cls.pricing = fetcher._download_pricing()
+        cls.version = write_price_list(cls.root, REGION, cls.location, cls.pricing, "20260101000000")
+        cls.offer_path = f"/offers/v1.0/aws/AmazonEC2/{cls.version}/{REGION}/index.json"
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    def setUp(self):
+        self.server = PriceListServer(self.root).start()
+        self.work = tempfile.mkdtemp(prefix="price_list_client_")
+        self.dest = str(Path(self.work) / "index.json")
+        # No backoff sleeps: Retry-After is 0 and the jitter range collapses to 0
+        self.client = PricingHTTPClient(retries=3, backoff=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def served_bytes(self) -> bytes:
+        return (Path(self.root) / self.offer_path.lstrip("/")).read_bytes()
+
+    def test_retries_after_503(self):
+        self.server.fail_requests = 2
+        result = self.client.fetch(self.server.url + self.offer_path, self.dest)
+
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(result.attempts, 3)
+        self.assertEqual(self.server.stats["requests"], 3)
+        self.assertEqual(Path(self.dest).read_bytes(), self.served_bytes())
+
+    def test_unchanged_file_is_revalidated_with_304(self):
+        url = self.server.url + self.offer_path
+        first = self.client.fetch(url, self.dest)
+        second = self.client.fetch(url, self.dest)
+
+        self.assertEqual(first.status, "downloaded")
+        self.assertEqual(second.status, "not_modified")
+        self.assertEqual(second.bytes_transferred, 0)
+        self.assertEqual(second.etag, first.etag)
+        self.assertEqual(self.server.stats["not_modified"], 1)
+        self.assertEqual(self.client.connections_opened, 1)
+
+    def test_resumes_after_dropped_connection(self):
+        self.server.drop_after_bytes = 100
+        result = self.client.fetch(self.server.url + self.offer_path, self.dest)
+
+        self.assertEqual(result.status, "resumed")
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(result.bytes_transferred, len(self.served_bytes()))
+        self.assertEqual(self.server.stats["ranges"], 1)
+        self.assertEqual(Path(self.dest).read_bytes(), self.served_bytes())
+        self.assertFalse(Path(self.dest + ".part").exists())
+
+    def test_prices_are_derived_from_offer_files(self):
+        pricing = {"ec2": dict(self.pricing["ec2"], **{"t3.medium": {"hourly": 0.0505}}),
+                   "fargate": dict(self.pricing["fargate"], cpu_per_vcpu_hour=0.05, memory_per_gb_hour=0.006)}
+        root = Path(self.work) / "offers"
+        write_price_list(str(root), REGION, self.location, pricing, "20260201000000")
+
+        with PriceListServer(str(root)) as server:
+            fetcher = AWSPricingFetcher(REGION, price_list_url=server.url)
+            fetcher.offer_dir = Path(self.work) / "cache" / REGION
+            fetcher.price_list_db = fetcher.offer_dir.parent / "price_list.db"
+            derived = fetcher._download_pricing()
+
+        self.assertAlmostEqual(derived["ec2"]["t3.medium"]["hourly"], 0.0505)
+        self.assertAlmostEqual(derived["fargate"]["cpu_per_vcpu_hour"], 0.05)
+        self.assertAlmostEqual(derived["fargate"]["memory_per_gb_hour"], 0.006)
+        self.assertEqual(fetcher._offer_prices.keys(), {"AmazonEC2", "AmazonECS"})
+
+if __name__ == "__main__":
+    unittest.main()
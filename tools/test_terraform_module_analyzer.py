@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Terraform Module Analyzer Tests
+HCL parsing, expression resolution and module sizing (including node group fallbacks)
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from terraform_module_analyzer import (HCLExpression, ResolvedSizing, TerraformModuleAnalyzer,
+                                       parse_hcl, resolve_expression)
+
+MODULE = '''
+variable "cpu" {
+  default = 512
+}
+
+locals {
+  memory = 1024
+  azs    = ["eu-west-1a", "eu-west-1b"]
+}
+
+resource "aws_ecs_task_definition" "app" {
+  cpu    = var.cpu
+  memory = local.memory
+}
+
+resource "aws_ecs_service" "app" {
+  desired_count = var.desired
+}
+
+resource "aws_eks_node_group" "workers" {
+  instance_types = ["m5.large"]
+  scaling_config {
+    min_size     = 2
+    max_size     = 6
+    desired_size = local.node_count
+  }
+}
+
+module "vpc" {
+  source             = "terraform-aws-modules/vpc/aws"
+  enable_nat_gateway = true
+  azs                = local.azs
+  private_subnets    = ["10.0.1.0/24", "10.0.2.0/24", "10.0.3.0/24"]
+}
+'''
+
+class ParseHCLTest(unittest.TestCase):
+    def test_literals_and_expressions(self):
+        root = parse_hcl('''
+            name    = "app"
+            count   = 3
+            ratio   = 0.5
+            enabled = true
+            nothing = null
+            tags    = { team = "web", tier = 2 }
+            azs     = ["a", "b"]
+            label   = "${var.prefix}-app"
+            size    = var.size
+        ''')
+
+        self.assertEqual(root.attributes["name"], "app")
+        self.assertEqual(root.attributes["count"], 3)
+        self.assertEqual(root.attributes["ratio"], 0.5)
+        self.assertIs(root.attributes["enabled"], True)
+        self.assertIsNone(root.attributes["nothing"])
+        self.assertEqual(root.attributes["tags"], {"team": "web", "tier": 2})
+        self.assertEqual(root.attributes["azs"], ["a", "b"])
+        self.assertIsInstance(root.attributes["label"], HCLExpression)
+        self.assertEqual(root.attributes["size"], HCLExpression("var.size"))
+
+    def test_blocks_comments_and_heredocs(self):
+        root = parse_hcl('''
+            # comment
+            terraform {
+              source = "../modules//ecs" // trailing comment
+            }
+            /* block
+               comment */
+            resource "aws_instance" "web" {
+              user_data = <<-EOT
+                echo "{ not a block }"
+              EOT
+              ami = "ami-123"
+            }
+        ''')
+
+        self.assertEqual([block.type for block in root.blocks], ["terraform", "resource"])
+        self.assertEqual(root.find_blocks("terraform")[0].attributes["source"], "../modules//ecs")
+        resource = root.find_blocks("resource")[0]
+        self.assertEqual(resource.labels, ["aws_instance", "web"])
+        self.assertEqual(resource.attributes["ami"], "ami-123")
+
+    def test_for_expressions_and_indexing_stay_expressions(self):
+        root = parse_hcl('''
+            names = [for az in var.azs : upper(az)]
+            first = ["a", "b"][0]
+        ''')
+
+        self.assertIsInstance(root.attributes["names"], HCLExpression)
+        self.assertEqual(root.attributes["first"], HCLExpression('["a", "b"][0]'))
+
+class ResolveExpressionTest(unittest.TestCase):
+    SCOPE = {"var": {"azs": ["a", "b", "c"], "size": HCLExpression("local.size")},
+             "local": {"size": 4, "groups": {"web": {"count": 2}}}}
+
+    def test_references_and_length(self):
+        self.assertEqual(resolve_expression(HCLExpression("var.azs[1]"), self.SCOPE), "b")
+        self.assertEqual(resolve_expression(HCLExpression("local.groups.web.count"), self.SCOPE), 2)
+        self.assertEqual(resolve_expression(HCLExpression("length(var.azs)"), self.SCOPE), 3)
+        # References to references are followed
+        self.assertEqual(resolve_expression(HCLExpression("var.size"), self.SCOPE), 4)
+
+    def test_unknown_expressions_resolve_to_none(self):
+        self.assertIsNone(resolve_expression(HCLExpression("aws_instance.web.id"), self.SCOPE))
+        self.assertIsNone(resolve_expression(HCLExpression("var.azs[9]"), self.SCOPE))
+        self.assertIsNone(resolve_expression(HCLExpression("var.missing"), self.SCOPE))
+
+class NodeGroupTest(unittest.TestCase):
+    def node_group(self, group):
+        sizing = ResolvedSizing()
+        return TerraformModuleAnalyzer._node_group("workers", group, sizing, "test"), sizing.sources
+
+    def test_numeric_sizes(self):
+        group, sources = self.node_group({"min_size": 1, "max_size": 5, "desired_size": 3.0,
+                                          "instance_types": ["m5.large"]})
+
+        self.assertEqual(group, {"name": "workers", "instance_type": "m5.large",
+                                 "min_size": 1, "max_size": 5, "desired_size": 3})
+        self.assertEqual(sources, {})
+
+    def test_missing_sizes_fall_back_without_sources(self):
+        group, sources = self.node_group({})
+
+        self.assertEqual((group["min_size"], group["max_size"], group["desired_size"]), (1, 1, 1))
+        self.assertEqual(group["instance_type"], "t3.medium")
+        self.assertEqual(sources, {})
+
+    def test_unresolved_desired_size_falls_back_to_min_size(self):
+        group, sources = self.node_group({"min_size": 2, "max_size": 4,
+                                          "desired_size": HCLExpression("local.node_count")})
+
+        self.assertEqual(group["desired_size"], 2)
+        self.assertEqual(sources["node_groups.workers.desired_size"],
+                         "test ('local.node_count' is not a number), using 2")
+
+    def test_non_numeric_sizes_fall_back_to_one(self):
+        group, sources = self.node_group({"min_size": None, "max_size": "many", "desired_size": True})
+
+        self.assertEqual((group["min_size"], group["max_size"], group["desired_size"]), (1, 1, 1))
+        self.assertEqual(set(sources), {"node_groups.workers.min_size", "node_groups.workers.max_size",
+                                        "node_groups.workers.desired_size"})
+        self.assertTrue(sources["node_groups.workers.desired_size"].endswith("using 1"))
+
+class ResolveSizingTest(unittest.TestCase):
+    def setUp(self):
+        self.module_dir = tempfile.mkdtemp(prefix="tf_module_test_")
+        (Path(self.module_dir) / "main.tf").write_text(MODULE)
+        self.analyzer = TerraformModuleAnalyzer()
+
+    def tearDown(self):
+        shutil.rmtree(self.module_dir, ignore_errors=True)
+
+    def test_resolves_module_wiring(self):
+        sizing = self.analyzer.resolve_sizing(self.module_dir, {"desired": 3})
+
+        self.assertEqual((sizing.task_cpu_units, sizing.task_memory_mb, sizing.desired_count), (512, 1024, 3))
+        self.assertEqual(sizing.nat_gateways, 3)
+        self.assertEqual(sizing.node_groups, [{"name": "aws_eks_node_group.workers", "instance_type": "m5.large",
+                                               "min_size": 2, "max_size": 6, "desired_size": 2}])
+        # local.node_count is not defined, so it resolves to None
+        self.assertTrue(sizing.sources["node_groups.aws_eks_node_group.workers.desired_size"]
+                        .endswith(":aws_eks_node_group.workers (None is not a number), using 2"))
+
+    def test_inputs_override_module_values(self):
+        sizing = self.analyzer.resolve_sizing(self.module_dir, {
+            "fargate_cpu": 1024, "desired_count": 5,
+            "node_groups": {"main": {"desired_size": "var.nodes", "min_size": 3}}
+        })
+
+        self.assertEqual((sizing.task_cpu_units, sizing.desired_count), (1024, 5))
+        self.assertEqual(sizing.sources["task_cpu_units"], "inputs.fargate_cpu")
+        self.assertEqual([group["desired_size"] for group in sizing.node_groups], [3])
+        self.assertEqual(sizing.sources["node_groups.main.desired_size"],
+                         "inputs.node_groups ('var.nodes' is not a number), using 3")
+
+    def test_modules_are_parsed_once(self):
+        self.analyzer.resolve_sizing(self.module_dir, {})
+        self.analyzer.resolve_sizing(self.module_dir, {})
+
+        self.assertEqual((self.analyzer.cache_misses, self.analyzer.cache_hits), (1, 1))
+
+    def test_nat_gateway_semantics(self):
+        nat_gateways = TerraformModuleAnalyzer._vpc_nat_gateways
+        subnets = {"enable_nat_gateway": True, "azs": ["a", "b"], "private_subnets": ["1", "2", "3"]}
+
+        self.assertEqual(nat_gateways({"enable_nat_gateway": False}), 0)
+        self.assertEqual(nat_gateways(dict(subnets, single_nat_gateway=True)), 1)
+        self.assertEqual(nat_gateways(dict(subnets, one_nat_gateway_per_az=True)), 2)
+        self.assertEqual(nat_gateways(subnets), 3)
+
+if __name__ == "__main__":
+    unittest.main()
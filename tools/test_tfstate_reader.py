@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Terraform State Reader Tests
+Chunked streaming of resources[] and pricing of deployed resources in tfstate_reader.py
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tfstate_reader import NAT_GATEWAY_MONTHLY, StreamingStateParser, TerraformStateCostAnalyzer
+
+PRICING = {
+    "ec2": {"t3.medium": {"monthly": 30.0}, "m5.large": {"monthly": 70.0}},
+    "fargate": {"cpu_monthly_per_vcpu": 30.0, "memory_monthly_per_gb": 3.0},
+    "eks": {"cluster_monthly": 73.0},
+    "load_balancer": {"alb_monthly": 16.0, "nlb_monthly": 14.0}
+}
+
+def resource(resource_type: str, *instances, mode: str = "managed", name: str = "this"):
+    return {"mode": mode, "type": resource_type, "name": name,
+            "instances": [{"attributes": attributes} for attributes in instances]}
+
+STATE = {
+    "version": 4,
+    "terraform_version": "1.6.0",
+    "serial": 42,
+    "resources": [
+        # The service comes before the task definition it runs
+        resource("aws_ecs_service", {"task_definition": "arn:task/app:3", "desired_count": 3}),
+        resource("aws_ecs_task_definition", {"arn": "arn:task/app:3", "cpu": "512", "memory": "2048"}),
+        resource("aws_instance", {"instance_type": "t3.medium"}, {"instance_type": "t3.medium"},
+                 {"instance_type": "x9.unknown"}),
+        resource("aws_eks_cluster", {"name": "main"}),
+        resource("aws_eks_node_group", {"instance_types": ["m5.large"], "scaling_config": [{"desired_size": 2}]}),
+        resource("aws_lb", {"load_balancer_type": "application"}, {"load_balancer_type": "network"}),
+        resource("aws_nat_gateway", {}, {}),
+        resource("aws_s3_bucket", {"bucket": "ünïcode-lögs"}),
+        resource("aws_ami", {"id": "ami-1"}, mode="data")
+    ],
+    "outputs": {"vpc_id": {"value": "vpc-123"}}
+}
+
+class StreamingStateParserTest(unittest.TestCase):
+    def setUp(self):
+        self.work = tempfile.mkdtemp(prefix="tfstate_test_")
+        self.state_file = Path(self.work) / "terraform.tfstate"
+
+    def tearDown(self):
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def write(self, text: str) -> str:
+        self.state_file.write_bytes(text.encode("utf-8"))
+        return str(self.state_file)
+
+    def test_matches_json_load_for_any_chunk_size(self):
+        state_file = self.write(json.dumps(STATE, indent=2, ensure_ascii=False))
+
+        # Small chunks split tokens, numbers and multi-byte characters across reads
+        for chunk_size in (1, 3, 7, 64, 1 << 20):
+            parser = StreamingStateParser(state_file, chunk_size=chunk_size)
+            self.assertEqual(list(parser.iter_resources()), STATE["resources"], chunk_size)
+            self.assertEqual(parser.header, {key: value for key, value in STATE.items() if key != "resources"})
+
+    def test_numbers_at_chunk_boundaries_are_not_truncated(self):
+        state_file = self.write('{"resources": [123456789, 2.5e10]}')
+
+        self.assertEqual(list(StreamingStateParser(state_file, chunk_size=16).iter_resources()), [123456789, 2.5e10])
+
+    def test_empty_files_have_no_resources(self):
+        self.assertEqual(list(StreamingStateParser(self.write("")).iter_resources()), [])
+        self.assertEqual(list(StreamingStateParser(self.write('{"version": 4}')).iter_resources()), [])
+
+    def test_malformed_files_raise_value_error(self):
+        for text in ('[]', '{"resources": [{"type": "aws_instance"}', '{"resources": [{"type": }]}'):
+            with self.assertRaises(ValueError, msg=text):
+                list(StreamingStateParser(self.write(text), chunk_size=4).iter_resources())
+
+class TerraformStateCostAnalyzerTest(unittest.TestCase):
+    def setUp(self):
+        self.work = tempfile.mkdtemp(prefix="tfstate_test_")
+        self.state_file = Path(self.work) / "terraform.tfstate"
+        self.state_file.write_text(json.dumps(STATE))
+
+    def tearDown(self):
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def test_prices_deployed_resources(self):
+        stack = TerraformStateCostAnalyzer(pricing_data=PRICING).analyze_state_file(str(self.state_file))
+
+        self.assertEqual((stack.terraform_version, stack.serial), ("1.6.0", 42))
+        self.assertEqual((stack.resource_count, stack.instance_count), (8, 12))
+        self.assertEqual(stack.cost_breakdown, {
+            "EC2 Instances (t3.medium)": 60.0,
+            "EKS Cluster Management": 73.0,
+            "Worker Nodes (m5.large)": 140.0,
+            "Application Load Balancer": 16.0,
+            "Network Load Balancer": 14.0,
+            "Fargate CPU (1.5 vCPUs)": 45.0,
+            "Fargate Memory (6 GB)": 18.0,
+            "NAT Gateways (2x)": 2 * NAT_GATEWAY_MONTHLY
+        })
+        self.assertAlmostEqual(stack.monthly_cost, sum(stack.cost_breakdown.values()))
+        self.assertEqual(stack.unpriced_types, ["aws_instance", "aws_s3_bucket"])
+        self.assertEqual(stack.resource_counts["aws_instance"], 3)
+        self.assertNotIn("aws_ami", stack.resource_counts)
+
+if __name__ == "__main__":
+    unittest.main()
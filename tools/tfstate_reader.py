@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Terraform State Cost Reader
+Streams terraform.tfstate files and prices the resources that are actually deployed
+"""
+
+import codecs
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+from aws_pricing_fetcher import AWSPricingFetcher
+
+# $32.85/month per NAT Gateway in eu-west-1 (same figure as the environment analyzer)
+NAT_GATEWAY_MONTHLY = 32.85
+
+@dataclass
+class DeployedStack:
+    """Priced view of the resources recorded in a Terraform state file"""
+    state_file: str
+    terraform_version: str
+    serial: int
+    resource_count: int
+    instance_count: int
+    monthly_cost: float
+    cost_breakdown: Dict[str, float]
+    resource_counts: Dict[str, int]
+    unpriced_types: List[str] = field(default_factory=list)
+
+class StreamingStateParser:
+    """Incrementally decodes the top-level resources array of a state file.
+
+    The file is memory-mapped and decoded in chunks, so only the resource
+    currently being parsed has to be held as Python objects.
+    """
+
+    def __init__(self, state_file: str, chunk_size: int = 1 << 20):
+        self.state_file = Path(state_file)
+        self.chunk_size = chunk_size
+        self.header: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+
+    def iter_resources(self) -> Iterator[Dict[str, Any]]:
+        """Yield each entry of ``resources[]`` in file order"""
+        with open(self.state_file, 'rb') as f:
+            if self.state_file.stat().st_size == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield from self._walk(mm)
+            finally:
+                mm.close()
+
+    def _walk(self, mm: mmap.mmap) -> Iterator[Dict[str, Any]]:
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        state = {"buf": "", "pos": 0, "offset": 0, "eof": False}
+
+        def fill(min_chars: int = 1) -> bool:
+            """Append at least ``min_chars`` more characters to the buffer"""
+            grown = 0
+            while grown < min_chars and not state["eof"]:
+                chunk = mm[state["offset"]:state["offset"] + self.chunk_size]
+                state["offset"] += len(chunk)
+                if not chunk:
+                    state["eof"] = True
+                    text = utf8.decode(b"", final=True)
+                else:
+                    text = utf8.decode(chunk)
+                # Drop consumed text so the buffer stays bounded by the largest resource
+                state["buf"] = state["buf"][state["pos"]:] + text
+                state["pos"] = 0
+                grown += len(text)
+            return grown > 0
+
+        def skip_ws() -> str:
+            while True:
+                buf, pos = state["buf"], state["pos"]
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                state["pos"] = pos
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        def expect(char: str):
+            if skip_ws() != char:
+                raise ValueError(f"Malformed state file: expected '{char}' at offset {state['offset']}")
+            state["pos"] += 1
+
+        def decode_value() -> Any:
+            need = self.chunk_size
+            while True:
+                skip_ws()
+                try:
+                    value, end = self._decoder.raw_decode(state["buf"], state["pos"])
+                except json.JSONDecodeError:
+                    if state["eof"]:
+                        raise
+                    fill(need)
+                    need *= 2
+                    continue
+                # A number at the very end of the buffer may still be truncated
+                if end == len(state["buf"]) and not state["eof"]:
+                    fill()
+                    continue
+                state["pos"] = end
+                return value
+
+        expect("{")
+        while True:
+            char = skip_ws()
+            if char == "}" or not char:
+                return
+            if char == ",":
+                state["pos"] += 1
+                continue
+            key = decode_value()
+            expect(":")
+            if key != "resources":
+                self.header[key] = decode_value()
+                continue
+
+            expect("[")
+            while True:
+                char = skip_ws()
+                if char == "]":
+                    state["pos"] += 1
+                    break
+                if char == ",":
+                    state["pos"] += 1
+                    continue
+                if not char:
+                    raise ValueError("Malformed state file: unterminated resources array")
+                yield decode_value()
+
+class TerraformStateCostAnalyzer:
+    """Resolves deployed instance types, task sizes and counts and prices them"""
+
+    def __init__(self, region: str = "eu-west-1", pricing_data: Optional[Dict[str, Any]] = None):
+        self.region = region
+        self.pricing_fetcher = AWSPricingFetcher(region)
+        self.pricing_data = pricing_data
+
+    def load_pricing_data(self):
+        """Load current pricing data"""
+        if not self.pricing_data:
+            self.pricing_data = self.pricing_fetcher.fetch_all_pricing()
+
+    def analyze_state_file(self, state_file: str) -> DeployedStack:
+        """Stream a state file and price every managed resource it records"""
+        self.load_pricing_data()
+
+        parser = StreamingStateParser(state_file)
+        resource_counts: Dict[str, int] = {}
+        task_definitions: Dict[str, Tuple[float, float]] = {}
+        services: List[Tuple[str, int]] = []
+        costs: Dict[str, float] = {}
+        unpriced = set()
+        resource_count = 0
+        instance_count = 0
+
+        for resource in parser.iter_resources():
+            if resource.get("mode") != "managed":
+                continue
+            resource_count += 1
+            resource_type = resource.get("type", "")
+            for instance in resource.get("instances") or []:
+                instance_count += 1
+                resource_counts[resource_type] = resource_counts.get(resource_type, 0) + 1
+                attributes = instance.get("attributes") or {}
+                if not self._price_instance(resource_type, attributes, costs, task_definitions, services):
+                    unpriced.add(resource_type)
+
+        # Services reference task definitions that may appear later in the file
+        fargate = self.pricing_data["fargate"]
+        total_vcpus = total_memory = 0.0
+        for task_definition_arn, desired_count in services:
+            cpu_vcpus, memory_gb = task_definitions.get(task_definition_arn, (0.0, 0.0))
+            total_vcpus += cpu_vcpus * desired_count
+            total_memory += memory_gb * desired_count
+        if total_vcpus:
+            costs[f"Fargate CPU ({total_vcpus:g} vCPUs)"] = total_vcpus * fargate["cpu_monthly_per_vcpu"]
+        if total_memory:
+            costs[f"Fargate Memory ({total_memory:g} GB)"] = total_memory * fargate["memory_monthly_per_gb"]
+
+        nat_count = resource_counts.get("aws_nat_gateway", 0)
+        if nat_count:
+            costs[f"NAT Gateways ({nat_count}x)"] = NAT_GATEWAY_MONTHLY * nat_count
+
+        return DeployedStack(
+            state_file=str(state_file),
+            terraform_version=str(parser.header.get("terraform_version", "")),
+            serial=int(parser.header.get("serial", 0) or 0),
+            resource_count=resource_count,
+            instance_count=instance_count,
+            monthly_cost=sum(costs.values()),
+            cost_breakdown=costs,
+            resource_counts=resource_counts,
+            unpriced_types=sorted(unpriced)
+        )
+
+    def _price_instance(self, resource_type: str, attributes: Dict[str, Any], costs: Dict[str, float],
+                        task_definitions: Dict[str, Tuple[float, float]],
+                        services: List[Tuple[str, int]]) -> bool:
+        """Add the monthly cost of one resource instance; returns False if it cannot be priced"""
+        ec2_pricing = self.pricing_data["ec2"]
+
+        if resource_type == "aws_instance":
+            instance_type = attributes.get("instance_type", "")
+            if instance_type not in ec2_pricing:
+                return False
+            key = f"EC2 Instances ({instance_type})"
+            costs[key] = costs.get(key, 0.0) + ec2_pricing[instance_type]["monthly"]
+            return True
+
+        if resource_type == "aws_ecs_task_definition":
+            cpu_vcpus = float(attributes.get("cpu") or 0) / 1024
+            memory_gb = float(attributes.get("memory") or 0) / 1024
+            task_definitions[attributes.get("arn", "")] = (cpu_vcpus, memory_gb)
+            return True
+
+        if resource_type == "aws_ecs_service":
+            services.append((attributes.get("task_definition", ""), int(attributes.get("desired_count") or 0)))
+            return True
+
+        if resource_type == "aws_eks_cluster":
+            key = "EKS Cluster Management"
+            costs[key] = costs.get(key, 0.0) + self.pricing_data["eks"]["cluster_monthly"]
+            return True
+
+        if resource_type == "aws_eks_node_group":
+            scaling = (attributes.get("scaling_config") or [{}])[0]
+            instance_types = attributes.get("instance_types") or ["t3.medium"]
+            instance_type = instance_types[0]
+            if instance_type not in ec2_pricing:
+                return False
+            desired_size = int(scaling.get("desired_size") or 0)
+            key = f"Worker Nodes ({instance_type})"
+            costs[key] = costs.get(key, 0.0) + ec2_pricing[instance_type]["monthly"] * desired_size
+            return True
+
+        if resource_type in ("aws_lb", "aws_alb"):
+            if attributes.get("load_balancer_type", "application") == "network":
+                key, price = "Network Load Balancer", self.pricing_data["load_balancer"].get("nlb_monthly", 0.0)
+            else:
+                key, price = "Application Load Balancer", self.pricing_data["load_balancer"]["alb_monthly"]
+            costs[key] = costs.get(key, 0.0) + price
+            return True
+
+        # NAT gateways are priced from the aggregated count
+        return resource_type == "aws_nat_gateway"
+
+def main():
+    """Price the resources recorded in one or more state files"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Price deployed resources from Terraform state")
+    parser.add_argument("state_files", nargs="*", default=["../Terraform/terraform.tfstate.backup"], help="State files to analyze")
+    parser.add_argument("--region", default="eu-west-1", help="AWS region")
+    parser.add_argument("--output", help="Output JSON file")
+
+    args = parser.parse_args()
+
+    try:
+        analyzer = TerraformStateCostAnalyzer(args.region)
+        stacks = []
+
+        for state_file in args.state_files:
+            stack = analyzer.analyze_state_file(state_file)
+            stacks.append(stack)
+
+            print(f"\n📦 {stack.state_file}")
+            print(f"   🔧 Terraform {stack.terraform_version or 'unknown'} (serial {stack.serial})")
+            print(f"   🏗️ {stack.resource_count} resources, {stack.instance_count} instances")
+            print(f"   💰 Deployed Monthly Cost: ${stack.monthly_cost:.2f}")
+            for service, cost in stack.cost_breakdown.items():
+                print(f"     • {service}: ${cost:.2f}")
+            if stack.unpriced_types:
+                print(f"   ℹ️ Not priced: {', '.join(stack.unpriced_types)}")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump([asdict(stack) for stack in stacks], f, indent=2)
+            print(f"\n📄 Results saved to: {args.output}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -6,11 +6,20 @@ Analyzes EKS and ECS environments based on configuration
 
 import json
 import argparse
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from aws_pricing_fetcher import AWSPricingFetcher
+from autoscaling_simulator import AutoscalingSimulator, ecs_policy, eks_policy
+from pricing_table import attach_pricing_table, published_pricing_table
+from analysis_daemon import DEFAULT_ADDRESS, request_daemon
+from load_generator import load_calibration
+from k8s_manifest_analyzer import node_allocatable
+from media_traffic_model import MediaTrafficProfile, simulate_media_traffic, media_transfer_costs
+from profiler import profiled, add_profile_arguments, start_profiling, finish_profiling
 
 @dataclass
 class AnalysisScenario:
@@ -34,15 +43,104 @@ class EnvironmentAnalysis:
     scaling_capacity: Dict[str, Any]
     recommendations: List[str]
 
+def _compare_matrix_cell(config_file: str, region: str, traffic_trace: Optional[str], config: Dict[str, Any],
+                         pricing: Any, scenario_name: str, calibration: Optional[Dict[str, Any]] = None,
+                         media_profile: Optional[MediaTrafficProfile] = None) -> Dict[str, Any]:
+    """Evaluate one scenario x region cell (module level so process pools can pickle it).
+
+    ``pricing`` is the pricing dict, or the path of a packed pricing table in process pools.
+    """
+    analyzer = YAMLBasedAnalyzer.from_config(
+        config_file, config, region, attach_pricing_table(pricing) if isinstance(pricing, str) else pricing,
+        traffic_trace, calibration, media_profile)
+    return analyzer.compare_environments(scenario_name, verbose=False)
+
 class YAMLBasedAnalyzer:
     """Analyzes Terragrunt environments based on YAML configuration"""
 
-    def __init__(self, config_file: str, region: str = "eu-west-1"):
+    ECS_USERS_PER_TASK = 250   # Concurrent users one Fargate task can serve
+    ECS_LCU_MULTIPLIER = 1.5   # Average ALB LCUs, moderate traffic
+    EKS_NODE_TYPE = "t3.medium"
+    EKS_USERS_PER_NODE = 500   # Concurrent users one t3.medium worker node can serve
+    USERS_PER_VCPU: Optional[float] = None  # Measured by a calibration profile; scales ECS_USERS_PER_TASK per task
+    EKS_MAX_NODES = 10         # Cluster autoscaler upper bound
+    EKS_LCU_MULTIPLIER = 2.0   # Average ALB LCUs, higher traffic in K8s
+    MEDIA_SAMPLES = 1_000_000  # Calls simulated per media traffic estimate
+
+    def __init__(self, config_file: str, region: str = "eu-west-1", traffic_trace: Optional[str] = None,
+                 calibration: Optional[str] = None, media_profile: Optional[MediaTrafficProfile] = None):
+        self._setup(config_file, None, region, None, traffic_trace,
+                    load_calibration(calibration) if calibration else None, media_profile)
+
+    @classmethod
+    def from_config(cls, config_file: str, config: Dict[str, Any], region: str = "eu-west-1",
+                    pricing_data: Optional[Dict[str, Any]] = None, traffic_trace: Optional[str] = None,
+                    calibration: Optional[Dict[str, Any]] = None,
+                    media_profile: Optional[MediaTrafficProfile] = None) -> "YAMLBasedAnalyzer":
+        """Analyzer over an already loaded ``config``, calibration profile and (optionally) pricing,
+        e.g. in matrix workers, without re-reading the YAML file"""
+        analyzer = cls.__new__(cls)
+        analyzer._setup(config_file, config, region, pricing_data, traffic_trace, calibration, media_profile)
+        return analyzer
+
+    def _setup(self, config_file: str, config: Optional[Dict[str, Any]], region: str,
+               pricing_data: Optional[Dict[str, Any]], traffic_trace: Optional[str],
+               calibration: Optional[Dict[str, Any]], media_profile: Optional[MediaTrafficProfile]):
+        """The one construction path shared by ``__init__`` and ``from_config``"""
         self.config_file = Path(config_file)
         self.region = region
         self.pricing_fetcher = AWSPricingFetcher(region)
-        self.config = self._load_config()
-        self.pricing_data = None
+        self.config = config if config is not None else self._load_config()
+        self.pricing_data = pricing_data
+        self.traffic_trace = traffic_trace
+        self.region_pricing: Dict[str, Dict[str, Any]] = {}
+        self._apply_calibration(calibration)
+        self.media_profile = media_profile
+        self._media_estimates: Dict[float, Any] = {}
+
+    def _apply_calibration(self, profile: Optional[Dict[str, Any]]):
+        """Replace the assumed users per task / node with a measured ``load_generator.py`` profile.
+
+        The profile's users per vCPU is scaled to each scenario's Fargate task
+        and to the allocatable CPU of the EKS worker node type, so the task and
+        node sizes the profile was written for do not carry over.
+        """
+        self.calibration = profile
+        if profile:
+            self.USERS_PER_VCPU = float(profile["users_per_vcpu"])
+            self.EKS_USERS_PER_NODE = max(1, int(self.USERS_PER_VCPU * node_allocatable(self.EKS_NODE_TYPE)[0]))
+
+    def users_per_task(self, task_vcpus: float) -> int:
+        """Users one Fargate task of ``task_vcpus`` serves (the assumed figure when uncalibrated)"""
+        if self.USERS_PER_VCPU is None:
+            return self.ECS_USERS_PER_TASK
+        return max(1, int(self.USERS_PER_VCPU * task_vcpus))
+
+    @staticmethod
+    def fargate_task_size(scenario: AnalysisScenario) -> Tuple[float, float]:
+        """vCPUs and memory GB of the scenario's Fargate task"""
+        fargate_cpu_units = max(256, int(scenario.cpu_cores * 1024))  # Convert to CPU units
+        fargate_memory_mb = max(512, int(scenario.memory_gb * 1024))  # Convert to MB
+        return fargate_cpu_units / 1024, fargate_memory_mb / 1024
+
+    def media_traffic(self, scenario: AnalysisScenario):
+        """Simulated media traffic of the scenario's users (shared by the ECS and EKS estimates)"""
+        if scenario.expected_users not in self._media_estimates:
+            self._media_estimates[scenario.expected_users] = simulate_media_traffic(
+                self.media_profile, scenario.expected_users, self.MEDIA_SAMPLES)
+        return self._media_estimates[scenario.expected_users]
+
+    def _data_transfer_costs(self, scenario: AnalysisScenario) -> Dict[str, float]:
+        """Data transfer lines of the cost breakdown.
+
+        Without a media traffic profile this is the flat estimate from the
+        scenario bandwidth; with one, the simulated WebRTC egress and inter-AZ
+        bytes priced on the region's data transfer pricing.
+        """
+        if self.media_profile is None:
+            data_transfer_gb = scenario.network_bandwidth_mbps * 0.36 * 730 / 8  # Monthly GB
+            return {"Data Transfer": max(0, (data_transfer_gb - 100) * 0.09)}  # First 100GB free
+        return media_transfer_costs(self.media_traffic(scenario), self.pricing_data["data_transfer"])
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration - use built-in config if YAML file not available"""
@@ -123,49 +221,48 @@ class YAMLBasedAnalyzer:
             peak_load_multiplier=scenario_data['peak_load_multiplier']
         )
 
+    @profiled("cost_estimation", lambda self, scenario: {"scenario": scenario.name, "infrastructure": "ecs"})
     def analyze_ecs_environment(self, scenario: AnalysisScenario) -> EnvironmentAnalysis:
         """Analyze ECS Fargate environment"""
         self._load_pricing_data()
 
         # Calculate Fargate requirements
-        fargate_cpu_units = max(256, int(scenario.cpu_cores * 1024))  # Convert to CPU units
-        fargate_memory_mb = max(512, int(scenario.memory_gb * 1024))  # Convert to MB
-
-        # Adjust to valid Fargate combinations
-        fargate_cpu_vcpus = fargate_cpu_units / 1024
-        fargate_memory_gb = fargate_memory_mb / 1024
+        fargate_cpu_vcpus, fargate_memory_gb = self.fargate_task_size(scenario)
 
         # Calculate number of tasks needed
-        users_per_task = 250  # Assume each task can handle 250 users
+        users_per_task = self.users_per_task(fargate_cpu_vcpus)
         base_tasks = max(2, int(scenario.expected_users / users_per_task))
         peak_tasks = int(base_tasks * scenario.peak_load_multiplier)
 
         # Cost calculations
         fargate_pricing = self.pricing_data["fargate"]
 
-        # Base cost (average between base and peak)
-        avg_tasks = (base_tasks + peak_tasks) / 2
+        # Base cost (average between base and peak, or replayed from a traffic trace)
+        simulation = None
+        if self.traffic_trace:
+            policy = ecs_policy(self.pricing_data, fargate_cpu_vcpus, fargate_memory_gb, users_per_task,
+                                min_units=2, max_units=max(2, peak_tasks))
+            simulation = AutoscalingSimulator(policy).run_file(self.traffic_trace)
+            avg_tasks = simulation.average_units
+        else:
+            avg_tasks = (base_tasks + peak_tasks) / 2
         cpu_cost = fargate_cpu_vcpus * fargate_pricing["cpu_monthly_per_vcpu"] * avg_tasks
         memory_cost = fargate_memory_gb * fargate_pricing["memory_monthly_per_gb"] * avg_tasks
 
         # Load Balancer
         alb_cost = self.pricing_data["load_balancer"]["alb_monthly"]
-        alb_lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * 1.5  # Moderate traffic
+        alb_lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * self.ECS_LCU_MULTIPLIER
 
         # Storage (EFS or EBS for logs)
         storage_cost = scenario.storage_gb * 0.08  # GP3 pricing
 
-        # Data transfer
-        data_transfer_gb = scenario.network_bandwidth_mbps * 0.36 * 730 / 8  # Monthly GB
-        data_transfer_cost = max(0, (data_transfer_gb - 100) * 0.09)  # First 100GB free
-
         cost_breakdown = {
             "Fargate CPU": cpu_cost,
             "Fargate Memory": memory_cost,
             "Application Load Balancer": alb_cost,
             "ALB Load Balancer Units": alb_lcu_cost,
             "Storage (EBS/EFS)": storage_cost,
-            "Data Transfer": data_transfer_cost,
+            **self._data_transfer_costs(scenario),
         }
 
         total_cost = sum(cost_breakdown.values())
@@ -186,6 +283,8 @@ class YAMLBasedAnalyzer:
             "scale_up_time": "2-3 minutes",
             "scale_down_time": "5-10 minutes"
         }
+        if simulation:
+            scaling_capacity["trace_simulation"] = asdict(simulation)
 
         # Recommendations
         recommendations = [
@@ -208,6 +307,7 @@ class YAMLBasedAnalyzer:
             recommendations=recommendations
         )
 
+    @profiled("cost_estimation", lambda self, scenario: {"scenario": scenario.name, "infrastructure": "eks"})
     def analyze_eks_environment(self, scenario: AnalysisScenario) -> EnvironmentAnalysis:
         """Analyze EKS environment"""
         self._load_pricing_data()
@@ -215,17 +315,24 @@ class YAMLBasedAnalyzer:
         # EKS Cluster cost
         eks_cluster_cost = self.pricing_data["eks"]["cluster_monthly"]
 
-        # Calculate node requirements
+        # Calculate node requirements (EKS_NODE_TYPE)
         cpu_per_node = 2  # t3.medium has 2 vCPUs
         memory_per_node = 4  # t3.medium has 4GB RAM
 
         nodes_for_cpu = max(2, int(scenario.cpu_cores / cpu_per_node))
         nodes_for_memory = max(2, int(scenario.memory_gb / memory_per_node))
-        base_nodes = max(nodes_for_cpu, nodes_for_memory)
+        nodes_for_users = -(-scenario.expected_users // self.EKS_USERS_PER_NODE)
+        base_nodes = max(nodes_for_cpu, nodes_for_memory, nodes_for_users)
 
         # Peak scaling (consider peak load)
-        peak_nodes = min(10, int(base_nodes * scenario.peak_load_multiplier))
-        avg_nodes = (base_nodes + peak_nodes) / 2
+        peak_nodes = min(self.EKS_MAX_NODES, int(base_nodes * scenario.peak_load_multiplier))
+        simulation = None
+        if self.traffic_trace:
+            policy = eks_policy(self.pricing_data, self.EKS_NODE_TYPE, self.EKS_USERS_PER_NODE, min_units=2, max_units=max(2, peak_nodes))
+            simulation = AutoscalingSimulator(policy).run_file(self.traffic_trace)
+            avg_nodes = simulation.average_units
+        else:
+            avg_nodes = (base_nodes + peak_nodes) / 2
 
         # Worker node costs (t3.medium)
         ec2_pricing = self.pricing_data["ec2"]
@@ -234,7 +341,7 @@ class YAMLBasedAnalyzer:
 
         # Load Balancer (shared with multiple services)
         alb_cost = self.pricing_data["load_balancer"]["alb_monthly"]
-        alb_lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * 2  # Higher traffic in K8s
+        alb_lcu_cost = self.pricing_data["load_balancer"]["lcu_monthly"] * self.EKS_LCU_MULTIPLIER
 
         # Storage (EBS for nodes + persistent volumes)
         node_storage = 20 * avg_nodes  # 20GB per node
@@ -245,10 +352,6 @@ class YAMLBasedAnalyzer:
         # Additional networking costs
         networking_cost = avg_nodes * 5  # NAT Gateway and VPC costs per node
 
-        # Data transfer
-        data_transfer_gb = scenario.network_bandwidth_mbps * 0.36 * 730 / 8
-        data_transfer_cost = max(0, (data_transfer_gb - 100) * 0.09)
-
         cost_breakdown = {
             "EKS Cluster Management": eks_cluster_cost,
             f"Worker Nodes ({avg_nodes:.1f}x t3.medium)": worker_nodes_cost,
@@ -256,7 +359,7 @@ class YAMLBasedAnalyzer:
             "ALB Load Balancer Units": alb_lcu_cost,
             "Storage (EBS)": storage_cost,
             "Networking": networking_cost,
-            "Data Transfer": data_transfer_cost,
+            **self._data_transfer_costs(scenario),
         }
 
         total_cost = sum(cost_breakdown.values())
@@ -278,11 +381,13 @@ class YAMLBasedAnalyzer:
             "scale_down_time": "10-15 minutes",
             "pod_scaling": "30-60 seconds"
         }
+        if simulation:
+            scaling_capacity["trace_simulation"] = asdict(simulation)
 
         # Recommendations
         recommendations = [
             "Use Kubernetes Horizontal Pod Autoscaler (HPA) for automatic scaling",
-            f"Current configuration supports {base_nodes * 500} to {peak_nodes * 500} concurrent users",
+            f"Current configuration supports {base_nodes * self.EKS_USERS_PER_NODE} to {peak_nodes * self.EKS_USERS_PER_NODE} concurrent users",
             "Consider using Spot instances for worker nodes to reduce costs by 60-90%",
             "Implement Cluster Autoscaler for automatic node scaling",
             "Use Kubernetes resource quotas to prevent resource exhaustion"
@@ -304,12 +409,13 @@ class YAMLBasedAnalyzer:
             recommendations=recommendations
         )
 
-    def compare_environments(self, scenario_name: str) -> Dict[str, Any]:
+    def compare_environments(self, scenario_name: str, verbose: bool = True) -> Dict[str, Any]:
         """Compare EKS vs ECS environments for a given scenario"""
         scenario = self.get_scenario(scenario_name)
 
-        print(f"🔍 Analyzing scenario: {scenario_name}")
-        print(f"📊 Requirements: {scenario.expected_users} users, {scenario.cpu_cores} CPU, {scenario.memory_gb}GB RAM")
+        if verbose:
+            print(f"🔍 Analyzing scenario: {scenario_name}")
+            print(f"📊 Requirements: {scenario.expected_users} users, {scenario.cpu_cores} CPU, {scenario.memory_gb}GB RAM")
 
         # Analyze both environments
         ecs_analysis = self.analyze_ecs_environment(scenario)
@@ -360,10 +466,83 @@ class YAMLBasedAnalyzer:
                 "recommended": recommended,
                 "recommendation_reason": self._get_recommendation_reason(ecs_analysis, eks_analysis, scenario)
             },
+            "capacity": {
+                "users_per_task": self.users_per_task(self.fargate_task_size(scenario)[0]),
+                "users_per_node": self.EKS_USERS_PER_NODE,
+                "users_per_vcpu": self.USERS_PER_VCPU,
+                "calibrated": self.calibration is not None
+            },
+            "media_traffic": asdict(self.media_traffic(scenario)) if self.media_profile else None,
             "analysis_timestamp": datetime.now().isoformat(),
             "region": self.region
         }
 
+    def load_region_pricing(self, regions: List[str], max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Fetch pricing for each region once, concurrently, and keep it for later matrix runs"""
+        missing = [region for region in regions if region not in self.region_pricing]
+        if self.pricing_data and self.region in missing:
+            self.region_pricing[self.region] = self.pricing_data
+            missing.remove(self.region)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max_workers or len(missing)) as executor:
+                fetched = executor.map(lambda region: AWSPricingFetcher(region).fetch_all_pricing(), missing)
+                self.region_pricing.update(zip(missing, fetched))
+
+        return {region: self.region_pricing[region] for region in regions}
+
+    def compare_matrix(self, regions: Optional[List[str]] = None, scenario_names: Optional[List[str]] = None,
+                       max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Compare EKS vs ECS for every scenario in every region in one run.
+
+        Pricing is loaded once per region and shared by all of that region's
+        cells. Cells run on threads; with a traffic trace each cell replays the
+        whole trace, which is CPU-bound, so a process pool is used instead.
+        """
+        regions = regions or [self.region]
+        scenario_names = scenario_names or list(self.config['scenarios'])
+        pricing = self.load_region_pricing(regions, max_workers)
+
+        print(f"🔍 Analyzing {len(scenario_names)} scenarios x {len(regions)} regions")
+
+        cells = [(scenario_name, region) for scenario_name in scenario_names for region in regions]
+        with ExitStack() as stack:
+            if self.traffic_trace:
+                # Process workers attach to one packed table per region instead of unpickling the dicts per cell
+                pricing = {region: stack.enter_context(published_pricing_table(pricing[region])) for region in regions}
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+            else:
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+            futures = [
+                executor.submit(_compare_matrix_cell, str(self.config_file), region, self.traffic_trace,
+                                self.config, pricing[region], scenario_name, self.calibration,
+                                self.media_profile)
+                for scenario_name, region in cells
+            ]
+            results = [future.result() for future in futures]
+
+        rows = []
+        for result in results:
+            comparison = result["comparison"]
+            rows.append({
+                "scenario": result["scenario"]["name"],
+                "region": result["region"],
+                "expected_users": result["scenario"]["expected_users"],
+                "ecs_monthly_cost": result["ecs_analysis"]["monthly_cost"],
+                "eks_monthly_cost": result["eks_analysis"]["monthly_cost"],
+                "cost_difference_usd": comparison["cost_difference_usd"],
+                "cheaper_option": comparison["cheaper_option"],
+                "recommended": comparison["recommended"]
+            })
+
+        return {
+            "regions": regions,
+            "scenarios": scenario_names,
+            "matrix": rows,
+            "results": results,
+            "analysis_timestamp": datetime.now().isoformat()
+        }
+
     def _get_recommendation_reason(self, ecs_analysis, eks_analysis, scenario) -> str:
         """Generate recommendation reasoning"""
         cost_diff = abs(ecs_analysis.monthly_cost - eks_analysis.monthly_cost)
@@ -381,6 +560,12 @@ class YAMLBasedAnalyzer:
             else:
                 return f"EKS provides enterprise features worth the additional ${cost_diff:.0f}/month"
 
+def media_traffic_profile(profile_file: Optional[str]) -> Optional[MediaTrafficProfile]:
+    """``--media-traffic`` value to a profile: None when off, the defaults when given without a file"""
+    if profile_file is None:
+        return None
+    return MediaTrafficProfile.load(profile_file) if profile_file else MediaTrafficProfile()
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description="YAML-based Terragrunt Infrastructure Analyzer")
@@ -389,16 +574,49 @@ def main():
     parser.add_argument("--region", default="eu-west-1", help="AWS region")
     parser.add_argument("--output", help="Output JSON file")
     parser.add_argument("--format", choices=["json", "summary"], default="summary", help="Output format")
+    parser.add_argument("--trace", help="CSV/NDJSON trace of concurrent users per minute for autoscaling simulation")
+    parser.add_argument("--calibration", help="Users per task / node measured by load_generator.py")
+    parser.add_argument("--media-traffic", nargs="?", const="", metavar="PROFILE",
+                        help="Price data transfer from simulated video calls (optional JSON profile of call parameters)")
+    parser.add_argument("--matrix", action="store_true", help="Compare every configured scenario in every region of --regions")
+    parser.add_argument("--regions", nargs="+", help="Regions for --matrix (default: --region)")
+    parser.add_argument("--workers", type=int, help="Parallel workers for --matrix")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, help=f"Hand off to a running analysis daemon (default: {DEFAULT_ADDRESS})")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args)
 
     try:
-        analyzer = YAMLBasedAnalyzer(args.config, args.region)
-        result = analyzer.compare_environments(args.scenario)
+        payload = {"region": args.region, "config": str(Path(args.config).resolve()),
+                   "trace": str(Path(args.trace).resolve()) if args.trace else None,
+                   "calibration": str(Path(args.calibration).resolve()) if args.calibration else None,
+                   "media_traffic": str(Path(args.media_traffic).resolve()) if args.media_traffic else args.media_traffic}
+        if args.matrix:
+            result = request_daemon(args.daemon, "/sweep", dict(payload, regions=args.regions, workers=args.workers))
+        else:
+            result = request_daemon(args.daemon, "/compare", dict(payload, scenario=args.scenario))
+
+        if result is None:
+            analyzer = YAMLBasedAnalyzer(args.config, args.region, args.trace, args.calibration,
+                                         media_traffic_profile(args.media_traffic))
+            if args.matrix:
+                result = analyzer.compare_matrix(args.regions or [args.region], max_workers=args.workers)
+            else:
+                result = analyzer.compare_environments(args.scenario)
 
         if args.format == "json":
             output = json.dumps(result, indent=2)
             print(output)
+        elif args.matrix:
+            print(f"\n🎯 Scenario x Region Matrix")
+            print(f"=" * 78)
+            print(f"{'Scenario':<12} {'Region':<16} {'Users':>6} {'ECS $/mo':>10} {'EKS $/mo':>10} {'Cheaper':>8} {'Recommended':>12}")
+            print(f"-" * 78)
+            for row in result["matrix"]:
+                print(f"{row['scenario']:<12} {row['region']:<16} {row['expected_users']:>6} "
+                      f"{row['ecs_monthly_cost']:>10.2f} {row['eks_monthly_cost']:>10.2f} "
+                      f"{row['cheaper_option']:>8} {row['recommended']:>12}")
         else:
             # Summary format
             scenario = result["scenario"]
@@ -412,6 +630,9 @@ def main():
             print(f"👥 Users: {scenario['expected_users']}")
             print(f"🖥️ Resources: {scenario['cpu_cores']} CPU, {scenario['memory_gb']}GB RAM")
             print(f"🌍 Region: {result['region']}")
+            capacity = result["capacity"]
+            print(f"📏 Capacity: {capacity['users_per_task']} users/task, {capacity['users_per_node']} users/node "
+                  f"({'calibrated' if capacity['calibrated'] else 'assumed'})")
 
             print(f"\n💰 Cost Comparison")
             print(f"-" * 30)
@@ -419,6 +640,10 @@ def main():
             print(f"EKS Kubernetes: ${eks['monthly_cost']:.2f}/month")
             print(f"Difference:     ${comparison['cost_difference_usd']:.2f} ({comparison['cost_difference_percentage']:.1f}%)")
             print(f"Cheaper option: {comparison['cheaper_option']}")
+            media = result["media_traffic"]
+            if media:
+                print(f"Media traffic:  {media['egress_gb']:,.0f} GB egress, {media['inter_az_gb']:,.0f} GB inter-AZ "
+                      f"({media['calls_per_month']:,.0f} calls/month)")
 
             print(f"\n🏆 Recommendation: {comparison['recommended']}")
             print(f"Reason: {comparison['recommendation_reason']}")
@@ -440,6 +665,8 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        finish_profiling(args)
 
     return 0
 